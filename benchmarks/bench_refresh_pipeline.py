@@ -0,0 +1,294 @@
+"""
+Refresh Pipeline Benchmark
+วัดเวลา verify_files / create_backups / auto_cleanup_backups / refresh_multiple_files
+บนชุดไฟล์จำลองด้วย SimulatedBackend แล้วรายงานผลเป็น JSON
+และเทียบกับแบบ pipeline ของ run_auto_refresh (ตรวจ/สำรองไฟล์ถัดไประหว่างรีเฟช, ลบไฟล์สำรองเก่าเบื้องหลัง)
+
+ตัวอย่าง:
+    python benchmarks/bench_refresh_pipeline.py --sizes 10,100,1000 --output bench.json
+    python benchmarks/bench_refresh_pipeline.py --sizes 100 --save-baseline benchmarks/baselines/local.json
+    python benchmarks/bench_refresh_pipeline.py --sizes 100 --baseline benchmarks/baselines/local.json
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_fleet import generate_fleet  # noqa: E402
+from src.main import PowerQueryRefreshApp  # noqa: E402
+from src.core.file_manager import FileManager  # noqa: E402
+from src.core.workbook_inspector import WorkbookInspector  # noqa: E402
+from src.refreshers.excel_refresher import ExcelRefresher  # noqa: E402
+from src.refreshers.backends import SimulatedBackend  # noqa: E402
+from src.refreshers.parallel_refresher import create_simulated_refresher  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    ดึง peak RSS ของ process ปัจจุบัน
+
+    Returns:
+        Optional[float]: peak RSS (MB) หรือ None หากวัดไม่ได้
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux รายงานเป็น KB, macOS รายงานเป็น bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    return None
+
+
+def _timed(phases: Dict[str, Any], name: str, items: int, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    phases[name] = {
+        "seconds": round(seconds, 4),
+        "items_per_second": round(items / seconds, 2) if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return result
+
+
+def write_config(work_dir: str, files: List[Dict[str, Any]], settings: Dict[str, Any]) -> str:
+    """
+    เขียนไฟล์ config ของรอบวัดลงใน work_dir โดยให้ทุกไฟล์ที่แอปเขียน (log, ประวัติ, journal,
+    cache ของการตรวจไฟล์, fingerprint, ไฟล์สำรอง) อยู่ใน work_dir ตั้งแต่ตอนสร้าง PowerQueryRefreshApp
+
+    Args:
+        work_dir (str): โฟลเดอร์ทำงานของ benchmark
+        files (List[Dict[str, Any]]): รายการไฟล์จำลอง
+        settings (Dict[str, Any]): การตั้งค่าของรอบวัด (ทับค่าโฟลเดอร์ด้านล่างได้)
+
+    Returns:
+        str: เส้นทางไฟล์ config
+    """
+    config = {
+        "excel_files": files,
+        "settings": {
+            "log_dir": os.path.join(work_dir, "logs"),
+            "backup_dir": os.path.join(work_dir, "backups"),
+            "run_history_db": os.path.join(work_dir, "run_history.db"),
+            "run_journal_dir": os.path.join(work_dir, "journal"),
+            "inspection_cache_path": os.path.join(work_dir, "inspection_cache.json"),
+            "fingerprint_state_path": os.path.join(work_dir, "source_fingerprints.json"),
+            **settings,
+        },
+    }
+    config_path = os.path.join(work_dir, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config_path
+
+
+def run_fleet(fleet_size: int, work_dir: str, profile: Dict[str, Any], workers: int,
+              seed: int, max_connections: int, max_rows: int) -> Dict[str, Any]:
+    """
+    รัน pipeline หนึ่งรอบบนชุดไฟล์ขนาด fleet_size
+
+    Returns:
+        Dict[str, Any]: ผลการวัดของรอบนี้
+    """
+    fleet_dir = os.path.join(work_dir, f"fleet_{fleet_size}_{seed}")
+    backup_dir = os.path.join(work_dir, f"backups_{fleet_size}")
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+    generate_start = time.perf_counter()
+    files = generate_fleet(fleet_dir, fleet_size, seed=seed, max_connections=max_connections,
+                           max_rows=max_rows, backup_dir=backup_dir)
+    generate_seconds = time.perf_counter() - generate_start
+
+    app = PowerQueryRefreshApp(write_config(work_dir, files, {
+        "auto_save": True,
+        "backup_before_refresh": False,
+        "backup_dir": backup_dir,
+        "refresh_timeout_minutes": 1,
+        "reuse_excel_app": True,
+        "excel_recycle_after": 0,
+        "max_workers": workers,
+    }))
+    app.logger_manager.logger.setLevel(logging.WARNING)
+    backend = SimulatedBackend(profile)
+    app.excel_refresher = ExcelRefresher(app.logger_manager, app.file_manager, backend=backend)
+    app.refresher_factory = functools.partial(create_simulated_refresher, profile)
+
+    phases: Dict[str, Any] = {}
+    wall_start = time.perf_counter()
+    _timed(phases, "verify_files", fleet_size, app.verify_files)
+    _timed(phases, "create_backups", fleet_size, app.create_backups)
+    _timed(phases, "auto_cleanup_backups", fleet_size, app.auto_cleanup_backups)
+    first_refresh_seconds = time.perf_counter() - wall_start
+    refresh_result = _timed(phases, "refresh_multiple_files", fleet_size,
+                            lambda: app._refresh_excel_files(files))
+    wall_seconds = time.perf_counter() - wall_start
+
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    app.file_manager = FileManager(backup_dir)
+    app.excel_refresher.file_manager = app.file_manager
+    pipelined = run_pipelined(app, files)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+    return {
+        "fleet_size": fleet_size,
+        "fleet_generate_seconds": round(generate_seconds, 4),
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_files_per_second": round(fleet_size / wall_seconds, 2) if wall_seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "refresh_result": {k: refresh_result[k] for k in ("success", "failed", "total")},
+        "phases": phases,
+        "first_refresh_seconds": round(first_refresh_seconds, 4),
+        "pipelined": pipelined,
+    }
+
+
+def run_pipelined(app: PowerQueryRefreshApp, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    รันแบบเดียวกับ run_auto_refresh (ไม่พิมพ์สรุป) และวัดเวลาจนไฟล์แรกพร้อมรีเฟช
+
+    Returns:
+        Dict[str, Any]: {"wall_seconds", "first_refresh_seconds", "refresh_result"}
+    """
+    settings = app.config_manager.settings
+    inspector = WorkbookInspector(None, settings.get("verify_workers", 8))
+    ready_times: List[float] = []
+
+    def prepare(file_info: Dict[str, Any]) -> Dict[str, Any]:
+        prepared = app._prepare_file(file_info, inspector)
+        ready_times.append(time.perf_counter())
+        return prepared
+
+    wall_start = time.perf_counter()
+    cleanup_future = app.start_backup_cleanup()
+    result = app._refresh_excel_files(files, prepare=prepare)
+    cleanup_future.result()
+    wall_seconds = time.perf_counter() - wall_start
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "first_refresh_seconds": round(min(ready_times) - wall_start, 4) if ready_times else None,
+        "refresh_result": {k: result[k] for k in ("success", "failed", "total")},
+    }
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float) -> List[str]:
+    """
+    เปรียบเทียบเวลาแต่ละ phase กับ baseline
+
+    Args:
+        report (Dict[str, Any]): ผลการวัดรอบนี้
+        baseline (Dict[str, Any]): ผลการวัดที่เก็บไว้
+        tolerance (float): สัดส่วนที่ยอมให้ช้าลงได้ (0.2 = 20%)
+
+    Returns:
+        List[str]: รายการ regression ที่พบ
+    """
+    regressions = []
+    baseline_runs = {run["fleet_size"]: run for run in baseline.get("results", [])}
+    for run in report["results"]:
+        base = baseline_runs.get(run["fleet_size"])
+        if not base:
+            continue
+        for phase, stats in run["phases"].items():
+            base_stats = base["phases"].get(phase)
+            if not base_stats or not base_stats["seconds"]:
+                continue
+            ratio = stats["seconds"] / base_stats["seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{phase} @ {run['fleet_size']} files: {base_stats['seconds']:.3f}s -> "
+                    f"{stats['seconds']:.3f}s (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark refresh pipeline บนชุดไฟล์จำลอง")
+    parser.add_argument("--sizes", default="10,100,1000",
+                        help="ขนาดชุดไฟล์คั่นด้วย comma (10 ถึง 5000)")
+    parser.add_argument("--workers", type=int, default=1, help="จำนวน worker สำหรับรีเฟช")
+    parser.add_argument("--time-scale", type=float, default=0.0005,
+                        help="ตัวคูณเวลาของ SimulatedBackend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-connections", type=int, default=8)
+    parser.add_argument("--max-rows", type=int, default=2000)
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "pq_refresh_bench"),
+                        help="โฟลเดอร์สำหรับชุดไฟล์จำลอง (ใช้ซ้ำได้ระหว่างรอบ)")
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON")
+    parser.add_argument("--save-baseline", help="บันทึกผลเป็น baseline")
+    parser.add_argument("--baseline", help="เปรียบเทียบกับ baseline ที่บันทึกไว้")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="สัดส่วนที่ยอมให้ช้ากว่า baseline ได้")
+    args = parser.parse_args(argv)
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    profile = {
+        "seed": args.seed,
+        "time_scale": args.time_scale,
+        "connection_seconds": [1.0, 30.0],
+    }
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workers": args.workers,
+            "profile": profile,
+        },
+        "results": [],
+    }
+    for size in sizes:
+        report["results"].append(
+            run_fleet(size, args.work_dir, profile, args.workers, args.seed,
+                      args.max_connections, args.max_rows)
+        )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    for target in (args.output, args.save_baseline):
+        if target:
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\nพบ regression:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print("\nไม่พบ regression เทียบกับ baseline", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
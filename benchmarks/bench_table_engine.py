@@ -0,0 +1,122 @@
+"""
+Table Engine Benchmark
+เปรียบเทียบเวลาประมวลผล query M ระหว่างฟังก์ชัน Table.* แบบทีละแถว (row list)
+กับแบบ columnar บน NumPy โดยใช้ข้อมูลสังเคราะห์ (ไม่ต้องมีไฟล์ Excel)
+
+ตัวอย่าง:
+    python benchmarks/bench_table_engine.py --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.powerquery.m_evaluator import Environment, Evaluator, force  # noqa: E402
+from src.powerquery.m_library import standard_library  # noqa: E402
+from src.powerquery.m_parser import parse_expression  # noqa: E402
+from src.powerquery.m_table import Table  # noqa: E402
+
+# ขั้นตอนของ query ตามลำดับ (ชื่อ step, expression)
+STEPS = [
+    ("Typed", 'Table.TransformColumnTypes(Source, {{"id", Int64.Type}, {"amount", type number}})'),
+    ("Filtered", 'Table.SelectRows(Typed, each [amount] > 100 and [category] <> "c03")'),
+    ("Added", 'Table.AddColumn(Filtered, "net", each if [amount] > 500 then [amount] * 0.9 else [amount])'),
+    ("Joined", 'Table.NestedJoin(Added, {"category"}, Lookup, {"category"}, "L", JoinKind.LeftOuter)'),
+    ("Expanded", 'Table.ExpandTableColumn(Joined, "L", {"region"}, {"region"})'),
+    ("Grouped", 'Table.Group(Expanded, {"region", "category"}, '
+                '{{"total", each List.Sum([net])}, {"largest", each List.Max([net])}, '
+                '{"rows", each Table.RowCount(_)}})'),
+]
+
+
+def make_tables(rows: int, seed: int) -> Tuple[Table, Table]:
+    """
+    สร้างตารางยอดขายและตาราง lookup ของ category
+
+    Returns:
+        Tuple[Table, Table]: (Source, Lookup)
+    """
+    rng = random.Random(seed)
+    categories = [f"c{i:02d}" for i in range(40)]
+    source = Table(
+        ["id", "category", "amount", "note"],
+        [
+            [str(i), rng.choice(categories), f"{rng.uniform(0, 1000):.2f}", None if i % 7 else "promo"]
+            for i in range(rows)
+        ],
+    )
+    lookup = Table(
+        ["category", "region"],
+        [[category, f"r{i % 6}"] for i, category in enumerate(categories) if i % 10 != 9],
+    )
+    return source, lookup
+
+
+def run_query(columnar: bool, source: Table, lookup: Table) -> Tuple[Table, Dict[str, float]]:
+    """
+    ประมวลผลทุก step และจับเวลาแยกตาม step
+
+    Returns:
+        Tuple[Table, Dict[str, float]]: (ผลลัพธ์, วินาทีของแต่ละ step)
+    """
+    evaluator = Evaluator(standard_library(columnar=columnar))
+    env = Environment({"Source": source, "Lookup": lookup})
+    seconds = {}
+    value: Any = None
+    for name, text in STEPS:
+        node = parse_expression(text)
+        start = time.perf_counter()
+        value = force(evaluator.evaluate(node, env))
+        # วัดรวมเวลาแปลงกลับเป็นแถวเฉพาะ step สุดท้าย (เหมือนตอนเขียนลง sheet)
+        if name == STEPS[-1][0]:
+            value.rows
+        seconds[name] = time.perf_counter() - start
+        env.values[name] = value
+    return value, seconds
+
+
+def normalized(table: Table) -> List[List[Any]]:
+    return sorted(
+        [[round(v, 6) if isinstance(v, float) else v for v in row] for row in table.rows],
+        key=repr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="เปรียบเทียบ Table.* แบบทีละแถวกับแบบ columnar")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-rows-engine", action="store_true", help="วัดเฉพาะแบบ columnar")
+    args = parser.parse_args(argv)
+
+    source, lookup = make_tables(args.rows, args.seed)
+    columnar_result, columnar_seconds = run_query(True, source, lookup)
+    report: Dict[str, Any] = {
+        "rows": args.rows,
+        "columnar_seconds": {k: round(v, 3) for k, v in columnar_seconds.items()},
+        "columnar_total_seconds": round(sum(columnar_seconds.values()), 3),
+    }
+
+    if not args.skip_rows_engine:
+        row_result, row_seconds = run_query(False, source, lookup)
+        report["row_seconds"] = {k: round(v, 3) for k, v in row_seconds.items()}
+        report["row_total_seconds"] = round(sum(row_seconds.values()), 3)
+        report["speedup"] = round(report["row_total_seconds"] / max(report["columnar_total_seconds"], 1e-9), 1)
+        report["results_match"] = (
+            row_result.columns == columnar_result.columns
+            and normalized(row_result) == normalized(columnar_result)
+        )
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+XLSX Reader Benchmark
+วัด throughput (แถว/วินาที) และหน่วยความจำสูงสุดของการอ่าน sheet แบบ streaming
+เทียบกับการโหลด XML ของ sheet ทั้งไฟล์ (ElementTree.fromstring) โดยใช้ไฟล์ xlsx สังเคราะห์
+
+ตัวอย่าง:
+    python benchmarks/bench_xlsx_reader.py --rows 1000000 --columns 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.powerquery.workbook_parts import NS_MAIN  # noqa: E402
+from src.powerquery.xlsx_reader import (  # noqa: E402
+    WorkbookReader, cell_value, column_letter, read_date_styles, read_shared_strings, split_cell_ref
+)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Raw" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '<Relationship Id="rId2" Target="sharedStrings.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/>'
+    '<Relationship Id="rId3" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<cellXfs count="2"><xf numFmtId="0"/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+
+def make_workbook(path: str, rows: int, columns: int, seed: int) -> None:
+    """
+    สร้างไฟล์ xlsx ที่มี sheet เดียว (ข้อความ, ตัวเลข และวันที่สลับกันตามคอลัมน์) โดยเขียนแบบ streaming
+    """
+    rng = random.Random(seed)
+    strings = [f"item-{i:05d}" for i in range(5000)]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+        archive.writestr("xl/sharedStrings.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<sst xmlns="{NS_MAIN}" count="{len(strings)}" uniqueCount="{len(strings)}">'
+            + "".join(f"<si><t>{text}</t></si>" for text in strings)
+            + "</sst>"
+        ))
+        letters = [column_letter(c) for c in range(1, columns + 1)]
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet xmlns="{NS_MAIN}">'
+                f'<dimension ref="A1:{letters[-1]}{rows + 1}"/><sheetData>'.encode()
+            )
+            sheet.write(("<row r=\"1\">" + "".join(
+                f'<c r="{letter}1" t="inlineStr"><is><t>col{i}</t></is></c>' for i, letter in enumerate(letters)
+            ) + "</row>").encode())
+            chunk: List[str] = []
+            for r in range(2, rows + 2):
+                cells = []
+                for i, letter in enumerate(letters):
+                    kind = i % 3
+                    if kind == 0:
+                        cells.append(f'<c r="{letter}{r}" t="s"><v>{rng.randrange(len(strings))}</v></c>')
+                    elif kind == 1:
+                        cells.append(f'<c r="{letter}{r}"><v>{rng.uniform(0, 10000):.2f}</v></c>')
+                    else:
+                        cells.append(f'<c r="{letter}{r}" s="1"><v>{rng.randint(43000, 46000)}</v></c>')
+                chunk.append(f'<row r="{r}">{"".join(cells)}</row>')
+                if len(chunk) >= 10_000:
+                    sheet.write("".join(chunk).encode())
+                    chunk = []
+            sheet.write(("".join(chunk) + "</sheetData></worksheet>").encode())
+
+
+def read_whole_sheet(path: str) -> int:
+    """วิธีเดิม: โหลด XML ทั้ง sheet เป็น DOM แล้วแปลงทุก cell"""
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = read_shared_strings(archive)
+        date_styles = read_date_styles(archive)
+        root = ET.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    cells: Dict[Tuple[int, int], Any] = {}
+    for row in root.iter(f"{{{NS_MAIN}}}row"):
+        for cell in row.findall(f"{{{NS_MAIN}}}c"):
+            value = cell_value(cell, shared_strings, date_styles)
+            if value is not None:
+                cells[split_cell_ref(cell.get("r"))] = value
+    return len({row for _, row in cells})
+
+
+def read_streaming(path: str, batch_rows: int) -> int:
+    """อ่านเป็นชุดด้วย WorkbookReader.iter_batches (ไม่เก็บแถวที่อ่านแล้ว)"""
+    count = 0
+    for batch in WorkbookReader(path).iter_batches("Raw", batch_rows):
+        count += len(batch)
+    return count
+
+
+def measure(function: Callable[[], int]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    rows = function()
+    seconds = time.perf_counter() - start
+
+    # รอบที่สองวัดหน่วยความจำ (tracemalloc ทำให้ช้าลง จึงแยกจากการจับเวลา)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "peak_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="วัด throughput และหน่วยความจำของตัวอ่าน xlsx")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-whole-sheet", action="store_true", help="วัดเฉพาะแบบ streaming")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "raw.xlsx")
+        make_workbook(path, args.rows, args.columns, args.seed)
+        report: Dict[str, Any] = {
+            "rows": args.rows,
+            "columns": args.columns,
+            "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+            "streaming": measure(lambda: read_streaming(path, args.batch_rows)),
+        }
+        if not args.skip_whole_sheet:
+            report["whole_sheet"] = measure(lambda: read_whole_sheet(path))
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Failure Policy Check
+ตรวจ classify_error, backoff_delay และ CircuitBreakers แบบ deterministic (นาฬิกาและตัวสุ่มที่กำหนดเอง)
+แล้วรันชุดไฟล์จำลองผ่าน _refresh_excel_files: แหล่งข้อมูลล่มหนึ่งแหล่งกับปัญหาชั่วคราวหนึ่งไฟล์
+และการลองแบบ half-open ที่ล้มเหลวแบบถาวร
+รายงานผลเป็น JSON และคืน exit code 1 หากมีข้อใดไม่ผ่าน
+
+ตัวอย่าง:
+    python benchmarks/check_failure_policy.py
+    python benchmarks/check_failure_policy.py --work-dir /tmp/pq_failure_policy --output check.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Any, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.bench_refresh_pipeline import write_config  # noqa: E402
+from benchmarks.synthetic_fleet import generate_fleet  # noqa: E402
+from src.main import PowerQueryRefreshApp  # noqa: E402
+from src.core.failure_policy import PERMANENT, TIMEOUT, TRANSIENT, CircuitBreakers, backoff_delay, \
+    classify_error  # noqa: E402
+from src.refreshers.parallel_refresher import create_simulated_refresher  # noqa: E402
+
+# ข้อความ error → ประเภทที่คาดไว้ (ข้อความที่ตรงทั้งสองแบบต้องเป็นแบบถาวร เพราะตรวจแบบถาวรก่อน)
+CLASSIFY_CASES = [
+    ("DataSource.Error: Service Unavailable", TRANSIENT),
+    ("DataSource.Error: แหล่งข้อมูลไม่พร้อมใช้งาน (unavailable)", PERMANENT),
+    ("DataSource.Error: Login failed for user 'etl' (timeout)", PERMANENT),
+    ("รีเฟชเกินเวลาสูงสุด 120 วินาที", TIMEOUT),
+    ("การรีเฟชใช้เวลานานเกิน 600 วินาที (ค้าง: query)", TIMEOUT),
+    ("ไม่ได้รับ heartbeat นาน 30 วินาที", TIMEOUT),
+    ("DataSource.Error: Timeout expired", TIMEOUT),
+    ("worker หยุดทำงาน (exit code -9)", TRANSIENT),
+    ("Expression.Error: The column 'x' of the table wasn't found", PERMANENT),
+    ("something unexpected", PERMANENT),
+    ("", PERMANENT),
+    (None, PERMANENT),
+]
+
+
+class FakeClock:
+    """นาฬิกาที่เดินเมื่อสั่งเท่านั้น"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class UpperBoundRandom:
+    """ตัวสุ่มที่คืนขอบบนของช่วงเสมอ (ใช้ตรวจเพดานของ backoff)"""
+
+    def uniform(self, low: float, high: float) -> float:
+        return high
+
+
+def _check(checks: List[Dict[str, Any]], name: str, passed: bool, detail: Any = None) -> None:
+    checks.append({"name": name, "passed": bool(passed), "detail": detail})
+
+
+def check_classify(checks: List[Dict[str, Any]]) -> None:
+    for message, expected in CLASSIFY_CASES:
+        actual = classify_error(message)
+        _check(checks, f"classify {message!r}", actual == expected, {"expected": expected, "actual": actual})
+
+
+def check_backoff(checks: List[Dict[str, Any]]) -> None:
+    ceilings = [backoff_delay(attempt, 30, 300, UpperBoundRandom()) for attempt in range(1, 7)]
+    _check(checks, "backoff ceilings double up to max_seconds", ceilings == [30, 60, 120, 240, 300, 300], ceilings)
+
+    first = [backoff_delay(attempt, 30, 300, random.Random(7)) for attempt in range(1, 5)]
+    second = [backoff_delay(attempt, 30, 300, random.Random(7)) for attempt in range(1, 5)]
+    in_range = all(0 <= delay <= ceiling for delay, ceiling in zip(first, ceilings))
+    _check(checks, "backoff jitter is reproducible with a seeded rng", first == second and in_range,
+           [round(delay, 3) for delay in first])
+
+
+def check_breakers(checks: List[Dict[str, Any]]) -> None:
+    clock = FakeClock()
+    breakers = CircuitBreakers(threshold=3, reset_seconds=100, clock=clock)
+
+    breakers.record(["db"], False)
+    breakers.record(["db"], False)
+    _check(checks, "breaker stays closed below threshold", breakers.blocked(["db"]) is None)
+    breakers.record(["db"], False)
+    _check(checks, "breaker opens at threshold", breakers.blocked(["db"]) == "db", breakers.open_keys())
+    _check(checks, "other sources are not blocked", breakers.blocked(["other"]) is None)
+
+    clock.advance(99)
+    _check(checks, "breaker stays open before reset_seconds", breakers.blocked(["db"]) == "db")
+
+    clock.advance(1)
+    trial = breakers.blocked(["db"])
+    others = [breakers.blocked(["db"]), breakers.blocked(["other", "db"])]
+    _check(checks, "half-open lets exactly one trial through", trial is None and others == ["db", "db"],
+           {"trial": trial, "others": others})
+
+    breakers.release_trial(["db"])
+    retrial = breakers.blocked(["db"])
+    _check(checks, "released trial (permanent failure) lets the next file try",
+           retrial is None and breakers.blocked(["db"]) == "db" and "db" in breakers.open_keys(), retrial)
+
+    breakers.record(["db"], False)
+    _check(checks, "failed trial reopens the breaker", breakers.blocked(["db"]) == "db")
+    clock.advance(50)
+    _check(checks, "reopened breaker waits a full reset_seconds", breakers.blocked(["db"]) == "db")
+
+    clock.advance(50)
+    trial = breakers.blocked(["db"])
+    breakers.record(["db"], True)
+    _check(checks, "successful trial closes the breaker",
+           trial is None and breakers.blocked(["db"]) is None and not breakers.open_keys())
+
+    breakers.record(["db"], False)
+    breakers.record(["db"], False)
+    _check(checks, "success resets the failure count", breakers.blocked(["db"]) is None)
+    breakers.record(["db"], True)
+    breakers.record(["db"], False)
+    breakers.record(["db"], False)
+    _check(checks, "count restarts after success in between", breakers.blocked(["db"]) is None)
+
+    disabled = CircuitBreakers(threshold=0, reset_seconds=100, clock=clock)
+    for _ in range(5):
+        disabled.record(["db"], False)
+    _check(checks, "threshold 0 disables the breaker", disabled.blocked(["db"]) is None)
+
+
+def run_simulated(work_dir: str, errors: List[Optional[Dict[str, Any]]], sources: List[str],
+                  retry_policy: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], List[str]]:
+    """
+    รันชุดไฟล์จำลองทีละไฟล์ตามลำดับ config ผ่าน _refresh_excel_files
+
+    Args:
+        work_dir (str): โฟลเดอร์ของรอบนี้ (ลบก่อนรัน)
+        errors (List[Optional[Dict[str, Any]]]): profile ของ error ของแต่ละไฟล์ ("error", "error_attempts")
+        sources (List[str]): แหล่งข้อมูลของแต่ละไฟล์
+        retry_policy (Dict[str, Any]): settings["retry_policy"]
+
+    Returns:
+        Tuple: (ผลลัพธ์, สรุปของแต่ละไฟล์ตามชื่อ, ชื่อไฟล์ตามลำดับ)
+    """
+    shutil.rmtree(work_dir, ignore_errors=True)
+    files = generate_fleet(os.path.join(work_dir, "fleet"), len(errors), seed=1, max_connections=1, max_rows=20,
+                           backup_dir=os.path.join(work_dir, "backups"))
+    names = [os.path.splitext(os.path.basename(f["path"]))[0] for f in files]
+    source_of = dict(zip(names, sources))
+    workbooks = {name: error for name, error in zip(names, errors) if error}
+    profile = {"seed": 1, "time_scale": 0.0001, "workbooks": workbooks}
+
+    config_path = write_config(work_dir, files, {
+        "backup_before_refresh": False,
+        "supervise_refresh": False,
+        "max_workers": 1,
+        "schedule_longest_first": False,
+        "adaptive_timeouts": False,
+        "retry_policy": retry_policy,
+    })
+    app = PowerQueryRefreshApp(config_path)
+    app.logger_manager.logger.setLevel(logging.ERROR)
+    app.excel_refresher = create_simulated_refresher(profile, app.config_manager.settings)
+    # ไฟล์จำลองไม่มี DataMashup จึงกำหนดแหล่งข้อมูลของแต่ละไฟล์แทนการตรวจจริง
+    app._inspect_sources = lambda inspector, file_info: [
+        source_of[os.path.splitext(os.path.basename(file_info["path"]))[0]]
+    ]
+
+    result = app._refresh_excel_files(app.config_manager.excel_files)
+    records = {record["name"]: record for record in result["files"]}
+    summary = {
+        name: {"success": records[name]["success"], "attempts": records[name].get("attempts", 1),
+               "error": records[name].get("error")}
+        for name in names
+    }
+    return result, summary, names
+
+
+def check_simulated_run(checks: List[Dict[str, Any]], work_dir: str) -> Dict[str, Any]:
+    """
+    db01 ล่ม (ทุกไฟล์ล้มเหลวแบบชั่วคราว) และไฟล์ของ db02 ล้มเหลวชั่วคราวครั้งเดียว
+    สองไฟล์แรกของ db01 เปิด circuit ไฟล์ที่เหลือของ db01 ถูกข้าม และไฟล์ของ db02 สำเร็จเมื่อลองใหม่
+    """
+    dead = {"error": "DataSource.Error: Could not connect to server db01"}
+    result, summary, names = run_simulated(
+        os.path.join(work_dir, "dead_source"),
+        [dead, dead, dead, dead, {"error": "DataSource.Error: connection was reset", "error_attempts": 1}],
+        ["sql:db01"] * 4 + ["sql:db02"],
+        {"max_attempts": 3, "base_seconds": 0.01, "max_seconds": 0.05,
+         "breaker_threshold": 2, "breaker_reset_seconds": 900},
+    )
+
+    _check(checks, "dead source fails its first two files", all(
+        not summary[name]["success"] and summary[name]["attempts"] == 1 for name in names[:2]
+    ), {name: summary[name] for name in names[:2]})
+    _check(checks, "open breaker short-circuits the rest of the dead source",
+           result["short_circuited"] == 2 and all("circuit" in (summary[name]["error"] or "") for name in names[2:4]),
+           {"short_circuited": result["short_circuited"]})
+    _check(checks, "transient failure is retried and succeeds",
+           summary[names[4]]["success"] and summary[names[4]]["attempts"] == 2 and result["retried"] == 1,
+           {"record": summary[names[4]], "retried": result["retried"]})
+    return {"result": {k: result[k] for k in ("success", "failed", "total", "retried", "short_circuited")},
+            "files": summary}
+
+
+def check_permanent_trial_run(checks: List[Dict[str, Any]], work_dir: str) -> Dict[str, Any]:
+    """
+    สองไฟล์แรกเปิด circuit ของ db01 (reset ทันที) ไฟล์ที่สามได้ลองแบบ half-open แต่ล้มเหลวแบบถาวร
+    ไฟล์ที่สี่ต้องได้ลองต่อ (ไม่ถูกข้ามไปตลอดรอบ) และปิด circuit เมื่อสำเร็จ
+    """
+    dead = {"error": "DataSource.Error: Could not connect to server db01", "error_attempts": 1}
+    result, summary, names = run_simulated(
+        os.path.join(work_dir, "permanent_trial"),
+        [dead, dead, {"error": "DataSource.Error: Login failed for user 'etl'"}, None],
+        ["sql:db01"] * 4,
+        {"max_attempts": 1, "breaker_threshold": 2, "breaker_reset_seconds": 0},
+    )
+    _check(checks, "permanent failure of the half-open trial does not block later files",
+           result["short_circuited"] == 0 and summary[names[3]]["success"],
+           {"short_circuited": result["short_circuited"], "last": summary[names[3]]})
+    return {"result": {k: result[k] for k in ("success", "failed", "total", "retried", "short_circuited")},
+            "files": summary}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ตรวจ retry / circuit breaker แบบ deterministic")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "pq_failure_policy_check"),
+                        help="โฟลเดอร์สำหรับชุดไฟล์จำลอง (ลบทุกครั้งที่รัน)")
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON")
+    args = parser.parse_args(argv)
+
+    checks: List[Dict[str, Any]] = []
+    check_classify(checks)
+    check_backoff(checks)
+    check_breakers(checks)
+    simulated = {
+        "dead_source": check_simulated_run(checks, args.work_dir),
+        "permanent_trial": check_permanent_trial_run(checks, args.work_dir),
+    }
+
+    report = {"checks": checks, "simulated_runs": simulated,
+              "failed": [check["name"] for check in checks if not check["passed"]]}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Run Journal Check
+ตรวจ replay / RunJournal.resume กับ journal ที่เขียนเอง: บรรทัดสุดท้ายที่เขียนไม่เสร็จ,
+ลำดับล้มเหลวแล้วลองใหม่สำเร็จ และรอบที่ทุกไฟล์บันทึกเสร็จแล้ว (--resume ต้องได้ชุดไฟล์ว่าง)
+รายงานผลเป็น JSON และคืน exit code 1 หากมีข้อใดไม่ผ่าน
+
+ตัวอย่าง:
+    python benchmarks/check_run_journal.py
+    python benchmarks/check_run_journal.py --work-dir /tmp/pq_journal_check --output check.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Any, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.bench_refresh_pipeline import write_config  # noqa: E402
+from benchmarks.synthetic_fleet import generate_fleet  # noqa: E402
+from src.main import PowerQueryRefreshApp  # noqa: E402
+from src.core.run_journal import FAILED, QUEUED, REFRESHING, SAVED, RunJournal, replay  # noqa: E402
+from src.refreshers.backends import SimulatedBackend  # noqa: E402
+from src.refreshers.excel_refresher import ExcelRefresher  # noqa: E402
+
+
+def _check(checks: List[Dict[str, Any]], name: str, passed: bool, detail: Any = None) -> None:
+    checks.append({"name": name, "passed": bool(passed), "detail": detail})
+
+
+def _key(file_path: str) -> str:
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def write_journal(path: str, entries: List[Dict[str, Any]], tail: str = "") -> None:
+    """
+    เขียน journal ด้วยมือ (หนึ่ง entry ต่อบรรทัด) ต่อท้ายด้วย tail ที่ไม่มีการขึ้นบรรทัดใหม่
+
+    Args:
+        path (str): เส้นทาง journal
+        entries (List[Dict[str, Any]]): entry ตามลำดับ
+        tail (str): ข้อความท้ายไฟล์ (จำลองบรรทัดที่เขียนไม่เสร็จ)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(dict(entry, ts="2026-01-01T00:00:00.000"), ensure_ascii=False) + "\n")
+        f.write(tail)
+
+
+def workbook(path: str, state: str) -> Dict[str, Any]:
+    return {"event": "workbook", "key": _key(path), "path": path, "state": state}
+
+
+def check_interrupted(checks: List[Dict[str, Any]], work_dir: str) -> None:
+    """
+    a: ล้มเหลวแล้วลองใหม่สำเร็จ (เสร็จแล้ว), b: บันทึกแล้วแต่ล้มเหลวภายหลัง (ยังไม่เสร็จ),
+    c: บรรทัด saved ถูกตัดกลางบรรทัด (ยังไม่เสร็จ), d: ยังอยู่ในคิว
+    """
+    journal_dir = os.path.join(work_dir, "interrupted")
+    files = [{"name": name, "path": os.path.join(work_dir, f"{name}.xlsx")} for name in "abcd"]
+    a, b, c, d = (f["path"] for f in files)
+    partial = json.dumps(workbook(c, SAVED), ensure_ascii=False)
+    journal_path = os.path.join(journal_dir, "run_20260101_000000_000000.jsonl")
+    write_journal(journal_path, [
+        {"event": "run_started", "files": 4},
+        *(workbook(f["path"], QUEUED) for f in files),
+        workbook(a, REFRESHING), workbook(a, FAILED),
+        workbook(b, REFRESHING), workbook(b, SAVED),
+        workbook(a, REFRESHING), workbook(a, SAVED),
+        workbook(b, FAILED),
+        workbook(c, REFRESHING),
+    ], tail=partial[:len(partial) // 2])
+
+    summary = replay(journal_path)
+    states = {os.path.basename(path): summary["states"].get(_key(path)) for path in (a, b, c, d)}
+    _check(checks, "truncated last line is skipped", states["c.xlsx"] == REFRESHING, states)
+    _check(checks, "retry success after failure counts as saved", states["a.xlsx"] == SAVED, states)
+    _check(checks, "failure after saved counts as failed", states["b.xlsx"] == FAILED, states)
+    _check(checks, "run without run_finished is interrupted", not summary["finished"])
+
+    journal = RunJournal(journal_dir)
+    done = journal.resume(files)
+    batch = [f["name"] for f in files if not journal.is_done(done, f["path"])]
+    _check(checks, "resume skips only saved files", batch == ["b", "c", "d"], batch)
+    _check(checks, "resume appends to the interrupted journal", journal.journal_path == journal_path)
+
+    journal.record(c, SAVED)
+    journal.close()
+    with open(journal_path, "r", encoding="utf-8") as f:
+        events = []
+        for line in f:
+            try:
+                events.append(json.loads(line).get("event"))
+            except ValueError:
+                events.append(None)
+    after = replay(journal_path)
+    _check(checks, "lines appended after a truncated line stay readable",
+           events.count(None) == 1 and "run_resumed" in events and after["states"].get(_key(c)) == SAVED,
+           {"unreadable_lines": events.count(None), "c": after["states"].get(_key(c))})
+
+
+def check_all_saved(checks: List[Dict[str, Any]], work_dir: str) -> None:
+    """รอบที่ถูกขัดจังหวะหลังบันทึกครบทุกไฟล์: --resume ต้องไม่รีเฟชไฟล์ใดเลยและปิดรอบได้"""
+    files = generate_fleet(os.path.join(work_dir, "fleet"), 3, seed=1, max_connections=1, max_rows=20,
+                           backup_dir=os.path.join(work_dir, "backups"))
+    journal_dir = os.path.join(work_dir, "journal")
+    write_journal(os.path.join(journal_dir, "run_20260101_000000_000000.jsonl"), [
+        {"event": "run_started", "files": 3},
+        *(workbook(f["path"], SAVED) for f in files),
+        {"event": "run_finished", "success": 3, "failed": 0, "total": 3},
+    ])
+    interrupted_path = os.path.join(journal_dir, "run_20260102_000000_000000.jsonl")
+    write_journal(interrupted_path, [
+        {"event": "run_started", "files": 3},
+        *(workbook(f["path"], QUEUED) for f in files),
+        *(entry for f in files for entry in (workbook(f["path"], REFRESHING), workbook(f["path"], SAVED))),
+    ])
+
+    journal = RunJournal(journal_dir)
+    done = journal.resume(files)
+    journal.close()
+    batch = [f["name"] for f in files if not journal.is_done(done, f["path"])]
+    _check(checks, "all saved gives an empty batch", batch == [] and journal.journal_path == interrupted_path,
+           {"batch": batch, "journal": os.path.basename(journal.journal_path)})
+
+    config_path = write_config(work_dir, files, {"supervise_refresh": False, "run_journal_dir": journal_dir})
+    app = PowerQueryRefreshApp(config_path)
+    app.logger_manager.logger.setLevel(logging.ERROR)
+    backend = SimulatedBackend({"time_scale": 0.0001})
+    app.excel_refresher = ExcelRefresher(app.logger_manager, app.file_manager, backend=backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.run_auto_refresh(resume=True)
+    summary = replay(interrupted_path)
+    _check(checks, "resume with nothing left opens no workbook and finishes the run",
+           backend.app_launches == 0 and summary["finished"],
+           {"app_launches": backend.app_launches, "finished": summary["finished"]})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ตรวจ replay / resume ของ run journal")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "pq_journal_check"),
+                        help="โฟลเดอร์สำหรับ journal และชุดไฟล์จำลอง (ลบทุกครั้งที่รัน)")
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON")
+    args = parser.parse_args(argv)
+
+    shutil.rmtree(args.work_dir, ignore_errors=True)
+    os.makedirs(args.work_dir)
+    checks: List[Dict[str, Any]] = []
+    check_interrupted(checks, args.work_dir)
+    check_all_saved(checks, args.work_dir)
+
+    report = {"checks": checks, "failed": [check["name"] for check in checks if not check["passed"]]}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Supervisor Check
+รันชุดไฟล์จำลองผ่าน SupervisedRefresher โดยให้ไฟล์หนึ่งค้างที่ขั้น refresh หรือ save
+แล้วตรวจว่าทั้งชุดจบได้, ไฟล์อื่นสำเร็จ, ไฟล์ที่ค้างมี error "เกินเวลาสูงสุด" โดยไม่ถูกลองใหม่ และไม่มี worker ค้างอยู่
+รายงานผลเป็น JSON และคืน exit code 1 หากมีข้อใดไม่ผ่าน
+
+ตัวอย่าง:
+    python benchmarks/check_supervisor.py
+    python benchmarks/check_supervisor.py --files 8 --workers 2 --output check.json
+"""
+
+import argparse
+import functools
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.bench_refresh_pipeline import write_config  # noqa: E402
+from benchmarks.synthetic_fleet import generate_fleet  # noqa: E402
+from src.main import PowerQueryRefreshApp  # noqa: E402
+from src.refreshers.parallel_refresher import create_simulated_refresher  # noqa: E402
+
+HANG_STAGES = ("refresh", "save")
+
+
+def _check(checks: List[Dict[str, Any]], name: str, passed: bool, detail: Any = None) -> None:
+    checks.append({"name": name, "passed": bool(passed), "detail": detail})
+
+
+def run_scenario(checks: List[Dict[str, Any]], work_dir: str, stage: str, file_count: int,
+                 workers: int, timeout_seconds: float, limit_seconds: float) -> Dict[str, Any]:
+    """
+    รันหนึ่งชุดที่ไฟล์ตรงกลางค้างที่ขั้น stage
+
+    Returns:
+        Dict[str, Any]: เวลาที่ใช้และผลของแต่ละไฟล์
+    """
+    scenario_dir = os.path.join(work_dir, stage)
+    files = generate_fleet(os.path.join(scenario_dir, "fleet"), file_count, seed=1, max_connections=2,
+                           max_rows=50, backup_dir=os.path.join(scenario_dir, "backups"))
+    hung = os.path.splitext(os.path.basename(files[len(files) // 2]["path"]))[0]
+    profile = {"seed": 1, "time_scale": 0.0001, "workbooks": {hung: {"hang": stage}}}
+
+    config_path = write_config(scenario_dir, files, {
+        "backup_before_refresh": False,
+        "supervise_refresh": True,
+        "max_workers": workers,
+        "reuse_excel_app": True,
+        "adaptive_timeouts": False,
+        "refresh_timeout_minutes": timeout_seconds / 60,
+        "supervisor_grace_seconds": 1,
+        "heartbeat_timeout_seconds": 3,
+        # ใช้การลองใหม่ตามค่าเริ่มต้น: ไฟล์ที่หมดเวลาต้องไม่ถูกลองใหม่ในรอบเดียวกัน
+        "retry_policy": {"breaker_threshold": 0},
+    })
+    app = PowerQueryRefreshApp(config_path)
+    app.logger_manager.logger.setLevel(logging.ERROR)
+    app.refresher_factory = functools.partial(create_simulated_refresher, profile)
+
+    outcome: Dict[str, Any] = {}
+    batch = threading.Thread(
+        target=lambda: outcome.update(app._refresh_excel_files(app.config_manager.excel_files)),
+        daemon=True
+    )
+    start = time.perf_counter()
+    batch.start()
+    batch.join(limit_seconds)
+    elapsed = time.perf_counter() - start
+
+    finished = not batch.is_alive()
+    _check(checks, f"[{stage}] batch finishes within {limit_seconds:.0f}s", finished, round(elapsed, 2))
+    if not finished:
+        return {"hung_workbook": hung, "elapsed_seconds": round(elapsed, 2), "finished": False}
+
+    records = {record["name"]: record for record in outcome["files"]}
+    others = [name for name in records if name != hung]
+    _check(checks, f"[{stage}] other workbooks succeed", all(records[name]["success"] for name in others),
+           {"success": outcome["success"], "total": outcome["total"]})
+    error = records[hung].get("error") or ""
+    _check(checks, f"[{stage}] hung workbook fails with เกินเวลาสูงสุด",
+           not records[hung]["success"] and "เกินเวลาสูงสุด" in error, error)
+    attempts = records[hung].get("attempts", 1)
+    _check(checks, f"[{stage}] hung workbook is not retried in the same run",
+           attempts == 1 and outcome.get("retried") == 0, {"attempts": attempts, "retried": outcome.get("retried")})
+    leftovers = [child.pid for child in mp.active_children()]
+    _check(checks, f"[{stage}] no worker process left behind", not leftovers, leftovers)
+    return {
+        "hung_workbook": hung,
+        "elapsed_seconds": round(elapsed, 2),
+        "finished": True,
+        "result": {k: outcome[k] for k in ("success", "failed", "total")},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ตรวจว่า SupervisedRefresher ปิด worker ที่ค้างแล้วทำชุดต่อจนจบ")
+    parser.add_argument("--files", type=int, default=6, help="จำนวนไฟล์ในแต่ละชุด")
+    parser.add_argument("--workers", type=int, default=2, help="จำนวน worker")
+    parser.add_argument("--timeout", type=float, default=1.2, help="refresh timeout ของแต่ละไฟล์ (วินาที)")
+    parser.add_argument("--limit", type=float, default=60.0, help="เวลาสูงสุดที่ยอมให้แต่ละชุดใช้ (วินาที)")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "pq_supervisor_check"),
+                        help="โฟลเดอร์สำหรับชุดไฟล์จำลอง (ลบทุกครั้งที่รัน)")
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON")
+    args = parser.parse_args(argv)
+
+    shutil.rmtree(args.work_dir, ignore_errors=True)
+    checks: List[Dict[str, Any]] = []
+    scenarios = {
+        stage: run_scenario(checks, args.work_dir, stage, args.files, args.workers, args.timeout, args.limit)
+        for stage in HANG_STAGES
+    }
+
+    report = {"scenarios": scenarios, "checks": checks,
+              "failed": [check["name"] for check in checks if not check["passed"]]}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if not all(scenario["finished"] for scenario in scenarios.values()):
+        # ชุดที่ไม่จบยังค้างอยู่ใน thread ออกทันทีแทนการรอ
+        sys.stdout.flush()
+        os._exit(1)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
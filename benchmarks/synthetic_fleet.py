@@ -0,0 +1,166 @@
+"""
+Synthetic Fleet
+สร้างชุดไฟล์ xlsx จำลอง (จำนวนการเชื่อมต่อและขนาดต่างกัน) สำหรับ benchmark
+"""
+
+import os
+import random
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Any
+from xml.sax.saxutils import escape
+import zipfile
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/connections.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.connections+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/connections" '
+    'Target="connections.xml"/>'
+    '</Relationships>'
+)
+
+
+def _connections_xml(names: List[str]) -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<connections xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    ]
+    for i, name in enumerate(names, 1):
+        location = name.replace("Query - ", "")
+        parts.append(
+            f'<connection id="{i}" keepAlive="1" name="{escape(name)}" type="5" '
+            f'refreshedVersion="8" background="1" saveData="1">'
+            f'<dbPr connection="Provider=Microsoft.Mashup.OleDb.1;Data Source=$Workbook$;'
+            f'Location={escape(location)};" command="SELECT * FROM [{escape(location)}]"/>'
+            f'</connection>'
+        )
+    parts.append('</connections>')
+    return "".join(parts)
+
+
+def _sheet_xml(rows: int, rng: random.Random) -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ]
+    for r in range(1, rows + 1):
+        parts.append(
+            f'<row r="{r}"><c r="A{r}"><v>{r}</v></c>'
+            f'<c r="B{r}"><v>{rng.random():.6f}</v></c>'
+            f'<c r="C{r}" t="inlineStr"><is><t>item-{rng.randrange(10000)}</t></is></c></row>'
+        )
+    parts.append('</sheetData></worksheet>')
+    return "".join(parts)
+
+
+def write_workbook(path: str, connection_names: List[str], rows: int, rng: random.Random) -> None:
+    """
+    เขียน xlsx ขั้นต่ำที่มี connections.xml และข้อมูล 1 sheet
+
+    Args:
+        path (str): เส้นทางไฟล์ปลายทาง
+        connection_names (List[str]): ชื่อการเชื่อมต่อ
+        rows (int): จำนวนแถวข้อมูล
+        rng (random.Random): ตัวสุ่มสำหรับข้อมูล
+    """
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/connections.xml", _connections_xml(connection_names))
+        archive.writestr("xl/worksheets/sheet1.xml", _sheet_xml(rows, rng))
+
+
+def generate_fleet(fleet_dir: str, count: int, seed: int = 0, max_connections: int = 8,
+                   max_rows: int = 2000, old_backups_per_workbook: int = 2,
+                   backup_dir: str = "") -> List[Dict[str, Any]]:
+    """
+    สร้างชุดไฟล์ xlsx จำลอง (ใช้ไฟล์เดิมหากเคยสร้างด้วยพารามิเตอร์เดียวกัน)
+
+    Args:
+        fleet_dir (str): โฟลเดอร์ที่จะเก็บไฟล์
+        count (int): จำนวนไฟล์
+        seed (int): seed สำหรับการสุ่ม
+        max_connections (int): จำนวนการเชื่อมต่อสูงสุดต่อไฟล์
+        max_rows (int): จำนวนแถวสูงสุดต่อไฟล์
+        old_backups_per_workbook (int): จำนวนไฟล์สำรองเก่า (อายุ > 60 วัน) ต่อไฟล์
+        backup_dir (str): โฟลเดอร์สำรองที่จะใส่ไฟล์สำรองเก่า (ว่าง = ไม่สร้าง)
+
+    Returns:
+        List[Dict[str, Any]]: รายการไฟล์ในรูปแบบเดียวกับ excel_files ใน config
+    """
+    os.makedirs(fleet_dir, exist_ok=True)
+    params = {"count": count, "seed": seed, "max_connections": max_connections, "max_rows": max_rows}
+    manifest_path = os.path.join(fleet_dir, "fleet.json")
+
+    files = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("params") == params and all(os.path.exists(x["path"]) for x in manifest["files"]):
+            files = manifest["files"]
+
+    if files is None:
+        rng = random.Random(seed)
+        files = []
+        for i in range(count):
+            name = f"wb_{i:05d}"
+            path = os.path.abspath(os.path.join(fleet_dir, f"{name}.xlsx"))
+            connection_count = rng.randint(1, max_connections)
+            rows = rng.randint(10, max_rows)
+            names = [f"Query - {name}_q{j}" for j in range(1, connection_count + 1)]
+            write_workbook(path, names, rows, rng)
+            files.append({"name": name, "path": path})
+
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "files": files}, f, indent=2)
+
+    if backup_dir and old_backups_per_workbook:
+        old_time = (datetime.now() - timedelta(days=90)).timestamp()
+        for file_info in files:
+            folder = os.path.join(backup_dir, file_info["name"])
+            os.makedirs(folder, exist_ok=True)
+            for k in range(old_backups_per_workbook):
+                stamp = (datetime.now() - timedelta(days=90 + k)).strftime("%Y%m%d_%H%M%S")
+                backup_path = os.path.join(folder, f"{stamp}_{file_info['name']}.xlsx")
+                with open(backup_path, "wb") as f:
+                    f.write(b"PK\x05\x06" + b"\x00" * 18)
+                os.utime(backup_path, (old_time, old_time))
+
+    return files
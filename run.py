@@ -9,8 +9,7 @@ import os
 # เพิ่ม src ไปยัง Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.main import PowerQueryRefreshApp
+from src.main import main
 
 if __name__ == "__main__":
-    app = PowerQueryRefreshApp()
-    app.run()
+    main()
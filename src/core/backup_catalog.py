@@ -0,0 +1,292 @@
+"""
+Backup Catalog
+ดัชนีของไฟล์สำรองใน SQLite (อยู่ในโฟลเดอร์สำรอง) ที่ FileManager อัปเดตทุกครั้งที่สำรองหรือลบ
+การแสดงรายการ การคำนวณขนาด และการลบไฟล์เก่าจึงเป็นการ query ดัชนีแทนการไล่ stat ทุกไฟล์
+ส่วนความคลาดเคลื่อน (ไฟล์ที่ถูกเพิ่ม/ลบจากภายนอก) แก้ด้วยการสแกนเทียบเป็นครั้งคราว (reconcile)
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator, Iterable, Set, Tuple
+
+from .backup_store import MANIFEST_SUFFIX, BackupStore, is_manifest
+
+# ชื่อไฟล์ฐานข้อมูลภายในโฟลเดอร์สำรอง (ขึ้นต้นด้วย "." จึงไม่ถูกนับเป็นไฟล์สำรอง)
+CATALOG_FILE = ".catalog.db"
+# ชื่อ folder ของไฟล์สำรองที่อยู่ในโฟลเดอร์หลักโดยตรง (แบบเก่า)
+ROOT_FOLDER = "root"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    path TEXT PRIMARY KEY,
+    workbook TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backups_workbook ON backups (workbook, created);
+CREATE INDEX IF NOT EXISTS idx_backups_created ON backups (created);
+
+CREATE TABLE IF NOT EXISTS backup_objects (
+    backup_path TEXT NOT NULL REFERENCES backups(path) ON DELETE CASCADE,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (backup_path, digest)
+);
+CREATE INDEX IF NOT EXISTS idx_backup_objects_digest ON backup_objects (digest);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _timestamp_from_name(name: str) -> Optional[datetime]:
+    """อ่านเวลาจากชื่อไฟล์สำรอง (<%Y%m%d_%H%M%S>_<ไฟล์>)"""
+    try:
+        return datetime.strptime(name[:15], "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+def manifest_objects(manifest: Dict[str, Any]) -> Dict[str, int]:
+    """
+    object ที่ manifest อ้างถึงพร้อมขนาดที่เก็บจริง
+
+    Args:
+        manifest (Dict[str, Any]): manifest จาก BackupStore
+
+    Returns:
+        Dict[str, int]: digest → ขนาด (bytes)
+    """
+    if manifest.get("kind") == "xlsx":
+        return {member["sha256"]: member["compress_size"] for member in manifest["members"]}
+    return {manifest["sha256"]: manifest["size"]}
+
+
+class BackupCatalog:
+    """คลาสสำหรับดัชนีไฟล์สำรอง"""
+
+    def __init__(self, backup_dir: str = "data/backups", db_path: Optional[str] = None):
+        """
+        เริ่มต้น BackupCatalog
+
+        Args:
+            backup_dir (str): โฟลเดอร์สำรอง
+            db_path (Optional[str]): เส้นทางฐานข้อมูล (None = <backup_dir>/.catalog.db)
+        """
+        self.backup_dir = backup_dir
+        self.db_path = db_path or os.path.join(backup_dir, CATALOG_FILE)
+        self._ensure_schema()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """เปิด connection และ commit เมื่อจบ block"""
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            connection.execute("PRAGMA foreign_keys=ON")
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _ensure_schema(self) -> None:
+        """สร้างโฟลเดอร์และตารางหากยังไม่มี"""
+        folder = os.path.dirname(self.db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        # ใช้ rollback journal (ไม่ใช้ WAL) เพราะโฟลเดอร์สำรองอาจอยู่บน network share
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _key(self, path: str) -> str:
+        """เส้นทางสัมพัทธ์กับโฟลเดอร์สำรอง (คีย์ของตาราง backups)"""
+        return os.path.relpath(path, self.backup_dir).replace(os.sep, "/")
+
+    def _entry(self, row: Tuple) -> Dict[str, Any]:
+        path, workbook, name, created, size = row
+        return {
+            'name': name,
+            'path': os.path.join(self.backup_dir, *path.split("/")),
+            'size': size,
+            'modified': datetime.fromisoformat(created),
+            'folder': workbook
+        }
+
+    def add(self, path: str, created: datetime, size: int, kind: str,
+            objects: Optional[Dict[str, int]] = None) -> None:
+        """
+        บันทึกไฟล์สำรองหนึ่งรายการ (แทนที่รายการเดิมที่ path เดียวกัน)
+
+        Args:
+            path (str): เส้นทางไฟล์สำรองหรือ manifest
+            created (datetime): เวลาที่สำรอง
+            size (int): ขนาดของไฟล์ต้นฉบับที่สำรองไว้
+            kind (str): "copy", "file" หรือ "xlsx"
+            objects (Optional[Dict[str, int]]): object ที่อ้างถึง (digest → ขนาด) สำหรับ manifest
+        """
+        with self._connect() as connection:
+            self._insert(connection, path, created, size, kind, objects or {})
+
+    def _insert(self, connection: sqlite3.Connection, path: str, created: datetime, size: int,
+                kind: str, objects: Dict[str, int]) -> None:
+        key = self._key(path)
+        parts = key.split("/")
+        workbook = parts[0] if len(parts) > 1 else ROOT_FOLDER
+        name = parts[-1][:-len(MANIFEST_SUFFIX)] if is_manifest(parts[-1]) else parts[-1]
+        connection.execute("DELETE FROM backups WHERE path = ?", (key,))
+        connection.execute(
+            "INSERT INTO backups (path, workbook, name, created, size, kind) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, workbook, name, created.isoformat(timespec="seconds"), size, kind)
+        )
+        connection.executemany(
+            "INSERT INTO backup_objects (backup_path, digest, size) VALUES (?, ?, ?)",
+            [(key, digest, object_size) for digest, object_size in objects.items()]
+        )
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """
+        ลบรายการออกจากดัชนี
+
+        Args:
+            paths (Iterable[str]): เส้นทางไฟล์สำรอง
+        """
+        with self._connect() as connection:
+            connection.executemany("DELETE FROM backups WHERE path = ?", [(self._key(p),) for p in paths])
+
+    def list_backups(self, workbook: Optional[str] = None,
+                     before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        รายการไฟล์สำรอง เรียงจากใหม่ไปเก่า
+
+        Args:
+            workbook (Optional[str]): เฉพาะโฟลเดอร์ของ workbook นี้ (None = ทั้งหมด)
+            before (Optional[datetime]): เฉพาะที่สำรองก่อนเวลานี้
+
+        Returns:
+            List[Dict[str, Any]]: {"name", "path", "size", "modified", "folder"}
+        """
+        query = "SELECT path, workbook, name, created, size FROM backups"
+        conditions, params = [], []
+        if workbook is not None:
+            conditions.append("workbook = ?")
+            params.append(workbook)
+        if before is not None:
+            conditions.append("created < ?")
+            params.append(before.isoformat(timespec="seconds"))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created DESC"
+        with self._connect() as connection:
+            return [self._entry(row) for row in connection.execute(query, params)]
+
+    def workbook_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        จำนวนและขนาดรวมของไฟล์สำรองแยกตาม workbook
+
+        Returns:
+            Dict[str, Dict[str, int]]: workbook → {"files", "size"}
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT workbook, COUNT(*), COALESCE(SUM(size), 0) FROM backups GROUP BY workbook ORDER BY workbook"
+            ).fetchall()
+        return {workbook: {'files': count, 'size': size} for workbook, count, size in rows}
+
+    def referenced_digests(self) -> Set[str]:
+        """object ที่มีไฟล์สำรองอ้างถึงอย่างน้อยหนึ่งรายการ"""
+        with self._connect() as connection:
+            return {row[0] for row in connection.execute("SELECT DISTINCT digest FROM backup_objects")}
+
+    def stored_size(self) -> int:
+        """
+        ขนาดรวมของ object ที่ถูกอ้างถึง (นับ object ที่ใช้ร่วมกันครั้งเดียว)
+
+        Returns:
+            int: bytes
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM "
+                "(SELECT digest, MAX(size) AS size FROM backup_objects GROUP BY digest)"
+            ).fetchone()
+        return row[0]
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def reconcile_due(self, interval_hours: float) -> bool:
+        """
+        ถึงเวลาสแกนเทียบดัชนีกับไฟล์จริงแล้วหรือไม่ (ยังไม่เคยสแกน = ถึงเวลา)
+
+        Args:
+            interval_hours (float): ระยะเวลาระหว่างการสแกน (0 หรือน้อยกว่า = ไม่สแกนตามรอบ)
+
+        Returns:
+            bool: True หากควรสแกน
+        """
+        last = self._get_meta("last_reconcile")
+        if last is None:
+            return True
+        if interval_hours <= 0:
+            return False
+        return time.time() - float(last) >= interval_hours * 3600
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        สแกนโฟลเดอร์สำรองแล้วแก้ดัชนีให้ตรงกับไฟล์จริง
+
+        ใช้ os.listdir เป็นหลัก ไฟล์ที่อยู่ในดัชนีแล้วจะไม่ถูก stat หรืออ่านซ้ำ
+        เฉพาะไฟล์ใหม่เท่านั้นที่ถูกอ่าน (manifest) หรือ stat (ไฟล์ที่คัดลอกไว้)
+
+        Returns:
+            Dict[str, int]: {"added", "removed", "errors"} (errors = ไฟล์ที่อ่านไม่ได้และไม่ถูกเพิ่มในดัชนี)
+        """
+        on_disk: Dict[str, str] = {}
+        if os.path.isdir(self.backup_dir):
+            for item in os.listdir(self.backup_dir):
+                if item.startswith("."):
+                    continue
+                item_path = os.path.join(self.backup_dir, item)
+                if os.path.isdir(item_path):
+                    for name in os.listdir(item_path):
+                        if not name.endswith(".tmp"):
+                            on_disk[f"{item}/{name}"] = os.path.join(item_path, name)
+                elif not item.endswith(".tmp"):
+                    on_disk[item] = item_path
+
+        with self._connect() as connection:
+            known = {row[0] for row in connection.execute("SELECT path FROM backups")}
+            missing = known - set(on_disk)
+            connection.executemany("DELETE FROM backups WHERE path = ?", [(key,) for key in missing])
+
+            added = errors = 0
+            for key in sorted(set(on_disk) - known):
+                path = on_disk[key]
+                try:
+                    if is_manifest(path):
+                        manifest = BackupStore.read_manifest(path)
+                        self._insert(connection, path, datetime.fromisoformat(manifest["created"]),
+                                     manifest["size"], manifest.get("kind", "file"), manifest_objects(manifest))
+                    elif os.path.isfile(path):
+                        created = _timestamp_from_name(os.path.basename(path)) \
+                            or datetime.fromtimestamp(os.path.getmtime(path))
+                        self._insert(connection, path, created, os.path.getsize(path), "copy", {})
+                    else:
+                        continue
+                    added += 1
+                except (OSError, ValueError, KeyError) as e:
+                    errors += 1
+                    print(f"ไม่สามารถอ่านไฟล์สำรอง {path}: {e}")
+
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_reconcile', ?)", (str(time.time()),)
+            )
+        return {"added": added, "removed": len(missing), "errors": errors}
@@ -0,0 +1,94 @@
+"""
+Backup Retention
+นโยบายเก็บไฟล์สำรองแบบ grandfather-father-son (GFS): เก็บทุกไฟล์ในช่วงล่าสุด
+แล้วเหลือวันละไฟล์, สัปดาห์ละไฟล์ และเดือนละไฟล์ตามช่วงเวลาที่ตั้งไว้
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+# ค่าเริ่มต้น: เก็บทั้งหมด 24 ชั่วโมง, วันละไฟล์ 30 วัน, สัปดาห์ละไฟล์ 52 สัปดาห์ (0 = ไม่ใช้ชั้นนั้น)
+DEFAULT_RETENTION = {
+    "keep_all_hours": 24,
+    "daily_days": 30,
+    "weekly_weeks": 52,
+    "monthly_months": 0,
+}
+
+
+def resolve_policy(default: Optional[Dict[str, Any]] = None,
+                   override: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    รวมนโยบาย: DEFAULT_RETENTION ← ค่าจาก settings ← ค่าเฉพาะไฟล์
+
+    Args:
+        default (Optional[Dict[str, Any]]): settings["backup_retention"]
+        override (Optional[Dict[str, Any]]): backup_retention ของไฟล์ใน excel_files
+
+    Returns:
+        Dict[str, float]: นโยบายที่ครบทุกคีย์
+
+    Raises:
+        ValueError: มีคีย์ที่ไม่รู้จักหรือค่าติดลบ
+    """
+    policy = dict(DEFAULT_RETENTION)
+    for values in (default or {}, override or {}):
+        unknown = set(values) - set(DEFAULT_RETENTION)
+        if unknown:
+            raise ValueError(f"ไม่รู้จักค่า backup_retention: {', '.join(sorted(unknown))}")
+        policy.update(values)
+    for key, value in policy.items():
+        policy[key] = float(value)
+        if policy[key] < 0:
+            raise ValueError(f"backup_retention.{key} ต้องไม่ติดลบ")
+    return policy
+
+
+def _bucket(age: timedelta, created: datetime, policy: Dict[str, float]) -> Optional[Tuple]:
+    """
+    ชั้นของไฟล์สำรองตามอายุ
+
+    Returns:
+        Optional[Tuple]: () = เก็บเสมอ, tuple อื่น = เก็บไฟล์ล่าสุดไฟล์เดียวต่อ bucket, None = หมดอายุ
+    """
+    if age < timedelta(hours=policy["keep_all_hours"]):
+        return ()
+    if age < timedelta(days=policy["daily_days"]):
+        return ("day", created.date())
+    if age < timedelta(weeks=policy["weekly_weeks"]):
+        year, week, _ = created.isocalendar()
+        return ("week", year, week)
+    if age < timedelta(days=policy["monthly_months"] * 31):
+        return ("month", created.year, created.month)
+    return None
+
+
+def select_expired(backups: List[Dict[str, Any]], policy: Dict[str, float],
+                   now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    เลือกไฟล์สำรองของ workbook หนึ่งที่หมดอายุตามนโยบาย (เรียงหนึ่งครั้ง แล้วไล่ครั้งเดียว: O(n log n))
+
+    ในแต่ละ bucket (วัน/สัปดาห์/เดือน) จะเก็บไฟล์ที่ใหม่ที่สุด และไม่ลบไฟล์สำรองล่าสุดของ workbook เลย
+
+    Args:
+        backups (List[Dict[str, Any]]): รายการจาก FileManager.list_backup_files ของ workbook เดียว
+        policy (Dict[str, float]): นโยบายจาก resolve_policy
+        now (Optional[datetime]): เวลาอ้างอิง (ค่าเริ่มต้นคือเวลาปัจจุบัน)
+
+    Returns:
+        List[Dict[str, Any]]: ไฟล์สำรองที่ควรลบ
+    """
+    now = now or datetime.now()
+    ordered = sorted(backups, key=lambda entry: entry['modified'], reverse=True)
+    expired = []
+    seen = set()
+    for index, entry in enumerate(ordered):
+        bucket = _bucket(now - entry['modified'], entry['modified'], policy)
+        if index == 0 or bucket == ():
+            seen.add(bucket)
+            continue
+        if bucket is None or bucket in seen:
+            expired.append(entry)
+        else:
+            seen.add(bucket)
+    return expired
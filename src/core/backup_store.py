@@ -0,0 +1,405 @@
+"""
+Backup Store
+ที่เก็บไฟล์สำรองแบบ content-addressed: เนื้อหาแต่ละแบบถูกเก็บครั้งเดียวตาม SHA-256
+และการสำรองแต่ละครั้งมีเพียง manifest ขนาดเล็กในโฟลเดอร์ของ workbook
+ไฟล์ xlsx เก็บแยกตาม member ของ zip ได้ การสำรองครั้งถัดไปจึงเพิ่มเฉพาะ member ที่เปลี่ยน
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+try:
+    from powerquery.zip_patch import RawZipWriter, open_raw_member, write_raw_member
+except ImportError:
+    # fallback สำหรับการใช้งานปกติ
+    from ..powerquery.zip_patch import RawZipWriter, open_raw_member, write_raw_member
+
+# โฟลเดอร์เก็บเนื้อหา (object) ภายในโฟลเดอร์สำรอง
+OBJECTS_DIR = ".objects"
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+# object ที่ถูกเขียนหรือใช้ซ้ำภายในช่วงนี้จะไม่ถูกลบ (manifest ที่อ้างถึงอาจยังเขียนไม่เสร็จ)
+GC_GRACE_SECONDS = 3600
+
+
+def is_manifest(file_name: str) -> bool:
+    """
+    ตรวจว่าเป็นไฟล์ manifest ของ BackupStore หรือไม่
+
+    Args:
+        file_name (str): ชื่อไฟล์
+
+    Returns:
+        bool: True หากเป็น manifest
+    """
+    return file_name.endswith(MANIFEST_SUFFIX)
+
+
+class BackupStore:
+    """คลาสสำหรับสำรองและกู้คืนไฟล์แบบไม่เก็บเนื้อหาซ้ำ"""
+
+    def __init__(self, backup_dir: str = "data/backups"):
+        """
+        เริ่มต้น BackupStore
+
+        Args:
+            backup_dir (str): โฟลเดอร์สำรอง (object อยู่ใน <backup_dir>/.objects)
+        """
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, OBJECTS_DIR)
+
+    def object_path(self, digest: str) -> str:
+        """
+        เส้นทางของ object
+
+        Args:
+            digest (str): SHA-256 (hex)
+
+        Returns:
+            str: <backup_dir>/.objects/<2 ตัวแรก>/<digest>
+        """
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def reuse_object(self, digest: str) -> bool:
+        """
+        ใช้ object เดิมซ้ำ (ต่ออายุ mtime เพื่อไม่ให้ collect_garbage ลบระหว่างเขียน manifest)
+
+        Returns:
+            bool: True หากมี object นี้
+        """
+        try:
+            os.utime(self.object_path(digest))
+            return True
+        except OSError:
+            return False
+
+    def put_stream(self, stream: Any, length: Optional[int] = None) -> Tuple[str, int]:
+        """
+        เก็บเนื้อหาจาก stream (เขียนไฟล์ชั่วคราวพร้อมคำนวณ hash แล้วย้ายไปตาม digest)
+
+        Args:
+            stream (Any): file object ที่อ่านได้
+            length (Optional[int]): อ่านไม่เกินจำนวน bytes นี้ (None = จนจบ)
+
+        Returns:
+            Tuple[str, int]: (digest, ขนาด)
+        """
+        if not os.path.exists(self.objects_dir):
+            os.makedirs(self.objects_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                while length is None or size < length:
+                    chunk = stream.read(_CHUNK_SIZE if length is None else min(_CHUNK_SIZE, length - size))
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    output.write(chunk)
+                    size += len(chunk)
+            hex_digest = digest.hexdigest()
+            target = self.object_path(hex_digest)
+            if self.reuse_object(hex_digest):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(temp_path, target)
+            return hex_digest, size
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def put_file(self, file_path: str) -> Tuple[str, int]:
+        """
+        เก็บเนื้อหาของไฟล์
+
+        Args:
+            file_path (str): เส้นทางไฟล์
+
+        Returns:
+            Tuple[str, int]: (digest, ขนาด)
+        """
+        with open(file_path, "rb") as stream:
+            return self.put_stream(stream)
+
+    def workbook_dir(self, file_path: str) -> str:
+        """โฟลเดอร์ manifest ของ workbook (ตามชื่อไฟล์โดยไม่มีนามสกุล เหมือนการสำรองแบบเดิม)"""
+        return os.path.join(self.backup_dir, os.path.splitext(os.path.basename(file_path))[0])
+
+    def latest_manifest(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        manifest ล่าสุดของ workbook
+
+        Args:
+            file_path (str): เส้นทางไฟล์ต้นฉบับ
+
+        Returns:
+            Optional[Dict[str, Any]]: manifest หรือ None หากยังไม่เคยสำรอง
+        """
+        folder = self.workbook_dir(file_path)
+        if not os.path.isdir(folder):
+            return None
+        file_name = os.path.basename(file_path)
+        names = sorted(
+            (name for name in os.listdir(folder) if is_manifest(name)
+             and name[:-len(MANIFEST_SUFFIX)].endswith("_" + file_name)),
+            reverse=True,
+        )
+        for name in names:
+            try:
+                return self.read_manifest(os.path.join(folder, name))
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def backup(self, file_path: str, timestamp: Optional[datetime] = None, by_member: bool = False) -> str:
+        """
+        สำรองไฟล์ หากขนาดและ mtime ตรงกับการสำรองครั้งก่อนจะใช้ object เดิมโดยไม่อ่านไฟล์
+
+        Args:
+            file_path (str): เส้นทางไฟล์ที่จะสำรอง
+            timestamp (Optional[datetime]): เวลาของการสำรอง (ค่าเริ่มต้นคือเวลาปัจจุบัน)
+            by_member (bool): เก็บแยกตาม member ของ zip (xlsx) แทนทั้งไฟล์
+                เก็บเฉพาะ member ที่เปลี่ยนจากการสำรองครั้งก่อน ไฟล์ที่ไม่ใช่ zip จะเก็บทั้งไฟล์
+
+        Returns:
+            str: เส้นทาง manifest
+        """
+        timestamp = timestamp or datetime.now()
+        stat = os.stat(file_path)
+        kind = "xlsx" if by_member and zipfile.is_zipfile(file_path) else "file"
+        previous = self.latest_manifest(file_path)
+        if previous and previous.get("kind") != kind:
+            previous = None
+        unchanged = previous is not None and previous["size"] == stat.st_size \
+            and previous["mtime_ns"] == stat.st_mtime_ns \
+            and all(self.reuse_object(digest) for digest in self.manifest_digests(previous))
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "kind": kind,
+            "source": os.path.abspath(file_path),
+            "file_name": os.path.basename(file_path),
+            "created": timestamp.isoformat(timespec="seconds"),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if kind == "xlsx":
+            manifest["members"] = previous["members"] if unchanged else self._backup_members(file_path)
+        else:
+            manifest["sha256"] = previous["sha256"] if unchanged else self.put_file(file_path)[0]
+        return self.write_manifest(file_path, manifest, timestamp)
+
+    def _backup_members(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        เก็บข้อมูลที่บีบอัดแล้วของแต่ละ member ตาม hash (member ที่มีอยู่แล้วจะถูกอ่านเพื่อคำนวณ hash เท่านั้น)
+
+        Returns:
+            List[Dict[str, Any]]: ข้อมูลของ member ตามลำดับในไฟล์
+        """
+        members = []
+        with zipfile.ZipFile(file_path) as archive, open(file_path, "rb") as reader:
+            for info in archive.infolist():
+                digest = hashlib.sha256()
+                stream = open_raw_member(reader, info)
+                remaining = info.compress_size
+                while remaining:
+                    chunk = stream.read(min(remaining, _CHUNK_SIZE))
+                    if not chunk:
+                        raise zipfile.BadZipFile(f"ข้อมูลของ {info.filename} ไม่ครบ")
+                    digest.update(chunk)
+                    remaining -= len(chunk)
+                hex_digest = digest.hexdigest()
+                if not self.reuse_object(hex_digest):
+                    stored, _ = self.put_stream(open_raw_member(reader, info), info.compress_size)
+                    if stored != hex_digest:
+                        raise zipfile.BadZipFile(f"{info.filename} เปลี่ยนระหว่างสำรอง")
+                members.append({
+                    "name": info.filename,
+                    "sha256": hex_digest,
+                    "compress_type": info.compress_type,
+                    "crc": info.CRC,
+                    "compress_size": info.compress_size,
+                    "file_size": info.file_size,
+                    "date_time": list(info.date_time),
+                    "flag_bits": info.flag_bits,
+                    "external_attr": info.external_attr,
+                    "create_system": info.create_system,
+                })
+        return members
+
+    def write_manifest(self, file_path: str, manifest: Dict[str, Any], timestamp: datetime) -> str:
+        """
+        บันทึก manifest เป็น <backup_dir>/<ชื่อไฟล์>/<timestamp>_<ไฟล์>.manifest.json
+
+        Returns:
+            str: เส้นทาง manifest
+        """
+        folder = self.workbook_dir(file_path)
+        os.makedirs(folder, exist_ok=True)
+        name = f"{timestamp.strftime('%Y%m%d_%H%M%S')}_{os.path.basename(file_path)}{MANIFEST_SUFFIX}"
+        manifest_path = os.path.join(folder, name)
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+        return manifest_path
+
+    @staticmethod
+    def read_manifest(manifest_path: str) -> Dict[str, Any]:
+        """
+        อ่าน manifest
+
+        Args:
+            manifest_path (str): เส้นทาง manifest
+
+        Returns:
+            Dict[str, Any]: manifest
+        """
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"ไม่รองรับ manifest version {manifest.get('version')}")
+        return manifest
+
+    @staticmethod
+    def manifest_digests(manifest: Dict[str, Any]) -> Set[str]:
+        """object ที่ manifest อ้างถึง"""
+        if manifest.get("kind") == "xlsx":
+            return {member["sha256"] for member in manifest["members"]}
+        return {manifest["sha256"]}
+
+    def restore(self, manifest_path: str, destination: str) -> str:
+        """
+        กู้คืนไฟล์จาก manifest (เขียนไฟล์ชั่วคราวแล้วแทนที่ปลายทาง)
+
+        manifest แบบ xlsx จะประกอบ zip ใหม่จากข้อมูลที่บีบอัดของแต่ละ member แล้วตรวจ CRC ก่อนแทนที่
+
+        Args:
+            manifest_path (str): เส้นทาง manifest
+            destination (str): เส้นทางไฟล์ที่จะกู้คืน
+
+        Returns:
+            str: เส้นทางไฟล์ที่กู้คืน
+
+        Raises:
+            zipfile.BadZipFile: ไฟล์ที่ประกอบใหม่ไม่ถูกต้อง
+        """
+        manifest = self.read_manifest(manifest_path)
+        temp_path = destination + ".tmp"
+        try:
+            if manifest.get("kind") == "xlsx":
+                self._restore_members(manifest["members"], temp_path)
+            else:
+                shutil.copyfile(self.object_path(manifest["sha256"]), temp_path)
+            os.utime(temp_path, ns=(manifest["mtime_ns"], manifest["mtime_ns"]))
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return destination
+
+    def _restore_members(self, members: List[Dict[str, Any]], output_path: str) -> None:
+        with RawZipWriter(output_path) as output:
+            for member in members:
+                info = zipfile.ZipInfo(member["name"], tuple(member["date_time"]))
+                info.compress_type = member["compress_type"]
+                info.CRC = member["crc"]
+                info.compress_size = member["compress_size"]
+                info.file_size = member["file_size"]
+                info.flag_bits = member["flag_bits"]
+                info.external_attr = member["external_attr"]
+                info.create_system = member["create_system"]
+                with open(self.object_path(member["sha256"]), "rb") as stream:
+                    write_raw_member(output, info, stream)
+        with zipfile.ZipFile(output_path) as archive:
+            bad = archive.testzip()
+        if bad is not None:
+            raise zipfile.BadZipFile(f"CRC ของ {bad} ไม่ตรงหลังกู้คืน")
+
+    def iter_manifests(self) -> List[str]:
+        """
+        เส้นทาง manifest ทั้งหมดในโฟลเดอร์สำรอง
+
+        Returns:
+            List[str]: เส้นทาง manifest
+        """
+        paths = []
+        if not os.path.isdir(self.backup_dir):
+            return paths
+        for item in os.listdir(self.backup_dir):
+            folder = os.path.join(self.backup_dir, item)
+            if item.startswith(".") or not os.path.isdir(folder):
+                continue
+            paths.extend(os.path.join(folder, name) for name in os.listdir(folder) if is_manifest(name))
+        return paths
+
+    def collect_garbage(self, referenced: Optional[Set[str]] = None) -> int:
+        """
+        ลบ object ที่ไม่มี manifest ใดอ้างถึง
+
+        Args:
+            referenced (Optional[Set[str]]): object ที่ยังถูกอ้างถึง (เช่นจาก BackupCatalog)
+                None = อ่าน manifest ทั้งหมดเพื่อหาเอง
+
+        Returns:
+            int: จำนวน object ที่ถูกลบ
+        """
+        if referenced is not None:
+            return self._remove_unreferenced(referenced)
+
+        referenced = set()
+        for manifest_path in self.iter_manifests():
+            try:
+                referenced |= self.manifest_digests(self.read_manifest(manifest_path))
+            except (OSError, ValueError, KeyError):
+                # manifest ที่อ่านไม่ได้: ไม่ลบอะไรเพื่อความปลอดภัย
+                return 0
+
+        return self._remove_unreferenced(referenced)
+
+    def _remove_unreferenced(self, referenced: Set[str]) -> int:
+        removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return removed
+        cutoff = time.time() - GC_GRACE_SECONDS
+        for prefix in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for digest in os.listdir(folder):
+                path = os.path.join(folder, digest)
+                if digest not in referenced and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            if not os.listdir(folder):
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    pass  # มี object ใหม่ถูกเขียนพร้อมกัน
+        return removed
+
+    def objects_size(self) -> int:
+        """
+        ขนาดรวมของ object ทั้งหมด (พื้นที่ดิสก์ที่ใช้จริง)
+
+        Returns:
+            int: bytes
+        """
+        total = 0
+        if not os.path.isdir(self.objects_dir):
+            return total
+        for root, _, files in os.walk(self.objects_dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
@@ -65,8 +65,38 @@ class ConfigManager:
             "settings": {
                 "auto_save": True,
                 "backup_before_refresh": True,
+                "backup_dir": "data/backups",
+                "backup_mode": "xlsx",
+                "backup_catalog_reconcile_hours": 24,
+                "backup_retention": {
+                    "keep_all_hours": 24,
+                    "daily_days": 30,
+                    "weekly_weeks": 52,
+                    "monthly_months": 0
+                },
                 "log_refresh_activity": True,
-                "refresh_timeout_minutes": 30
+                "log_dir": "data/logs",
+                "refresh_timeout_minutes": 30,
+                "adaptive_timeouts": True,
+                "adaptive_timeout_policy": {"factor": 3.0, "min_seconds": 120, "max_seconds": 3600, "min_samples": 5},
+                "retry_policy": {"max_attempts": 3, "base_seconds": 30, "max_seconds": 300, "breaker_threshold": 3, "breaker_reset_seconds": 900},
+                "reuse_excel_app": True,
+                "excel_recycle_after": 20,
+                "max_workers": 1,
+                "supervise_refresh": True,
+                "supervisor_grace_seconds": 120,
+                "heartbeat_timeout_seconds": 60,
+                "run_history_db": "data/run_history.db",
+                "run_journal_dir": "data/journal",
+                "schedule_longest_first": True,
+                "refresh_leaf_connections_only": False,
+                "incremental_refresh": False,
+                "fingerprint_state_path": "data/source_fingerprints.json",
+                "headless_refresh": False,
+                "pushdown_source_folders": ["data"],
+                "verify_workers": 8,
+                "pipeline_prepare_workers": 2,
+                "inspection_cache_path": "data/inspection_cache.json"
             }
         }
     
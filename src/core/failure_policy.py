@@ -0,0 +1,208 @@
+"""
+Failure Policy
+แยกความล้มเหลวของการรีเฟชเป็นแบบชั่วคราว (transient) / หมดเวลา (timeout) / ถาวร (permanent), คำนวณเวลารอก่อนลองใหม่
+แบบ exponential backoff พร้อม jitter และ circuit breaker แยกตามแหล่งข้อมูล
+เมื่อฐานข้อมูลหนึ่งล่ม workbook ที่เหลือซึ่งใช้ฐานข้อมูลเดียวกันจะล้มเหลวทันทีแทนที่จะรอจนหมดเวลาทีละไฟล์
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, Any, Optional
+
+TRANSIENT = "transient"
+TIMEOUT = "timeout"
+PERMANENT = "permanent"
+
+# ค่าเริ่มต้น: ลองรวม 3 ครั้ง รอ 30, 60 วินาที (สุ่มภายในช่วง, ไม่เกิน 300)
+# และเปิด circuit ของแหล่งข้อมูลเมื่อล้มเหลวติดกัน 3 ครั้ง นาน 15 นาที (0 = ไม่ใช้ circuit breaker)
+DEFAULT_RETRY_POLICY = {
+    "max_attempts": 3,
+    "base_seconds": 30,
+    "max_seconds": 300,
+    "breaker_threshold": 3,
+    "breaker_reset_seconds": 900,
+}
+
+# ตรวจแบบถาวรก่อน: สิทธิ์ / ไฟล์ / query ที่ผิด ลองใหม่ก็ไม่หาย
+_PERMANENT_PATTERNS = [
+    r"login failed", r"access (is )?denied", r"permission", r"unauthori[sz]ed", r"\b40[13]\b",
+    r"credentials?", r"expression\.error", r"formula\.firewall", r"syntax",
+    r"ไม่พบไฟล์", r"ไฟล์ไม่ใช่ excel", r"ไม่พร้อมใช้งาน",
+]
+# หมดเวลา / ถูก watchdog ปิด: ไม่ลองใหม่ในรอบเดียวกัน เพราะแต่ละครั้งเสียเวลาเต็ม timeout
+# แต่ยังนับเข้า circuit breaker ของแหล่งข้อมูล
+_TIMEOUT_PATTERNS = [
+    r"time ?out", r"timed out", r"เกินเวลาสูงสุด", r"ใช้เวลานานเกิน", r"heartbeat",
+]
+_TRANSIENT_PATTERNS = [
+    r"worker หยุดทำงาน",
+    r"could not (connect|open a connection)", r"connection (was )?(reset|refused|closed|forcibly)",
+    r"network", r"unreachable", r"temporar", r"unavailable", r"deadlock", r"throttl",
+    r"\b(429|502|503|504)\b", r"server (was )?not found", r"name resolution",
+    # Excel ไม่ว่างรับคำสั่ง COM (RPC_E_CALL_REJECTED / VBA_E_IGNORE)
+    r"call was rejected", r"0x80010001", r"0x800ac472",
+]
+
+
+def classify_error(message: Optional[str]) -> str:
+    """
+    แยกประเภทความล้มเหลวจากข้อความ error
+
+    ข้อความที่ไม่รู้จักนับเป็นแบบถาวร เพื่อไม่เสียเวลาลองซ้ำกับปัญหาที่ไม่น่าหายเอง
+
+    Args:
+        message (Optional[str]): ข้อความ error (record["error"])
+
+    Returns:
+        str: TRANSIENT, TIMEOUT หรือ PERMANENT
+    """
+    text = (message or "").lower()
+    if not text or any(re.search(pattern, text) for pattern in _PERMANENT_PATTERNS):
+        return PERMANENT
+    if any(re.search(pattern, text) for pattern in _TIMEOUT_PATTERNS):
+        return TIMEOUT
+    if any(re.search(pattern, text) for pattern in _TRANSIENT_PATTERNS):
+        return TRANSIENT
+    return PERMANENT
+
+
+def resolve_policy(policy: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    รวมนโยบาย: DEFAULT_RETRY_POLICY ← settings["retry_policy"]
+
+    Args:
+        policy (Optional[Dict[str, Any]]): ค่าจาก settings
+
+    Returns:
+        Dict[str, float]: นโยบายที่ครบทุกคีย์
+
+    Raises:
+        ValueError: มีคีย์ที่ไม่รู้จัก, ค่าติดลบ หรือ max_attempts น้อยกว่า 1
+    """
+    resolved = dict(DEFAULT_RETRY_POLICY)
+    values = policy or {}
+    unknown = set(values) - set(DEFAULT_RETRY_POLICY)
+    if unknown:
+        raise ValueError(f"ไม่รู้จักค่า retry_policy: {', '.join(sorted(unknown))}")
+    resolved.update(values)
+    for key, value in resolved.items():
+        resolved[key] = float(value)
+        if resolved[key] < 0:
+            raise ValueError(f"retry_policy.{key} ต้องไม่ติดลบ")
+    if resolved["max_attempts"] < 1:
+        raise ValueError("retry_policy.max_attempts ต้องไม่น้อยกว่า 1")
+    return resolved
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float,
+                  rng: Optional[random.Random] = None) -> float:
+    """
+    เวลารอก่อนลองครั้งถัดไปแบบ exponential backoff พร้อม full jitter
+
+    Args:
+        attempt (int): ครั้งที่ล้มเหลว (1 = ครั้งแรก)
+        base_seconds (float): เวลารอสูงสุดหลังล้มเหลวครั้งแรก
+        max_seconds (float): เพดานของเวลารอ
+        rng (Optional[random.Random]): ตัวสุ่ม (ค่าเริ่มต้นคือ random)
+
+    Returns:
+        float: วินาที สุ่มในช่วง [0, min(max_seconds, base_seconds × 2^(attempt-1))]
+    """
+    ceiling = min(max_seconds, base_seconds * (2 ** max(0, attempt - 1)))
+    return (rng or random).uniform(0, ceiling)
+
+
+class CircuitBreakers:
+    """circuit breaker แยกตามแหล่งข้อมูล (thread-safe)"""
+
+    def __init__(self, threshold: int, reset_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        เริ่มต้น CircuitBreakers
+
+        Args:
+            threshold (int): จำนวนครั้งที่ล้มเหลวแบบชั่วคราวหรือหมดเวลาติดกันก่อนเปิด circuit (0 = ไม่ใช้)
+            reset_seconds (float): ระยะเวลาที่ circuit เปิด ก่อนยอมให้ลองหนึ่งไฟล์ (half-open)
+            clock (Callable[[], float]): นาฬิกา (ใช้แทนในการทดสอบได้)
+        """
+        self.threshold = int(threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def blocked(self, keys: Iterable[str]) -> Optional[str]:
+        """
+        ตรวจว่าไฟล์ที่ใช้แหล่งข้อมูลเหล่านี้ควรถูกข้ามหรือไม่
+
+        เมื่อ circuit เปิดครบ reset_seconds จะยอมให้ไฟล์แรกที่ถามผ่านไปลอง (half-open)
+        ไฟล์อื่นยังถูกข้ามจนกว่าจะรู้ผล
+
+        Args:
+            keys (Iterable[str]): แหล่งข้อมูลของไฟล์
+
+        Returns:
+            Optional[str]: แหล่งข้อมูลที่ circuit เปิดอยู่ หรือ None หากรีเฟชได้
+        """
+        if self.threshold <= 0:
+            return None
+        with self._lock:
+            now = self.clock()
+            trials = []
+            for key in keys:
+                opened_at = self._opened_at.get(key)
+                if opened_at is None:
+                    continue
+                if self._trial.get(key) or now - opened_at < self.reset_seconds:
+                    return key
+                trials.append(key)
+            for key in trials:
+                self._trial[key] = True
+            return None
+
+    def record(self, keys: Iterable[str], success: bool) -> None:
+        """
+        บันทึกผลของไฟล์ (เฉพาะความสำเร็จ และความล้มเหลวแบบชั่วคราว)
+
+        Args:
+            keys (Iterable[str]): แหล่งข้อมูลของไฟล์
+            success (bool): รีเฟชสำเร็จหรือไม่
+        """
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            for key in keys:
+                if success:
+                    self._failures.pop(key, None)
+                    self._opened_at.pop(key, None)
+                    self._trial.pop(key, None)
+                    continue
+                self._failures[key] = self._failures.get(key, 0) + 1
+                if self._trial.pop(key, False) or self._failures[key] >= self.threshold:
+                    self._opened_at[key] = self.clock()
+
+    def release_trial(self, keys: Iterable[str]) -> None:
+        """
+        ปิดการลองแบบ half-open โดยไม่นับผล (ไฟล์ล้มเหลวด้วยสาเหตุที่ไม่เกี่ยวกับแหล่งข้อมูล เช่น query ผิด)
+        circuit ยังเปิดอยู่ และไฟล์ถัดไปที่ถามจะได้เป็นผู้ลองแทน
+
+        Args:
+            keys (Iterable[str]): แหล่งข้อมูลของไฟล์
+        """
+        with self._lock:
+            for key in keys:
+                self._trial.pop(key, None)
+
+    def open_keys(self) -> Dict[str, int]:
+        """
+        แหล่งข้อมูลที่ circuit เปิดอยู่
+
+        Returns:
+            Dict[str, int]: แหล่งข้อมูล → จำนวนครั้งที่ล้มเหลวติดกัน
+        """
+        with self._lock:
+            return {key: self._failures.get(key, 0) for key in self._opened_at}
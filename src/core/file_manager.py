@@ -9,19 +9,34 @@ from datetime import datetime, timedelta
 from typing import Optional
 from pathlib import Path
 
+from .backup_catalog import ROOT_FOLDER, BackupCatalog, manifest_objects
+from .backup_retention import resolve_policy, select_expired
+from .backup_store import OBJECTS_DIR, BackupStore, is_manifest
+
+# วิธีสำรองไฟล์: "copy" = คัดลอกทั้งไฟล์ทุกครั้ง, "dedup" = เก็บเนื้อหาครั้งเดียวตาม hash + manifest,
+# "xlsx" = เหมือน dedup แต่เก็บแยกตาม member ของ zip (เพิ่มเฉพาะ part ที่เปลี่ยน)
+BACKUP_MODES = ("copy", "dedup", "xlsx")
+
 
 class FileManager:
     """คลาสสำหรับจัดการไฟล์"""
     
-    def __init__(self, backup_dir: str = "data/backups"):
+    def __init__(self, backup_dir: str = "data/backups", backup_mode: str = "xlsx",
+                 reconcile_hours: float = 24):
         """
         เริ่มต้น FileManager
         
         Args:
             backup_dir (str): โฟลเดอร์สำหรับสำรองไฟล์
+            backup_mode (str): วิธีสำรองเริ่มต้น (ดู BACKUP_MODES)
+            reconcile_hours (float): สแกนเทียบดัชนีไฟล์สำรองกับไฟล์จริงทุก ๆ กี่ชั่วโมง (0 = เฉพาะครั้งแรก)
         """
         self.backup_dir = backup_dir
+        self.backup_mode = backup_mode
+        self.reconcile_hours = reconcile_hours
+        self.backup_store = BackupStore(backup_dir)
         self._ensure_backup_dir()
+        self.backup_catalog = BackupCatalog(backup_dir)
     
     def _ensure_backup_dir(self) -> None:
         """สร้างโฟลเดอร์สำรองหากยังไม่มี"""
@@ -69,16 +84,17 @@ class FileManager:
             return datetime.fromtimestamp(timestamp)
         return None
     
-    def backup_file(self, file_path: str, enable_backup: bool = True) -> Optional[str]:
+    def backup_file(self, file_path: str, enable_backup: bool = True, mode: Optional[str] = None) -> Optional[str]:
         """
         สำรองไฟล์ในโฟลเดอร์ตามชื่อไฟล์
         
         Args:
             file_path (str): เส้นทางไฟล์ที่จะสำรอง
             enable_backup (bool): เปิดใช้งานการสำรองหรือไม่
+            mode (Optional[str]): วิธีสำรอง (None = ใช้ค่าของ FileManager)
             
         Returns:
-            Optional[str]: เส้นทางไฟล์สำรอง หรือ None หากไม่สำรอง
+            Optional[str]: เส้นทางไฟล์สำรอง (หรือ manifest ในโหมด dedup) หรือ None หากไม่สำรอง
         """
         if not enable_backup:
             return None
@@ -86,6 +102,18 @@ class FileManager:
         if not self.file_exists(file_path):
             return None
         
+        mode = mode or self.backup_mode
+        if mode != "copy":
+            try:
+                manifest_path = self.backup_store.backup(file_path, by_member=(mode == "xlsx"))
+                manifest = self.backup_store.read_manifest(manifest_path)
+                self._catalog_add(manifest_path, datetime.fromisoformat(manifest['created']), manifest['size'],
+                                  manifest['kind'], manifest_objects(manifest))
+                return manifest_path
+            except Exception as e:
+                print(f"ไม่สามารถสำรองไฟล์ {file_path}: {e}")
+                return None
+        
         # ดึงชื่อไฟล์โดยไม่มีนามสกุล
         file_name = os.path.basename(file_path)
         file_name_without_ext = os.path.splitext(file_name)[0]
@@ -96,17 +124,57 @@ class FileManager:
             os.makedirs(file_backup_dir)
         
         # สร้างชื่อไฟล์สำรอง
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         backup_filename = f"{timestamp}_{file_name}"
         backup_path = os.path.join(file_backup_dir, backup_filename)
         
         try:
             shutil.copy2(file_path, backup_path)
+            self._catalog_add(backup_path, now.replace(microsecond=0), self.get_file_size(backup_path), "copy")
             return backup_path
         except Exception as e:
             print(f"ไม่สามารถสำรองไฟล์ {file_path}: {e}")
             return None
     
+    def restore_backup(self, backup_path: str, destination: str) -> str:
+        """
+        กู้คืนไฟล์จากไฟล์สำรอง (ไฟล์ที่คัดลอกไว้หรือ manifest)
+        
+        Args:
+            backup_path (str): เส้นทางจาก backup_file / list_backup_files
+            destination (str): เส้นทางไฟล์ที่จะกู้คืน
+            
+        Returns:
+            str: เส้นทางไฟล์ที่กู้คืน
+        """
+        if is_manifest(backup_path):
+            return self.backup_store.restore(backup_path, destination)
+        shutil.copy2(backup_path, destination)
+        return destination
+    
+    def _catalog_add(self, path: str, created: datetime, size: int, kind: str,
+                     objects: Optional[dict] = None) -> None:
+        """บันทึกไฟล์สำรองลงดัชนี (ดัชนีที่คลาดเคลื่อนจะถูกแก้ตอน reconcile จึงไม่ทำให้การสำรองล้มเหลว)"""
+        try:
+            self.backup_catalog.add(path, created, size, kind, objects)
+        except Exception as e:
+            print(f"ไม่สามารถบันทึกดัชนีไฟล์สำรอง {path}: {e}")
+    
+    def reconcile_backup_catalog(self, force: bool = False) -> Optional[dict]:
+        """
+        สแกนเทียบดัชนีไฟล์สำรองกับไฟล์จริงเมื่อถึงรอบ (ตาม reconcile_hours) หรือเมื่อสั่ง
+        
+        Args:
+            force (bool): สแกนทันทีโดยไม่สนใจรอบ
+            
+        Returns:
+            Optional[dict]: ผลจาก BackupCatalog.reconcile หรือ None หากยังไม่ถึงรอบ
+        """
+        if not force and not self.backup_catalog.reconcile_due(self.reconcile_hours):
+            return None
+        return self.backup_catalog.reconcile()
+    
     def get_absolute_path(self, file_path: str) -> str:
         """
         แปลงเส้นทางเป็น absolute path
@@ -159,40 +227,60 @@ class FileManager:
     
     def list_backup_files(self) -> list:
         """
-        แสดงรายการไฟล์สำรองทั้งหมด (รวมในโฟลเดอร์ย่อย)
+        แสดงรายการไฟล์สำรองทั้งหมด (รวมในโฟลเดอร์ย่อย) จากดัชนี
         
         Returns:
-            list: รายการไฟล์สำรอง
-        """
-        backup_files = []
-        if os.path.exists(self.backup_dir):
-            # เรียกดูไฟล์ในโฟลเดอร์หลัก
-            for item in os.listdir(self.backup_dir):
-                item_path = os.path.join(self.backup_dir, item)
-                
-                if os.path.isfile(item_path):
-                    # ไฟล์ในโฟลเดอร์หลัก
-                    backup_files.append({
-                        'name': item,
-                        'path': item_path,
-                        'size': self.get_file_size(item_path),
-                        'modified': self.get_file_modified_time(item_path),
-                        'folder': 'root'
-                    })
-                elif os.path.isdir(item_path):
-                    # โฟลเดอร์ย่อย - เรียกดูไฟล์ข้างใน
-                    for file in os.listdir(item_path):
-                        file_path = os.path.join(item_path, file)
-                        if os.path.isfile(file_path):
-                            backup_files.append({
-                                'name': file,
-                                'path': file_path,
-                                'size': self.get_file_size(file_path),
-                                'modified': self.get_file_modified_time(file_path),
-                                'folder': item
-                            })
-        
-        return sorted(backup_files, key=lambda x: x['modified'], reverse=True)
+            list: รายการไฟล์สำรอง เรียงจากใหม่ไปเก่า ('modified' คือเวลาที่สำรอง)
+        """
+        self.reconcile_backup_catalog()
+        return self.backup_catalog.list_backups()
+    
+    def delete_backups(self, backup_files: list) -> int:
+        """
+        ลบไฟล์สำรองตามรายการ (จาก list_backup_files) พร้อมอัปเดตดัชนีและลบเนื้อหาที่ไม่ใช้แล้ว
+        
+        Args:
+            backup_files (list): รายการไฟล์สำรองที่จะลบ
+            
+        Returns:
+            int: จำนวนไฟล์ที่ถูกลบ
+        """
+        removed = []
+        deleted_manifests = False
+        for backup_file in backup_files:
+            try:
+                os.remove(backup_file['path'])
+            except FileNotFoundError:
+                pass  # ถูกลบไปแล้ว: เอาออกจากดัชนีอย่างเดียว
+            except Exception as e:
+                print(f"ไม่สามารถลบไฟล์สำรอง {backup_file['name']}: {e}")
+                continue
+            removed.append(backup_file)
+            deleted_manifests = deleted_manifests or is_manifest(backup_file['path'])
+        
+        if not removed:
+            return 0
+        self.backup_catalog.remove(backup_file['path'] for backup_file in removed)
+        
+        # ลบโฟลเดอร์ย่อยที่ไม่มีไฟล์สำรองเหลือแล้ว
+        remaining = self.backup_catalog.workbook_stats()
+        for folder in {backup_file['folder'] for backup_file in removed} - {ROOT_FOLDER} - set(remaining):
+            try:
+                os.rmdir(os.path.join(self.backup_dir, folder))
+            except Exception:
+                pass  # ไม่สำคัญหากลบโฟลเดอร์ไม่ได้
+        
+        # ลบเนื้อหาที่ไม่มี manifest ใดอ้างถึงแล้ว
+        if deleted_manifests:
+            try:
+                # ดัชนีต้องครบก่อนใช้ตัดสินว่า object ไหนไม่มีใครอ้างถึง
+                reconciled = self.reconcile_backup_catalog(force=True)
+                if not reconciled['errors']:
+                    self.backup_store.collect_garbage(self.backup_catalog.referenced_digests())
+            except Exception as e:
+                print(f"ไม่สามารถลบเนื้อหาสำรองที่ไม่ใช้แล้ว: {e}")
+        
+        return len(removed)
     
     def cleanup_old_backups(self, days_to_keep: int = 30) -> int:
         """
@@ -204,29 +292,40 @@ class FileManager:
         Returns:
             int: จำนวนไฟล์ที่ถูกลบ
         """
-        deleted_count = 0
+        self.reconcile_backup_catalog()
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        return self.delete_backups(self.backup_catalog.list_backups(before=cutoff_date))
+    
+    def prune_backups(self, default_policy: Optional[dict] = None,
+                      overrides: Optional[dict] = None) -> int:
+        """
+        ลบไฟล์สำรองตามนโยบาย GFS ของแต่ละ workbook (ดู backup_retention) ในครั้งเดียว
         
-        backup_files = self.list_backup_files()
-        for backup_file in backup_files:
-            if backup_file['modified'] and backup_file['modified'] < cutoff_date:
-                try:
-                    os.remove(backup_file['path'])
-                    deleted_count += 1
-                    
-                    # ตรวจสอบว่าโฟลเดอร์ย่อยว่างหรือไม่ หากว่างให้ลบ
-                    if backup_file['folder'] != 'root':
-                        folder_path = os.path.dirname(backup_file['path'])
-                        if os.path.exists(folder_path) and not os.listdir(folder_path):
-                            try:
-                                os.rmdir(folder_path)
-                            except Exception:
-                                pass  # ไม่สำคัญหากลบโฟลเดอร์ไม่ได้
-                                
-                except Exception as e:
-                    print(f"ไม่สามารถลบไฟล์สำรอง {backup_file['name']}: {e}")
-        
-        return deleted_count
+        Args:
+            default_policy (Optional[dict]): นโยบายเริ่มต้น (settings["backup_retention"])
+            overrides (Optional[dict]): ชื่อโฟลเดอร์ของ workbook → นโยบายเฉพาะ
+            
+        Returns:
+            int: จำนวนไฟล์ที่ถูกลบ
+        """
+        overrides = overrides or {}
+        policy = resolve_policy(default_policy)
+        self.reconcile_backup_catalog()
+        now = datetime.now()
+        expired = []
+        for folder in self.backup_catalog.workbook_stats():
+            folder_policy = resolve_policy(default_policy, overrides[folder]) if folder in overrides else policy
+            backups = self.backup_catalog.list_backups(workbook=folder)
+            if folder != ROOT_FOLDER:
+                expired.extend(select_expired(backups, folder_policy, now))
+                continue
+            # ไฟล์เก่าในโฟลเดอร์หลักปนกันหลาย workbook: แยกตามชื่อไฟล์หลัง <timestamp>_
+            groups = {}
+            for entry in backups:
+                groups.setdefault(entry['name'][16:], []).append(entry)
+            for group in groups.values():
+                expired.extend(select_expired(group, folder_policy, now))
+        return self.delete_backups(expired)
     
     def show_backup_structure(self) -> None:
         """แสดงโครงสร้างโฟลเดอร์สำรองแบบเป็นระเบียบ"""
@@ -236,58 +335,29 @@ class FileManager:
         
         print(f"\n=== โครงสร้างโฟลเดอร์สำรอง: {self.backup_dir} ===")
         
-        # เก็บข้อมูลสำหรับการนับ
-        folder_stats = {}
-        total_files = 0
-        total_size = 0
+        self.reconcile_backup_catalog()
+        folder_stats = self.backup_catalog.workbook_stats()
+        total_files = sum(stats['files'] for stats in folder_stats.values())
+        total_size = sum(stats['size'] for stats in folder_stats.values())
         
-        for item in os.listdir(self.backup_dir):
-            item_path = os.path.join(self.backup_dir, item)
-            
-            if os.path.isfile(item_path):
-                # ไฟล์ในโฟลเดอร์หลัก (ไฟล์เก่า)
-                size = self.get_file_size(item_path)
-                modified = self.get_file_modified_time(item_path)
-                print(f"📄 {item} ({size/1024:.1f} KB) - {modified.strftime('%Y-%m-%d %H:%M:%S')}")
-                total_files += 1
-                total_size += size
-                
-            elif os.path.isdir(item_path):
-                # โฟลเดอร์ย่อย
-                files_in_folder = []
-                folder_size = 0
-                
-                for file in os.listdir(item_path):
-                    file_path = os.path.join(item_path, file)
-                    if os.path.isfile(file_path):
-                        size = self.get_file_size(file_path)
-                        modified = self.get_file_modified_time(file_path)
-                        files_in_folder.append({
-                            'name': file,
-                            'size': size,
-                            'modified': modified
-                        })
-                        folder_size += size
-                        total_files += 1
-                        total_size += size
-                
-                # เรียงตามวันที่แก้ไข
-                files_in_folder.sort(key=lambda x: x['modified'], reverse=True)
-                
-                print(f"\n📁 {item}/ ({len(files_in_folder)} ไฟล์, {folder_size/1024:.1f} KB)")
-                for file_info in files_in_folder:
-                    print(f"   📄 {file_info['name']} ({file_info['size']/1024:.1f} KB) - {file_info['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                folder_stats[item] = {
-                    'files': len(files_in_folder),
-                    'size': folder_size
-                }
+        # ไฟล์ในโฟลเดอร์หลัก (ไฟล์เก่า)
+        for entry in self.backup_catalog.list_backups(workbook=ROOT_FOLDER):
+            print(f"📄 {entry['name']} ({entry['size']/1024:.1f} KB) - {entry['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
+        folder_stats.pop(ROOT_FOLDER, None)
+        
+        for folder, stats in folder_stats.items():
+            print(f"\n📁 {folder}/ ({stats['files']} ไฟล์, {stats['size']/1024:.1f} KB)")
+            for file_info in self.backup_catalog.list_backups(workbook=folder):
+                print(f"   📄 {file_info['name']} ({file_info['size']/1024:.1f} KB) - {file_info['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
         
         # สรุป
         print(f"\n=== สรุป ===")
         print(f"โฟลเดอร์ย่อย: {len(folder_stats)} โฟลเดอร์")
         print(f"ไฟล์ทั้งหมด: {total_files} ไฟล์")
         print(f"ขนาดรวม: {total_size/1024:.1f} KB ({total_size/(1024*1024):.2f} MB)")
+        stored_size = self.backup_catalog.stored_size()
+        if stored_size:
+            print(f"พื้นที่จริงของเนื้อหาที่ไม่ซ้ำ ({OBJECTS_DIR}): {stored_size/(1024*1024):.2f} MB")
     
     def get_excel_files(self, data_folder: str = "data") -> list:
         """
@@ -0,0 +1,120 @@
+"""
+Refresh Timeouts
+คำนวณเวลาสูงสุดของแต่ละไฟล์จากประวัติของไฟล์นั้นเอง (p95 × factor ภายในช่วง min/max)
+ไฟล์เล็กที่ค้างจึงล้มเหลวเร็ว แทนที่จะรอ refresh_timeout_minutes เท่ากับไฟล์ใหญ่
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+from .run_history import RunHistory
+
+# ค่าเริ่มต้น: 3 เท่าของ p95, ไม่ต่ำกว่า 2 นาที, ไม่เกิน 1 ชั่วโมง และต้องมีประวัติที่สำเร็จอย่างน้อย 5 รอบ
+DEFAULT_TIMEOUT_POLICY = {
+    "factor": 3.0,
+    "min_seconds": 120,
+    "max_seconds": 3600,
+    "min_samples": 5,
+}
+
+
+def resolve_policy(policy: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    รวมนโยบาย: DEFAULT_TIMEOUT_POLICY ← settings["adaptive_timeout_policy"]
+
+    Args:
+        policy (Optional[Dict[str, Any]]): ค่าจาก settings
+
+    Returns:
+        Dict[str, float]: นโยบายที่ครบทุกคีย์
+
+    Raises:
+        ValueError: มีคีย์ที่ไม่รู้จัก, ค่าติดลบ หรือ min_seconds มากกว่า max_seconds
+    """
+    resolved = dict(DEFAULT_TIMEOUT_POLICY)
+    values = policy or {}
+    unknown = set(values) - set(DEFAULT_TIMEOUT_POLICY)
+    if unknown:
+        raise ValueError(f"ไม่รู้จักค่า adaptive_timeout_policy: {', '.join(sorted(unknown))}")
+    resolved.update(values)
+    for key, value in resolved.items():
+        resolved[key] = float(value)
+        if resolved[key] < 0:
+            raise ValueError(f"adaptive_timeout_policy.{key} ต้องไม่ติดลบ")
+    if resolved["min_seconds"] > resolved["max_seconds"]:
+        raise ValueError("adaptive_timeout_policy.min_seconds ต้องไม่มากกว่า max_seconds")
+    return resolved
+
+
+def adaptive_timeout(p95: Optional[float], samples: int, policy: Dict[str, float]) -> Optional[float]:
+    """
+    เวลาสูงสุดจาก p95 ของไฟล์
+
+    Args:
+        p95 (Optional[float]): p95 ของเวลารีเฟชที่สำเร็จ (วินาที)
+        samples (int): จำนวนรอบที่ใช้คำนวณ p95
+        policy (Dict[str, float]): นโยบายจาก resolve_policy
+
+    Returns:
+        Optional[float]: เวลาสูงสุด (วินาที) หรือ None หากประวัติไม่พอ
+    """
+    if p95 is None or samples < max(1, policy["min_samples"]):
+        return None
+    return min(policy["max_seconds"], max(policy["min_seconds"], p95 * policy["factor"]))
+
+
+class TimeoutPlanner:
+    """คลาสสำหรับกำหนดเวลาสูงสุดของแต่ละไฟล์ก่อนเริ่มรีเฟช"""
+
+    def __init__(self, run_history: Optional[RunHistory], default_seconds: float,
+                 policy: Optional[Dict[str, Any]] = None, history_limit: int = 50):
+        """
+        เริ่มต้น TimeoutPlanner
+
+        Args:
+            run_history (Optional[RunHistory]): ประวัติการรีเฟช (None = ใช้ค่าเริ่มต้นทุกไฟล์)
+            default_seconds (float): เวลาสูงสุดเมื่อไม่มีประวัติพอ (refresh_timeout_minutes × 60)
+            policy (Optional[Dict[str, Any]]): settings["adaptive_timeout_policy"]
+            history_limit (int): จำนวนรอบล่าสุดที่ใช้คำนวณ p95
+        """
+        self.run_history = run_history
+        self.default_seconds = float(default_seconds)
+        self.policy = resolve_policy(policy)
+        self.history_limit = history_limit
+
+    def timeout_for(self, file_info: Dict[str, Any]) -> Tuple[float, str]:
+        """
+        เวลาสูงสุดของไฟล์: ค่าเฉพาะไฟล์ใน config ← ประวัติของไฟล์ ← ค่าเริ่มต้น
+
+        Args:
+            file_info (Dict[str, Any]): ข้อมูลไฟล์ (refresh_timeout_minutes = ค่าเฉพาะไฟล์)
+
+        Returns:
+            Tuple[float, str]: (วินาที, ที่มา "config" / "history" / "default")
+        """
+        override = file_info.get("refresh_timeout_minutes")
+        if override is not None:
+            return float(override) * 60, "config"
+        if self.run_history is not None:
+            stats = self.run_history.workbook_percentiles(file_info["name"], (95,), self.history_limit)
+            seconds = adaptive_timeout(stats["p95"], int(stats["count"] or 0), self.policy)
+            if seconds is not None:
+                return seconds, "history"
+        return self.default_seconds, "default"
+
+    def assign(self, files: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        สร้างรายการไฟล์ใหม่ที่มี "timeout_seconds" (ไม่แก้ dict เดิมใน config)
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, int]]: (รายการไฟล์, จำนวนไฟล์ตามที่มาของเวลาสูงสุด)
+        """
+        assigned = []
+        sources = {"config": 0, "history": 0, "default": 0}
+        for file_info in files:
+            seconds, source = self.timeout_for(file_info)
+            assigned.append(dict(file_info, timeout_seconds=round(seconds, 1)))
+            sources[source] += 1
+        return assigned, sources
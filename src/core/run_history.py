@@ -0,0 +1,302 @@
+"""
+Run History
+เก็บประวัติเวลาการรีเฟชของแต่ละรอบ / ไฟล์ / การเชื่อมต่อใน SQLite
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterator, Sequence
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    total INTEGER DEFAULT 0,
+    success INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS workbook_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    workbook TEXT NOT NULL,
+    path TEXT,
+    started_at TEXT NOT NULL,
+    duration REAL NOT NULL,
+    success INTEGER NOT NULL,
+    file_size INTEGER,
+    phases TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_workbook_runs_workbook
+    ON workbook_runs (workbook, success, started_at);
+CREATE INDEX IF NOT EXISTS idx_workbook_runs_run ON workbook_runs (run_id);
+
+CREATE TABLE IF NOT EXISTS connection_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workbook_run_id INTEGER NOT NULL REFERENCES workbook_runs(id),
+    workbook TEXT NOT NULL,
+    connection TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_connection_runs_key
+    ON connection_runs (workbook, connection, started_at);
+"""
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """
+    คำนวณ percentile แบบ linear interpolation
+
+    Args:
+        values (Sequence[float]): ค่าที่จะคำนวณ
+        pct (float): percentile (0-100)
+
+    Returns:
+        Optional[float]: ค่า percentile หรือ None หากไม่มีข้อมูล
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class RunHistory:
+    """คลาสสำหรับจัดเก็บและสืบค้นประวัติการรีเฟช"""
+
+    def __init__(self, db_path: str = "data/run_history.db"):
+        """
+        เริ่มต้น RunHistory
+
+        Args:
+            db_path (str): เส้นทางไฟล์ฐานข้อมูล SQLite
+        """
+        self.db_path = db_path
+        self._ensure_schema()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """เปิด connection และ commit เมื่อจบ block"""
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _ensure_schema(self) -> None:
+        """สร้างโฟลเดอร์และตารางหากยังไม่มี"""
+        folder = os.path.dirname(self.db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def start_run(self) -> int:
+        """
+        เริ่มบันทึกรอบการรีเฟชใหม่
+
+        Returns:
+            int: run id
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (started_at) VALUES (?)",
+                (datetime.now().isoformat(timespec="seconds"),)
+            )
+            return cursor.lastrowid
+
+    def record_workbook(self, run_id: int, record: Dict[str, Any]) -> None:
+        """
+        บันทึกผลการรีเฟชหนึ่งไฟล์ (record จาก ExcelRefresher.refresh_file)
+
+        Args:
+            run_id (int): run id
+            record (Dict[str, Any]): ข้อมูลเวลาของไฟล์
+        """
+        started_at = record.get("started_at") or datetime.now().isoformat(timespec="seconds")
+        file_size = record.get("file_size")
+        if file_size is None and record.get("path") and os.path.isfile(record["path"]):
+            file_size = os.path.getsize(record["path"])
+
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO workbook_runs "
+                "(run_id, workbook, path, started_at, duration, success, file_size, phases) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    record["name"],
+                    record.get("path"),
+                    started_at,
+                    record.get("total_seconds", 0.0),
+                    1 if record.get("success") else 0,
+                    file_size,
+                    json.dumps(record.get("phases", {}))
+                )
+            )
+            workbook_run_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO connection_runs "
+                "(workbook_run_id, workbook, connection, started_at, duration) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (workbook_run_id, record["name"], name, started_at, duration)
+                    for name, duration in record.get("connections", {}).items()
+                ]
+            )
+
+    def finish_run(self, run_id: int, result: Dict[str, Any]) -> None:
+        """
+        ปิดรอบการรีเฟชพร้อมสรุปผล
+
+        Args:
+            run_id (int): run id
+            result (Dict[str, Any]): ผลลัพธ์จาก refresh_multiple_files
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE runs SET finished_at = ?, total = ?, success = ?, failed = ? WHERE id = ?",
+                (
+                    datetime.now().isoformat(timespec="seconds"),
+                    result.get("total", 0),
+                    result.get("success", 0),
+                    result.get("failed", 0),
+                    run_id
+                )
+            )
+
+    def record_result(self, result: Dict[str, Any]) -> int:
+        """
+        บันทึกผลลัพธ์ของ refresh_multiple_files ทั้งชุดเป็นหนึ่งรอบ
+
+        Args:
+            result (Dict[str, Any]): ผลลัพธ์จาก refresh_multiple_files
+
+        Returns:
+            int: run id
+        """
+        run_id = self.start_run()
+        for record in result.get("files", []):
+            if record:
+                self.record_workbook(run_id, record)
+        self.finish_run(run_id, result)
+        return run_id
+
+    def workbook_durations(self, workbook: str, limit: int = 50,
+                           successful_only: bool = True) -> List[float]:
+        """
+        ดึงระยะเวลารีเฟชล่าสุดของไฟล์
+
+        Args:
+            workbook (str): ชื่อไฟล์
+            limit (int): จำนวนรอบล่าสุดที่จะดึง
+            successful_only (bool): ดึงเฉพาะรอบที่สำเร็จ
+
+        Returns:
+            List[float]: ระยะเวลา (วินาที) เรียงจากใหม่ไปเก่า
+        """
+        sql = "SELECT duration FROM workbook_runs WHERE workbook = ?"
+        if successful_only:
+            sql += " AND success = 1"
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute(sql, (workbook, limit))]
+
+    def workbook_percentiles(self, workbook: str, percentiles: Sequence[float] = (50, 95),
+                             limit: int = 50) -> Dict[str, Optional[float]]:
+        """
+        คำนวณ percentile ของระยะเวลารีเฟชไฟล์จากรอบที่สำเร็จล่าสุด
+
+        Args:
+            workbook (str): ชื่อไฟล์
+            percentiles (Sequence[float]): percentile ที่ต้องการ
+            limit (int): จำนวนรอบล่าสุดที่ใช้คำนวณ
+
+        Returns:
+            Dict[str, Optional[float]]: เช่น {"p50": 12.3, "p95": 40.1, "count": 20}
+        """
+        durations = self.workbook_durations(workbook, limit)
+        result: Dict[str, Optional[float]] = {f"p{int(p)}": percentile(durations, p) for p in percentiles}
+        result["count"] = len(durations)
+        return result
+
+    def connection_percentiles(self, workbook: str, connection: str,
+                               percentiles: Sequence[float] = (50, 95),
+                               limit: int = 50) -> Dict[str, Optional[float]]:
+        """
+        คำนวณ percentile ของระยะเวลารีเฟชการเชื่อมต่อหนึ่งรายการ
+
+        Args:
+            workbook (str): ชื่อไฟล์
+            connection (str): ชื่อการเชื่อมต่อ
+            percentiles (Sequence[float]): percentile ที่ต้องการ
+            limit (int): จำนวนรอบล่าสุดที่ใช้คำนวณ
+
+        Returns:
+            Dict[str, Optional[float]]: เช่น {"p50": 3.2, "p95": 9.8, "count": 20}
+        """
+        with self._connect() as db:
+            durations = [
+                row[0] for row in db.execute(
+                    "SELECT duration FROM connection_runs WHERE workbook = ? AND connection = ? "
+                    "ORDER BY started_at DESC LIMIT ?",
+                    (workbook, connection, limit)
+                )
+            ]
+        result: Dict[str, Optional[float]] = {f"p{int(p)}": percentile(durations, p) for p in percentiles}
+        result["count"] = len(durations)
+        return result
+
+    def workbook_trend(self, workbook: str, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        แนวโน้มระยะเวลารีเฟชรายวันของไฟล์
+
+        Args:
+            workbook (str): ชื่อไฟล์
+            days (int): จำนวนวันย้อนหลัง
+
+        Returns:
+            List[Dict[str, Any]]: รายการ {"date", "runs", "failed", "avg_duration", "max_duration", "avg_file_size"}
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT substr(started_at, 1, 10) AS day, COUNT(*), SUM(1 - success), "
+                "AVG(duration), MAX(duration), AVG(file_size) "
+                "FROM workbook_runs WHERE workbook = ? AND started_at >= ? "
+                "GROUP BY day ORDER BY day",
+                (workbook, since)
+            ).fetchall()
+        return [
+            {
+                "date": day,
+                "runs": runs,
+                "failed": failed,
+                "avg_duration": avg_duration,
+                "max_duration": max_duration,
+                "avg_file_size": avg_file_size
+            }
+            for day, runs, failed, avg_duration, max_duration, avg_file_size in rows
+        ]
+
+    def list_workbooks(self) -> List[str]:
+        """
+        รายชื่อไฟล์ที่มีประวัติ
+
+        Returns:
+            List[str]: ชื่อไฟล์
+        """
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute(
+                "SELECT DISTINCT workbook FROM workbook_runs ORDER BY workbook"
+            )]
@@ -0,0 +1,204 @@
+"""
+Run Journal
+บันทึกสถานะของแต่ละไฟล์ระหว่างรอบรีเฟชแบบ append-only (JSON ทีละบรรทัด, fsync ทุกบรรทัด)
+หากโปรแกรมหรือ Excel หยุดกลางรอบ รอบถัดไปใช้ --resume เพื่อข้ามไฟล์ที่บันทึกเสร็จแล้วได้
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set
+
+# สถานะของไฟล์ตามลำดับที่เกิดขึ้น
+QUEUED = "queued"
+BACKED_UP = "backed-up"
+REFRESHING = "refreshing"
+SAVED = "saved"
+FAILED = "failed"
+STATES = (QUEUED, BACKED_UP, REFRESHING, SAVED, FAILED)
+
+JOURNAL_PREFIX = "run_"
+JOURNAL_SUFFIX = ".jsonl"
+
+
+def _key(file_path: str) -> str:
+    """คีย์ของไฟล์ใน journal (absolute path ที่ normalize แล้ว)"""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def replay(journal_path: str) -> Dict[str, Any]:
+    """
+    อ่าน journal แล้วสรุปสถานะล่าสุดของแต่ละไฟล์
+
+    บรรทัดที่อ่านไม่ได้ (เช่นบรรทัดสุดท้ายที่เขียนไม่เสร็จตอนโปรแกรมหยุด) จะถูกข้าม
+
+    Args:
+        journal_path (str): เส้นทาง journal
+
+    Returns:
+        Dict[str, Any]: {"path", "started_at", "finished", "states": {คีย์ไฟล์: สถานะล่าสุด}}
+    """
+    summary: Dict[str, Any] = {"path": journal_path, "started_at": None, "finished": False, "states": {}}
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            event = entry.get("event")
+            if event == "run_started":
+                summary["started_at"] = entry.get("ts")
+            elif event == "run_finished":
+                summary["finished"] = True
+            elif event == "workbook" and entry.get("state") in STATES:
+                summary["states"][entry["key"]] = entry["state"]
+    return summary
+
+
+class RunJournal:
+    """คลาสสำหรับบันทึกและอ่าน journal ของรอบการรีเฟช"""
+
+    def __init__(self, journal_dir: str = "data/journal", keep: int = 20):
+        """
+        เริ่มต้น RunJournal
+
+        Args:
+            journal_dir (str): โฟลเดอร์เก็บ journal (หนึ่งไฟล์ต่อรอบ)
+            keep (int): จำนวน journal ของรอบที่จบแล้วที่เก็บไว้
+        """
+        self.journal_dir = journal_dir
+        self.keep = keep
+        self.journal_path: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _journals(self) -> List[str]:
+        """journal ทั้งหมด เรียงจากเก่าไปใหม่"""
+        if not os.path.isdir(self.journal_dir):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.journal_dir)
+            if name.startswith(JOURNAL_PREFIX) and name.endswith(JOURNAL_SUFFIX)
+        )
+        return [os.path.join(self.journal_dir, name) for name in names]
+
+    def find_interrupted(self) -> Optional[Dict[str, Any]]:
+        """
+        journal ของรอบล่าสุดหากรอบนั้นยังไม่จบ
+
+        Returns:
+            Optional[Dict[str, Any]]: ผลจาก replay หรือ None หากรอบล่าสุดจบแล้ว / ไม่มี journal
+        """
+        journals = self._journals()
+        if not journals:
+            return None
+        summary = replay(journals[-1])
+        return None if summary["finished"] else summary
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """เขียนหนึ่งบรรทัดแล้ว fsync ก่อนคืนค่า"""
+        entry = dict(entry, ts=datetime.now().isoformat(timespec="milliseconds"))
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("ยังไม่ได้เริ่ม journal (start / resume)")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _open(self, journal_path: str) -> None:
+        folder = os.path.dirname(journal_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.journal_path = journal_path
+        self._file = open(journal_path, "a", encoding="utf-8")
+        if self._file.tell() > 0 and not self._ends_with_newline(journal_path):
+            # บรรทัดสุดท้ายเขียนไม่เสร็จ ขึ้นบรรทัดใหม่ก่อนเพื่อไม่ให้บรรทัดถัดไปเสียตาม
+            self._file.write("\n")
+
+    @staticmethod
+    def _ends_with_newline(journal_path: str) -> bool:
+        with open(journal_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def start(self, files: List[Dict[str, Any]]) -> str:
+        """
+        เริ่ม journal ของรอบใหม่และบันทึกทุกไฟล์เป็น queued
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ของรอบนี้
+
+        Returns:
+            str: เส้นทาง journal
+        """
+        name = f"{JOURNAL_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{JOURNAL_SUFFIX}"
+        self._open(os.path.join(self.journal_dir, name))
+        self._append({"event": "run_started", "files": len(files)})
+        for file_info in files:
+            self.record(file_info["path"], QUEUED)
+        return self.journal_path
+
+    def resume(self, files: List[Dict[str, Any]]) -> Set[str]:
+        """
+        ทำต่อจากรอบที่ถูกขัดจังหวะ (เขียนต่อท้าย journal เดิม) หากไม่มีจะเริ่มรอบใหม่
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ของรอบนี้
+
+        Returns:
+            Set[str]: คีย์ของไฟล์ที่บันทึกเสร็จแล้วในรอบเดิม (ตรวจด้วย is_done)
+        """
+        interrupted = self.find_interrupted()
+        if interrupted is None:
+            self.start(files)
+            return set()
+        self._open(interrupted["path"])
+        done = {key for key, state in interrupted["states"].items() if state == SAVED}
+        self._append({"event": "run_resumed", "skipped": len(done)})
+        for file_info in files:
+            if _key(file_info["path"]) not in done:
+                self.record(file_info["path"], QUEUED)
+        return done
+
+    @staticmethod
+    def is_done(done: Set[str], file_path: str) -> bool:
+        """ตรวจว่าไฟล์อยู่ในชุดที่บันทึกเสร็จแล้ว (ผลจาก resume)"""
+        return _key(file_path) in done
+
+    def record(self, file_path: str, state: str, **details: Any) -> None:
+        """
+        บันทึกสถานะของไฟล์
+
+        Args:
+            file_path (str): เส้นทางไฟล์
+            state (str): หนึ่งใน STATES
+            **details: ข้อมูลเพิ่มเติม (เช่น backup_path)
+        """
+        if state not in STATES:
+            raise ValueError(f"ไม่รู้จักสถานะ {state}")
+        self._append(dict(details, event="workbook", key=_key(file_path), path=file_path, state=state))
+
+    def finish(self, result: Optional[Dict[str, Any]] = None) -> None:
+        """
+        บันทึกว่ารอบจบแล้ว ปิดไฟล์ และลบ journal เก่าที่เกินจำนวน keep
+
+        Args:
+            result (Optional[Dict[str, Any]]): สรุปผล (success, failed, total)
+        """
+        summary = {k: (result or {}).get(k) for k in ("success", "failed", "total")}
+        self._append(dict(summary, event="run_finished"))
+        self.close()
+        for old_path in self._journals()[:-self.keep] if self.keep > 0 else []:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """ปิดไฟล์ journal (รอบที่ปิดโดยไม่เรียก finish จะถูกนับเป็นรอบที่ถูกขัดจังหวะ)"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
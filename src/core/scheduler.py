@@ -0,0 +1,105 @@
+"""
+Refresh Scheduler
+จัดลำดับไฟล์ที่จะรีเฟช โดยให้ไฟล์ที่คาดว่าใช้เวลานานที่สุดเริ่มก่อน
+"""
+
+import heapq
+import os
+from typing import Dict, List, Any, Optional, Sequence
+
+from .run_history import RunHistory, percentile
+
+
+def simulate_makespan(durations: Sequence[float], workers: int) -> float:
+    """
+    คำนวณเวลารวม (makespan) เมื่อแจกงานตามลำดับให้ worker ที่ว่างก่อน
+
+    Args:
+        durations (Sequence[float]): ระยะเวลาของแต่ละงานตามลำดับที่จะเริ่ม
+        workers (int): จำนวน worker
+
+    Returns:
+        float: เวลาที่งานสุดท้ายเสร็จ
+    """
+    finish_times = [0.0] * max(1, workers)
+    for duration in durations:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + duration)
+    return max(finish_times)
+
+
+class RefreshScheduler:
+    """คลาสสำหรับจัดลำดับไฟล์แบบ longest-expected-first"""
+
+    def __init__(self, run_history: Optional[RunHistory] = None,
+                 seconds_per_mb: float = 30.0, history_limit: int = 20):
+        """
+        เริ่มต้น RefreshScheduler
+
+        Args:
+            run_history (Optional[RunHistory]): ประวัติการรีเฟช
+            seconds_per_mb (float): ค่าประมาณเวลาต่อขนาดไฟล์ เมื่อไม่มีประวัติเลยทั้งชุด
+            history_limit (int): จำนวนรอบล่าสุดที่ใช้คำนวณเวลาที่คาดไว้
+        """
+        self.run_history = run_history
+        self.seconds_per_mb = seconds_per_mb
+        self.history_limit = history_limit
+
+    def _history_duration(self, file_info: Dict[str, Any]) -> Optional[float]:
+        """เวลามัธยฐานจากประวัติของไฟล์ (None หากไม่มี)"""
+        if self.run_history is None:
+            return None
+        durations = self.run_history.workbook_durations(file_info["name"], self.history_limit)
+        return percentile(durations, 50)
+
+    def expected_durations(self, files: List[Dict[str, Any]]) -> List[float]:
+        """
+        คำนวณเวลาที่คาดว่าจะใช้ของแต่ละไฟล์
+
+        ไฟล์ที่ไม่มีประวัติจะใช้ค่ามัธยฐานของไฟล์อื่นในชุด
+        หากทั้งชุดไม่มีประวัติจะประมาณจากขนาดไฟล์
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+
+        Returns:
+            List[float]: เวลาที่คาดไว้ (วินาที) ตามลำดับเดียวกับ files
+        """
+        known = [self._history_duration(file_info) for file_info in files]
+        known_values = [d for d in known if d is not None]
+        fallback = percentile(known_values, 50)
+
+        expected = []
+        for file_info, duration in zip(files, known):
+            if duration is None:
+                if fallback is not None:
+                    duration = fallback
+                else:
+                    path = file_info.get("path", "")
+                    size_mb = os.path.getsize(path) / (1024 * 1024) if os.path.isfile(path) else 0.0
+                    duration = size_mb * self.seconds_per_mb
+            expected.append(duration)
+        return expected
+
+    def order(self, files: List[Dict[str, Any]],
+              expected: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """
+        เรียงไฟล์ตาม priority (มากก่อน) แล้วตามเวลาที่คาดไว้ (นานก่อน)
+
+        priority กำหนดได้ต่อไฟล์ใน config.json เช่น {"path": "...", "priority": 10}
+        ไฟล์ที่ไม่กำหนดมี priority เป็น 0 และไฟล์ที่ค่าเท่ากันจะคงลำดับเดิม
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ตามลำดับใน config
+            expected (Optional[List[float]]): เวลาที่คาดไว้ (หากคำนวณไว้แล้ว)
+
+        Returns:
+            List[Dict[str, Any]]: รายการไฟล์ที่เรียงแล้ว
+        """
+        if expected is None:
+            expected = self.expected_durations(files)
+        ranked = sorted(
+            range(len(files)),
+            key=lambda i: (-files[i].get("priority", 0), -expected[i], i)
+        )
+        return [files[i] for i in ranked]
@@ -0,0 +1,227 @@
+"""
+Source Fingerprints
+เก็บ fingerprint ของไฟล์ต้นทางที่แต่ละ workbook ใช้ เพื่อข้ามการรีเฟชเมื่อไม่มีอะไรเปลี่ยน
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from powerquery.query_graph import build_query_graph
+except ImportError:
+    # fallback สำหรับการใช้งานปกติ
+    from ..powerquery.query_graph import build_query_graph
+
+# ประเภทแหล่งข้อมูลที่ตรวจการเปลี่ยนแปลงได้จากระบบไฟล์
+FILE_SOURCE_KINDS = {"file", "folder"}
+
+
+def file_digest(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    คำนวณ SHA-256 ของไฟล์
+
+    Args:
+        file_path (str): เส้นทางไฟล์
+        chunk_size (int): ขนาดที่อ่านต่อครั้ง
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceFingerprintStore:
+    """คลาสสำหรับจัดการ fingerprint ของไฟล์ต้นทาง"""
+
+    def __init__(self, state_path: str = "data/source_fingerprints.json"):
+        """
+        เริ่มต้น SourceFingerprintStore
+
+        Args:
+            state_path (str): ไฟล์ JSON สำหรับเก็บ fingerprint
+        """
+        self.state_path = state_path
+        self._state = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self) -> None:
+        """บันทึก state ลงไฟล์ (เขียนไฟล์ชั่วคราวแล้วแทนที่)"""
+        folder = os.path.dirname(self.state_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Dict[str, Any]]:
+        """size และ mtime ของไฟล์ หรือ listing ของโฟลเดอร์"""
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if os.path.isdir(path):
+            entries = []
+            for root, _, files in os.walk(path):
+                for name in files:
+                    full_path = os.path.join(root, name)
+                    stat = os.stat(full_path)
+                    entries.append(f"{os.path.relpath(full_path, path)}|{stat.st_size}|{stat.st_mtime_ns}")
+            listing = hashlib.sha256("\n".join(sorted(entries)).encode("utf-8")).hexdigest()
+            return {"size": len(entries), "mtime_ns": 0, "listing": listing}
+        return None
+
+    def _fingerprint(self, path: str, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        สร้าง fingerprint ใหม่ ใช้ hash เดิมซ้ำหาก size และ mtime ไม่เปลี่ยน
+
+        Returns:
+            Optional[Dict[str, Any]]: fingerprint หรือ None หากไม่พบไฟล์
+        """
+        stat = self._stat(path)
+        if stat is None or "listing" in stat:
+            return stat
+        if previous and previous.get("size") == stat["size"] and previous.get("mtime_ns") == stat["mtime_ns"]:
+            stat["sha256"] = previous.get("sha256")
+        else:
+            stat["sha256"] = file_digest(path)
+        return stat
+
+    def _unchanged(self, path: str, previous: Dict[str, Any]) -> bool:
+        """
+        ตรวจว่าไฟล์ไม่เปลี่ยนจาก fingerprint เดิม
+        คำนวณ hash เฉพาะเมื่อ size เท่าเดิมแต่ mtime เปลี่ยน
+        """
+        stat = self._stat(path)
+        if stat is None:
+            return False
+        if "listing" in stat or "listing" in previous:
+            return stat.get("listing") == previous.get("listing")
+        if stat["size"] != previous.get("size"):
+            return False
+        if stat["mtime_ns"] == previous.get("mtime_ns"):
+            return True
+        return bool(previous.get("sha256")) and file_digest(path) == previous["sha256"]
+
+    @staticmethod
+    def discover_sources(file_path: str) -> Tuple[List[str], bool]:
+        """
+        หาไฟล์ / โฟลเดอร์ต้นทางที่ workbook ใช้
+
+        Args:
+            file_path (str): เส้นทาง workbook
+
+        Returns:
+            Tuple[List[str], bool]: (รายการ path ต้นทาง, ตรวจได้ครบทุกแหล่งหรือไม่)
+                หากมีแหล่งข้อมูลอื่น (ฐานข้อมูล, web) หรือ path ไม่ใช่ค่าคงที่ จะคืน False
+        """
+        try:
+            graph = build_query_graph(file_path)
+        except Exception:
+            return [], False
+        if graph is None:
+            return [], False
+
+        paths = []
+        complete = True
+        for source in graph.external_sources():
+            if source["kind"] == "current_workbook":
+                continue
+            if source["kind"] not in FILE_SOURCE_KINDS or not source["arguments"]:
+                complete = False
+                continue
+            paths.append(source["arguments"][0])
+        return sorted(set(paths)), complete and bool(paths)
+
+    def is_unchanged(self, file_path: str) -> bool:
+        """
+        ตรวจว่าไฟล์ต้นทางทั้งหมดและตัว workbook เองไม่เปลี่ยนตั้งแต่รีเฟชสำเร็จครั้งล่าสุด
+
+        Args:
+            file_path (str): เส้นทาง workbook
+
+        Returns:
+            bool: True หากข้ามการรีเฟชได้
+        """
+        entry = self._state.get(os.path.abspath(file_path))
+        if not entry:
+            return False
+        if not self._unchanged(file_path, entry["workbook"]):
+            return False
+
+        sources, complete = self.discover_sources(file_path)
+        if not complete or sorted(entry["sources"]) != sources:
+            return False
+        return all(self._unchanged(path, entry["sources"][path]) for path in sources)
+
+    def snapshot(self, file_path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        fingerprint ของไฟล์ต้นทาง ณ ตอนนี้ (เรียกก่อนเริ่มรีเฟช แล้วส่งให้ record() เมื่อรีเฟชสำเร็จ)
+
+        หากไฟล์ต้นทางถูกเขียนใหม่ระหว่างรีเฟช fingerprint ที่บันทึกจะไม่ตรงกับไฟล์ รอบถัดไปจึงรีเฟชอีกครั้ง
+
+        Args:
+            file_path (str): เส้นทาง workbook
+
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: path ต้นทาง → fingerprint
+                หรือ None หาก workbook มีแหล่งข้อมูลอื่นที่ไม่ใช่ไฟล์ หรือไม่พบไฟล์ต้นทางบางไฟล์
+        """
+        sources, complete = self.discover_sources(file_path)
+        if not complete:
+            return None
+        previous = self._state.get(os.path.abspath(file_path), {}).get("sources", {})
+        fingerprints = {}
+        for path in sources:
+            fingerprint = self._fingerprint(path, previous.get(path))
+            if fingerprint is None:
+                return None
+            fingerprints[path] = fingerprint
+        return fingerprints
+
+    def record(self, file_path: str, sources: Optional[Dict[str, Dict[str, Any]]]) -> bool:
+        """
+        บันทึก fingerprint หลังรีเฟชสำเร็จ (ต้องเรียก save() เพื่อเขียนลงไฟล์)
+
+        Args:
+            file_path (str): เส้นทาง workbook
+            sources (Optional[Dict[str, Dict[str, Any]]]): fingerprint ของไฟล์ต้นทางจาก snapshot()
+                ที่ได้ก่อนเริ่มรีเฟช (None = ไม่บันทึก)
+
+        Returns:
+            bool: True หากบันทึกได้ (workbook มีเฉพาะแหล่งข้อมูลที่เป็นไฟล์และพบทุกไฟล์)
+        """
+        key = os.path.abspath(file_path)
+        workbook = self._stat(file_path) if sources else None
+        if workbook is None:
+            self._state.pop(key, None)
+            return False
+
+        self._state[key] = {
+            "refreshed_at": datetime.now().isoformat(timespec="seconds"),
+            "workbook": workbook,
+            "sources": sources,
+        }
+        return True
+
+    def forget(self, file_path: str) -> None:
+        """
+        ลบ fingerprint ของ workbook (รอบถัดไปจะรีเฟชแน่นอน)
+
+        Args:
+            file_path (str): เส้นทาง workbook
+        """
+        self._state.pop(os.path.abspath(file_path), None)
@@ -0,0 +1,213 @@
+"""
+Workbook Inspector
+ตรวจไฟล์ workbook โดยไม่ต้องเปิด Excel: อ่านเฉพาะ central directory ของ zip, xl/connections.xml
+และ DataMashup เพื่อหาไฟล์เสียหายก่อนเริ่มรีเฟช
+"""
+
+import json
+import os
+import threading
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
+
+try:
+    from powerquery.datamashup import DataMashupError, read_datamashup, read_package_parts, section_from_parts
+    from powerquery.m_lexer import MSyntaxError
+    from powerquery.query_graph import find_sources, parse_section
+    from powerquery.workbook_parts import read_connections
+except ImportError:
+    # fallback สำหรับการใช้งานปกติ
+    from ..powerquery.datamashup import DataMashupError, read_datamashup, read_package_parts, section_from_parts
+    from ..powerquery.m_lexer import MSyntaxError
+    from ..powerquery.query_graph import find_sources, parse_section
+    from ..powerquery.workbook_parts import read_connections
+
+# นามสกุลที่เป็น zip (Office Open XML) และตรวจเนื้อหาได้
+ZIP_EXTENSIONS = {".xlsx", ".xlsm"}
+EXCEL_EXTENSIONS = ZIP_EXTENSIONS | {".xls"}
+# part ที่ต้องมีในไฟล์ xlsx ทุกไฟล์
+REQUIRED_PARTS = ("[Content_Types].xml", "xl/workbook.xml")
+# เพิ่มเมื่อรูปแบบของผลการตรวจเปลี่ยน เพื่อให้ผลเดิมใน cache ถูกตรวจใหม่
+CACHE_VERSION = 2
+
+
+def source_key(source: Dict[str, Any]) -> Optional[str]:
+    """
+    ชื่อแหล่งข้อมูลสำหรับจัดกลุ่ม workbook ที่ใช้แหล่งเดียวกัน เช่น "sql:db01", "web:api.example.com"
+
+    Args:
+        source (Dict[str, Any]): หนึ่งรายการจาก find_sources
+
+    Returns:
+        Optional[str]: ชื่อแหล่งข้อมูล หรือ None หากระบุไม่ได้ (ไม่มี argument ที่เป็น string)
+            หรือเป็นข้อมูลภายใน workbook
+    """
+    if source["kind"] == "current_workbook" or not source["arguments"]:
+        return None
+    target = source["arguments"][0]
+    if source["kind"] in ("web", "odata", "sharepoint"):
+        target = urlparse(target).netloc or target
+    elif source["kind"] == "file":
+        # ไฟล์ในโฟลเดอร์ / share เดียวกันล่มพร้อมกัน จึงใช้โฟลเดอร์เป็นแหล่งข้อมูล
+        target = target.replace("\\", "/").rsplit("/", 1)[0]
+    return f"{source['kind']}:{target.lower()}"
+
+
+def inspect_workbook(file_path: str) -> Dict[str, Any]:
+    """
+    ตรวจไฟล์ workbook หนึ่งไฟล์
+
+    Args:
+        file_path (str): เส้นทางไฟล์
+
+    Returns:
+        Dict[str, Any]: {"path", "valid", "errors", "inspected", "connections", "queries", "source_types",
+            "sources"} โดย sources คือชื่อแหล่งข้อมูลจาก source_key
+            inspected เป็น False สำหรับไฟล์ที่ไม่ใช่ zip (.xls) ซึ่งตรวจได้เพียงว่ามีไฟล์อยู่
+    """
+    report: Dict[str, Any] = {
+        "path": file_path,
+        "valid": False,
+        "errors": [],
+        "inspected": False,
+        "connections": 0,
+        "queries": [],
+        "source_types": [],
+        "sources": [],
+    }
+    extension = os.path.splitext(file_path)[1].lower()
+    if not os.path.isfile(file_path):
+        report["errors"].append("ไม่พบไฟล์")
+        return report
+    if extension not in EXCEL_EXTENSIONS:
+        report["errors"].append(f"นามสกุลไฟล์ไม่ใช่ Excel ({extension or 'ไม่มี'})")
+        return report
+    if extension not in ZIP_EXTENSIONS:
+        report["valid"] = True
+        return report
+
+    report["inspected"] = True
+    try:
+        # ZipFile อ่านเฉพาะ central directory ส่วนการอ่าน part ด้านล่างตรวจ CRC ของ part นั้นด้วย
+        with zipfile.ZipFile(file_path) as archive:
+            missing = [part for part in REQUIRED_PARTS if part not in archive.NameToInfo]
+            if missing:
+                report["errors"].append(f"ไม่พบ part ที่จำเป็น: {', '.join(missing)}")
+                return report
+            report["connections"] = len(read_connections(archive))
+            data = read_datamashup(archive)
+    except (zipfile.BadZipFile, zlib.error) as e:
+        report["errors"].append(f"ไฟล์ zip เสียหาย: {e}")
+        return report
+    except ET.ParseError as e:
+        report["errors"].append(f"xl/connections.xml เสียหาย: {e}")
+        return report
+    except (DataMashupError, UnicodeDecodeError, OSError, EOFError) as e:
+        report["errors"].append(f"อ่านไฟล์ไม่ได้: {e}")
+        return report
+
+    if data is not None:
+        try:
+            members = parse_section(section_from_parts(read_package_parts(data)))
+        except (DataMashupError, MSyntaxError, UnicodeDecodeError) as e:
+            report["errors"].append(f"Power Query (DataMashup) เสียหาย: {e}")
+            return report
+        sources = [source for member in members for source in find_sources(member["tokens"])]
+        report["queries"] = [member["name"] for member in members if member["shared"]]
+        report["source_types"] = sorted({source["kind"] for source in sources})
+        report["sources"] = sorted({key for key in map(source_key, sources) if key})
+
+    report["valid"] = True
+    return report
+
+
+class WorkbookInspector:
+    """คลาสสำหรับตรวจ workbook หลายไฟล์พร้อมกัน พร้อม cache ตาม (path, size, mtime)"""
+
+    def __init__(self, cache_path: Optional[str] = "data/inspection_cache.json", max_workers: int = 8):
+        """
+        เริ่มต้น WorkbookInspector
+
+        Args:
+            cache_path (Optional[str]): ไฟล์ JSON สำหรับเก็บผลการตรวจ (None = เก็บในหน่วยความจำเท่านั้น)
+            max_workers (int): จำนวน thread ที่ใช้ตรวจพร้อมกัน
+        """
+        self.cache_path = cache_path
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self) -> None:
+        """บันทึก cache ลงไฟล์ (เขียนไฟล์ชั่วคราวแล้วแทนที่)"""
+        if not self.cache_path:
+            return
+        folder = os.path.dirname(self.cache_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._lock:
+            state = dict(self._cache)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.cache_path)
+
+    def inspect(self, file_path: str) -> Dict[str, Any]:
+        """
+        ตรวจไฟล์หนึ่งไฟล์ ใช้ผลเดิมหาก size และ mtime ไม่เปลี่ยน
+
+        Args:
+            file_path (str): เส้นทางไฟล์
+
+        Returns:
+            Dict[str, Any]: ผลจาก inspect_workbook และ "cached" (True หากใช้ผลเดิม)
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        if stat is not None:
+            with self._lock:
+                entry = self._cache.get(key)
+            if entry and entry.get("version") == CACHE_VERSION and \
+                    entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                return dict(entry["report"], path=file_path, cached=True)
+
+        report = inspect_workbook(file_path)
+        with self._lock:
+            if stat is None:
+                self._cache.pop(key, None)
+            else:
+                self._cache[key] = {
+                    "version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "report": report
+                }
+        return dict(report, cached=False)
+
+    def inspect_many(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        ตรวจหลายไฟล์พร้อมกันด้วย thread pool
+
+        Args:
+            file_paths (List[str]): เส้นทางไฟล์
+
+        Returns:
+            Dict[str, Dict[str, Any]]: เส้นทางไฟล์ → ผลการตรวจ
+        """
+        paths = list(dict.fromkeys(file_paths))
+        if len(paths) <= 1 or self.max_workers == 1:
+            return {path: self.inspect(path) for path in paths}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            return dict(zip(paths, executor.map(self.inspect, paths)))
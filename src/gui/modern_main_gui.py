@@ -34,8 +34,11 @@ class ModernMainGUI:
         
         # Initialize managers
         self.config_manager = ConfigManager()
-        self.logger_manager = LoggerManager()
-        self.file_manager = FileManager()
+        self.logger_manager = LoggerManager(self.config_manager.get_setting("log_dir", "data/logs"))
+        self.file_manager = FileManager(
+            self.config_manager.get_setting("backup_dir", "data/backups"),
+            reconcile_hours=self.config_manager.get_setting("backup_catalog_reconcile_hours", 24)
+        )
         self.excel_refresher = ExcelRefresher(self.logger_manager, self.file_manager)
         
         # Variables for file management
@@ -3,11 +3,22 @@ Main Application
 โปรแกรมหลักสำหรับรีเฟช Power Query
 """
 
-from typing import Dict, List, Optional, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable
 from .core.config_manager import ConfigManager
 from .core.logger_manager import LoggerManager
 from .core.file_manager import FileManager
+from .core.failure_policy import TIMEOUT, TRANSIENT, CircuitBreakers, backoff_delay, classify_error, resolve_policy
+from .core.run_history import RunHistory
+from .core.run_journal import BACKED_UP, FAILED, REFRESHING, SAVED, RunJournal
+from .core.scheduler import RefreshScheduler, simulate_makespan
+from .core.refresh_timeouts import TimeoutPlanner
+from .core.source_fingerprints import SourceFingerprintStore
+from .core.workbook_inspector import WorkbookInspector
 from .refreshers.excel_refresher import ExcelRefresher
+from .refreshers.parallel_refresher import ParallelRefresher, create_excel_refresher
+from .refreshers.supervisor import SupervisedRefresher
+import argparse
 import time
 import os
 
@@ -28,11 +39,19 @@ class PowerQueryRefreshApp:
         """
         # สร้าง managers
         self.config_manager = ConfigManager(config_path)
-        self.logger_manager = LoggerManager()
-        self.file_manager = FileManager()
+        self.logger_manager = LoggerManager(self.config_manager.get_setting("log_dir", "data/logs"))
+        self.file_manager = FileManager(
+            self.config_manager.get_setting("backup_dir", "data/backups"),
+            reconcile_hours=self.config_manager.get_setting("backup_catalog_reconcile_hours", 24)
+        )
+        self.run_history = RunHistory(
+            self.config_manager.get_setting("run_history_db", "data/run_history.db")
+        )
         
         # สร้าง refreshers
         self.excel_refresher = ExcelRefresher(self.logger_manager, self.file_manager)
+        # ฟังก์ชันสร้าง refresher สำหรับ worker process (โหมดขนาน)
+        self.refresher_factory = create_excel_refresher
         
         self.logger = self.logger_manager.get_logger()
     
@@ -78,18 +97,376 @@ class PowerQueryRefreshApp:
             print(f"   Path: {backup['path']}")
     
     def cleanup_backups(self) -> None:
-        """ลบไฟล์สำรองเก่า (ใช้ค่าเริ่มต้น 30 วัน)"""
-        days_to_keep = 30
-        deleted_count = self.file_manager.cleanup_old_backups(days_to_keep)
+        """ลบไฟล์สำรองเก่าตามนโยบาย backup_retention"""
+        deleted_count = self.auto_cleanup_backups()
         print(f"\nลบไฟล์สำรองแล้ว {deleted_count} ไฟล์")
         self.logger.info(f"ลบไฟล์สำรองแล้ว {deleted_count} ไฟล์")
     
+    def _refresh_excel_files(self, files: List[Dict[str, Any]],
+                             prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                             journal: Optional[RunJournal] = None) -> Dict[str, int]:
+        """
+        รีเฟชไฟล์ Excel ตามการตั้งค่า (แบบขนานหาก max_workers > 1, ใน worker ที่มีผู้ดูแลหาก supervise_refresh)
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            prepare (Optional[Callable]): ขั้นเตรียมของแต่ละไฟล์ (ตรวจ/สำรอง) ที่ทำใน thread ตามลำดับการรีเฟช
+                ไฟล์แต่ละไฟล์เริ่มรีเฟชทันทีที่ขั้นเตรียมของไฟล์นั้นเสร็จ ขณะที่ไฟล์ถัดไปถูกเตรียมต่อไปพร้อมกัน
+            journal (Optional[RunJournal]): บันทึกสถานะ refreshing / saved / failed ของแต่ละไฟล์
+            
+        ไฟล์ที่ล้มเหลวแบบชั่วคราวจะถูกลองใหม่ตาม retry_policy และไฟล์ที่ใช้แหล่งข้อมูลซึ่ง circuit เปิดอยู่
+        (ล้มเหลวติดกันหลายไฟล์) จะล้มเหลวทันทีโดยไม่เปิด Excel
+            
+        Returns:
+            Dict[str, int]: ผลลัพธ์การรีเฟช (มี "prepared" เป็นผลของขั้นเตรียมตามลำดับไฟล์หากส่ง prepare,
+                "retried" จำนวนไฟล์ที่ถูกลองใหม่ และ "short_circuited" จำนวนไฟล์ที่ถูกข้ามเพราะ circuit เปิด)
+        """
+        settings = self.config_manager.settings
+        max_workers = settings.get("max_workers", 1)
+        
+        fingerprints = None
+        skipped = []
+        if settings.get("incremental_refresh", False):
+            fingerprints = SourceFingerprintStore(
+                settings.get("fingerprint_state_path", "data/source_fingerprints.json")
+            )
+            files, skipped = self._split_unchanged_files(files, fingerprints)
+        
+        if settings.get("schedule_longest_first", True) and len(files) > 1:
+            files = self._schedule_files(files, max_workers)
+        
+        if files:
+            files = self._assign_timeouts(files)
+        
+        executor = None
+        futures: Dict[int, Future] = {}
+        if prepare is not None and files:
+            # สำรองไปแล้วในขั้นเตรียม จึงไม่ต้องสำรองซ้ำใน refresh_file
+            settings = dict(settings, backup_before_refresh=False)
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.get("pipeline_prepare_workers", 2)),
+                thread_name_prefix="prepare"
+            )
+            futures = {id(file_info): executor.submit(prepare, file_info) for file_info in files}
+            
+        retry_policy = self._retry_policy()
+        breakers = CircuitBreakers(retry_policy["breaker_threshold"], retry_policy["breaker_reset_seconds"])
+        sources: Dict[str, List[str]] = {}
+        failures: Dict[str, Dict[str, Any]] = {}
+        inspector = None
+        if prepare is None and breakers.threshold > 0:
+            inspector = WorkbookInspector(settings.get("inspection_cache_path", "data/inspection_cache.json"))
+        
+        def ready(file_info: Dict[str, Any]) -> None:
+            if futures:
+                prepared = futures[id(file_info)].result()
+                sources.setdefault(file_info["path"], prepared.get("sources", []))
+            elif inspector is not None and file_info["path"] not in sources:
+                sources[file_info["path"]] = self._inspect_sources(inspector, file_info)
+            
+            open_source = breakers.blocked(sources.get(file_info["path"], []))
+            if open_source:
+                file_info["skip_reason"] = f"circuit ของแหล่งข้อมูล {open_source} เปิดอยู่"
+            else:
+                file_info.pop("skip_reason", None)
+            self._journal_record(journal, file_info, REFRESHING)
+        
+        def on_result(file_info: Dict[str, Any], success: bool, record: Optional[Dict[str, Any]] = None) -> None:
+            self._journal_record(journal, file_info, SAVED if success else FAILED)
+            file_sources = sources.get(file_info["path"], [])
+            if success:
+                breakers.record(file_sources, True)
+            elif not file_info.get("skip_reason"):
+                kind = classify_error((record or {}).get("error"))
+                if kind in (TRANSIENT, TIMEOUT):
+                    breakers.record(file_sources, False)
+                else:
+                    # ความล้มเหลวแบบถาวรไม่บอกสถานะของแหล่งข้อมูล แต่ต้องคืนสิทธิ์ลองแบบ half-open
+                    breakers.release_trial(file_sources)
+                failures[file_info["path"]] = {"kind": kind, "failed_at": time.monotonic()}
+        
+        try:
+            result = self._run_refresher(files, settings, ready, on_result)
+            result["retried"] = self._retry_failed(
+                files, result, settings, ready, on_result, failures, sources, breakers, retry_policy
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        if prepare is not None:
+            result["prepared"] = [futures[id(file_info)].result() for file_info in files]
+        result["short_circuited"] = sum(
+            1 for file_info, record in zip(files, result["files"])
+            if file_info.get("skip_reason") and not (record or {}).get("success")
+        )
+        if breakers.open_keys():
+            self.logger.warning(f"แหล่งข้อมูลที่ circuit เปิดอยู่: {', '.join(sorted(breakers.open_keys()))}")
+        
+        # บันทึกประวัติการรีเฟช
+        if result.get("total"):
+            try:
+                self.run_history.record_result(result)
+            except Exception as e:
+                self.logger.error(f"ไม่สามารถบันทึกประวัติการรีเฟช: {e}")
+        
+        if fingerprints is not None:
+            self._record_fingerprints(files, result, fingerprints)
+        result["skipped"] = len(skipped)
+        
+        return result
+    
+    def _run_refresher(self, files: List[Dict[str, Any]], settings: Dict[str, Any],
+                       ready: Callable[[Dict[str, Any]], None],
+                       on_result: Callable[..., None]) -> Dict[str, Any]:
+        """
+        เลือก refresher ตามการตั้งค่า (supervised / parallel / ทีละไฟล์) แล้วรีเฟชไฟล์ทั้งชุด
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+            ready (Callable): เรียกก่อนรีเฟชแต่ละไฟล์
+            on_result (Callable): เรียกเมื่อได้ผลของแต่ละไฟล์ (file_info, success, record)
+            
+        Returns:
+            Dict[str, Any]: ผลลัพธ์จาก refresh_multiple_files
+        """
+        max_workers = settings.get("max_workers", 1)
+        if settings.get("supervise_refresh", False):
+            supervised_refresher = SupervisedRefresher(
+                self.logger_manager,
+                refresher_factory=self.refresher_factory,
+                max_workers=max_workers
+            )
+            return supervised_refresher.refresh_multiple_files(files, settings, ready, on_result)
+        if max_workers > 1 and len(files) > 1:
+            parallel_refresher = ParallelRefresher(
+                self.logger_manager,
+                refresher_factory=self.refresher_factory,
+                max_workers=max_workers
+            )
+            return parallel_refresher.refresh_multiple_files(files, settings, ready, on_result)
+        return self.excel_refresher.refresh_multiple_files(files, settings, ready, on_result)
+    
+    def _retry_policy(self) -> Dict[str, float]:
+        """นโยบายลองใหม่ / circuit breaker จาก settings (ใช้ค่าเริ่มต้นหากตั้งค่าไม่ถูกต้อง)"""
+        try:
+            return resolve_policy(self.config_manager.settings.get("retry_policy"))
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"retry_policy ไม่ถูกต้อง ใช้ค่าเริ่มต้นแทน: {e}")
+            return resolve_policy()
+    
+    def _inspect_sources(self, inspector: WorkbookInspector, file_info: Dict[str, Any]) -> List[str]:
+        """แหล่งข้อมูลของไฟล์จากการตรวจ DataMashup (ตรวจไม่ได้ = ไม่ใช้ circuit breaker กับไฟล์นี้)"""
+        try:
+            return inspector.inspect(file_info["path"]).get("sources", [])
+        except Exception as e:
+            self.logger.warning(f"หาแหล่งข้อมูลของ {file_info['name']} ไม่ได้: {e}")
+            return []
+    
+    def _retry_failed(self, files: List[Dict[str, Any]], result: Dict[str, Any], settings: Dict[str, Any],
+                      ready: Callable[[Dict[str, Any]], None], on_result: Callable[..., None],
+                      failures: Dict[str, Dict[str, Any]], sources: Dict[str, List[str]],
+                      breakers: CircuitBreakers, policy: Dict[str, float]) -> int:
+        """
+        ลองรีเฟชไฟล์ที่ล้มเหลวแบบชั่วคราวใหม่ หลังรอแบบ exponential backoff พร้อม jitter
+        (ไฟล์ที่หมดเวลาไม่ถูกลองใหม่ในรอบเดียวกัน)
+        (นับเวลารอจากตอนที่ไฟล์ล้มเหลว จึงรอน้อยลงเมื่อมีไฟล์อื่นรีเฟชอยู่ระหว่างนั้น)
+        
+        แก้ result ให้เป็นผลของครั้งล่าสุดของแต่ละไฟล์ (record มี "attempts")
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ตามลำดับใน result["files"]
+            result (Dict[str, Any]): ผลลัพธ์ของรอบแรก
+            settings (Dict[str, Any]): การตั้งค่า
+            ready (Callable): เรียกก่อนรีเฟชแต่ละไฟล์ (ตรวจ circuit breaker)
+            on_result (Callable): เรียกเมื่อได้ผลของแต่ละไฟล์
+            failures (Dict[str, Dict[str, Any]]): ความล้มเหลวล่าสุดตาม path ({"kind", "failed_at"})
+            sources (Dict[str, List[str]]): แหล่งข้อมูลของแต่ละไฟล์ตาม path
+            breakers (CircuitBreakers): circuit breaker ของแหล่งข้อมูล
+            policy (Dict[str, float]): นโยบายจาก resolve_policy
+            
+        Returns:
+            int: จำนวนไฟล์ที่ถูกลองใหม่ (ไม่นับซ้ำ)
+        """
+        retried = set()
+        attempt = 1
+        while attempt < policy["max_attempts"]:
+            open_sources = set(breakers.open_keys())
+            retry = [
+                index for index, file_info in enumerate(files)
+                if failures.get(file_info["path"], {}).get("kind") == TRANSIENT
+                and not (result["files"][index] or {}).get("success")
+                and not open_sources.intersection(sources.get(file_info["path"], []))
+            ]
+            if not retry:
+                break
+            
+            delay = backoff_delay(attempt, policy["base_seconds"], policy["max_seconds"])
+            wait_seconds = max(failures[files[i]["path"]]["failed_at"] for i in retry) + delay - time.monotonic()
+            self.logger.warning(
+                f"ลองรีเฟชครั้งที่ {attempt + 1} สำหรับ {len(retry)} ไฟล์ที่ล้มเหลวแบบชั่วคราว "
+                f"(รอ {max(0.0, wait_seconds):.0f} วินาที)"
+            )
+            if wait_seconds > 0:
+                time.sleep(wait_seconds)
+            
+            for index in retry:
+                failures.pop(files[index]["path"], None)
+                retried.add(index)
+            attempt += 1
+            retry_result = self._run_refresher([files[i] for i in retry], settings, ready, on_result)
+            for index, record in zip(retry, retry_result["files"]):
+                if record is not None:
+                    record["attempts"] = attempt
+                result["files"][index] = record
+        
+        if retried:
+            success_count = sum(1 for record in result["files"] if record and record["success"])
+            result["success"] = success_count
+            result["failed"] = result["total"] - success_count
+        return len(retried)
+    
+    def _split_unchanged_files(self, files: List[Dict[str, Any]],
+                               fingerprints: SourceFingerprintStore) -> tuple:
+        """
+        แยกไฟล์ที่แหล่งข้อมูลต้นทางไม่เปลี่ยนตั้งแต่รีเฟชสำเร็จครั้งล่าสุด
+        
+        ไฟล์ที่ต้องรีเฟชจะถูกคัดลอกพร้อม "source_snapshot" (fingerprint ของไฟล์ต้นทางก่อนเริ่มรีเฟช)
+        ซึ่งจะถูกบันทึกเมื่อรีเฟชสำเร็จ ไฟล์ต้นทางที่ถูกเขียนใหม่ระหว่างรีเฟชจึงไม่ถูกนับว่ารีเฟชแล้ว
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            fingerprints (SourceFingerprintStore): fingerprint ที่บันทึกไว้
+            
+        Returns:
+            tuple: (ไฟล์ที่ต้องรีเฟช, ไฟล์ที่ข้าม)
+        """
+        to_refresh, skipped = [], []
+        for file_info in files:
+            try:
+                unchanged = fingerprints.is_unchanged(file_info["path"])
+            except Exception as e:
+                self.logger.warning(f"ตรวจ fingerprint ของ {file_info['name']} ไม่ได้: {e}")
+                unchanged = False
+            if unchanged:
+                skipped.append(file_info)
+                self.logger.info(f"ข้าม {file_info['name']}: แหล่งข้อมูลไม่เปลี่ยนแปลง")
+                continue
+            
+            try:
+                snapshot = fingerprints.snapshot(file_info["path"])
+            except Exception as e:
+                self.logger.warning(f"สร้าง fingerprint ของ {file_info['name']} ไม่ได้: {e}")
+                snapshot = None
+            to_refresh.append(dict(file_info, source_snapshot=snapshot))
+        
+        if skipped:
+            self.logger.info(f"ข้ามไฟล์ที่ไม่มีการเปลี่ยนแปลง {len(skipped)}/{len(files)} ไฟล์")
+        return to_refresh, skipped
+    
+    def _record_fingerprints(self, files: List[Dict[str, Any]], result: Dict[str, Any],
+                             fingerprints: SourceFingerprintStore) -> None:
+        """
+        บันทึก fingerprint ก่อนรีเฟชของไฟล์ที่รีเฟชสำเร็จ (กับ stat ของ workbook หลังบันทึก)
+        และลบของไฟล์ที่ล้มเหลว
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ตามลำดับใน result["files"] (มี "source_snapshot")
+            result (Dict[str, Any]): ผลลัพธ์จาก refresh_multiple_files
+            fingerprints (SourceFingerprintStore): fingerprint ที่บันทึกไว้
+        """
+        try:
+            for file_info, record in zip(files, result.get("files", [])):
+                if record and record["success"]:
+                    fingerprints.record(file_info["path"], file_info.get("source_snapshot"))
+                else:
+                    fingerprints.forget(file_info["path"])
+            fingerprints.save()
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถบันทึก fingerprint ของแหล่งข้อมูล: {e}")
+    
+    def _schedule_files(self, files: List[Dict[str, Any]], max_workers: int) -> List[Dict[str, Any]]:
+        """
+        เรียงไฟล์ให้ไฟล์ที่คาดว่าใช้เวลานานเริ่มก่อน (ตามประวัติการรีเฟช)
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์ตามลำดับใน config
+            max_workers (int): จำนวน worker
+            
+        Returns:
+            List[Dict[str, Any]]: รายการไฟล์ที่เรียงแล้ว
+        """
+        try:
+            scheduler = RefreshScheduler(self.run_history)
+            expected = scheduler.expected_durations(files)
+            ordered = scheduler.order(files, expected)
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถจัดลำดับไฟล์: {e}")
+            return files
+        
+        expected_by_id = {id(f): d for f, d in zip(files, expected)}
+        before = simulate_makespan(expected, max_workers)
+        after = simulate_makespan([expected_by_id[id(f)] for f in ordered], max_workers)
+        self.logger.info(
+            f"จัดลำดับไฟล์แบบ longest-first: เวลาที่คาดไว้ {before / 60:.1f} → {after / 60:.1f} นาที"
+        )
+        return ordered
+    
+    def _assign_timeouts(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        กำหนดเวลาสูงสุดของแต่ละไฟล์ (timeout_seconds) จากประวัติของไฟล์นั้น หรือค่าเฉพาะไฟล์ใน config
+        
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            
+        Returns:
+            List[Dict[str, Any]]: รายการไฟล์ใหม่ที่มี timeout_seconds (สำเนาของรายการเดิมหากคำนวณไม่ได้)
+        """
+        settings = self.config_manager.settings
+        default_seconds = settings.get("refresh_timeout_minutes", 30) * 60
+        try:
+            planner = TimeoutPlanner(
+                self.run_history if settings.get("adaptive_timeouts", True) else None,
+                default_seconds,
+                settings.get("adaptive_timeout_policy")
+            )
+            assigned, sources = planner.assign(files)
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถคำนวณเวลาสูงสุดของแต่ละไฟล์: {e}")
+            # คัดลอกเสมอ เพราะระหว่างรอบจะมีการเขียนสถานะ (skip_reason) ลงใน dict ของไฟล์
+            return [dict(file_info) for file_info in files]
+        
+        shortest = min(file_info["timeout_seconds"] for file_info in assigned)
+        self.logger.info(
+            f"เวลาสูงสุดต่อไฟล์: จากประวัติ {sources['history']}, จาก config {sources['config']}, "
+            f"ค่าเริ่มต้น {sources['default']} ไฟล์ (ต่ำสุด {shortest / 60:.1f} นาที)"
+        )
+        return assigned
+    
+    def _log_refresh_timings(self, result: Dict[str, Any], top: int = 5) -> None:
+        """
+        แสดงไฟล์ที่ใช้เวลารีเฟชนานที่สุดพร้อมขั้นตอนที่ใช้เวลามากที่สุด
+        
+        Args:
+            result (Dict[str, Any]): ผลลัพธ์จาก refresh_multiple_files
+            top (int): จำนวนไฟล์ที่จะแสดง
+        """
+        records = [r for r in result.get("files", []) if r]
+        if not records:
+            return
+        
+        print(f"\nไฟล์ที่ใช้เวลานานที่สุด:")
+        for record in sorted(records, key=lambda r: r["total_seconds"], reverse=True)[:top]:
+            phases = record["phases"]
+            slowest = max(phases, key=phases.get) if phases else "-"
+            message = (f"{record['name']}: {record['total_seconds']:.1f} วินาที "
+                       f"(ช้าสุด: {slowest} {phases.get(slowest, 0):.1f} วินาที)")
+            print(f"  {message}")
+            self.logger.info(f"เวลารีเฟช {message}")
+    
     def refresh_all_excel(self) -> None:
         """รีเฟชไฟล์ Excel ทั้งหมด"""
-        result = self.excel_refresher.refresh_multiple_files(
-            self.config_manager.excel_files,
-            self.config_manager.settings
-        )
+        result = self._refresh_excel_files(self.config_manager.excel_files)
         
         print(f"\nรีเฟช Excel เสร็จสิ้น:")
         print(f"สำเร็จ: {result['success']}")
@@ -101,10 +478,7 @@ class PowerQueryRefreshApp:
         print("\n=== เริ่มรีเฟช Excel ===")
         
         # รีเฟช Excel
-        excel_result = self.excel_refresher.refresh_multiple_files(
-            self.config_manager.excel_files,
-            self.config_manager.settings
-        )
+        excel_result = self._refresh_excel_files(self.config_manager.excel_files)
         
         # แสดงผลลัพธ์
         print("\nสรุปผลการรีเฟช:")
@@ -113,27 +487,46 @@ class PowerQueryRefreshApp:
     
     def verify_files(self) -> Dict[str, Any]:
         """
-        ตรวจสอบไฟล์ทั้งหมดที่ตั้งค่าไว้
+        ตรวจสอบไฟล์ทั้งหมดที่ตั้งค่าไว้ (ตรวจโครงสร้างไฟล์และ Power Query โดยไม่เปิด Excel)
         
         Returns:
-            Dict[str, Any]: ผลการตรวจสอบไฟล์
+            Dict[str, Any]: ผลการตรวจสอบไฟล์ (รายละเอียดของแต่ละไฟล์อยู่ใน "inspections")
         """
         self.logger.info("=== เริ่มตรวจสอบไฟล์ ===")
         
         result = {
             "excel_files": {"valid": [], "invalid": []},
+            "inspections": {},
             "total_valid": 0,
             "total_invalid": 0
         }
         
+        settings = self.config_manager.settings
+        inspector = WorkbookInspector(
+            settings.get("inspection_cache_path", "data/inspection_cache.json"),
+            settings.get("verify_workers", 8)
+        )
+        excel_files = self.config_manager.excel_files
+        try:
+            inspections = inspector.inspect_many([file_info["path"] for file_info in excel_files])
+        except Exception as e:
+            self.logger.error(f"ตรวจโครงสร้างไฟล์ไม่ได้ ใช้การตรวจแบบเดิม: {e}")
+            inspections = {}
+        
         # ตรวจสอบไฟล์ Excel
-        for file_info in self.config_manager.excel_files:
-            if self.file_manager.file_exists(file_info["path"]) and self.file_manager.is_excel_file(file_info["path"]):
+        for file_info in excel_files:
+            inspection = inspections.get(file_info["path"])
+            if inspection is not None:
+                result["inspections"][file_info["path"]] = inspection
+            if self._check_inspection(file_info, inspection):
                 result["excel_files"]["valid"].append(file_info)
-                self.logger.info(f"✓ Excel: {file_info['name']} - {file_info['path']}")
             else:
                 result["excel_files"]["invalid"].append(file_info)
-                self.logger.error(f"✗ Excel: {file_info['name']} - {file_info['path']} (ไม่พบหรือไฟล์ไม่ถูกต้อง)")
+        
+        try:
+            inspector.save()
+        except OSError as e:
+            self.logger.warning(f"ไม่สามารถบันทึก cache การตรวจไฟล์: {e}")
         
         # คำนวณสรุป
         result["total_valid"] = len(result["excel_files"]["valid"])
@@ -143,6 +536,86 @@ class PowerQueryRefreshApp:
         
         return result
     
+    def _check_inspection(self, file_info: Dict[str, Any], inspection: Optional[Dict[str, Any]]) -> bool:
+        """
+        สรุปและบันทึก log ผลการตรวจไฟล์หนึ่งไฟล์
+        
+        Args:
+            file_info (Dict[str, Any]): ข้อมูลไฟล์
+            inspection (Optional[Dict[str, Any]]): ผลจาก WorkbookInspector (None = ตรวจแบบเดิม)
+            
+        Returns:
+            bool: True หากไฟล์ถูกต้อง
+        """
+        if inspection is None:
+            valid = self.file_manager.file_exists(file_info["path"]) and \
+                self.file_manager.is_excel_file(file_info["path"])
+            reason = "ไม่พบหรือไฟล์ไม่ถูกต้อง"
+        else:
+            valid = inspection["valid"]
+            reason = "; ".join(inspection["errors"])
+        
+        if valid:
+            details = ""
+            if inspection and inspection["inspected"]:
+                details = f" (การเชื่อมต่อ {inspection['connections']}, query {len(inspection['queries'])}"
+                if inspection["source_types"]:
+                    details += f", แหล่งข้อมูล {', '.join(inspection['source_types'])}"
+                details += ")"
+            self.logger.info(f"✓ Excel: {file_info['name']} - {file_info['path']}{details}")
+        else:
+            self.logger.error(f"✗ Excel: {file_info['name']} - {file_info['path']} ({reason})")
+        return valid
+    
+    def _journal_record(self, journal: Optional[RunJournal], file_info: Dict[str, Any],
+                        state: str, **details: Any) -> None:
+        """บันทึกสถานะลง journal (เขียนไม่ได้จะบันทึก log แต่ไม่หยุดการรีเฟช)"""
+        if journal is None:
+            return
+        try:
+            journal.record(file_info["path"], state, **details)
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถบันทึก journal ของ {file_info['name']}: {e}")
+    
+    def _prepare_file(self, file_info: Dict[str, Any], inspector: WorkbookInspector,
+                      journal: Optional[RunJournal] = None) -> Dict[str, Any]:
+        """
+        ตรวจและสำรองไฟล์หนึ่งไฟล์ก่อนรีเฟช (ขั้นแรกของ pipeline ใน run_auto_refresh ทำงานใน thread)
+        
+        Args:
+            file_info (Dict[str, Any]): ข้อมูลไฟล์
+            inspector (WorkbookInspector): ตัวตรวจไฟล์ที่ใช้ร่วมกันทั้งรอบ
+            journal (Optional[RunJournal]): บันทึกสถานะ backed-up เมื่อสำรองสำเร็จ
+            
+        Returns:
+            Dict[str, Any]: {"valid", "backup_path", "backup_failed", "sources"}
+        """
+        prepared = {"valid": False, "backup_path": None, "backup_failed": False, "sources": []}
+        try:
+            try:
+                inspection = inspector.inspect(file_info["path"])
+            except Exception as e:
+                self.logger.error(f"ตรวจโครงสร้างไฟล์ {file_info['name']} ไม่ได้ ใช้การตรวจแบบเดิม: {e}")
+                inspection = None
+            prepared["valid"] = self._check_inspection(file_info, inspection)
+            if inspection is not None:
+                prepared["sources"] = inspection.get("sources", [])
+            
+            if self.file_manager.file_exists(file_info["path"]):
+                backup_path = self.file_manager.backup_file(
+                    file_info["path"], True, self.config_manager.settings.get("backup_mode", "xlsx")
+                )
+                if backup_path:
+                    prepared["backup_path"] = backup_path
+                    self.logger.info(f"✓ สำรอง Excel: {file_info['name']} → {backup_path}")
+                    self._journal_record(journal, file_info, BACKED_UP, backup_path=backup_path)
+                else:
+                    prepared["backup_failed"] = True
+                    self.logger.error(f"✗ ไม่สามารถสำรอง Excel: {file_info['name']}")
+        except Exception as e:
+            self.logger.error(f"เตรียมไฟล์ {file_info['name']} ไม่สำเร็จ: {e}")
+        return prepared
+    
     def create_backups(self) -> Dict[str, Any]:
         """
         สร้างไฟล์สำรองสำหรับไฟล์ที่จะรีเฟช
@@ -161,7 +634,9 @@ class PowerQueryRefreshApp:
         # สำรองไฟล์ Excel
         for file_info in self.config_manager.excel_files:
             if self.file_manager.file_exists(file_info["path"]):
-                backup_path = self.file_manager.backup_file(file_info["path"], True)
+                backup_path = self.file_manager.backup_file(
+                    file_info["path"], True, self.config_manager.settings.get("backup_mode", "xlsx")
+                )
                 if backup_path:
                     backup_result["success"] += 1
                     backup_result["backup_paths"].append(backup_path)
@@ -174,84 +649,175 @@ class PowerQueryRefreshApp:
         
         return backup_result
     
-    def auto_cleanup_backups(self, days_to_keep: int = 30) -> int:
+    def _retention_overrides(self) -> Dict[str, Dict[str, Any]]:
+        """นโยบายเฉพาะไฟล์ (backup_retention ใน excel_files) ตามชื่อโฟลเดอร์สำรองของ workbook"""
+        return {
+            os.path.splitext(os.path.basename(file_info["path"]))[0]: file_info["backup_retention"]
+            for file_info in self.config_manager.excel_files
+            if file_info.get("backup_retention")
+        }
+    
+    def auto_cleanup_backups(self) -> int:
         """
-        ลบไฟล์สำรองเก่าแบบอัตโนมัติ
+        ลบไฟล์สำรองเก่าแบบอัตโนมัติตามนโยบาย GFS (settings["backup_retention"] และค่าเฉพาะไฟล์)
         
-        Args:
-            days_to_keep (int): จำนวนวันที่จะเก็บไฟล์สำรอง
-            
         Returns:
             int: จำนวนไฟล์ที่ถูกลบ
         """
-        self.logger.info(f"=== เริ่มลบไฟล์สำรองเก่า (เก็บไว้ {days_to_keep} วัน) ===")
+        policy = self.config_manager.settings.get("backup_retention")
+        self.logger.info(f"=== เริ่มลบไฟล์สำรองเก่า (นโยบาย: {policy or 'ค่าเริ่มต้น'}) ===")
         
-        deleted_count = self.file_manager.cleanup_old_backups(days_to_keep)
+        deleted_count = self.file_manager.prune_backups(policy, self._retention_overrides())
         
         self.logger.info(f"ลบไฟล์สำรองแล้ว {deleted_count} ไฟล์")
         
         return deleted_count
+    
+    def start_backup_cleanup(self) -> Future:
+        """
+        เริ่มลบไฟล์สำรองเก่าใน thread พื้นหลัง เพื่อไม่ให้รอบการรีเฟชต้องรอ
+        
+        Returns:
+            Future: ผลลัพธ์เป็นจำนวนไฟล์ที่ถูกลบ
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup-cleanup")
+        future = executor.submit(self.auto_cleanup_backups)
+        executor.shutdown(wait=False)
+        return future
 
-    def run(self) -> None:
-        """เริ่มการทำงานแอปพลิเคชันแบบอัตโนมัติ"""
+    def run(self, resume: bool = False) -> None:
+        """
+        เริ่มการทำงานแอปพลิเคชันแบบอัตโนมัติ
+        
+        Args:
+            resume (bool): ทำต่อจากรอบที่ถูกขัดจังหวะ (ดู run_auto_refresh)
+        """
         self.logger.info("=== โปรแกรมรีเฟช Excel เริ่มทำงาน ===")
         print("=== โปรแกรมรีเฟช Excel ===")
-        print("โปรแกรมจะทำงานแบบอัตโนมัติ: ตรวจสอบไฟล์ → แบ็กอัพ → ลบไฟล์เก่า → รีเฟช Excel")
+        print("โปรแกรมจะทำงานแบบอัตโนมัติ: ตรวจสอบไฟล์ → แบ็กอัพ → รีเฟช Excel ทีละไฟล์แบบ pipeline (ลบไฟล์สำรองเก่าเบื้องหลัง)")
         
         # รันกระบวนการอัตโนมัติทันที
-        self.run_auto_refresh()
+        self.run_auto_refresh(resume)
         
         print("\nโปรแกรมทำงานเสร็จสิ้น")
         self.logger.info("=== โปรแกรมจบการทำงาน ===")
 
-    def run_auto_refresh(self) -> None:
-        """รันกระบวนการรีเฟชอัตโนมัติ"""
+    def run_auto_refresh(self, resume: bool = False) -> None:
+        """
+        รันกระบวนการรีเฟชอัตโนมัติแบบ pipeline
+        
+        แต่ละไฟล์ผ่านขั้นตรวจ → สำรอง → รีเฟชของตัวเอง: ไฟล์ถัดไปถูกตรวจและสำรองระหว่างที่ไฟล์ก่อนหน้ารีเฟช
+        และการลบไฟล์สำรองเก่าทำงานเบื้องหลังไปพร้อมกัน ไฟล์แรกจึงเริ่มรีเฟชได้โดยไม่ต้องรอสำรองครบทุกไฟล์
+        สถานะของแต่ละไฟล์ถูกบันทึกลง run journal
+        
+        Args:
+            resume (bool): ทำต่อจากรอบที่ถูกขัดจังหวะ โดยข้ามไฟล์ที่บันทึกเสร็จแล้วในรอบนั้น
+        """
         self.logger.info("=== เริ่มการรีเฟชอัตโนมัติ ===")
         
+        journal = None
         try:
-            # ขั้นตอนที่ 1: ตรวจสอบไฟล์
-            print("\n1. ตรวจสอบไฟล์ที่ตั้งค่าไว้...")
-            verification_result = self.verify_files()
-            
-            if verification_result["total_invalid"] > 0:
-                self.logger.warning(f"พบไฟล์ไม่ถูกต้อง {verification_result['total_invalid']} ไฟล์ แต่จะดำเนินการต่อ")
+            settings = self.config_manager.settings
+            files = self.config_manager.excel_files
             
-            # ขั้นตอนที่ 2: สร้างไฟล์สำรอง
-            print("\n2. สร้างไฟล์สำรอง...")
-            backup_result = self.create_backups()
+            journal = RunJournal(settings.get("run_journal_dir", "data/journal"))
+            try:
+                if resume:
+                    done = journal.resume(files)
+                    resumed = [f for f in files if not journal.is_done(done, f["path"])]
+                    if done:
+                        print(f"\nทำต่อจากรอบที่ถูกขัดจังหวะ: ข้ามไฟล์ที่เสร็จแล้ว {len(files) - len(resumed)} ไฟล์")
+                        self.logger.info(
+                            f"ทำต่อจาก {journal.journal_path}: ข้าม {len(files) - len(resumed)} ไฟล์ "
+                            f"เหลือ {len(resumed)} ไฟล์"
+                        )
+                    files = resumed
+                else:
+                    journal.start(files)
+            except Exception as e:
+                self.logger.error(f"ไม่สามารถเปิด run journal (จะรีเฟชต่อโดยไม่บันทึก): {e}")
+                journal = None
             
-            if backup_result["failed"] > 0:
-                self.logger.warning(f"มีไฟล์ที่ไม่สามารถสำรองได้ {backup_result['failed']} ไฟล์")
+            # ลบไฟล์สำรองเก่า (ทำงานเบื้องหลังตลอดรอบ)
+            print("\n1. ลบไฟล์สำรองเก่า (เบื้องหลัง)...")
+            cleanup_future = self.start_backup_cleanup()
             
-            # ขั้นตอนที่ 3: ลบไฟล์สำรองเก่า
-            print("\n3. ลบไฟล์สำรองเก่า...")
-            deleted_count = self.auto_cleanup_backups(30)
+            # ตรวจสอบ → สำรอง → รีเฟช ทีละไฟล์แบบ pipeline
+            print("\n2. ตรวจสอบ สำรอง และรีเฟชไฟล์ Excel...")
+            self.logger.info("=== เริ่มรีเฟช Excel (ตรวจสอบและสำรองไฟล์ถัดไประหว่างรีเฟช) ===")
+            inspector = WorkbookInspector(
+                settings.get("inspection_cache_path", "data/inspection_cache.json"),
+                settings.get("verify_workers", 8)
+            )
+            excel_result = self._refresh_excel_files(
+                files,
+                prepare=lambda file_info: self._prepare_file(file_info, inspector, journal),
+                journal=journal
+            )
+            if journal is not None:
+                journal.finish(excel_result)
+            try:
+                inspector.save()
+            except OSError as e:
+                self.logger.warning(f"ไม่สามารถบันทึก cache การตรวจไฟล์: {e}")
             
-            # ขั้นตอนที่ 4: รีเฟชไฟล์ Excel
-            print("\n4. เริ่มรีเฟชไฟล์ Excel...")
+            prepared = excel_result.get("prepared", [])
+            total_valid = sum(1 for p in prepared if p["valid"])
+            total_invalid = len(prepared) - total_valid
+            backup_success = sum(1 for p in prepared if p["backup_path"])
+            backup_failed = sum(1 for p in prepared if p["backup_failed"])
+            if total_invalid > 0:
+                self.logger.warning(f"พบไฟล์ไม่ถูกต้อง {total_invalid} ไฟล์ แต่ได้ดำเนินการต่อ")
+            if backup_failed > 0:
+                self.logger.warning(f"มีไฟล์ที่ไม่สามารถสำรองได้ {backup_failed} ไฟล์")
             
-            # รีเฟช Excel
-            self.logger.info("=== เริ่มรีเฟช Excel ===")
-            excel_result = self.excel_refresher.refresh_multiple_files(
-                self.config_manager.excel_files,
-                self.config_manager.settings
-            )
+            try:
+                deleted_count = cleanup_future.result()
+            except Exception as e:
+                self.logger.error(f"ไม่สามารถลบไฟล์สำรองเก่า: {e}")
+                deleted_count = 0
             
             # สรุปผลลัพธ์
             print("\n=== สรุปผลการรีเฟชอัตโนมัติ ===")
-            print(f"ไฟล์ที่ตรวจสอบ: ถูกต้อง {verification_result['total_valid']}, ไม่ถูกต้อง {verification_result['total_invalid']}")
-            print(f"ไฟล์สำรอง: สำเร็จ {backup_result['success']}, ล้มเหลว {backup_result['failed']}")
+            print(f"ไฟล์ที่ตรวจสอบ: ถูกต้อง {total_valid}, ไม่ถูกต้อง {total_invalid}")
+            print(f"ไฟล์สำรอง: สำเร็จ {backup_success}, ล้มเหลว {backup_failed}")
             print(f"ไฟล์สำรองเก่าที่ลบ: {deleted_count} ไฟล์")
             print(f"Excel - สำเร็จ: {excel_result['success']}, ล้มเหลว: {excel_result['failed']}")
+            if excel_result.get("skipped"):
+                print(f"ข้ามเพราะแหล่งข้อมูลไม่เปลี่ยน: {excel_result['skipped']} ไฟล์")
+            if excel_result.get("retried"):
+                print(f"ลองรีเฟชใหม่ (ล้มเหลวแบบชั่วคราว): {excel_result['retried']} ไฟล์")
+            if excel_result.get("short_circuited"):
+                print(f"ข้ามเพราะแหล่งข้อมูลล่ม (circuit เปิด): {excel_result['short_circuited']} ไฟล์")
             print(f"รวมทั้งหมด: {excel_result['total']} ไฟล์")
+            self._log_refresh_timings(excel_result)
             
             self.logger.info("=== การรีเฟชอัตโนมัติเสร็จสิ้น ===")
             
         except Exception as e:
             self.logger.error(f"เกิดข้อผิดพลาดในการรีเฟชอัตโนมัติ: {e}")
             print(f"เกิดข้อผิดพลาด: {e}")
+        finally:
+            # รอบที่ไม่ได้ finish จะถูกนับเป็นรอบที่ถูกขัดจังหวะ และทำต่อได้ด้วย --resume
+            if journal is not None:
+                journal.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    จุดเริ่มต้นแบบ command line
+
+    Args:
+        argv (Optional[List[str]]): argument (None = sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="รีเฟช Power Query ใน Excel แบบอัตโนมัติ")
+    parser.add_argument("--config", default="config/config.json", help="เส้นทางไฟล์การตั้งค่า")
+    parser.add_argument("--resume", action="store_true",
+                        help="ทำต่อจากรอบที่ถูกขัดจังหวะ โดยข้ามไฟล์ที่บันทึกเสร็จแล้ว")
+    args = parser.parse_args(argv)
+    
+    app = PowerQueryRefreshApp(args.config)
+    app.run(resume=args.resume)
 
 
 if __name__ == "__main__":
-    app = PowerQueryRefreshApp()
-    app.run()
+    main()
@@ -0,0 +1,4 @@
+"""
+Power Query package
+โมดูลสำหรับอ่านและวิเคราะห์ Power Query (M) ที่ฝังอยู่ในไฟล์ Excel
+"""
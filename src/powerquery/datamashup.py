@@ -0,0 +1,115 @@
+"""
+DataMashup Reader
+อ่าน Power Query package (DataMashup) ที่ฝังอยู่ใน customXml ของไฟล์ xlsx
+"""
+
+import base64
+import io
+import re
+import struct
+import zipfile
+from typing import Dict, Optional
+
+DATAMASHUP_NAMESPACE = "http://schemas.microsoft.com/DataMashup"
+
+_DATAMASHUP_BODY = re.compile(r"<DataMashup\b[^>]*>\s*([A-Za-z0-9+/=\s]+?)\s*</DataMashup>", re.S)
+
+
+class DataMashupError(Exception):
+    """ข้อผิดพลาดเมื่ออ่านหรือถอดรหัส DataMashup ไม่ได้"""
+
+
+def _decode_xml_bytes(raw: bytes) -> str:
+    """แปลง bytes ของ customXml เป็นข้อความ (รองรับ UTF-16 และ UTF-8)"""
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return raw.decode("utf-16")
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8")
+    return raw.decode("utf-8", "replace")
+
+
+def read_datamashup(archive: zipfile.ZipFile) -> Optional[bytes]:
+    """
+    หา customXml/item*.xml ที่เป็น DataMashup แล้วถอด base64
+
+    Args:
+        archive (zipfile.ZipFile): ไฟล์ xlsx ที่เปิดแล้ว
+
+    Returns:
+        Optional[bytes]: binary ของ DataMashup หรือ None หากไม่มี Power Query
+    """
+    for name in archive.namelist():
+        if not (name.startswith("customXml/item") and name.endswith(".xml")) or "Props" in name:
+            continue
+        text = _decode_xml_bytes(archive.read(name))
+        if DATAMASHUP_NAMESPACE not in text:
+            continue
+        match = _DATAMASHUP_BODY.search(text)
+        if not match:
+            raise DataMashupError(f"{name}: ไม่พบข้อมูลใน DataMashup")
+        try:
+            return base64.b64decode("".join(match.group(1).split()))
+        except ValueError as e:
+            raise DataMashupError(f"{name}: base64 ไม่ถูกต้อง: {e}")
+    return None
+
+
+def read_package_parts(data: bytes) -> Dict[str, bytes]:
+    """
+    แยก package parts (zip ภายใน) ออกจาก DataMashup binary
+
+    โครงสร้าง: version (int32) | ความยาว package (int32) | package zip | permissions | metadata | bindings
+
+    Args:
+        data (bytes): binary ของ DataMashup
+
+    Returns:
+        Dict[str, bytes]: ชื่อไฟล์ใน package → เนื้อหา (เช่น "Formulas/Section1.m")
+    """
+    if len(data) < 8:
+        raise DataMashupError("DataMashup สั้นเกินไป")
+    version, package_length = struct.unpack_from("<ii", data, 0)
+    if version != 0:
+        raise DataMashupError(f"ไม่รองรับ DataMashup version {version}")
+    if package_length < 0 or 8 + package_length > len(data):
+        raise DataMashupError("ความยาว package parts ไม่ถูกต้อง")
+
+    try:
+        with zipfile.ZipFile(io.BytesIO(data[8:8 + package_length])) as package:
+            return {name: package.read(name) for name in package.namelist()}
+    except zipfile.BadZipFile as e:
+        raise DataMashupError(f"package parts เสียหาย: {e}")
+
+
+def section_from_parts(parts: Dict[str, bytes]) -> str:
+    """
+    ดึงโค้ด M จาก package parts
+
+    Args:
+        parts (Dict[str, bytes]): ผลจาก read_package_parts
+
+    Returns:
+        str: โค้ด M ของ section
+    """
+    for name, content in parts.items():
+        if name.startswith("Formulas/") and name.endswith(".m"):
+            return content.decode("utf-8-sig")
+    raise DataMashupError("ไม่พบ Formulas/Section1.m ใน package")
+
+
+def read_section_document(file_path: str) -> Optional[str]:
+    """
+    อ่านโค้ด M (Formulas/Section1.m) จากไฟล์ xlsx
+
+    Args:
+        file_path (str): เส้นทางไฟล์ xlsx
+
+    Returns:
+        Optional[str]: โค้ด M หรือ None หากไฟล์ไม่มี Power Query
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        data = read_datamashup(archive)
+    if data is None:
+        return None
+
+    return section_from_parts(read_package_parts(data))
@@ -0,0 +1,180 @@
+"""
+Headless Engine
+รีเฟช query ใน workbook ด้วย evaluator ของ M แทน Excel (ใช้ได้บน Linux)
+รองรับเฉพาะฟังก์ชันใน m_library หาก workbook ใช้ส่วนที่ไม่รองรับจะแจ้ง UnsupportedFeature
+"""
+
+import time
+import zipfile
+from typing import Any, Dict, List, Optional, Set
+
+from .datamashup import read_datamashup, read_package_parts, section_from_parts
+from .m_evaluator import Evaluator, MEvaluationError, UnsupportedFeature, force
+from .m_lexer import MSyntaxError
+from .m_library import standard_library
+from .m_parser import FunctionExpr, Identifier, LetExpr, iter_nodes, parse_expression
+from .m_table import Table
+from .query_graph import QueryGraph, parse_section
+from .sheet_writer import write_results
+from .workbook_parts import read_connections, read_query_table_loads
+
+
+def unsupported_names(expressions: Dict[str, Any], library: Dict[str, Any]) -> Set[str]:
+    """
+    หาชื่อที่ไม่ใช่ member ของ section, ตัวแปรภายใน หรือฟังก์ชันที่รองรับ
+
+    Args:
+        expressions (Dict[str, Any]): ชื่อ query → syntax tree
+        library (Dict[str, Any]): ผลจาก standard_library
+
+    Returns:
+        Set[str]: ชื่อที่ evaluator ประมวลผลไม่ได้
+    """
+    unknown = set()
+    for node in expressions.values():
+        local_names = {"_"}
+        identifiers = []
+        for child in iter_nodes(node):
+            if isinstance(child, LetExpr):
+                local_names.update(name for name, _ in child.bindings)
+            elif isinstance(child, FunctionExpr):
+                local_names.update(child.params)
+            elif isinstance(child, Identifier):
+                identifiers.append(child.name)
+        unknown.update(
+            name for name in identifiers
+            if name not in local_names and name not in expressions and name not in library
+        )
+    return unknown
+
+
+class HeadlessWorkbook:
+    """query ของ workbook หนึ่งไฟล์ที่อ่านและแปลงเป็น syntax tree แล้ว"""
+
+    def __init__(self, file_path: str, source_folders: Optional[List[str]] = None):
+        """
+        อ่าน Power Query จากไฟล์ xlsx
+
+        Args:
+            file_path (str): เส้นทางไฟล์ xlsx
+            source_folders (Optional[List[str]]): โฟลเดอร์ข้อมูลที่อ่านแบบ lazy plan พร้อม pushdown
+        """
+        self.file_path = file_path
+        with zipfile.ZipFile(file_path) as archive:
+            data = read_datamashup(archive)
+            if data is None:
+                raise UnsupportedFeature("ไฟล์ไม่มี Power Query")
+            connections = read_connections(archive)
+            loads = read_query_table_loads(archive)
+
+        text = section_from_parts(read_package_parts(data))
+        members = parse_section(text)
+        self.graph = QueryGraph(members, connections, loads)
+        self.expressions = {
+            member["name"]: parse_expression(text, member["tokens"]) for member in members
+        }
+        self.library = standard_library(current_workbook=file_path, source_folders=source_folders)
+
+    def unsupported_reasons(self) -> List[str]:
+        """
+        เหตุผลที่ workbook นี้รีเฟชแบบ headless ไม่ได้
+
+        Returns:
+            List[str]: รายการเหตุผล (ว่างหากรองรับ)
+        """
+        reasons = []
+        names = unsupported_names(self.expressions, self.library)
+        if names:
+            reasons.append(f"ใช้ฟังก์ชันที่ไม่รองรับ: {', '.join(sorted(names))}")
+        for name, info in self.graph.queries.items():
+            if info["data_model"]:
+                reasons.append(f"query {name} โหลดลง Data Model")
+        if not any(info["loads"] for info in self.graph.queries.values()):
+            reasons.append("ไม่มี query ที่โหลดลง table ใน sheet")
+        return reasons
+
+    def evaluate(self) -> List[Dict[str, Any]]:
+        """
+        ประมวลผลทุก query ที่โหลดลง sheet
+
+        Returns:
+            List[Dict[str, Any]]: {"query", "connection", "loads", "table", "seconds"} ตามลำดับ topological
+        """
+        evaluator = Evaluator(self.library)
+        env = evaluator.global_environment(self.expressions)
+        results = []
+        for name in self.graph.topological_order():
+            info = self.graph.queries[name]
+            if not info["loads"]:
+                continue
+            start = time.perf_counter()
+            value = force(env.lookup(name))
+            if not isinstance(value, Table):
+                raise MEvaluationError(f"query {name} ไม่ได้คืนค่าเป็น table")
+            results.append({
+                "query": name,
+                "connection": info["connection"],
+                "loads": info["loads"],
+                "table": value,
+                "seconds": time.perf_counter() - start,
+            })
+        return results
+
+
+class HeadlessEngine:
+    """รีเฟช workbook โดยไม่ต้องใช้ Excel"""
+
+    def analyze(self, file_path: str) -> List[str]:
+        """
+        ตรวจว่า workbook รีเฟชแบบ headless ได้หรือไม่
+
+        Args:
+            file_path (str): เส้นทางไฟล์ xlsx
+
+        Returns:
+            List[str]: เหตุผลที่รีเฟชไม่ได้ (ว่างหากรองรับ)
+        """
+        try:
+            return HeadlessWorkbook(file_path).unsupported_reasons()
+        except (UnsupportedFeature, MSyntaxError) as e:
+            return [str(e)]
+
+    def refresh_workbook(self, file_path: str, save: bool = True,
+                         source_folders: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        ประมวลผล query แล้วเขียนผลลัพธ์ลง table ใน sheet
+
+        Args:
+            file_path (str): เส้นทางไฟล์ xlsx
+            save (bool): เขียนผลลัพธ์ลงไฟล์หรือไม่
+            source_folders (Optional[List[str]]): โฟลเดอร์ข้อมูลที่อ่านแบบ lazy plan พร้อม pushdown
+
+        Returns:
+            List[Dict[str, Any]]: {"query", "connection", "rows", "seconds"} ของแต่ละ query
+
+        Raises:
+            UnsupportedFeature: workbook ใช้ส่วนที่ไม่รองรับ (ควรรีเฟชด้วย Excel)
+            MEvaluationError: query ประมวลผลไม่สำเร็จ
+        """
+        try:
+            workbook = HeadlessWorkbook(file_path, source_folders)
+        except MSyntaxError as e:
+            raise UnsupportedFeature(f"อ่านโค้ด M ไม่ได้: {e}")
+        reasons = workbook.unsupported_reasons()
+        if reasons:
+            raise UnsupportedFeature("; ".join(reasons))
+
+        results = workbook.evaluate()
+        if save:
+            write_results(file_path, [
+                (load, result["table"]) for result in results for load in result["loads"]
+            ])
+        return [
+            {
+                "query": result["query"],
+                "connection": result["connection"],
+                "rows": len(result["table"]),
+                "seconds": result["seconds"],
+            }
+            for result in results
+        ]
@@ -0,0 +1,779 @@
+"""
+M Columnar
+ฟังก์ชัน Table.* แบบ columnar บน NumPy (filter, projection, แปลงชนิด, group-by, hash join)
+
+ใช้แทนฟังก์ชันแบบทีละแถวใน m_library เมื่อติดตั้ง numpy
+expression ใน each ที่ประกอบด้วย field, ค่าคงที่ และตัวดำเนินการพื้นฐาน
+จะถูกประมวลผลทั้งคอลัมน์ในครั้งเดียว ส่วนที่ไม่รองรับจะกลับไปใช้วิธีทีละแถว
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import m_library
+from .m_evaluator import MError, MEvaluationError, MFunction, MType, NUMBER_FACETS, UnsupportedFeature, force, type_of
+from .m_parser import Binary, Call, FieldAccess, FunctionExpr, Identifier, IfExpr, Literal, Projection, Unary, \
+    iter_nodes
+from .m_table import Column, NestedColumn, Table, column_from_values, column_take, column_to_values, np
+
+_INTEGER_FACETS = {"Int64", "Int32", "Int16", "Int8", "Byte"}
+_SCALAR_TYPES = (type(None), bool, int, float, str)
+_CONSTANT_TYPES = _SCALAR_TYPES + (date, datetime, time, timedelta)
+
+# ฟังก์ชันรวมค่าใน Table.Group ที่คำนวณแบบ vectorized ได้
+_AGGREGATES = {"List.Sum", "List.Average", "List.Min", "List.Max", "List.Count"}
+
+# ฟังก์ชันที่เรียกใน each แล้วยังประมวลผลทั้งคอลัมน์ได้
+_VECTOR_FUNCTIONS = {
+    "Number.Mod": None,
+    "Text.Contains": lambda text, sub: sub in text,
+    "Text.StartsWith": lambda text, sub: text.startswith(sub),
+    "Text.EndsWith": lambda text, sub: text.endswith(sub),
+    "Text.Upper": lambda text, *culture: text.upper(),
+    "Text.Lower": lambda text, *culture: text.lower(),
+}
+
+
+def available() -> bool:
+    """
+    ตรวจว่าใช้ table แบบ columnar ได้หรือไม่
+
+    Returns:
+        bool: True หากติดตั้ง numpy
+    """
+    return np is not None
+
+
+class _NotVectorizable(Exception):
+    """expression ไม่สามารถประมวลผลทั้งคอลัมน์ได้ (ให้ใช้วิธีทีละแถว)"""
+
+
+def _has_errors(column: Column) -> bool:
+    """คอลัมน์มี error ระดับ cell (ต้องใช้วิธีทีละแถวเพื่อให้ error เกิดเมื่อใช้ค่านั้น)"""
+    return column.values.dtype == object and any(isinstance(v, MError) for v in column.values.tolist())
+
+
+# ---------- ค่าแบบ vector ----------
+
+class _Vector:
+    """ผลลัพธ์ระหว่างประมวลผล: array ทั้งคอลัมน์ หรือค่าคงที่ค่าเดียว"""
+
+    def __init__(self, values: Any, nulls: Any = None, scalar: bool = False):
+        self.values = values
+        self.nulls = nulls
+        self.scalar = scalar
+
+    @classmethod
+    def constant(cls, value: Any) -> "_Vector":
+        return cls(value, value is None, scalar=True)
+
+    @classmethod
+    def of_column(cls, column: Column) -> "_Vector":
+        return cls(column.values, column.nulls)
+
+    def null_mask(self, length: int) -> Any:
+        if self.scalar:
+            return np.full(length, bool(self.nulls))
+        return self.nulls if self.nulls is not None else np.zeros(length, dtype=bool)
+
+    def to_column(self, length: int) -> Column:
+        if self.scalar:
+            return column_from_values([self.values] * length)
+        values = self.values
+        if values.dtype == object and self.nulls is not None:
+            values = values.copy()
+            values[self.nulls] = None
+        return Column(values, self.nulls if self.nulls is not None and self.nulls.any() else None)
+
+
+def _combine_nulls(left: _Vector, right: _Vector, length: int) -> Any:
+    if left.scalar and right.scalar:
+        return None
+    if (left.scalar and not left.nulls) or (not left.scalar and left.nulls is None):
+        return None if right.scalar else right.nulls
+    if (right.scalar and not right.nulls) or (not right.scalar and right.nulls is None):
+        return None if left.scalar else left.nulls
+    return left.null_mask(length) | right.null_mask(length)
+
+
+def _is_numeric(vector: _Vector) -> bool:
+    if vector.scalar:
+        return isinstance(vector.values, (int, float)) and not isinstance(vector.values, bool)
+    return vector.values.dtype.kind in "if"
+
+
+def _is_logical(vector: _Vector) -> bool:
+    if vector.scalar:
+        return vector.values is None or isinstance(vector.values, bool)
+    return vector.values.dtype == bool
+
+
+def _object_compare(op: str, left: _Vector, right: _Vector, length: int, nulls: Any) -> Any:
+    """เปรียบเทียบ array ชนิด object เฉพาะตำแหน่งที่ไม่ใช่ null"""
+    result = np.zeros(length, dtype=bool)
+    valid = ~nulls if nulls is not None else slice(None)
+    lhs = left.values if left.scalar else left.values[valid]
+    rhs = right.values if right.scalar else right.values[valid]
+    try:
+        if op == "=":
+            compared = lhs == rhs
+        elif op == "<>":
+            compared = lhs != rhs
+        elif op == "<":
+            compared = lhs < rhs
+        elif op == ">":
+            compared = lhs > rhs
+        elif op == "<=":
+            compared = lhs <= rhs
+        else:
+            compared = lhs >= rhs
+    except TypeError:
+        raise _NotVectorizable()
+    result[valid] = compared
+    return result
+
+
+class _VectorCompiler:
+    """ประมวลผล body ของ each กับทุกแถวของ table พร้อมกัน"""
+
+    def __init__(self, function: MFunction, table: Table):
+        if not isinstance(function, MFunction) or len(function.params) != 1:
+            raise _NotVectorizable()
+        self.function = function
+        self.param = function.params[0]
+        self.table = table
+        self.length = len(table)
+
+    def column(self, name: str) -> _Vector:
+        if name not in self.table.columns:
+            raise _NotVectorizable()
+        column = self.table.data[self.table.index(name)]
+        if isinstance(column, NestedColumn) or _has_errors(column):
+            raise _NotVectorizable()
+        return _Vector.of_column(column)
+
+    def constant(self, name: str) -> Any:
+        try:
+            value = self.function.evaluator.lookup(name, self.function.env)
+        except MEvaluationError:
+            raise _NotVectorizable()
+        if not isinstance(value, _CONSTANT_TYPES):
+            raise _NotVectorizable()
+        return value
+
+    def is_constant(self, node: Any) -> bool:
+        """node ไม่อ้างถึงแถว (ประมวลผลครั้งเดียวได้ เช่น #date(2024, 1, 1))"""
+        for child in iter_nodes(node):
+            if isinstance(child, FunctionExpr):
+                return False
+            if isinstance(child, (FieldAccess, Projection)) and child.target is None:
+                return False
+            if isinstance(child, Identifier) and child.name == self.param:
+                return False
+        return True
+
+    def fold(self, node: Any) -> _Vector:
+        try:
+            value = force(self.function.evaluator.evaluate(node, self.function.env))
+        except MEvaluationError:
+            raise _NotVectorizable()
+        if not isinstance(value, _CONSTANT_TYPES):
+            raise _NotVectorizable()
+        return _Vector.constant(value)
+
+    def evaluate(self, node: Any) -> _Vector:
+        if isinstance(node, (Call, Binary, Unary, IfExpr)) and self.is_constant(node):
+            return self.fold(node)
+        if isinstance(node, Literal):
+            if not isinstance(node.value, _SCALAR_TYPES):
+                raise _NotVectorizable()
+            return _Vector.constant(node.value)
+        if isinstance(node, FieldAccess) and not node.optional:
+            if node.target is None and self.param == "_":
+                return self.column(node.name)
+            if isinstance(node.target, Identifier) and node.target.name == self.param:
+                return self.column(node.name)
+            raise _NotVectorizable()
+        if isinstance(node, Identifier):
+            if node.name == self.param:
+                raise _NotVectorizable()
+            return _Vector.constant(self.constant(node.name))
+        if isinstance(node, Binary):
+            return self.binary(node)
+        if isinstance(node, Unary):
+            return self.unary(node)
+        if isinstance(node, IfExpr):
+            return self.conditional(node)
+        if isinstance(node, Call):
+            return self.call(node)
+        raise _NotVectorizable()
+
+    def binary(self, node: Binary) -> _Vector:
+        op = node.op
+        left, right = self.evaluate(node.left), self.evaluate(node.right)
+        if left.scalar and right.scalar:
+            raise _NotVectorizable()
+        length = self.length
+
+        if op in ("and", "or"):
+            if not (_is_logical(left) and _is_logical(right)):
+                raise _NotVectorizable()
+            lv = np.broadcast_to(np.asarray(bool(left.values) if left.scalar else left.values), (length,))
+            rv = np.broadcast_to(np.asarray(bool(right.values) if right.scalar else right.values), (length,))
+            ln, rn = left.null_mask(length), right.null_mask(length)
+            if op == "and":
+                false = (~lv & ~ln) | (~rv & ~rn)
+                nulls = ~false & (ln | rn)
+                values = ~false & ~nulls
+            else:
+                true = (lv & ~ln) | (rv & ~rn)
+                nulls = ~true & (ln | rn)
+                values = true
+            return _Vector(values, nulls if nulls.any() else None)
+
+        nulls = _combine_nulls(left, right, length)
+        if op in ("=", "<>", "<", ">", "<=", ">="):
+            if (left.scalar and left.values is None) or (right.scalar and right.values is None):
+                # เปรียบเทียบกับ null: = / <> ดูเฉพาะตำแหน่ง null ส่วนการเปรียบเทียบขนาดได้ null ทั้งคอลัมน์
+                other = right if left.scalar else left
+                if op == "=":
+                    return _Vector(other.null_mask(length).copy())
+                if op == "<>":
+                    return _Vector(~other.null_mask(length))
+                return _Vector(np.zeros(length, dtype=bool), np.ones(length, dtype=bool))
+            numeric = _is_numeric(left) and _is_numeric(right)
+            if numeric:
+                values = {
+                    "=": np.equal, "<>": np.not_equal, "<": np.less,
+                    ">": np.greater, "<=": np.less_equal, ">=": np.greater_equal,
+                }[op](left.values, right.values)
+            elif _is_numeric(left) or _is_numeric(right) or _is_logical(left) or _is_logical(right):
+                # ชนิดต่างกันหรือมีค่า logical ให้วิธีทีละแถวจัดการตามกฎของ M
+                raise _NotVectorizable()
+            else:
+                values = _object_compare(op, left, right, length, nulls)
+            values = np.broadcast_to(values, (length,))
+            if nulls is not None:
+                # null = null เป็น true ส่วนการเปรียบเทียบขนาดกับ null เป็น null
+                if op in ("=", "<>"):
+                    both = left.null_mask(length) & right.null_mask(length)
+                    either = left.null_mask(length) | right.null_mask(length)
+                    values = np.where(either, both if op == "=" else ~both, values)
+                    nulls = None
+            return _Vector(values, nulls)
+
+        if op in ("+", "-", "*", "/"):
+            if not (_is_numeric(left) and _is_numeric(right)):
+                raise _NotVectorizable()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if op == "+":
+                    values = np.add(left.values, right.values)
+                elif op == "-":
+                    values = np.subtract(left.values, right.values)
+                elif op == "*":
+                    values = np.multiply(left.values, right.values)
+                else:
+                    values = np.true_divide(left.values, right.values)
+            return _Vector(np.broadcast_to(values, (length,)), nulls)
+        raise _NotVectorizable()
+
+    def unary(self, node: Unary) -> _Vector:
+        operand = self.evaluate(node.operand)
+        if operand.scalar:
+            value = operand.values
+            if node.op in ("-", "+") and _is_numeric(operand):
+                return _Vector.constant(-value if node.op == "-" else value)
+            raise _NotVectorizable()
+        if node.op == "not" and operand.values.dtype == bool:
+            return _Vector(~operand.values, operand.nulls)
+        if node.op in ("-", "+") and _is_numeric(operand):
+            return _Vector(-operand.values if node.op == "-" else operand.values, operand.nulls)
+        raise _NotVectorizable()
+
+    def conditional(self, node: IfExpr) -> _Vector:
+        condition = self.evaluate(node.condition)
+        if condition.scalar or condition.values.dtype != bool:
+            raise _NotVectorizable()
+        if condition.nulls is not None and condition.nulls.any():
+            raise _NotVectorizable()
+        then, otherwise = self.evaluate(node.then), self.evaluate(node.otherwise)
+        length = self.length
+        then_column, else_column = then.to_column(length), otherwise.to_column(length)
+        if then_column.values.dtype != else_column.values.dtype:
+            then_values = then_column.values.astype(object)
+            else_values = else_column.values.astype(object)
+        else:
+            then_values, else_values = then_column.values, else_column.values
+        values = np.where(condition.values, then_values, else_values)
+        nulls = None
+        if then_column.nulls is not None or else_column.nulls is not None:
+            then_nulls = then_column.nulls if then_column.nulls is not None else np.zeros(length, dtype=bool)
+            else_nulls = else_column.nulls if else_column.nulls is not None else np.zeros(length, dtype=bool)
+            nulls = np.where(condition.values, then_nulls, else_nulls)
+            if values.dtype == object:
+                values[nulls] = None
+        return _Vector(values, nulls)
+
+    def call(self, node: Call) -> _Vector:
+        if not isinstance(node.function, Identifier) or node.function.name not in _VECTOR_FUNCTIONS:
+            raise _NotVectorizable()
+        try:
+            self.function.env.lookup(node.function.name)
+            raise _NotVectorizable()
+        except KeyError:
+            pass
+        name = node.function.name
+        args = [self.evaluate(arg) for arg in node.args]
+        if name == "Number.Mod":
+            if len(args) != 2 or not all(_is_numeric(arg) for arg in args):
+                raise _NotVectorizable()
+            number, divisor = args
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.fmod(number.values, divisor.values)
+            return _Vector(np.broadcast_to(values, (self.length,)), _combine_nulls(number, divisor, self.length))
+
+        # ฟังก์ชันข้อความ: คอลัมน์ข้อความกับอาร์กิวเมนต์ที่เป็นค่าคงที่
+        text = args[0]
+        if text.scalar or text.values.dtype != object or not all(arg.scalar for arg in args[1:]):
+            raise _NotVectorizable()
+        valid = ~text.nulls if text.nulls is not None else np.ones(self.length, dtype=bool)
+        strings = text.values[valid].tolist()
+        if not all(isinstance(value, str) for value in strings):
+            raise _NotVectorizable()
+        function = _VECTOR_FUNCTIONS[name]
+        extra = [arg.values for arg in args[1:]]
+        if any(not isinstance(value, str) for value in extra[:1]):
+            raise _NotVectorizable()
+        results = [function(value, *extra[:1]) for value in strings]
+        dtype = object if name in ("Text.Upper", "Text.Lower") else bool
+        values = np.zeros(self.length, dtype=dtype)
+        values[valid] = results
+        return _Vector(values, text.nulls)
+
+
+def _vectorize(function: Any, table: Table) -> Optional[_Vector]:
+    """ประมวลผล each แบบทั้งคอลัมน์ หรือ None หากทำไม่ได้"""
+    try:
+        return _VectorCompiler(force(function), table).evaluate(force(function).body)
+    except _NotVectorizable:
+        return None
+
+
+# ---------- การจัดกลุ่ม key ----------
+
+def _factorize(columns: List[Column], length: int) -> Tuple[Any, int]:
+    """
+    แปลง key เป็นรหัสกลุ่ม 0..n-1 ตามลำดับที่พบครั้งแรก
+
+    Returns:
+        Tuple[np.ndarray, int]: (รหัสของแต่ละแถว, จำนวนกลุ่ม)
+    """
+    codes = np.zeros(length, dtype=np.int64)
+    groups = 1
+    for column in columns:
+        column_codes, count = _factorize_column(column)
+        codes = codes * count + column_codes
+        groups *= count
+        if groups > 2 ** 31:
+            # จัดรหัสใหม่ก่อนคูณกับคอลัมน์ถัดไปเพื่อไม่ให้ int64 ล้น
+            codes, groups = _compact(codes)
+    return _compact(codes)
+
+
+def _compact(codes: Any) -> Tuple[Any, int]:
+    """จัดรหัสใหม่ให้ต่อเนื่องตามลำดับที่พบครั้งแรก"""
+    if len(codes) == 0:
+        return codes, 0
+    unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[order] = np.arange(len(unique))
+    return rank[inverse.reshape(-1)], len(unique)
+
+
+def _factorize_column(column: Column) -> Tuple[Any, int]:
+    values = column.values
+    if values.dtype == object:
+        items = values.tolist()
+        mapping: Dict[Any, int] = {}
+        if len({type(v) for v in items} - {type(None)}) > 1:
+            # หลายชนิดปนกัน ใช้ชนิดข้อมูลร่วมกับค่าเพื่อให้ตรงกับการเปรียบเทียบของ M
+            items = [(type_of(v), v) for v in items]
+        codes = np.fromiter(
+            (mapping.setdefault(v, len(mapping)) for v in items), dtype=np.int64, count=len(items)
+        )
+        return codes, max(len(mapping), 1)
+    unique, inverse = np.unique(values, return_inverse=True)
+    codes = inverse.reshape(-1).astype(np.int64)
+    count = len(unique)
+    if column.nulls is not None and column.nulls.any():
+        codes = np.where(column.nulls, count, codes)
+        count += 1
+    return codes, max(count, 1)
+
+
+def _shared_codes(left: List[Column], right: List[Column]) -> Tuple[Any, Any]:
+    """รหัสของ key สองฝั่งใน space เดียวกัน (สำหรับ join)"""
+    left_length = len(left[0].values) if left else 0
+    combined = []
+    for l, r in zip(left, right):
+        if l.values.dtype == object or r.values.dtype == object:
+            values = np.concatenate([l.values.astype(object), r.values.astype(object)])
+        elif l.values.dtype == bool or r.values.dtype == bool:
+            if l.values.dtype != r.values.dtype:
+                values = np.concatenate([l.values.astype(object), r.values.astype(object)])
+            else:
+                values = np.concatenate([l.values, r.values])
+        else:
+            values = np.concatenate([l.values.astype(np.float64), r.values.astype(np.float64)])
+        nulls = None
+        if l.nulls is not None or r.nulls is not None:
+            nulls = np.concatenate([
+                l.nulls if l.nulls is not None else np.zeros(len(l.values), dtype=bool),
+                r.nulls if r.nulls is not None else np.zeros(len(r.values), dtype=bool),
+            ])
+            if values.dtype == object:
+                values[nulls] = None
+        combined.append(Column(values, nulls))
+    codes, _ = _factorize(combined, len(combined[0].values) if combined else 0)
+    return codes[:left_length], codes[left_length:]
+
+
+def _key_columns(table: Table, keys: List[str], function: str) -> List[Column]:
+    columns = []
+    for name in keys:
+        if name not in table.columns:
+            raise MEvaluationError(f"{function}: ไม่พบคอลัมน์ {name!r}")
+        column = table.data[table.index(name)]
+        if isinstance(column, NestedColumn) or _has_errors(column):
+            raise _NotVectorizable()
+        columns.append(column)
+    return columns
+
+
+# ---------- ฟังก์ชัน Table.* ----------
+
+def table_select_rows(table: Any, condition: Any) -> Table:
+    """Table.SelectRows แบบ columnar"""
+    table = m_library._require_table(table, "Table.SelectRows")
+    result = _vectorize(condition, table)
+    if result is None or result.scalar or result.values.dtype != bool:
+        return m_library.table_select_rows(table, condition)
+    mask = result.values if result.nulls is None else (result.values & ~result.nulls)
+    return table.take(np.flatnonzero(mask))
+
+
+def table_select_columns(table: Any, columns: Any, missing_field: Any = None) -> Table:
+    """Table.SelectColumns แบบ columnar (ไม่คัดลอกข้อมูล)"""
+    table = m_library._require_table(table, "Table.SelectColumns")
+    names = [force(c) for c in m_library._as_list(columns)]
+    if force(missing_field) != m_library.MISSING_FIELD_USE_NULL:
+        names = m_library._present_columns(table, names, missing_field, "Table.SelectColumns")
+    data = []
+    for name in names:
+        if name in table.columns:
+            data.append(table.data[table.index(name)])
+        else:
+            data.append(column_from_values([None] * len(table)))
+    return Table.from_columns(names, data, len(table))
+
+
+def table_remove_columns(table: Any, columns: Any, missing_field: Any = None) -> Table:
+    """Table.RemoveColumns แบบ columnar"""
+    table = m_library._require_table(table, "Table.RemoveColumns")
+    names = m_library._present_columns(
+        table, [force(c) for c in m_library._as_list(columns)], missing_field, "Table.RemoveColumns"
+    )
+    keep = [i for i, name in enumerate(table.columns) if name not in set(names)]
+    return Table.from_columns([table.columns[i] for i in keep], [table.data[i] for i in keep], len(table))
+
+
+def table_rename_columns(table: Any, renames: Any, missing_field: Any = None) -> Table:
+    """Table.RenameColumns แบบ columnar"""
+    table = m_library._require_table(table, "Table.RenameColumns")
+    renames = force(renames)
+    if renames and not isinstance(force(renames[0]), list):
+        renames = [renames]
+    columns = list(table.columns)
+    for pair in renames:
+        old, new = (force(v) for v in force(pair))
+        if m_library._present_columns(table, [old], missing_field, "Table.RenameColumns"):
+            columns[table.index(old)] = new
+    return Table.from_columns(columns, list(table.data), len(table))
+
+
+def _convert_column(column: Column, target: MType, culture: Optional[str]) -> Column:
+    """แปลงชนิดทั้งคอลัมน์ (ชนิดตัวเลขใช้ NumPy ส่วนอื่นแปลงทีละค่าภายในคอลัมน์)"""
+    name = target.name
+    if name == "any":
+        return column
+    values, nulls = column.values, column.nulls
+    numeric_target = name == "number" or name in NUMBER_FACETS
+    if numeric_target and values.dtype.kind in "if":
+        if name in _INTEGER_FACETS:
+            return Column(np.rint(values).astype(np.int64) if values.dtype.kind == "f" else values, nulls)
+        if name == "Currency" and values.dtype.kind == "f":
+            return Column(np.round(values, 4), nulls)
+        return column
+    if name == "logical" and values.dtype == bool:
+        return column
+    if numeric_target and values.dtype == object:
+        valid = ~nulls if nulls is not None else slice(None)
+        parsed = np.zeros(len(values), dtype=np.float64)
+        try:
+            parsed[valid] = np.asarray(values[valid], dtype=np.float64)
+        except (ValueError, TypeError):
+            parsed = None
+        if parsed is not None:
+            if name in _INTEGER_FACETS:
+                return Column(np.rint(parsed).astype(np.int64), nulls)
+            if name == "Currency":
+                return Column(np.round(parsed, 4), nulls)
+            return Column(parsed, nulls)
+    return column_from_values([
+        None if value is None else m_library._convert_cell(value, target, culture)
+        for value in column_to_values(column)
+    ])
+
+
+def table_transform_column_types(table: Any, transforms: Any, culture: Any = None) -> Table:
+    """Table.TransformColumnTypes แบบ columnar"""
+    table = m_library._require_table(table, "Table.TransformColumnTypes")
+    transforms = force(transforms)
+    culture = force(culture)
+    if isinstance(culture, dict):
+        culture = force(culture.get("Culture"))
+    if transforms and not isinstance(force(transforms[0]), list):
+        transforms = [transforms]
+
+    data = list(table.data)
+    for pair in transforms:
+        column, target = (force(v) for v in force(pair))
+        if not isinstance(target, MType):
+            raise MEvaluationError("Table.TransformColumnTypes: ต้องระบุ type")
+        index = m_library._column_indexes(table, [column], "Table.TransformColumnTypes")[0]
+        if isinstance(data[index], NestedColumn):
+            raise MEvaluationError(f"Table.TransformColumnTypes: แปลงคอลัมน์ table {column!r} ไม่ได้")
+        data[index] = _convert_column(data[index], target, culture)
+    return Table.from_columns(table.columns, data, len(table))
+
+
+def table_add_column(table: Any, name: Any, generator: Any, column_type: Any = None) -> Table:
+    """Table.AddColumn แบบ columnar"""
+    table = m_library._require_table(table, "Table.AddColumn")
+    name = force(name)
+    if name in table.columns:
+        raise MEvaluationError(f"Table.AddColumn: มีคอลัมน์ {name!r} อยู่แล้ว")
+    result = _vectorize(generator, table)
+    if result is None:
+        return m_library.table_add_column(table, name, generator, column_type)
+    return Table.from_columns(table.columns + [name], list(table.data) + [result.to_column(len(table))], len(table))
+
+
+def _aggregate_plan(function: Any) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    ตรวจว่า each ใน Table.Group เป็นการรวมค่าแบบพื้นฐานหรือไม่
+
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: (ชื่อฟังก์ชัน, คอลัมน์) หรือ None
+    """
+    function = force(function)
+    if not isinstance(function, MFunction) or len(function.params) != 1:
+        return None
+    body = function.body
+    if not isinstance(body, Call) or not isinstance(body.function, Identifier) or len(body.args) != 1:
+        return None
+    try:
+        function.env.lookup(body.function.name)
+        return None
+    except KeyError:
+        pass
+    arg = body.args[0]
+    param = function.params[0]
+    if body.function.name == "Table.RowCount" and isinstance(arg, Identifier) and arg.name == param:
+        return "Table.RowCount", None
+    if body.function.name not in _AGGREGATES or not isinstance(arg, FieldAccess) or arg.optional:
+        return None
+    if arg.target is None and param == "_" or isinstance(arg.target, Identifier) and arg.target.name == param:
+        return body.function.name, arg.name
+    return None
+
+
+def _aggregate(plan: Tuple[str, Optional[str]], table: Table, codes: Any, groups: int) -> Optional[Column]:
+    """รวมค่าตามกลุ่มด้วย NumPy หรือ None หากต้องใช้วิธีทีละกลุ่ม"""
+    function, column_name = plan
+    if function in ("Table.RowCount", "List.Count"):
+        if column_name is not None and column_name not in table.columns:
+            return None
+        return Column(np.bincount(codes, minlength=groups).astype(np.int64))
+    if column_name not in table.columns:
+        return None
+    column = table.data[table.index(column_name)]
+    if isinstance(column, NestedColumn) or column.values.dtype.kind not in "if":
+        return None
+
+    valid = ~column.nulls if column.nulls is not None else np.ones(len(codes), dtype=bool)
+    group_codes, values = codes[valid], column.values[valid]
+    counts = np.bincount(group_codes, minlength=groups)
+    empty = counts == 0
+    nulls = empty if empty.any() else None
+
+    if function in ("List.Sum", "List.Average"):
+        sums = np.bincount(group_codes, weights=values.astype(np.float64), minlength=groups)
+        if function == "List.Average":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return Column(np.where(empty, 0.0, sums / np.maximum(counts, 1)), nulls)
+        if column.values.dtype.kind == "i" and np.all(np.abs(sums) < 2 ** 53):
+            return Column(sums.astype(np.int64), nulls)
+        return Column(sums, nulls)
+
+    # List.Min / List.Max: เรียงตามกลุ่มแล้วใช้ reduceat
+    order = np.argsort(group_codes, kind="stable")
+    sorted_codes, sorted_values = group_codes[order], values[order]
+    present = np.flatnonzero(~empty)
+    result = np.zeros(groups, dtype=values.dtype)
+    if len(sorted_values):
+        starts = np.searchsorted(sorted_codes, present, side="left")
+        reducer = np.minimum if function == "List.Min" else np.maximum
+        result[present] = reducer.reduceat(sorted_values, starts)
+    return Column(result, nulls)
+
+
+def table_group(table: Any, key: Any, aggregated: Any, group_kind: Any = None, comparer: Any = None) -> Table:
+    """Table.Group แบบ columnar (hash group-by ด้วยรหัสกลุ่ม)"""
+    table = m_library._require_table(table, "Table.Group")
+    if force(group_kind) not in (None, 1):
+        raise UnsupportedFeature("Table.Group: ไม่รองรับ GroupKind.Local")
+    if force(comparer) is not None:
+        raise UnsupportedFeature("Table.Group: ไม่รองรับ comparer")
+    keys = [force(k) for k in m_library._as_list(key)]
+    try:
+        key_columns = _key_columns(table, keys, "Table.Group")
+    except _NotVectorizable:
+        return m_library.table_group(table, key, aggregated, group_kind, comparer)
+
+    aggregated = force(aggregated)
+    if aggregated and not isinstance(force(aggregated[0]), list):
+        aggregated = [aggregated]
+    aggregations = [(force(force(item)[0]), force(force(item)[1])) for item in aggregated]
+
+    codes, groups = _factorize(key_columns, len(table))
+    first = np.unique(codes, return_index=True)[1]
+    data = [column_take(column, first) for column in key_columns]
+
+    members = None
+    for name, function in aggregations:
+        plan = _aggregate_plan(function)
+        column = _aggregate(plan, table, codes, groups) if plan else None
+        if column is None:
+            # รวมค่าด้วยฟังก์ชันของผู้ใช้ทีละกลุ่ม
+            if members is None:
+                order = np.argsort(codes, kind="stable")
+                bounds = np.searchsorted(codes[order], np.arange(groups + 1), side="left")
+                members = [order[bounds[g]:bounds[g + 1]] for g in range(groups)]
+            column = column_from_values([force(function(table.take(rows))) for rows in members])
+        data.append(column)
+    return Table.from_columns(keys + [name for name, _ in aggregations], data, groups)
+
+
+def table_nested_join(table1: Any, key1: Any, table2: Any, key2: Any, new_column: Any,
+                      join_kind: Any = None, key_equality_comparers: Any = None) -> Table:
+    """Table.NestedJoin แบบ columnar (hash join ด้วยรหัสของ key)"""
+    table1 = m_library._require_table(table1, "Table.NestedJoin")
+    table2 = m_library._require_table(table2, "Table.NestedJoin")
+    if force(key_equality_comparers) is not None:
+        raise UnsupportedFeature("Table.NestedJoin: ไม่รองรับ keyEqualityComparers")
+    new_column = force(new_column)
+    join_kind = m_library.JOIN_LEFT_OUTER if force(join_kind) is None else int(force(join_kind))
+    left_keys = [force(k) for k in m_library._as_list(key1)]
+    right_keys = [force(k) for k in m_library._as_list(key2)]
+    if len(left_keys) != len(right_keys):
+        raise MEvaluationError("Table.NestedJoin: จำนวน key ไม่เท่ากัน")
+    try:
+        left_codes, right_codes = _shared_codes(
+            _key_columns(table1, left_keys, "Table.NestedJoin"),
+            _key_columns(table2, right_keys, "Table.NestedJoin"),
+        )
+    except _NotVectorizable:
+        return m_library.table_nested_join(table1, key1, table2, key2, new_column, join_kind)
+
+    order = np.argsort(right_codes, kind="stable")
+    sorted_codes = right_codes[order]
+    starts = np.searchsorted(sorted_codes, left_codes, side="left")
+    counts = np.searchsorted(sorted_codes, left_codes, side="right") - starts
+
+    if join_kind in (m_library.JOIN_INNER, m_library.JOIN_RIGHT_OUTER):
+        left_rows = np.flatnonzero(counts > 0)
+    elif join_kind == m_library.JOIN_LEFT_ANTI:
+        left_rows = np.flatnonzero(counts == 0)
+    elif join_kind == m_library.JOIN_RIGHT_ANTI:
+        left_rows = np.zeros(0, dtype=np.int64)
+    else:
+        left_rows = np.arange(len(table1), dtype=np.int64)
+
+    flat = order
+    row_index, nested_starts, nested_counts = left_rows, starts[left_rows], counts[left_rows]
+    if join_kind in (m_library.JOIN_RIGHT_OUTER, m_library.JOIN_FULL_OUTER, m_library.JOIN_RIGHT_ANTI):
+        unmatched = np.flatnonzero(~np.isin(right_codes, left_codes))
+        flat = np.concatenate([order, unmatched])
+        row_index = np.concatenate([row_index, np.full(len(unmatched), -1, dtype=np.int64)])
+        nested_starts = np.concatenate([nested_starts, len(order) + np.arange(len(unmatched))])
+        nested_counts = np.concatenate([nested_counts, np.ones(len(unmatched), dtype=np.int64)])
+
+    data = [column_take(column, row_index) for column in table1.data]
+    data.append(NestedColumn(table2, flat, nested_starts, nested_counts))
+    return Table.from_columns(table1.columns + [new_column], data, len(row_index))
+
+
+def table_expand_table_column(table: Any, column: Any, column_names: Any, new_column_names: Any = None) -> Table:
+    """Table.ExpandTableColumn แบบ columnar (ขยายผลของ NestedJoin ด้วย np.repeat)"""
+    table = m_library._require_table(table, "Table.ExpandTableColumn")
+    column = m_library._column_name(table, force(column), "Table.ExpandTableColumn")
+    nested = table.data[table.index(column)]
+    if not isinstance(nested, NestedColumn):
+        return m_library.table_expand_table_column(table, column, column_names, new_column_names)
+    names = [force(n) for n in m_library._as_list(column_names)]
+    new_names = [force(n) for n in m_library._as_list(new_column_names)] \
+        if force(new_column_names) is not None else names
+    if len(new_names) != len(names):
+        raise MEvaluationError("Table.ExpandTableColumn: จำนวนชื่อคอลัมน์ใหม่ไม่ตรงกัน")
+
+    # แต่ละแถวขยายเป็น max(จำนวนแถวที่ match, 1) แถว
+    repeats = np.maximum(nested.counts, 1)
+    row_index = np.repeat(np.arange(len(table), dtype=np.int64), repeats)
+    offsets = np.arange(len(row_index), dtype=np.int64) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    has_match = np.repeat(nested.counts > 0, repeats)
+    positions = np.repeat(nested.starts, repeats) + offsets
+    nested_rows = np.where(has_match, nested.flat[np.where(has_match, positions, 0)] if len(nested.flat) else -1, -1)
+
+    position = table.index(column)
+    base = nested.base
+    expanded = []
+    for name in names:
+        if name in base.columns:
+            expanded.append(column_take(base.data[base.index(name)], nested_rows))
+        else:
+            expanded.append(column_from_values([None] * len(row_index)))
+    before = [column_take(c, row_index) for c in table.data[:position]]
+    after = [column_take(c, row_index) for c in table.data[position + 1:]]
+    columns = table.columns[:position] + new_names + table.columns[position + 1:]
+    return Table.from_columns(columns, before + expanded + after, len(row_index))
+
+
+def table_row_count(table: Any) -> int:
+    """Table.RowCount"""
+    return len(m_library._require_table(table, "Table.RowCount"))
+
+
+COLUMNAR_FUNCTIONS = {
+    "Table.SelectRows": table_select_rows,
+    "Table.SelectColumns": table_select_columns,
+    "Table.RemoveColumns": table_remove_columns,
+    "Table.RenameColumns": table_rename_columns,
+    "Table.TransformColumnTypes": table_transform_column_types,
+    "Table.AddColumn": table_add_column,
+    "Table.Group": table_group,
+    "Table.NestedJoin": table_nested_join,
+    "Table.ExpandTableColumn": table_expand_table_column,
+    "Table.RowCount": table_row_count,
+}
@@ -0,0 +1,475 @@
+"""
+M Evaluator
+ประมวลผล syntax tree ของโค้ด M (เฉพาะส่วนที่ใช้กับ query ทั่วไป)
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .m_parser import (
+    Binary, Call, ErrorExpr, FieldAccess, FunctionExpr, Identifier, IfExpr, ItemAccess,
+    LetExpr, ListExpr, Literal, Projection, Range, RecordExpr, TryExpr, TypeExpr, Unary,
+)
+from .m_table import Table
+
+
+class MEvaluationError(Exception):
+    """ข้อผิดพลาดระหว่างประมวลผลโค้ด M (เทียบเท่า error ของ Power Query)"""
+
+
+class UnsupportedFeature(MEvaluationError):
+    """โค้ด M ใช้ฟังก์ชันหรือความสามารถที่ evaluator ยังไม่รองรับ"""
+
+
+# ชนิดที่มี facet เช่น Int64.Type เป็น number ในการตรวจด้วย is
+NUMBER_FACETS = {"Int64", "Int32", "Int16", "Int8", "Byte", "Decimal", "Double", "Single", "Currency", "Percentage"}
+
+
+class MType(NamedTuple):
+    """ค่าชนิด type ของ M เช่น type number หรือ Int64.Type"""
+    name: str
+    nullable: bool = False
+
+
+class MBinary(NamedTuple):
+    """ค่าชนิด binary ที่อ้างถึงไฟล์ (อ่านเมื่อใช้งานจริง)"""
+    path: str
+
+    def read(self) -> bytes:
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise MEvaluationError(f"อ่านไฟล์ {self.path} ไม่ได้: {e}")
+
+
+class Thunk:
+    """ค่าที่ยังไม่ประมวลผล (ประมวลผลครั้งแรกที่ถูกใช้แล้วเก็บผลไว้)"""
+
+    _EVALUATING = object()
+
+    def __init__(self, compute: Callable[[], Any]):
+        self._compute = compute
+        self._value: Any = None
+        self._state: Any = None
+
+    def force(self) -> Any:
+        if self._state is Thunk._EVALUATING:
+            raise MEvaluationError("พบการอ้างอิงวนกลับ (cyclic reference)")
+        if self._state is None:
+            self._state = Thunk._EVALUATING
+            try:
+                self._value = self._compute()
+            except BaseException:
+                self._state = None
+                raise
+            self._state = True
+        return self._value
+
+
+class MError(Thunk):
+    """
+    ค่า error ระดับ cell (เช่นแปลงชนิดไม่ได้ใน Table.TransformColumnTypes)
+    แถวอื่นของ table ยังใช้ได้ตามปกติ ส่วนการใช้ค่านี้จะเกิด MEvaluationError (จับได้ด้วย try)
+    """
+
+    def __init__(self, message: str, reason: str = "DataFormat.Error"):
+        super().__init__(lambda: None)
+        self.message = message
+        self.reason = reason
+
+    def force(self) -> Any:
+        raise MEvaluationError(self.message)
+
+    def __repr__(self) -> str:
+        return f"MError({self.reason}: {self.message})"
+
+
+def force(value: Any) -> Any:
+    """
+    ประมวลผลค่าที่เป็น Thunk
+
+    Args:
+        value (Any): ค่าใด ๆ
+
+    Returns:
+        Any: ค่าที่ประมวลผลแล้ว
+    """
+    while isinstance(value, Thunk):
+        value = value.force()
+    return value
+
+
+class Environment:
+    """ขอบเขตของชื่อ (let, parameter ของฟังก์ชัน, member ของ section)"""
+
+    def __init__(self, values: Dict[str, Any], parent: Optional["Environment"] = None):
+        self.values = values
+        self.parent = parent
+
+    def lookup(self, name: str) -> Any:
+        env: Optional[Environment] = self
+        while env is not None:
+            if name in env.values:
+                return force(env.values[name])
+            env = env.parent
+        raise KeyError(name)
+
+
+class MFunction:
+    """ฟังก์ชันที่นิยามในโค้ด M (รวม each)"""
+
+    def __init__(self, evaluator: "Evaluator", params: List[str], body: Any, env: Environment):
+        self.evaluator = evaluator
+        self.params = params
+        self.body = body
+        self.env = env
+
+    def __call__(self, *args: Any) -> Any:
+        values = {name: args[i] if i < len(args) else None for i, name in enumerate(self.params)}
+        return self.evaluator.evaluate(self.body, Environment(values, self.env))
+
+
+def type_of(value: Any) -> str:
+    """
+    ชื่อชนิดพื้นฐานของค่า
+
+    Args:
+        value (Any): ค่าใด ๆ
+
+    Returns:
+        str: เช่น "number", "text", "table"
+    """
+    value = force(value)
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "logical"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "text"
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, timedelta):
+        return "duration"
+    if isinstance(value, Table):
+        return "table"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, dict):
+        return "record"
+    if isinstance(value, MType):
+        return "type"
+    if isinstance(value, MBinary):
+        return "binary"
+    if callable(value):
+        return "function"
+    return "any"
+
+
+def values_equal(left: Any, right: Any) -> bool:
+    """
+    เปรียบเทียบค่าแบบ M (ค่าต่างชนิดกันไม่เท่ากัน เช่น true <> 1)
+
+    Args:
+        left (Any): ค่าซ้าย
+        right (Any): ค่าขวา
+
+    Returns:
+        bool: True หากเท่ากัน
+    """
+    left, right = force(left), force(right)
+    if type_of(left) != type_of(right):
+        return False
+    if isinstance(left, Table):
+        return left.columns == right.columns and left.rows == right.rows
+    return left == right
+
+
+def _compare(op: str, left: Any, right: Any) -> Optional[bool]:
+    if left is None or right is None:
+        return None
+    if type_of(left) != type_of(right):
+        raise MEvaluationError(f"เปรียบเทียบ {type_of(left)} กับ {type_of(right)} ไม่ได้")
+    if op == "<":
+        return left < right
+    if op == ">":
+        return left > right
+    if op == "<=":
+        return left <= right
+    return left >= right
+
+
+def _arithmetic(op: str, left: Any, right: Any) -> Any:
+    if left is None or right is None:
+        return None
+    if op == "&":
+        if isinstance(left, str) and isinstance(right, str):
+            return left + right
+        if isinstance(left, list) and isinstance(right, list):
+            return left + right
+        if isinstance(left, dict) and isinstance(right, dict):
+            merged = dict(left)
+            merged.update(right)
+            return merged
+        raise MEvaluationError(f"ใช้ & กับ {type_of(left)} และ {type_of(right)} ไม่ได้")
+    numeric = type_of(left) == type_of(right) == "number"
+    try:
+        if op == "+" and (numeric or isinstance(right, timedelta)):
+            return left + right
+        if op == "-" and (numeric or isinstance(right, (timedelta, date))):
+            return left - right
+        if op == "*" and (numeric or isinstance(left, timedelta) or isinstance(right, timedelta)):
+            return left * right
+        if op == "/" and (numeric or isinstance(left, timedelta)):
+            if right == 0 and numeric:
+                if left == 0:
+                    return float("nan")
+                return float("inf") if left > 0 else float("-inf")
+            return left / right
+    except TypeError:
+        pass
+    raise MEvaluationError(f"ใช้ {op} กับ {type_of(left)} และ {type_of(right)} ไม่ได้")
+
+
+def _truthy(value: Any, op: str) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    raise MEvaluationError(f"ตัวดำเนินการ {op} ต้องใช้กับค่า logical")
+
+
+def field_value(value: Any, name: str, optional: bool = False) -> Any:
+    """
+    ค่า field ของ record หรือคอลัมน์ของ table (value[name])
+
+    Args:
+        value (Any): record หรือ table
+        name (str): ชื่อ field
+        optional (bool): คืน null แทน error เมื่อไม่พบ (value[name]?)
+
+    Returns:
+        Any: ค่า field
+    """
+    value = force(value)
+    if isinstance(value, dict):
+        if name in value:
+            return force(value[name])
+    elif isinstance(value, Table):
+        if name in value.columns:
+            return [force(v) for v in value.column(name)]
+    elif value is None and optional:
+        return None
+    else:
+        raise MEvaluationError(f"เข้าถึง field [{name}] ของค่า {type_of(value)} ไม่ได้")
+    if optional:
+        return None
+    raise MEvaluationError(f"ไม่พบ field [{name}]")
+
+
+def row_record(table: Table, row: List[Any]) -> Dict[str, Any]:
+    """
+    แปลงแถวของ table เป็น record
+
+    Args:
+        table (Table): ตาราง
+        row (List[Any]): แถวข้อมูล
+
+    Returns:
+        Dict[str, Any]: ชื่อคอลัมน์ → ค่า
+    """
+    return dict(zip(table.columns, row))
+
+
+def _select_item(value: Any, selector: Any, optional: bool) -> Any:
+    if isinstance(value, list):
+        if not isinstance(selector, int) or isinstance(selector, bool):
+            raise MEvaluationError("index ของ list ต้องเป็นตัวเลข")
+        if 0 <= selector < len(value):
+            return force(value[selector])
+    elif isinstance(value, Table):
+        if isinstance(selector, dict):
+            matches = [
+                row for row in value.rows
+                if all(values_equal(row[value.index(k)], v) for k, v in selector.items())
+            ]
+            if len(matches) > 1:
+                raise MEvaluationError("พบแถวที่ตรงกับเงื่อนไขมากกว่าหนึ่งแถว")
+            if matches:
+                return row_record(value, matches[0])
+        elif isinstance(selector, int) and not isinstance(selector, bool):
+            if 0 <= selector < len(value.rows):
+                return row_record(value, value.rows[selector])
+        else:
+            raise MEvaluationError("ตัวเลือกแถวของ table ต้องเป็นตัวเลขหรือ record")
+    else:
+        raise MEvaluationError(f"ใช้ {{}} กับค่า {type_of(value)} ไม่ได้")
+    if optional:
+        return None
+    raise MEvaluationError("ไม่พบรายการที่ต้องการ")
+
+
+class Evaluator:
+    """ประมวลผล expression ของ M ด้วยชุดฟังก์ชันมาตรฐานที่กำหนด"""
+
+    def __init__(self, library: Dict[str, Any]):
+        """
+        เริ่มต้น Evaluator
+
+        Args:
+            library (Dict[str, Any]): ชื่อ → ค่า/ฟังก์ชัน Python ของฟังก์ชันมาตรฐาน
+        """
+        self.library = library
+
+    def global_environment(self, members: Dict[str, Any]) -> Environment:
+        """
+        สร้าง environment ของ section (member อ้างถึงกันได้ และประมวลผลเมื่อใช้งาน)
+
+        Args:
+            members (Dict[str, Any]): ชื่อ member → syntax tree
+
+        Returns:
+            Environment: environment ระดับ section
+        """
+        env = Environment({})
+        for name, node in members.items():
+            env.values[name] = Thunk(lambda node=node: self.evaluate(node, env))
+        return env
+
+    def lookup(self, name: str, env: Environment) -> Any:
+        try:
+            return env.lookup(name)
+        except KeyError:
+            pass
+        if name in self.library:
+            return self.library[name]
+        raise UnsupportedFeature(f"ไม่รองรับหรือไม่พบชื่อ {name}")
+
+    def evaluate(self, node: Any, env: Environment) -> Any:
+        """
+        ประมวลผล node
+
+        Args:
+            node (Any): node ของ syntax tree
+            env (Environment): environment ปัจจุบัน
+
+        Returns:
+            Any: ค่าผลลัพธ์
+        """
+        if isinstance(node, Literal):
+            return node.value
+        if isinstance(node, Identifier):
+            return self.lookup(node.name, env)
+        if isinstance(node, Call):
+            function = self.evaluate(node.function, env)
+            if not callable(function) or isinstance(function, (MType, Table)):
+                raise MEvaluationError(f"ค่า {type_of(function)} ไม่ใช่ฟังก์ชัน")
+            args = [self.evaluate(arg, env) for arg in node.args]
+            return function(*args)
+        if isinstance(node, LetExpr):
+            scope = Environment({}, env)
+            for name, value in node.bindings:
+                scope.values[name] = Thunk(lambda value=value: self.evaluate(value, scope))
+            return self.evaluate(node.body, scope)
+        if isinstance(node, FieldAccess):
+            target = self.lookup("_", env) if node.target is None else self.evaluate(node.target, env)
+            return field_value(target, node.name, node.optional)
+        if isinstance(node, ItemAccess):
+            target = force(self.evaluate(node.target, env))
+            return _select_item(target, force(self.evaluate(node.selector, env)), node.optional)
+        if isinstance(node, Binary):
+            return self._binary(node, env)
+        if isinstance(node, Unary):
+            value = force(self.evaluate(node.operand, env))
+            if node.op == "not":
+                truth = _truthy(value, "not")
+                return None if truth is None else not truth
+            if value is None:
+                return None
+            if type_of(value) not in ("number", "duration"):
+                raise MEvaluationError(f"ใช้ {node.op} กับ {type_of(value)} ไม่ได้")
+            return -value if node.op == "-" else value
+        if isinstance(node, IfExpr):
+            condition = force(self.evaluate(node.condition, env))
+            if not isinstance(condition, bool):
+                raise MEvaluationError("เงื่อนไขของ if ต้องเป็นค่า logical")
+            return self.evaluate(node.then if condition else node.otherwise, env)
+        if isinstance(node, FunctionExpr):
+            return MFunction(self, node.params, node.body, env)
+        if isinstance(node, ListExpr):
+            items: List[Any] = []
+            for item in node.items:
+                if isinstance(item, Range):
+                    start = force(self.evaluate(item.start, env))
+                    end = force(self.evaluate(item.end, env))
+                    if not all(isinstance(v, int) and not isinstance(v, bool) for v in (start, end)):
+                        raise UnsupportedFeature("รองรับช่วง a..b เฉพาะจำนวนเต็ม")
+                    items.extend(range(start, end + 1))
+                else:
+                    items.append(self.evaluate(item, env))
+            return items
+        if isinstance(node, RecordExpr):
+            record: Dict[str, Any] = {}
+            scope = Environment(record, env)
+            for name, value in node.fields:
+                record[name] = Thunk(lambda value=value: self.evaluate(value, scope))
+            return {name: force(value) for name, value in record.items()}
+        if isinstance(node, Projection):
+            target = force(self.lookup("_", env) if node.target is None else self.evaluate(node.target, env))
+            if isinstance(target, Table):
+                indexes = [target.index(name) for name in node.names]
+                return Table(node.names, [[row[i] for i in indexes] for row in target.rows])
+            return {name: field_value(target, name, node.optional) for name in node.names}
+        if isinstance(node, TypeExpr):
+            return MType(node.name, node.nullable)
+        if isinstance(node, TryExpr):
+            try:
+                value = force(self.evaluate(node.body, env))
+            except UnsupportedFeature:
+                raise
+            except MEvaluationError as e:
+                if node.otherwise is not None:
+                    return self.evaluate(node.otherwise, env)
+                return {"HasError": True, "Error": {"Reason": "Expression.Error", "Message": str(e)}}
+            if node.otherwise is not None:
+                return value
+            return {"HasError": False, "Value": value}
+        if isinstance(node, ErrorExpr):
+            message = force(self.evaluate(node.message, env))
+            if isinstance(message, dict):
+                message = message.get("Message", message.get("Reason", ""))
+            raise MEvaluationError(str(message))
+        raise UnsupportedFeature(f"ไม่รองรับ expression ชนิด {type(node).__name__}")
+
+    def _binary(self, node: Binary, env: Environment) -> Any:
+        op = node.op
+        left = force(self.evaluate(node.left, env))
+        if op in ("and", "or"):
+            truth = _truthy(left, op)
+            if op == "and" and truth is False:
+                return False
+            if op == "or" and truth is True:
+                return True
+            right = _truthy(force(self.evaluate(node.right, env)), op)
+            if op == "and":
+                return False if right is False else (None if None in (truth, right) else True)
+            return True if right is True else (None if None in (truth, right) else False)
+
+        right = force(self.evaluate(node.right, env))
+        if op == "=":
+            return values_equal(left, right)
+        if op == "<>":
+            return not values_equal(left, right)
+        if op in ("<", ">", "<=", ">="):
+            return _compare(op, left, right)
+        if op == "as":
+            return left
+        if op == "is":
+            if not isinstance(right, MType):
+                raise MEvaluationError("ด้านขวาของ is ต้องเป็น type")
+            actual = type_of(left)
+            expected = "number" if right.name in NUMBER_FACETS else right.name
+            return expected in ("any", actual) or (right.nullable and actual == "null")
+        return _arithmetic(op, left, right)
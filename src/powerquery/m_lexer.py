@@ -0,0 +1,144 @@
+"""
+M Lexer
+แยก token ของภาษา Power Query M
+"""
+
+from typing import List, NamedTuple
+
+
+class MSyntaxError(Exception):
+    """ข้อผิดพลาดเมื่อโค้ด M มีรูปแบบไม่ถูกต้อง"""
+
+
+class Token(NamedTuple):
+    """token หนึ่งตัวของโค้ด M"""
+    kind: str       # "ident", "string", "number", "symbol", "eof"
+    value: str      # สำหรับ #"quoted name" จะเก็บเฉพาะชื่อ
+    pos: int
+    quoted: bool = False
+
+
+KEYWORDS = {
+    "and", "as", "each", "else", "error", "false", "if", "in", "is", "let", "meta",
+    "not", "null", "or", "otherwise", "section", "shared", "then", "true", "try", "type"
+}
+
+# เรียงจากยาวไปสั้นเพื่อให้จับ operator หลายตัวอักษรก่อน
+_SYMBOLS = ["...", "=>", "<=", ">=", "<>", "..", "??",
+            "=", "<", ">", "+", "-", "*", "/", "&", "(", ")", "[", "]", "{", "}",
+            ",", ";", "@", "!", "?"]
+
+
+def _is_ident_start(ch: str) -> bool:
+    return ch.isalpha() or ch == "_"
+
+
+def _is_ident_part(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def tokenize(text: str) -> List[Token]:
+    """
+    แยกโค้ด M เป็น token (ข้าม whitespace และ comment)
+
+    ชื่อที่มีจุด เช่น Table.SelectRows หรือ Int64.Type จะเป็น token เดียว
+
+    Args:
+        text (str): โค้ด M
+
+    Returns:
+        List[Token]: รายการ token ปิดท้ายด้วย token ชนิด "eof"
+    """
+    tokens: List[Token] = []
+    i = 0
+    length = len(text)
+
+    while i < length:
+        ch = text[i]
+
+        if ch.isspace() or ch == "﻿":
+            i += 1
+            continue
+
+        # comment
+        if text.startswith("//", i):
+            end = text.find("\n", i)
+            i = length if end == -1 else end + 1
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            if end == -1:
+                raise MSyntaxError(f"comment ไม่ได้ปิดที่ตำแหน่ง {i}")
+            i = end + 2
+            continue
+
+        # string และ quoted identifier ("" คือเครื่องหมายคำพูดหนึ่งตัว)
+        if ch == '"' or text.startswith('#"', i):
+            quoted = ch == "#"
+            start = i
+            i += 2 if quoted else 1
+            parts = []
+            while True:
+                end = text.find('"', i)
+                if end == -1:
+                    raise MSyntaxError(f"string ไม่ได้ปิดที่ตำแหน่ง {start}")
+                parts.append(text[i:end])
+                if text.startswith('""', end):
+                    parts.append('"')
+                    i = end + 2
+                    continue
+                i = end + 1
+                break
+            value = "".join(parts)
+            tokens.append(Token("ident" if quoted else "string", value, start, quoted))
+            continue
+
+        # identifier (รวมชื่อที่มีจุดคั่น) และ keyword แบบ #table, #date
+        if _is_ident_start(ch) or (ch == "#" and i + 1 < length and _is_ident_start(text[i + 1])):
+            start = i
+            i += 1
+            while i < length:
+                if _is_ident_part(text[i]):
+                    i += 1
+                elif text[i] == "." and i + 1 < length and _is_ident_start(text[i + 1]):
+                    i += 1
+                else:
+                    break
+            tokens.append(Token("ident", text[start:i], start))
+            continue
+
+        # number
+        if ch.isdigit() or (ch == "." and i + 1 < length and text[i + 1].isdigit()):
+            start = i
+            if text.startswith(("0x", "0X"), i):
+                i += 2
+                while i < length and text[i] in "0123456789abcdefABCDEF":
+                    i += 1
+            else:
+                while i < length and text[i].isdigit():
+                    i += 1
+                if i < length and text[i] == "." and i + 1 < length and text[i + 1].isdigit():
+                    i += 1
+                    while i < length and text[i].isdigit():
+                        i += 1
+                if i < length and text[i] in "eE":
+                    j = i + 1
+                    if j < length and text[j] in "+-":
+                        j += 1
+                    if j < length and text[j].isdigit():
+                        i = j
+                        while i < length and text[i].isdigit():
+                            i += 1
+            tokens.append(Token("number", text[start:i], start))
+            continue
+
+        for symbol in _SYMBOLS:
+            if text.startswith(symbol, i):
+                tokens.append(Token("symbol", symbol, i))
+                i += len(symbol)
+                break
+        else:
+            raise MSyntaxError(f"อักขระไม่รู้จัก {ch!r} ที่ตำแหน่ง {i}")
+
+    tokens.append(Token("eof", "", length))
+    return tokens
@@ -0,0 +1,745 @@
+"""
+M Library
+ฟังก์ชันมาตรฐานของ M ที่ headless engine รองรับ
+"""
+
+import csv
+import io
+import math
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .m_evaluator import MBinary, MError, MEvaluationError, MType, NUMBER_FACETS, Thunk, UnsupportedFeature, force, \
+    row_record, type_of, values_equal
+from .m_table import Table
+from .xlsx_reader import WorkbookReader, datetime_to_excel_serial, excel_serial_to_datetime
+
+# ค่าคงที่ของ JoinKind
+JOIN_INNER, JOIN_LEFT_OUTER, JOIN_RIGHT_OUTER, JOIN_FULL_OUTER, JOIN_LEFT_ANTI, JOIN_RIGHT_ANTI = range(6)
+
+# Encoding ของ Csv.Document (code page → ชื่อใน Python)
+CODE_PAGES = {
+    65001: "utf-8-sig", 1200: "utf-16-le", 1201: "utf-16-be", 1252: "cp1252",
+    874: "cp874", 20127: "ascii", 28591: "latin-1", 932: "cp932", 936: "gbk",
+}
+
+QUOTE_STYLE_NONE, QUOTE_STYLE_CSV = 0, 1
+
+MISSING_FIELD_ERROR, MISSING_FIELD_IGNORE, MISSING_FIELD_USE_NULL = range(3)
+
+
+def _as_list(value: Any) -> List[Any]:
+    """ค่าเดี่ยวหรือ list → list"""
+    value = force(value)
+    return list(value) if isinstance(value, list) else [value]
+
+
+def _require_table(value: Any, function: str) -> Table:
+    value = force(value)
+    if not isinstance(value, Table):
+        raise MEvaluationError(f"{function}: ต้องการ table แต่ได้ {type_of(value)}")
+    return value
+
+
+def _column_indexes(table: Table, columns: Sequence[str], function: str) -> List[int]:
+    try:
+        return [table.index(name) for name in columns]
+    except KeyError as e:
+        raise MEvaluationError(f"{function}: {e.args[0]}") from None
+
+
+def _present_columns(table: Table, columns: Sequence[str], missing_field: Any, function: str) -> List[str]:
+    """คอลัมน์ที่มีอยู่จริง (ข้ามคอลัมน์ที่ไม่พบเมื่อใช้ MissingField.Ignore / UseNull)"""
+    if force(missing_field) in (MISSING_FIELD_IGNORE, MISSING_FIELD_USE_NULL):
+        return [name for name in columns if name in table.columns]
+    _column_indexes(table, columns, function)
+    return list(columns)
+
+
+# ---------- การแปลงชนิดข้อมูล ----------
+
+def _number_from_text(text: str) -> Optional[float]:
+    cleaned = text.strip().replace(",", "")
+    if not cleaned:
+        return None
+    percent = cleaned.endswith("%")
+    if percent:
+        cleaned = cleaned[:-1]
+    try:
+        number = float(cleaned)
+    except ValueError:
+        raise MEvaluationError(f"แปลง {text!r} เป็นตัวเลขไม่ได้") from None
+    return number / 100 if percent else number
+
+
+def _datetime_from_text(text: str, culture: Optional[str]) -> Optional[datetime]:
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    day_first = bool(culture) and not culture.lower().startswith("en-us")
+    formats = ["%d/%m/%Y", "%m/%d/%Y"] if day_first else ["%m/%d/%Y", "%d/%m/%Y"]
+    for fmt in formats:
+        for suffix in ("", " %H:%M", " %H:%M:%S", " %I:%M %p", " %I:%M:%S %p"):
+            try:
+                return datetime.strptime(text, fmt + suffix)
+            except ValueError:
+                continue
+    raise MEvaluationError(f"แปลง {text!r} เป็นวันที่ไม่ได้")
+
+
+def text_from_value(value: Any) -> Optional[str]:
+    """
+    แปลงค่าเป็นข้อความ (Text.From)
+
+    Args:
+        value (Any): ค่าใด ๆ
+
+    Returns:
+        Optional[str]: ข้อความ หรือ None หากค่าเป็น null
+    """
+    value = force(value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, (int, date, time)):
+        return str(value) if isinstance(value, int) else value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    raise MEvaluationError(f"แปลง {type_of(value)} เป็นข้อความไม่ได้")
+
+
+def convert_value(value: Any, target: MType, culture: Optional[str] = None) -> Any:
+    """
+    แปลงค่าเป็นชนิดที่กำหนด (ใช้ใน Table.TransformColumnTypes)
+
+    Args:
+        value (Any): ค่าเดิม
+        target (MType): ชนิดปลายทาง
+        culture (Optional[str]): culture สำหรับแปลงข้อความ เช่น "en-US"
+
+    Returns:
+        Any: ค่าที่แปลงแล้ว (ข้อความว่างเป็น null เมื่อแปลงเป็นตัวเลข / วันที่)
+
+    Raises:
+        MEvaluationError: แปลงค่าไม่ได้
+    """
+    value = force(value)
+    if value is None:
+        return None
+    name = target.name
+    if name == "any":
+        return value
+
+    if name == "text":
+        return text_from_value(value)
+
+    if name in NUMBER_FACETS or name == "number":
+        if isinstance(value, bool):
+            number: Any = 1 if value else 0
+        elif isinstance(value, (int, float)):
+            number = value
+        elif isinstance(value, str):
+            number = _number_from_text(value)
+            if number is None:
+                return None
+        elif isinstance(value, (date, timedelta)):
+            number = datetime_to_excel_serial(value)
+        else:
+            raise MEvaluationError(f"แปลง {type_of(value)} เป็นตัวเลขไม่ได้")
+        if name in ("Int64", "Int32", "Int16", "Int8", "Byte"):
+            return int(round(number))
+        if name == "Currency":
+            return round(number, 4)
+        return number
+
+    if name in ("date", "datetime"):
+        if isinstance(value, datetime):
+            moment = value
+        elif isinstance(value, date):
+            moment = datetime(value.year, value.month, value.day)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            moment = excel_serial_to_datetime(value)
+        elif isinstance(value, str):
+            moment = _datetime_from_text(value, culture)
+            if moment is None:
+                return None
+        else:
+            raise MEvaluationError(f"แปลง {type_of(value)} เป็นวันที่ไม่ได้")
+        return moment.date() if name == "date" else moment
+
+    if name == "logical":
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            return value != 0
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+        raise MEvaluationError(f"แปลง {value!r} เป็น logical ไม่ได้")
+
+    if name == "duration":
+        if isinstance(value, timedelta):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return timedelta(days=value)
+        raise MEvaluationError(f"แปลง {type_of(value)} เป็น duration ไม่ได้")
+
+    raise UnsupportedFeature(f"ไม่รองรับการแปลงเป็นชนิด {name}")
+
+
+def _convert_cell(value: Any, target: MType, culture: Optional[str] = None) -> Any:
+    """convert_value ของหนึ่ง cell: ค่าที่แปลงไม่ได้เป็น error ของ cell นั้น แทนที่จะทำให้ทั้ง query ล้มเหลว"""
+    try:
+        return convert_value(value, target, culture)
+    except UnsupportedFeature:
+        raise
+    except MEvaluationError as e:
+        return MError(str(e))
+
+
+# ---------- แหล่งข้อมูล ----------
+
+def file_contents(path: Any, options: Any = None) -> MBinary:
+    """File.Contents(path)"""
+    path = force(path)
+    if not isinstance(path, str):
+        raise MEvaluationError("File.Contents: path ต้องเป็นข้อความ")
+    return MBinary(path)
+
+
+def _generic_columns(count: int) -> List[str]:
+    return [f"Column{i}" for i in range(1, count + 1)]
+
+
+def _unique_names(names: List[Any]) -> List[str]:
+    """ชื่อคอลัมน์จากแถวหัวตาราง (ชื่อว่างเป็น ColumnN และชื่อซ้ำต่อท้ายด้วย _1, _2)"""
+    result: List[str] = []
+    seen = set()
+    for i, name in enumerate(names, 1):
+        text = text_from_value(name) if name is not None else ""
+        text = text or f"Column{i}"
+        candidate, suffix = text, 1
+        while candidate in seen:
+            candidate = f"{text}_{suffix}"
+            suffix += 1
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+
+def _rows_to_table(rows: List[List[Any]], use_headers: bool) -> Table:
+    width = max((len(row) for row in rows), default=0)
+    rows = [row + [None] * (width - len(row)) for row in rows]
+    if use_headers and rows:
+        return Table(_unique_names(rows[0]), rows[1:])
+    return Table(_generic_columns(width), rows)
+
+
+def excel_workbook(workbook: Any, use_headers: Any = None, delay_types: Any = None) -> Table:
+    """
+    Excel.Workbook(binary, useHeaders, delayTypes)
+
+    Returns:
+        Table: ตาราง navigation ที่มีคอลัมน์ Name, Data, Item, Kind, Hidden
+    """
+    workbook = force(workbook)
+    if not isinstance(workbook, MBinary):
+        raise UnsupportedFeature("Excel.Workbook: รองรับเฉพาะ binary จาก File.Contents")
+    if not os.path.exists(workbook.path):
+        raise MEvaluationError(f"Excel.Workbook: ไม่พบไฟล์ {workbook.path}")
+    if os.path.splitext(workbook.path)[1].lower() not in (".xlsx", ".xlsm"):
+        raise UnsupportedFeature(f"Excel.Workbook: ไม่รองรับไฟล์ {workbook.path}")
+    reader = WorkbookReader(workbook.path)
+    headers = bool(force(use_headers))
+
+    rows: List[List[Any]] = []
+    for sheet in reader.sheets:
+        name = sheet["name"]
+        data = Thunk(lambda name=name: _rows_to_table(reader.sheet_rows(name), headers))
+        rows.append([name, data, name, "Sheet", name in reader.hidden])
+    for table in reader.tables:
+        name = table["name"]
+        data = Thunk(lambda name=name: Table(*reader.table_rows(name)))
+        rows.append([name, data, name, "Table", table["sheet"] in reader.hidden])
+    return Table(["Name", "Data", "Item", "Kind", "Hidden"], rows)
+
+
+def csv_options(columns: Any, delimiter: Any, encoding: Any) -> Tuple[Any, str, int, int]:
+    """
+    อ่านตัวเลือกของ Csv.Document (อาร์กิวเมนต์ที่สองเป็นจำนวนคอลัมน์, รายชื่อคอลัมน์ หรือ options record)
+
+    Returns:
+        Tuple[Any, str, int, int]: (columns, delimiter, code page, quote style)
+    """
+    options = force(columns)
+    quote_style = QUOTE_STYLE_CSV
+    if isinstance(options, dict):
+        delimiter = options.get("Delimiter", delimiter)
+        encoding = options.get("Encoding", encoding)
+        quote_style = force(options.get("QuoteStyle", quote_style))
+        columns = options.get("Columns")
+    columns, delimiter, encoding = force(columns), force(delimiter), force(encoding)
+
+    code_page = 65001 if encoding is None else int(encoding)
+    if code_page not in CODE_PAGES:
+        raise UnsupportedFeature(f"Csv.Document: ไม่รองรับ encoding {code_page}")
+    if delimiter is None:
+        delimiter = ","
+    if not isinstance(delimiter, str) or len(delimiter) != 1:
+        raise UnsupportedFeature(f"Csv.Document: ไม่รองรับ delimiter {delimiter!r}")
+    return columns, delimiter, code_page, quote_style
+
+
+def csv_column_names(columns: Any, width: Callable[[], int]) -> List[str]:
+    """
+    ชื่อคอลัมน์ของ Csv.Document
+
+    Args:
+        columns (Any): ค่า Columns จาก csv_options
+        width (Callable[[], int]): คืนจำนวนคอลัมน์ที่มากที่สุดในไฟล์ (เรียกเมื่อไม่ได้ระบุ Columns)
+
+    Returns:
+        List[str]: ชื่อคอลัมน์
+    """
+    if isinstance(columns, list):
+        return [text_from_value(c) for c in columns]
+    if isinstance(columns, (int, float)) and not isinstance(columns, bool):
+        return _generic_columns(int(columns))
+    return _generic_columns(width())
+
+
+def csv_document(source: Any, columns: Any = None, delimiter: Any = None,
+                 extra_values: Any = None, encoding: Any = None) -> Table:
+    """
+    Csv.Document(source, columns หรือ options record, delimiter, extraValues, encoding)
+
+    Returns:
+        Table: คอลัมน์ Column1..N ค่าทุกช่องเป็นข้อความ
+    """
+    source = force(source)
+    columns, delimiter, code_page, quote_style = csv_options(columns, delimiter, encoding)
+    if isinstance(source, MBinary):
+        text = source.read().decode(CODE_PAGES[code_page])
+    elif isinstance(source, str):
+        text = source
+    else:
+        raise MEvaluationError(f"Csv.Document: ไม่รองรับแหล่งข้อมูลชนิด {type_of(source)}")
+
+    reader = csv.reader(
+        io.StringIO(text, newline=""),
+        delimiter=delimiter,
+        quoting=csv.QUOTE_NONE if quote_style == QUOTE_STYLE_NONE else csv.QUOTE_MINIMAL,
+    )
+    rows = [row for row in reader]
+    # Power Query ไม่นับบรรทัดว่างท้ายไฟล์
+    while rows and not rows[-1]:
+        rows.pop()
+
+    names = csv_column_names(columns, lambda: max((len(row) for row in rows), default=0))
+    width = len(names)
+    return Table(names, [(row + [""] * (width - len(row)))[:width] for row in rows])
+
+
+# ---------- ฟังก์ชันของ table ----------
+
+def table_promote_headers(table: Any, options: Any = None) -> Table:
+    """Table.PromoteHeaders(table, options)"""
+    table = _require_table(table, "Table.PromoteHeaders")
+    if not table.rows:
+        return Table(table.columns, [])
+    return Table(_unique_names(table.rows[0]), [list(row) for row in table.rows[1:]])
+
+
+def table_select_rows(table: Any, condition: Any) -> Table:
+    """Table.SelectRows(table, condition)"""
+    table = _require_table(table, "Table.SelectRows")
+    condition = force(condition)
+    rows = []
+    for row in table.rows:
+        result = force(condition(row_record(table, row)))
+        if result is True:
+            rows.append(row)
+        elif result is not False and result is not None:
+            raise MEvaluationError("Table.SelectRows: เงื่อนไขต้องคืนค่า logical")
+    return Table(table.columns, rows)
+
+
+def table_transform_column_types(table: Any, transforms: Any, culture: Any = None) -> Table:
+    """Table.TransformColumnTypes(table, {{column, type}}, culture)"""
+    table = _require_table(table, "Table.TransformColumnTypes")
+    transforms = force(transforms)
+    culture = force(culture)
+    if isinstance(culture, dict):
+        culture = force(culture.get("Culture"))
+    if transforms and not isinstance(force(transforms[0]), list):
+        transforms = [transforms]
+
+    conversions: Dict[int, MType] = {}
+    for pair in transforms:
+        column, target = (force(v) for v in force(pair))
+        if not isinstance(target, MType):
+            raise MEvaluationError("Table.TransformColumnTypes: ต้องระบุ type")
+        conversions[_column_indexes(table, [column], "Table.TransformColumnTypes")[0]] = target
+
+    rows = []
+    for row in table.rows:
+        new_row = list(row)
+        for index, target in conversions.items():
+            new_row[index] = _convert_cell(row[index], target, culture)
+        rows.append(new_row)
+    return Table(table.columns, rows)
+
+
+def table_add_column(table: Any, name: Any, generator: Any, column_type: Any = None) -> Table:
+    """Table.AddColumn(table, newColumnName, columnGenerator, columnType)"""
+    table = _require_table(table, "Table.AddColumn")
+    name, generator = force(name), force(generator)
+    if name in table.columns:
+        raise MEvaluationError(f"Table.AddColumn: มีคอลัมน์ {name!r} อยู่แล้ว")
+    rows = [list(row) + [force(generator(row_record(table, row)))] for row in table.rows]
+    return Table(table.columns + [name], rows)
+
+
+def table_select_columns(table: Any, columns: Any, missing_field: Any = None) -> Table:
+    """Table.SelectColumns(table, columns)"""
+    table = _require_table(table, "Table.SelectColumns")
+    names = [force(c) for c in _as_list(columns)]
+    if force(missing_field) != MISSING_FIELD_USE_NULL:
+        names = _present_columns(table, names, missing_field, "Table.SelectColumns")
+    indexes = [table.index(name) if name in table.columns else None for name in names]
+    return Table(names, [[row[i] if i is not None else None for i in indexes] for row in table.rows])
+
+
+def table_remove_columns(table: Any, columns: Any, missing_field: Any = None) -> Table:
+    """Table.RemoveColumns(table, columns)"""
+    table = _require_table(table, "Table.RemoveColumns")
+    names = _present_columns(table, [force(c) for c in _as_list(columns)], missing_field, "Table.RemoveColumns")
+    removed = set(_column_indexes(table, names, "Table.RemoveColumns"))
+    keep = [i for i in range(len(table.columns)) if i not in removed]
+    return Table([table.columns[i] for i in keep], [[row[i] for i in keep] for row in table.rows])
+
+
+def table_rename_columns(table: Any, renames: Any, missing_field: Any = None) -> Table:
+    """Table.RenameColumns(table, {{old, new}})"""
+    table = _require_table(table, "Table.RenameColumns")
+    renames = force(renames)
+    if renames and not isinstance(force(renames[0]), list):
+        renames = [renames]
+    columns = list(table.columns)
+    for pair in renames:
+        old, new = (force(v) for v in force(pair))
+        if _present_columns(table, [old], missing_field, "Table.RenameColumns"):
+            columns[table.index(old)] = new
+    return Table(columns, [list(row) for row in table.rows])
+
+
+def table_row_count(table: Any) -> int:
+    """Table.RowCount(table)"""
+    return len(_require_table(table, "Table.RowCount").rows)
+
+
+def table_column(table: Any, column: Any) -> List[Any]:
+    """Table.Column(table, column)"""
+    table = _require_table(table, "Table.Column")
+    return table.column(_column_name(table, force(column), "Table.Column"))
+
+
+def _column_name(table: Table, name: Any, function: str) -> str:
+    if name not in table.columns:
+        raise MEvaluationError(f"{function}: ไม่พบคอลัมน์ {name!r}")
+    return name
+
+
+def _key_of(row: List[Any], indexes: List[int]) -> tuple:
+    # ใช้ชนิดข้อมูลร่วมกับค่าเพื่อไม่ให้ 1 กับ true เป็น key เดียวกัน
+    return tuple((type_of(row[i]), row[i]) for i in indexes)
+
+
+def table_group(table: Any, key: Any, aggregated: Any, group_kind: Any = None, comparer: Any = None) -> Table:
+    """Table.Group(table, key, {{name, each aggregation, type}})"""
+    table = _require_table(table, "Table.Group")
+    if force(group_kind) not in (None, 1):
+        raise UnsupportedFeature("Table.Group: ไม่รองรับ GroupKind.Local")
+    if force(comparer) is not None:
+        raise UnsupportedFeature("Table.Group: ไม่รองรับ comparer")
+    keys = [force(k) for k in _as_list(key)]
+    indexes = _column_indexes(table, keys, "Table.Group")
+
+    aggregated = force(aggregated)
+    if aggregated and not isinstance(force(aggregated[0]), list):
+        aggregated = [aggregated]
+    aggregations = []
+    for item in aggregated:
+        item = force(item)
+        aggregations.append((force(item[0]), force(item[1])))
+
+    groups: Dict[tuple, List[List[Any]]] = {}
+    for row in table.rows:
+        groups.setdefault(_key_of(row, indexes), []).append(row)
+
+    rows = []
+    for group_rows in groups.values():
+        sub_table = Table(table.columns, group_rows)
+        rows.append(
+            [group_rows[0][i] for i in indexes]
+            + [force(function(sub_table)) for _, function in aggregations]
+        )
+    return Table(keys + [name for name, _ in aggregations], rows)
+
+
+def table_nested_join(table1: Any, key1: Any, table2: Any, key2: Any, new_column: Any,
+                      join_kind: Any = None, key_equality_comparers: Any = None) -> Table:
+    """Table.NestedJoin(table1, key1, table2, key2, newColumnName, joinKind)"""
+    table1 = _require_table(table1, "Table.NestedJoin")
+    table2 = _require_table(table2, "Table.NestedJoin")
+    if force(key_equality_comparers) is not None:
+        raise UnsupportedFeature("Table.NestedJoin: ไม่รองรับ keyEqualityComparers")
+    new_column = force(new_column)
+    join_kind = JOIN_LEFT_OUTER if force(join_kind) is None else int(force(join_kind))
+    left_indexes = _column_indexes(table1, [force(k) for k in _as_list(key1)], "Table.NestedJoin")
+    right_indexes = _column_indexes(table2, [force(k) for k in _as_list(key2)], "Table.NestedJoin")
+    if len(left_indexes) != len(right_indexes):
+        raise MEvaluationError("Table.NestedJoin: จำนวน key ไม่เท่ากัน")
+
+    index: Dict[tuple, List[int]] = {}
+    for position, row in enumerate(table2.rows):
+        index.setdefault(_key_of(row, right_indexes), []).append(position)
+
+    rows = []
+    matched_right = set()
+    for row in table1.rows:
+        positions = index.get(_key_of(row, left_indexes), [])
+        matched_right.update(positions)
+        if join_kind == JOIN_INNER and not positions:
+            continue
+        if join_kind in (JOIN_LEFT_ANTI, JOIN_RIGHT_ANTI) and positions:
+            continue
+        if join_kind == JOIN_RIGHT_ANTI:
+            continue
+        if join_kind == JOIN_RIGHT_OUTER and not positions:
+            continue
+        nested = Table(table2.columns, [table2.rows[p] for p in positions])
+        rows.append(list(row) + [nested])
+
+    if join_kind in (JOIN_RIGHT_OUTER, JOIN_FULL_OUTER, JOIN_RIGHT_ANTI):
+        for position, row in enumerate(table2.rows):
+            if position not in matched_right:
+                rows.append([None] * len(table1.columns) + [Table(table2.columns, [row])])
+    return Table(table1.columns + [new_column], rows)
+
+
+def table_expand_table_column(table: Any, column: Any, column_names: Any, new_column_names: Any = None) -> Table:
+    """Table.ExpandTableColumn(table, column, columnNames, newColumnNames)"""
+    table = _require_table(table, "Table.ExpandTableColumn")
+    column = _column_name(table, force(column), "Table.ExpandTableColumn")
+    names = [force(n) for n in _as_list(column_names)]
+    new_names = [force(n) for n in _as_list(new_column_names)] if force(new_column_names) is not None else names
+    if len(new_names) != len(names):
+        raise MEvaluationError("Table.ExpandTableColumn: จำนวนชื่อคอลัมน์ใหม่ไม่ตรงกัน")
+    position = table.index(column)
+
+    rows = []
+    for row in table.rows:
+        nested = force(row[position])
+        before, after = list(row[:position]), list(row[position + 1:])
+        if nested is None or (isinstance(nested, Table) and not nested.rows):
+            rows.append(before + [None] * len(names) + after)
+            continue
+        nested = _require_table(nested, "Table.ExpandTableColumn")
+        indexes = [nested.index(n) if n in nested.columns else None for n in names]
+        for nested_row in nested.rows:
+            rows.append(before + [nested_row[i] if i is not None else None for i in indexes] + after)
+    columns = table.columns[:position] + new_names + table.columns[position + 1:]
+    return Table(columns, rows)
+
+
+def hash_table(columns: Any, rows: Any) -> Table:
+    """#table(columns, rows)"""
+    columns = force(columns)
+    if isinstance(columns, MType):
+        raise UnsupportedFeature("#table: ไม่รองรับการระบุคอลัมน์ด้วย type")
+    if isinstance(columns, (int, float)):
+        columns = _generic_columns(int(columns))
+    return Table([force(c) for c in columns], [[force(v) for v in force(row)] for row in force(rows)])
+
+
+# ---------- ฟังก์ชันของ list / number / text ----------
+
+def _non_null(values: Any) -> List[Any]:
+    return [v for v in (force(v) for v in force(values)) if v is not None]
+
+
+def list_sum(values: Any, precision: Any = None) -> Any:
+    values = _non_null(values)
+    return sum(values) if values else None
+
+
+def list_average(values: Any, precision: Any = None) -> Any:
+    values = _non_null(values)
+    return sum(values) / len(values) if values else None
+
+
+def list_min(values: Any, default: Any = None, comparer: Any = None, include_nulls: Any = None) -> Any:
+    values = _non_null(values)
+    return min(values) if values else force(default)
+
+
+def list_max(values: Any, default: Any = None, comparer: Any = None, include_nulls: Any = None) -> Any:
+    values = _non_null(values)
+    return max(values) if values else force(default)
+
+
+def list_distinct(values: Any, equation_criteria: Any = None) -> List[Any]:
+    result: List[Any] = []
+    for value in (force(v) for v in force(values)):
+        if not any(values_equal(value, existing) for existing in result):
+            result.append(value)
+    return result
+
+
+def number_mod(number: Any, divisor: Any, precision: Any = None) -> Any:
+    number, divisor = force(number), force(divisor)
+    if number is None or divisor is None:
+        return None
+    # Number.Mod ให้ผลลัพธ์มีเครื่องหมายตามตัวตั้ง
+    return math.fmod(number, divisor) if isinstance(number, float) or isinstance(divisor, float) \
+        else int(math.fmod(number, divisor))
+
+
+def number_round(number: Any, digits: Any = None, rounding_mode: Any = None) -> Any:
+    number = force(number)
+    if number is None:
+        return None
+    if force(rounding_mode) not in (None, 4):
+        raise UnsupportedFeature("Number.Round: รองรับเฉพาะ RoundingMode.ToEven")
+    return round(number, int(force(digits) or 0))
+
+
+def _text_function(function: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(text: Any, *args: Any) -> Any:
+        text = force(text)
+        if text is None:
+            return None
+        if not isinstance(text, str):
+            raise MEvaluationError(f"ต้องการข้อความแต่ได้ {type_of(text)}")
+        return function(text, *(force(a) for a in args))
+    return wrapper
+
+
+def _date_part(function: Callable[[date], Any]) -> Callable[[Any], Any]:
+    def wrapper(value: Any) -> Any:
+        value = force(value)
+        if value is None:
+            return None
+        if not isinstance(value, date):
+            raise MEvaluationError(f"ต้องการวันที่แต่ได้ {type_of(value)}")
+        return function(value)
+    return wrapper
+
+
+def standard_library(current_workbook: Optional[str] = None, columnar: bool = True,
+                     source_folders: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    ชุดฟังก์ชันมาตรฐานที่ evaluator รองรับ
+
+    Args:
+        current_workbook (Optional[str]): ไฟล์ที่กำลังรีเฟช (สำหรับ Excel.CurrentWorkbook)
+        columnar (bool): ใช้ฟังก์ชัน Table.* แบบ columnar จาก m_columnar เมื่อติดตั้ง numpy
+        source_folders (Optional[Sequence[str]]): โฟลเดอร์ข้อมูลที่อ่านแบบ lazy plan
+            พร้อม projection / predicate pushdown (ดู m_plan)
+
+    Returns:
+        Dict[str, Any]: ชื่อ → ค่า/ฟังก์ชัน
+    """
+    def excel_current_workbook() -> Table:
+        if current_workbook is None:
+            raise UnsupportedFeature("Excel.CurrentWorkbook: ไม่ทราบไฟล์ปัจจุบัน")
+        reader = WorkbookReader(current_workbook)
+        rows = [
+            [table["name"], Thunk(lambda name=table["name"]: Table(*reader.table_rows(name)))]
+            for table in reader.tables
+        ]
+        return Table(["Name", "Content"], rows)
+
+    library: Dict[str, Any] = {
+        "File.Contents": file_contents,
+        "Excel.Workbook": excel_workbook,
+        "Excel.CurrentWorkbook": excel_current_workbook,
+        "Csv.Document": csv_document,
+        "Table.PromoteHeaders": table_promote_headers,
+        "Table.SelectRows": table_select_rows,
+        "Table.TransformColumnTypes": table_transform_column_types,
+        "Table.AddColumn": table_add_column,
+        "Table.SelectColumns": table_select_columns,
+        "Table.RemoveColumns": table_remove_columns,
+        "Table.RenameColumns": table_rename_columns,
+        "Table.RowCount": table_row_count,
+        "Table.Column": table_column,
+        "Table.Group": table_group,
+        "Table.NestedJoin": table_nested_join,
+        "Table.ExpandTableColumn": table_expand_table_column,
+        "#table": hash_table,
+        "#date": lambda y, m, d: date(force(y), force(m), force(d)),
+        "#datetime": lambda y, mo, d, h, mi, s: datetime(
+            force(y), force(mo), force(d), force(h), force(mi), int(force(s))
+        ),
+        "#duration": lambda d, h, m, s: timedelta(days=force(d), hours=force(h), minutes=force(m), seconds=force(s)),
+        "List.Sum": list_sum,
+        "List.Average": list_average,
+        "List.Min": list_min,
+        "List.Max": list_max,
+        "List.Count": lambda values: len(force(values)),
+        "List.Distinct": list_distinct,
+        "Number.Mod": number_mod,
+        "Number.Round": number_round,
+        "Number.From": lambda value, culture=None: convert_value(value, MType("number"), force(culture)),
+        "Text.From": lambda value, culture=None: text_from_value(value),
+        "Text.Upper": _text_function(lambda text, culture=None: text.upper()),
+        "Text.Lower": _text_function(lambda text, culture=None: text.lower()),
+        "Text.Trim": _text_function(lambda text, chars=None: text.strip()),
+        "Text.Contains": _text_function(lambda text, sub, comparer=None: sub in text),
+        "Text.StartsWith": _text_function(lambda text, sub, comparer=None: text.startswith(sub)),
+        "Text.EndsWith": _text_function(lambda text, sub, comparer=None: text.endswith(sub)),
+        "Date.Year": _date_part(lambda value: value.year),
+        "Date.Month": _date_part(lambda value: value.month),
+        "Date.Day": _date_part(lambda value: value.day),
+        "Date.From": lambda value, culture=None: convert_value(value, MType("date"), force(culture)),
+        "JoinKind.Inner": JOIN_INNER,
+        "JoinKind.LeftOuter": JOIN_LEFT_OUTER,
+        "JoinKind.RightOuter": JOIN_RIGHT_OUTER,
+        "JoinKind.FullOuter": JOIN_FULL_OUTER,
+        "JoinKind.LeftAnti": JOIN_LEFT_ANTI,
+        "JoinKind.RightAnti": JOIN_RIGHT_ANTI,
+        "QuoteStyle.None": QUOTE_STYLE_NONE,
+        "QuoteStyle.Csv": QUOTE_STYLE_CSV,
+        "ExtraValues.List": 0,
+        "ExtraValues.Error": 1,
+        "ExtraValues.Ignore": 2,
+        "GroupKind.Local": 0,
+        "GroupKind.Global": 1,
+        "MissingField.Error": MISSING_FIELD_ERROR,
+        "MissingField.Ignore": MISSING_FIELD_IGNORE,
+        "MissingField.UseNull": MISSING_FIELD_USE_NULL,
+        "RoundingMode.ToEven": 4,
+    }
+    for name in NUMBER_FACETS | {"Number", "Text", "Date", "DateTime", "Logical", "Duration", "Any"}:
+        base = {"DateTime": "datetime", "Any": "any"}.get(name, name.lower() if name not in NUMBER_FACETS else name)
+        library[f"{name}.Type"] = MType(base)
+
+    if columnar:
+        from . import m_columnar
+        if m_columnar.available():
+            library.update(m_columnar.COLUMNAR_FUNCTIONS)
+    if source_folders:
+        from . import m_plan
+        m_plan.install(library, source_folders)
+    return library
@@ -0,0 +1,488 @@
+"""
+M Parser
+แปลง token ของโค้ด M เป็น syntax tree สำหรับ evaluator
+"""
+
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from .m_lexer import MSyntaxError, Token, tokenize
+
+
+class Literal(NamedTuple):
+    value: Any
+
+
+class Identifier(NamedTuple):
+    name: str
+
+
+class ListExpr(NamedTuple):
+    items: List[Any]            # ช่วง a..b เก็บเป็น Range
+
+
+class Range(NamedTuple):
+    start: Any
+    end: Any
+
+
+class RecordExpr(NamedTuple):
+    fields: List[Tuple[str, Any]]
+
+
+class LetExpr(NamedTuple):
+    bindings: List[Tuple[str, Any]]
+    body: Any
+
+
+class IfExpr(NamedTuple):
+    condition: Any
+    then: Any
+    otherwise: Any
+
+
+class FunctionExpr(NamedTuple):
+    params: List[str]
+    body: Any
+
+
+class Call(NamedTuple):
+    function: Any
+    args: List[Any]
+
+
+class FieldAccess(NamedTuple):
+    target: Optional[Any]       # None คือ [Field] ภายใน each (อ้างถึง _)
+    name: str
+    optional: bool
+
+
+class Projection(NamedTuple):
+    target: Optional[Any]
+    names: List[str]
+    optional: bool
+
+
+class ItemAccess(NamedTuple):
+    target: Any
+    selector: Any
+    optional: bool
+
+
+class Binary(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+class Unary(NamedTuple):
+    op: str
+    operand: Any
+
+
+class TypeExpr(NamedTuple):
+    name: str                   # ชนิดพื้นฐาน เช่น "number", "text", "table"
+    nullable: bool = False
+
+
+class TryExpr(NamedTuple):
+    body: Any
+    otherwise: Optional[Any]
+
+
+class ErrorExpr(NamedTuple):
+    message: Any
+
+
+_PRIMITIVE_TYPES = {
+    "any", "anynonnull", "binary", "date", "datetime", "datetimezone", "duration",
+    "function", "list", "logical", "none", "null", "number", "record", "table", "text", "time", "type"
+}
+
+_CLOSING = {"(": ")", "[": "]", "{": "}"}
+
+
+class _Parser:
+    """recursive descent parser ของ expression ภาษา M"""
+
+    def __init__(self, text: str, tokens: List[Token]):
+        self.text = text
+        self.tokens = tokens
+        self.i = 0
+
+    # ---------- ตัวช่วย ----------
+
+    def peek(self, offset: int = 0) -> Token:
+        return self.tokens[min(self.i + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def at(self, value: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token.kind in ("symbol", "ident") and not token.quoted and token.value == value
+
+    def expect(self, value: str) -> Token:
+        if not self.at(value):
+            token = self.peek()
+            raise MSyntaxError(f"คาดว่าจะเป็น {value!r} แต่พบ {token.value!r} ที่ตำแหน่ง {token.pos}")
+        return self.advance()
+
+    def identifier(self) -> str:
+        token = self.advance()
+        if token.kind != "ident":
+            raise MSyntaxError(f"คาดว่าจะเป็นชื่อ แต่พบ {token.value!r} ที่ตำแหน่ง {token.pos}")
+        return token.value
+
+    def generalized_name(self, stops: Tuple[str, ...]) -> str:
+        """
+        ชื่อ field ภายใน [ ] ซึ่งอาจมีช่องว่าง เช่น [Unit Price]
+        อ่านข้อความจริงจากตำแหน่งของ token แรกจนถึง token ที่เป็นตัวหยุด
+        """
+        first = self.peek()
+        if first.kind == "ident" and first.quoted:
+            self.advance()
+            return first.value
+        if first.kind == "eof" or (first.kind == "symbol" and first.value in stops):
+            raise MSyntaxError(f"คาดว่าจะเป็นชื่อ field ที่ตำแหน่ง {first.pos}")
+        while not (self.peek().kind == "eof" or (self.peek().kind == "symbol" and self.peek().value in stops)):
+            self.advance()
+        return self.text[first.pos:self.peek().pos].strip()
+
+    def matching_close(self, index: int) -> int:
+        """ตำแหน่ง token ที่ปิดวงเล็บซึ่งเปิดที่ index"""
+        depth = 0
+        for j in range(index, len(self.tokens)):
+            token = self.tokens[j]
+            if token.kind != "symbol":
+                continue
+            if token.value in _CLOSING:
+                depth += 1
+            elif token.value in _CLOSING.values():
+                depth -= 1
+                if depth == 0:
+                    return j
+        raise MSyntaxError(f"วงเล็บไม่ได้ปิดที่ตำแหน่ง {self.tokens[index].pos}")
+
+    # ---------- expression ----------
+
+    def expression(self) -> Any:
+        if self.at("let"):
+            return self.let_expression()
+        if self.at("if"):
+            self.advance()
+            condition = self.expression()
+            self.expect("then")
+            then = self.expression()
+            self.expect("else")
+            return IfExpr(condition, then, self.expression())
+        if self.at("each"):
+            self.advance()
+            return FunctionExpr(["_"], self.expression())
+        if self.at("try"):
+            self.advance()
+            body = self.expression()
+            otherwise = None
+            if self.at("otherwise"):
+                self.advance()
+                otherwise = self.expression()
+            return TryExpr(body, otherwise)
+        if self.at("error"):
+            self.advance()
+            return ErrorExpr(self.expression())
+        if self.at("(") and self.is_function_start():
+            return self.function_expression()
+        return self.logical_or()
+
+    def let_expression(self) -> LetExpr:
+        self.expect("let")
+        bindings = []
+        while True:
+            name = self.identifier()
+            self.expect("=")
+            bindings.append((name, self.expression()))
+            if self.at(","):
+                self.advance()
+                continue
+            break
+        self.expect("in")
+        return LetExpr(bindings, self.expression())
+
+    def is_function_start(self) -> bool:
+        close = self.matching_close(self.i)
+        following = self.tokens[close + 1] if close + 1 < len(self.tokens) else self.tokens[-1]
+        return following.kind == "symbol" and following.value == "=>" or \
+            (following.kind == "ident" and following.value == "as" and not following.quoted)
+
+    def function_expression(self) -> FunctionExpr:
+        self.expect("(")
+        params = []
+        while not self.at(")"):
+            if self.at("optional"):
+                self.advance()
+            params.append(self.identifier())
+            if self.at("as"):
+                self.advance()
+                self.type_reference()
+            if self.at(","):
+                self.advance()
+        self.expect(")")
+        if self.at("as"):
+            self.advance()
+            self.type_reference()
+        self.expect("=>")
+        return FunctionExpr(params, self.expression())
+
+    def logical_or(self) -> Any:
+        left = self.logical_and()
+        while self.at("or"):
+            self.advance()
+            left = Binary("or", left, self.logical_and())
+        return left
+
+    def logical_and(self) -> Any:
+        left = self.type_test()
+        while self.at("and"):
+            self.advance()
+            left = Binary("and", left, self.type_test())
+        return left
+
+    def type_test(self) -> Any:
+        left = self.equality()
+        while self.at("is") or self.at("as"):
+            op = self.advance().value
+            left = Binary(op, left, self.type_reference())
+        return left
+
+    def equality(self) -> Any:
+        left = self.relational()
+        while self.at("=") or self.at("<>"):
+            op = self.advance().value
+            left = Binary(op, left, self.relational())
+        return left
+
+    def relational(self) -> Any:
+        left = self.additive()
+        while self.at("<") or self.at(">") or self.at("<=") or self.at(">="):
+            op = self.advance().value
+            left = Binary(op, left, self.additive())
+        return left
+
+    def additive(self) -> Any:
+        left = self.multiplicative()
+        while self.at("+") or self.at("-") or self.at("&"):
+            op = self.advance().value
+            left = Binary(op, left, self.multiplicative())
+        return left
+
+    def multiplicative(self) -> Any:
+        left = self.metadata()
+        while self.at("*") or self.at("/"):
+            op = self.advance().value
+            left = Binary(op, left, self.metadata())
+        return left
+
+    def metadata(self) -> Any:
+        value = self.unary()
+        while self.at("meta"):
+            # metadata ไม่มีผลกับค่า
+            self.advance()
+            self.unary()
+        return value
+
+    def unary(self) -> Any:
+        if self.at("-") or self.at("+") or self.at("not"):
+            op = self.advance().value
+            return Unary(op, self.unary())
+        if self.at("type"):
+            self.advance()
+            return self.type_reference()
+        return self.postfix(self.primary())
+
+    def type_reference(self) -> Any:
+        """ชนิดข้อมูลหลัง type / as / is เช่น number, nullable text, table [A = number]"""
+        nullable = False
+        if self.at("nullable"):
+            self.advance()
+            nullable = True
+        if self.at("[") or self.at("{"):
+            name = "record" if self.at("[") else "list"
+            self.i = self.matching_close(self.i) + 1
+            return TypeExpr(name, nullable)
+        if self.at("type"):
+            self.advance()
+        token = self.peek()
+        if token.kind == "ident" and not token.quoted and token.value in _PRIMITIVE_TYPES:
+            self.advance()
+            if token.value == "table" and (self.at("[") or self.at("{")):
+                self.i = self.matching_close(self.i) + 1
+            return TypeExpr(token.value, nullable)
+        # ชนิดที่อ้างผ่านชื่อ เช่น Int64.Type
+        return self.postfix(self.primary())
+
+    def primary(self) -> Any:
+        token = self.peek()
+        if token.kind == "number":
+            self.advance()
+            text = token.value
+            if text.lower().startswith("0x"):
+                return Literal(int(text, 16))
+            value = float(text)
+            return Literal(int(value) if value.is_integer() and "." not in text and "e" not in text.lower() else value)
+        if token.kind == "string":
+            self.advance()
+            return Literal(token.value)
+        if token.kind == "ident":
+            if not token.quoted and token.value in ("true", "false"):
+                self.advance()
+                return Literal(token.value == "true")
+            if not token.quoted and token.value == "null":
+                self.advance()
+                return Literal(None)
+            self.advance()
+            return Identifier(token.value)
+        if self.at("@"):
+            self.advance()
+            return Identifier(self.identifier())
+        if self.at("("):
+            self.advance()
+            value = self.expression()
+            self.expect(")")
+            return value
+        if self.at("{"):
+            return self.list_expression()
+        if self.at("["):
+            return self.record_or_field(None)
+        raise MSyntaxError(f"ไม่คาดว่าจะพบ {token.value!r} ที่ตำแหน่ง {token.pos}")
+
+    def list_expression(self) -> ListExpr:
+        self.expect("{")
+        items = []
+        while not self.at("}"):
+            item = self.expression()
+            if self.at(".."):
+                self.advance()
+                item = Range(item, self.expression())
+            items.append(item)
+            if not self.at(","):
+                break
+            self.advance()
+        self.expect("}")
+        return ListExpr(items)
+
+    def record_or_field(self, target: Optional[Any]) -> Any:
+        """[A = 1, B = 2] เป็น record, [A] เป็น field access, [[A], [B]] เป็น projection"""
+        open_index = self.i
+        self.expect("[")
+        if self.at("]"):
+            self.advance()
+            return RecordExpr([])
+        if target is None and not self.at("["):
+            # หา "=" ระดับบนสุดก่อน "]" หรือ "," เพื่อแยก record ออกจาก field access
+            close = self.matching_close(open_index)
+            j = self.i
+            while j < close:
+                token = self.tokens[j]
+                if token.kind == "symbol" and token.value in _CLOSING:
+                    j = self.matching_close(j) + 1
+                    continue
+                if token.kind == "symbol" and token.value in ("=", ","):
+                    break
+                j += 1
+            if j < close and self.tokens[j].value == "=":
+                return self.record_fields()
+        if self.at("["):
+            names = []
+            while self.at("["):
+                self.advance()
+                names.append(self.generalized_name(("]",)))
+                self.expect("]")
+                if not self.at(","):
+                    break
+                self.advance()
+            self.expect("]")
+            return Projection(target, names, self.optional_mark())
+        name = self.generalized_name(("]",))
+        self.expect("]")
+        return FieldAccess(target, name, self.optional_mark())
+
+    def record_fields(self) -> RecordExpr:
+        fields = []
+        while True:
+            name = self.generalized_name(("=",))
+            self.expect("=")
+            fields.append((name, self.expression()))
+            if self.at(","):
+                self.advance()
+                continue
+            break
+        self.expect("]")
+        return RecordExpr(fields)
+
+    def optional_mark(self) -> bool:
+        if self.at("?"):
+            self.advance()
+            return True
+        return False
+
+    def postfix(self, value: Any) -> Any:
+        while True:
+            if self.at("("):
+                self.advance()
+                args = []
+                while not self.at(")"):
+                    args.append(self.expression())
+                    if not self.at(","):
+                        break
+                    self.advance()
+                self.expect(")")
+                value = Call(value, args)
+            elif self.at("{"):
+                self.advance()
+                selector = self.expression()
+                self.expect("}")
+                value = ItemAccess(value, selector, self.optional_mark())
+            elif self.at("["):
+                value = self.record_or_field(value)
+            else:
+                return value
+
+
+def parse_expression(text: str, tokens: Optional[List[Token]] = None) -> Any:
+    """
+    แปลงโค้ด M หนึ่ง expression เป็น syntax tree
+
+    Args:
+        text (str): โค้ด M
+        tokens (Optional[List[Token]]): token ที่แยกไว้แล้ว (ตำแหน่งต้องอ้างอิง text เดียวกัน)
+
+    Returns:
+        Any: node ของ syntax tree
+    """
+    parser = _Parser(text, tokens if tokens is not None else tokenize(text))
+    node = parser.expression()
+    if parser.peek().kind != "eof":
+        token = parser.peek()
+        raise MSyntaxError(f"ไม่คาดว่าจะพบ {token.value!r} ที่ตำแหน่ง {token.pos}")
+    return node
+
+
+def iter_nodes(node: Any):
+    """
+    ไล่ทุก node ใน syntax tree (depth-first)
+
+    Args:
+        node (Any): node เริ่มต้น
+
+    Yields:
+        Any: node แต่ละตัว
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, tuple) and hasattr(current, "_fields"):
+            yield current
+            stack.extend(reversed(list(current)))
+        elif isinstance(current, (list, tuple)):
+            stack.extend(reversed(list(current)))
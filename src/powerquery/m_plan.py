@@ -0,0 +1,514 @@
+"""
+M Plan
+logical plan แบบ lazy สำหรับ query ที่อ่าน Excel.Workbook / Csv.Document จากโฟลเดอร์ข้อมูล
+
+Table.PromoteHeaders, Table.SelectColumns, Table.RemoveColumns, Table.SelectRows และ
+Table.TransformColumnTypes ที่ต่อจากแหล่งข้อมูลจะถูกเก็บเป็นขั้นตอนของ plan แทนการประมวลผลทันที
+เมื่อ table ถูกใช้งานจริง optimizer จะหาคอลัมน์ที่ขั้นตอนถัดไปต้องใช้ (projection pushdown)
+ให้ตัวอ่านแปลงค่าเฉพาะคอลัมน์เหล่านั้น และกรองแถวเป็นชุดระหว่างอ่าน (predicate pushdown)
+"""
+
+import csv
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from . import m_library
+from .m_evaluator import MBinary, MEvaluationError, MFunction, MType, Thunk, force
+from .m_parser import FieldAccess, FunctionExpr, Identifier, Projection, iter_nodes
+from .m_table import Table
+from .xlsx_reader import WorkbookReader, split_range_ref
+
+# จำนวนแถวที่อ่านจากแหล่งข้อมูลก่อนใช้ขั้นตอนของ plan หนึ่งครั้ง
+BATCH_ROWS = 50_000
+
+
+def in_folders(path: str, folders: Sequence[str]) -> bool:
+    """
+    ตรวจว่าไฟล์อยู่ในโฟลเดอร์ใดโฟลเดอร์หนึ่ง (รวมโฟลเดอร์ย่อย)
+
+    Args:
+        path (str): เส้นทางไฟล์
+        folders (Sequence[str]): โฟลเดอร์ข้อมูล
+
+    Returns:
+        bool: True หากอยู่ในโฟลเดอร์ที่กำหนด
+    """
+    path = os.path.normcase(os.path.abspath(path))
+    for folder in folders:
+        folder = os.path.normcase(os.path.abspath(folder))
+        try:
+            if os.path.commonpath([path, folder]) == folder:
+                return True
+        except ValueError:
+            # คนละไดรฟ์บน Windows
+            continue
+    return False
+
+
+def referenced_fields(function: Any) -> Optional[Set[str]]:
+    """
+    field ของแถวที่ฟังก์ชันเงื่อนไขอ้างถึง
+
+    Args:
+        function (Any): ฟังก์ชันที่ส่งให้ Table.SelectRows
+
+    Returns:
+        Optional[Set[str]]: ชื่อ field หรือ None หากต้องใช้ทั้งแถว (เช่นส่ง _ ให้ฟังก์ชันอื่น)
+    """
+    function = force(function)
+    if not isinstance(function, MFunction) or len(function.params) != 1:
+        return None
+    param = function.params[0]
+    fields: Set[str] = set()
+    for node in iter_nodes(function.body):
+        if isinstance(node, FunctionExpr):
+            # each ซ้อนกันทำให้ [Field] อาจอ้างถึงแถวอื่น
+            return None
+        if isinstance(node, FieldAccess):
+            if node.target is None and param == "_":
+                fields.add(node.name)
+            elif isinstance(node.target, Identifier) and node.target.name == param:
+                fields.add(node.name)
+        elif isinstance(node, Projection) and (
+                node.target is None or isinstance(node.target, Identifier) and node.target.name == param):
+            return None
+    # ชื่อ parameter ที่ไม่ได้อยู่ใน [Field] หมายถึงใช้ทั้งแถว
+    direct = sum(1 for node in iter_nodes(function.body) if isinstance(node, Identifier) and node.name == param)
+    accessed = sum(
+        1 for node in iter_nodes(function.body)
+        if isinstance(node, FieldAccess) and isinstance(node.target, Identifier) and node.target.name == param
+    )
+    return fields if direct == accessed else None
+
+
+# ---------- แหล่งข้อมูล ----------
+
+class CsvSource:
+    """ไฟล์ CSV ที่อ่านทีละแถวแบบ streaming"""
+
+    def __init__(self, path: str, columns: Any, delimiter: str, code_page: int, quote_style: int):
+        self.path = path
+        self.delimiter = delimiter
+        self.encoding = m_library.CODE_PAGES[code_page]
+        self.quote_style = quote_style
+        self._names = m_library.csv_column_names(columns, self._max_width)
+
+    def describe(self) -> str:
+        return f"Csv.Document({os.path.basename(self.path)})"
+
+    def column_names(self) -> List[str]:
+        return list(self._names)
+
+    def _reader(self, handle: Any) -> Iterator[List[str]]:
+        return csv.reader(
+            handle,
+            delimiter=self.delimiter,
+            quoting=csv.QUOTE_NONE if self.quote_style == m_library.QUOTE_STYLE_NONE else csv.QUOTE_MINIMAL,
+        )
+
+    def _max_width(self) -> int:
+        try:
+            with open(self.path, encoding=self.encoding, newline="") as handle:
+                return max((len(row) for row in self._reader(handle)), default=0)
+        except OSError as e:
+            raise MEvaluationError(f"อ่านไฟล์ {self.path} ไม่ได้: {e}")
+
+    def raw_rows(self, positions: List[int]) -> Iterator[List[Any]]:
+        """แถวของไฟล์ เฉพาะคอลัมน์ตาม positions (เติม "" ให้ครบความกว้างเหมือน Csv.Document)"""
+        width = len(self._names)
+        positions = [p for p in positions if p < width]
+        empty = 0
+        try:
+            with open(self.path, encoding=self.encoding, newline="") as handle:
+                for row in self._reader(handle):
+                    if not row:
+                        # บรรทัดว่างท้ายไฟล์ไม่นับ จึงเก็บไว้จนกว่าจะพบแถวถัดไป
+                        empty += 1
+                        continue
+                    for _ in range(empty):
+                        yield [""] * len(positions)
+                    empty = 0
+                    yield [row[p] if p < len(row) else "" for p in positions]
+        except OSError as e:
+            raise MEvaluationError(f"อ่านไฟล์ {self.path} ไม่ได้: {e}")
+
+
+class ExcelSource:
+    """sheet หรือ table ในไฟล์ xlsx ที่อ่านเฉพาะคอลัมน์ที่ต้องใช้"""
+
+    def __init__(self, reader: WorkbookReader, kind: str, item: str):
+        self.reader = reader
+        self.kind = kind
+        self.item = item
+        if kind == "Table":
+            table = next(t for t in reader.tables if t["name"] == item)
+            first_col, first_row, last_col, last_row = split_range_ref(table["ref"])
+            self.part = table["sheet_part"]
+            self.bounds: Optional[Tuple[int, int, int, int]] = (
+                first_col, first_row + table["header_rows"], last_col, last_row - table["totals_rows"]
+            )
+            self._names = list(table["columns"])
+        else:
+            self.part = reader.sheet_part(item)
+            self.bounds = reader.sheet_range(item)
+            width = self.bounds[2] - self.bounds[0] + 1 if self.bounds else 0
+            self._names = [f"Column{i}" for i in range(1, width + 1)]
+
+    def describe(self) -> str:
+        return f"Excel.Workbook({os.path.basename(self.reader.file_path)})[{self.item}]"
+
+    def column_names(self) -> List[str]:
+        return list(self._names)
+
+    def raw_rows(self, positions: List[int]) -> Iterator[List[Any]]:
+        """แถวของ sheet / table เฉพาะคอลัมน์ตาม positions"""
+        if self.bounds is None:
+            return
+        first_col, first_row, _, last_row = self.bounds
+        if last_row < first_row:
+            return
+        if self.kind == "Table" and first_row == last_row:
+            # table ที่ว่างจะมีแถวข้อมูลเปล่าหนึ่งแถว (ต้องดูทุกคอลัมน์)
+            rows = self.reader.iter_range(self.part, self.bounds)
+            full = next(rows)
+            rows.close()
+            if all(value is None for value in full):
+                return
+            yield [full[p] for p in positions]
+            return
+        yield from self.reader.iter_range(self.part, self.bounds, [first_col + p for p in positions])
+
+
+# ---------- plan ----------
+
+def _batches(rows: Iterator[List[Any]], size: int) -> Iterator[List[List[Any]]]:
+    batch: List[List[Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _pick(table: Table, names: List[str]) -> Table:
+    """เลือกคอลัมน์ตามลำดับ names (คอลัมน์ที่ไม่มีเป็น null)"""
+    if table.columns == names:
+        return table
+    indexes = [table.columns.index(name) if name in table.columns else None for name in names]
+    return Table(names, [[row[i] if i is not None else None for i in indexes] for row in table.rows])
+
+
+class LazyTable(Table):
+    """
+    table ที่ยังไม่ได้อ่านจากแหล่งข้อมูล
+
+    เก็บแหล่งข้อมูลและขั้นตอนของ plan และอ่านข้อมูลจริงครั้งแรกที่ถูกใช้ (rows / data / len)
+    """
+
+    def __init__(self, source: Any, functions: Dict[str, Callable[..., Any]], headers: bool = False,
+                 steps: Tuple[Tuple[Any, ...], ...] = (), schemas: Optional[List[List[str]]] = None,
+                 header_names: Optional[List[str]] = None):
+        """
+        เริ่มต้น LazyTable
+
+        Args:
+            source (Any): CsvSource หรือ ExcelSource
+            functions (Dict[str, Callable[..., Any]]): ฟังก์ชัน Table.* ที่ใช้ประมวลผลแต่ละชุดแถว
+            headers (bool): ใช้แถวแรกของแหล่งข้อมูลเป็นชื่อคอลัมน์
+            steps (Tuple[Tuple[Any, ...], ...]): ขั้นตอน ("select" / "remove" / "filter" / "convert", ...)
+            schemas (Optional[List[List[str]]]): ชื่อคอลัมน์ก่อนขั้นตอนแรกและหลังแต่ละขั้นตอน
+            header_names (Optional[List[str]]): ชื่อคอลัมน์จากแถวแรกที่อ่านไว้แล้ว
+        """
+        self.source = source
+        self.functions = functions
+        self.headers = headers
+        self.steps = steps
+        self._header_names = header_names
+        self._schemas = schemas if schemas is not None else [self._source_names()]
+        self._table: Optional[Table] = None
+
+    # ----- schema -----
+
+    def _source_names(self) -> List[str]:
+        names = self.source.column_names()
+        if not self.headers:
+            return names
+        if self._header_names is None:
+            first = next(iter(self.source.raw_rows(list(range(len(names))))), None)
+            self._header_names = m_library._unique_names(first) if first is not None else names
+        return list(self._header_names)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._schemas[-1])
+
+    def then(self, step: Tuple[Any, ...]) -> "LazyTable":
+        """
+        เพิ่มขั้นตอนต่อท้าย plan (ตรวจชื่อคอลัมน์เหมือนการประมวลผลทันที)
+
+        Args:
+            step (Tuple[Any, ...]): ขั้นตอน
+
+        Returns:
+            LazyTable: plan ใหม่
+        """
+        names = self._schemas[-1]
+        probe = Table(names, [])
+        kind = step[0]
+        if kind == "select":
+            _, columns, missing_field = step
+            if missing_field != m_library.MISSING_FIELD_USE_NULL:
+                columns = m_library._present_columns(probe, columns, missing_field, "Table.SelectColumns")
+            output = list(columns)
+            step = ("select", output, missing_field)
+            if len(set(output)) != len(output):
+                raise ValueError(f"ชื่อคอลัมน์ซ้ำ: {output}")
+        elif kind == "remove":
+            _, columns, missing_field = step
+            removed = set(m_library._present_columns(probe, columns, missing_field, "Table.RemoveColumns"))
+            output = [name for name in names if name not in removed]
+        elif kind == "convert":
+            for column, target in step[1]:
+                if not isinstance(target, MType):
+                    raise MEvaluationError("Table.TransformColumnTypes: ต้องระบุ type")
+                m_library._column_indexes(probe, [column], "Table.TransformColumnTypes")
+            output = list(names)
+        else:
+            output = list(names)
+        return LazyTable(self.source, self.functions, self.headers, self.steps + (step,),
+                         self._schemas + [output], self._header_names)
+
+    def promote_headers(self) -> Optional["LazyTable"]:
+        """Table.PromoteHeaders ที่ต่อจากแหล่งข้อมูลโดยตรง (None หากต้องประมวลผลทันที)"""
+        if self.steps or self.headers:
+            return None
+        return LazyTable(self.source, self.functions, headers=True)
+
+    # ----- optimizer -----
+
+    def required_columns(self) -> List[Set[str]]:
+        """
+        คอลัมน์ที่ต้องมีก่อนแต่ละขั้นตอน (ไล่จากผลลัพธ์ย้อนกลับไปหาแหล่งข้อมูล)
+
+        Returns:
+            List[Set[str]]: ลำดับเดียวกับ schema (ตัวแรกคือคอลัมน์ที่ต้องอ่านจากแหล่งข้อมูล)
+        """
+        needed = set(self._schemas[-1])
+        required = [needed]
+        for index in range(len(self.steps) - 1, -1, -1):
+            step, before = self.steps[index], self._schemas[index]
+            if step[0] == "filter":
+                fields = referenced_fields(step[1])
+                needed = set(before) if fields is None else needed | fields
+            needed = needed & set(before)
+            required.insert(0, needed)
+        return required
+
+    def execution_plan(self) -> List[Tuple[Any, ...]]:
+        """
+        ลำดับการทำงานหลังปรับ plan
+
+        การแปลงชนิดของคอลัมน์ที่เงื่อนไขถัดไปไม่ได้ใช้จะถูกเลื่อนไปหลังการกรอง
+        จึงแปลงเฉพาะแถวที่ผ่านเงื่อนไข และคอลัมน์ที่ไม่ถูกใช้ต่อจะถูกตัดออกหลังแต่ละขั้นตอน
+
+        Returns:
+            List[Tuple[Any, ...]]: ("convert", [(column, type)], culture) / ("filter", function) /
+                ("pick", [column])
+        """
+        required = self.required_columns()
+        operations: List[Tuple[Any, ...]] = []
+        pending: Dict[str, Tuple[MType, Any]] = {}
+
+        def flush(columns: Optional[Set[str]] = None) -> None:
+            groups: List[Tuple[Any, List[Tuple[str, MType]]]] = []
+            for column in [c for c in pending if columns is None or c in columns]:
+                target, culture = pending.pop(column)
+                if groups and groups[-1][0] is culture:
+                    groups[-1][1].append((column, target))
+                else:
+                    groups.append((culture, [(column, target)]))
+            for culture, pairs in groups:
+                operations.append(("convert", pairs, culture))
+
+        for index, step in enumerate(self.steps):
+            kind = step[0]
+            if kind == "convert":
+                for column, target in step[1]:
+                    if column in pending:
+                        # แปลงซ้ำคอลัมน์เดิมต้องทำตามลำดับ
+                        flush({column})
+                    pending[column] = (target, step[2])
+            elif kind == "filter":
+                fields = referenced_fields(step[1])
+                flush(None if fields is None else fields)
+                operations.append(("filter", step[1]))
+            after = required[index + 1]
+            for column in [c for c in pending if c not in after]:
+                del pending[column]
+            operations.append(("pick", [name for name in self._schemas[index + 1] if name in after]))
+        flush()
+        return operations
+
+    def explain(self) -> str:
+        """
+        plan หลังปรับแล้วในรูปข้อความ (สำหรับ log และตรวจสอบ)
+
+        Returns:
+            str: เช่น "Csv.Document(s.csv) [headers] columns=['a', 'b'] -> filter -> convert(a)"
+        """
+        required = self.required_columns()
+        names = [name for name in self._schemas[0] if name in required[0]]
+        parts = [f"{self.source.describe()}{' [headers]' if self.headers else ''} columns={names}"]
+        for operation in self.execution_plan():
+            if operation[0] == "convert":
+                parts.append(f"convert({', '.join(column for column, _ in operation[1])})")
+            elif operation[0] == "filter":
+                parts.append("filter")
+        return " -> ".join(parts)
+
+    # ----- execution -----
+
+    def _run(self, operations: List[Tuple[Any, ...]], table: Table) -> Table:
+        for operation in operations:
+            kind = operation[0]
+            if kind == "filter":
+                table = self.functions["Table.SelectRows"](table, operation[1])
+            elif kind == "convert":
+                table = self.functions["Table.TransformColumnTypes"](
+                    table, [[column, target] for column, target in operation[1]], operation[2]
+                )
+            else:
+                table = _pick(table, operation[1])
+        return table
+
+    def materialize(self) -> Table:
+        """
+        อ่านข้อมูลตาม plan
+
+        Returns:
+            Table: ผลลัพธ์ที่อ่านแล้ว
+        """
+        if self._table is not None:
+            return self._table
+        required = self.required_columns()
+        operations = self.execution_plan()
+        source_names = self._schemas[0]
+        positions = [i for i, name in enumerate(source_names) if name in required[0]]
+        names = [source_names[i] for i in positions]
+
+        rows = self.source.raw_rows(positions)
+        if self.headers:
+            next(rows, None)
+        result: List[List[Any]] = []
+        for batch in _batches(rows, BATCH_ROWS):
+            result.extend(self._run(operations, Table(names, batch)).rows)
+        self._table = Table(self._schemas[-1], result)
+        return self._table
+
+    # ----- ส่วนของ Table -----
+
+    @property
+    def rows(self) -> List[List[Any]]:
+        return self.materialize().rows
+
+    @property
+    def data(self) -> List[Any]:
+        return self.materialize().data
+
+    @property
+    def is_columnar(self) -> bool:
+        return self._table is not None and self._table.is_columnar
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def __repr__(self) -> str:
+        return f"LazyTable({self.explain()})"
+
+    def column(self, column: str) -> List[Any]:
+        return self.materialize().column(column)
+
+    def take(self, indices: Any) -> Table:
+        return self.materialize().take(indices)
+
+
+# ---------- ฟังก์ชันของ M ที่สร้าง plan ----------
+
+def install(library: Dict[str, Any], folders: Sequence[str]) -> None:
+    """
+    แทนที่ฟังก์ชันแหล่งข้อมูลและ Table.* ใน library ด้วยเวอร์ชันที่สร้าง plan แบบ lazy
+
+    ใช้เฉพาะไฟล์ที่อยู่ในโฟลเดอร์ที่กำหนด แหล่งข้อมูลอื่นทำงานแบบเดิม
+
+    Args:
+        library (Dict[str, Any]): ผลจาก standard_library (แก้ไขในที่)
+        folders (Sequence[str]): โฟลเดอร์ข้อมูล
+    """
+    eager = dict(library)
+    folders = list(folders)
+
+    def excel_workbook(workbook: Any, use_headers: Any = None, delay_types: Any = None) -> Table:
+        navigation = eager["Excel.Workbook"](workbook, use_headers, delay_types)
+        path = force(workbook).path
+        if not in_folders(path, folders):
+            return navigation
+        reader = WorkbookReader(path)
+        headers = bool(force(use_headers))
+        rows = []
+        for name, _, item, kind, hidden in navigation.rows:
+            data = Thunk(lambda kind=kind, item=item: LazyTable(
+                ExcelSource(reader, kind, item), eager, headers=headers and kind == "Sheet"
+            ))
+            rows.append([name, data, item, kind, hidden])
+        return Table(navigation.columns, rows)
+
+    def csv_document(source: Any, columns: Any = None, delimiter: Any = None,
+                     extra_values: Any = None, encoding: Any = None) -> Table:
+        value = force(source)
+        if not isinstance(value, MBinary) or not in_folders(value.path, folders):
+            return eager["Csv.Document"](source, columns, delimiter, extra_values, encoding)
+        columns, delimiter, code_page, quote_style = m_library.csv_options(columns, delimiter, encoding)
+        return LazyTable(CsvSource(value.path, columns, delimiter, code_page, quote_style), eager)
+
+    def planned(name: str, build: Callable[..., Optional[LazyTable]]) -> Callable[..., Any]:
+        def function(table: Any, *args: Any) -> Any:
+            value = force(table)
+            if isinstance(value, LazyTable):
+                lazy = build(value, *args)
+                if lazy is not None:
+                    return lazy
+            return eager[name](value, *args)
+        return function
+
+    def promote_headers(table: LazyTable, options: Any = None) -> Optional[LazyTable]:
+        return table.promote_headers()
+
+    def select_columns(table: LazyTable, columns: Any, missing_field: Any = None) -> LazyTable:
+        names = [force(c) for c in m_library._as_list(columns)]
+        return table.then(("select", names, force(missing_field)))
+
+    def remove_columns(table: LazyTable, columns: Any, missing_field: Any = None) -> LazyTable:
+        names = [force(c) for c in m_library._as_list(columns)]
+        return table.then(("remove", names, force(missing_field)))
+
+    def select_rows(table: LazyTable, condition: Any) -> LazyTable:
+        return table.then(("filter", force(condition)))
+
+    def transform_column_types(table: LazyTable, transforms: Any, culture: Any = None) -> LazyTable:
+        transforms = force(transforms)
+        if transforms and not isinstance(force(transforms[0]), list):
+            transforms = [transforms]
+        pairs = [tuple(force(v) for v in force(pair)) for pair in transforms]
+        return table.then(("convert", pairs, culture))
+
+    library.update({
+        "Excel.Workbook": excel_workbook,
+        "Csv.Document": csv_document,
+        "Table.PromoteHeaders": planned("Table.PromoteHeaders", promote_headers),
+        "Table.SelectColumns": planned("Table.SelectColumns", select_columns),
+        "Table.RemoveColumns": planned("Table.RemoveColumns", remove_columns),
+        "Table.SelectRows": planned("Table.SelectRows", select_rows),
+        "Table.TransformColumnTypes": planned("Table.TransformColumnTypes", transform_column_types),
+    })
@@ -0,0 +1,284 @@
+"""
+M Table
+ค่าชนิด table ของ evaluator
+
+เก็บข้อมูลได้สองแบบ: รายการแถว หรือคอลัมน์ที่เป็น NumPy array (columnar)
+และแปลงระหว่างกันเมื่อถูกใช้งาน ฟังก์ชันใน m_columnar ทำงานกับคอลัมน์โดยตรง
+"""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# จำนวนเต็มที่เก็บใน float64 ได้โดยไม่เสียความแม่นยำ
+_MAX_EXACT_INT = 2 ** 53
+
+
+class Column(NamedTuple):
+    """
+    คอลัมน์แบบ columnar
+
+    values เป็น array ชนิด int64, float64, bool หรือ object
+    nulls เป็น bool array (True = null) หรือ None หากไม่มี null
+    ตำแหน่งที่เป็น null ใน array ชนิด object จะเก็บ None ไว้ด้วย
+    """
+    values: Any
+    nulls: Any = None
+
+
+def column_from_values(values: Sequence[Any]) -> Column:
+    """
+    สร้างคอลัมน์จากค่า Python โดยเลือกชนิด array ที่แคบที่สุด
+
+    Args:
+        values (Sequence[Any]): ค่าตามลำดับแถว
+
+    Returns:
+        Column: คอลัมน์
+    """
+    kinds = set()
+    has_null = False
+    for value in values:
+        if value is None:
+            has_null = True
+        else:
+            kinds.add(type(value))
+            if len(kinds) > 2:
+                break
+
+    if kinds and kinds <= {int, float}:
+        nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values)) if has_null else None
+        if kinds == {int}:
+            if all(-_MAX_EXACT_INT < v < _MAX_EXACT_INT for v in values if v is not None):
+                filled = values if nulls is None else [0 if v is None else v for v in values]
+                return Column(np.asarray(filled, dtype=np.int64), nulls)
+        else:
+            filled = values if nulls is None else [0.0 if v is None else v for v in values]
+            return Column(np.asarray(filled, dtype=np.float64), nulls)
+    if kinds == {bool}:
+        nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values)) if has_null else None
+        filled = values if nulls is None else [False if v is None else v for v in values]
+        return Column(np.asarray(filled, dtype=bool), nulls)
+
+    array = np.empty(len(values), dtype=object)
+    array[:] = list(values)
+    nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values)) if has_null else None
+    return Column(array, nulls)
+
+
+def column_to_values(column: Any) -> List[Any]:
+    """
+    แปลงคอลัมน์เป็นรายการค่า Python (null เป็น None)
+
+    Args:
+        column (Any): Column หรือ NestedColumn
+
+    Returns:
+        List[Any]: ค่าตามลำดับแถว
+    """
+    if isinstance(column, NestedColumn):
+        return [column.table_at(i) for i in range(len(column))]
+    values = column.values.tolist()
+    if column.nulls is not None and column.values.dtype != object:
+        for i in np.flatnonzero(column.nulls).tolist():
+            values[i] = None
+    return values
+
+
+def column_take(column: Any, indices: Any) -> Any:
+    """
+    เลือกแถวของคอลัมน์ตาม index (index -1 คือ null)
+
+    Args:
+        column (Any): Column หรือ NestedColumn
+        indices (np.ndarray): index ของแถว
+
+    Returns:
+        Any: คอลัมน์ใหม่
+    """
+    if isinstance(column, NestedColumn):
+        return column.take(indices)
+    missing = indices < 0
+    has_missing = bool(missing.any())
+    safe = np.where(missing, 0, indices) if has_missing else indices
+    if len(column.values) == 0:
+        values = np.zeros(len(indices), dtype=column.values.dtype)
+        if column.values.dtype == object:
+            values[:] = None
+        return Column(values, np.ones(len(indices), dtype=bool) if len(indices) else None)
+    values = column.values[safe]
+    nulls = column.nulls[safe] if column.nulls is not None else None
+    if has_missing:
+        nulls = missing if nulls is None else (nulls | missing)
+        if values.dtype == object:
+            values[missing] = None
+    return Column(values, nulls)
+
+
+class NestedColumn:
+    """
+    คอลัมน์ที่แต่ละแถวเป็น table ย่อย (ผลของ Table.NestedJoin)
+
+    เก็บเป็นตาราง base กับช่วงของ index: แถว i คือ base.take(flat[starts[i]:starts[i] + counts[i]])
+    """
+
+    def __init__(self, base: "Table", flat: Any, starts: Any, counts: Any):
+        self.base = base
+        self.flat = flat
+        self.starts = starts
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def table_at(self, row: int) -> "Table":
+        start = int(self.starts[row])
+        return self.base.take(self.flat[start:start + int(self.counts[row])])
+
+    def take(self, indices: Any) -> "NestedColumn":
+        safe = np.where(indices < 0, 0, indices)
+        counts = np.where(indices < 0, 0, self.counts[safe]) if len(self.counts) else np.zeros(len(indices), int)
+        starts = self.starts[safe] if len(self.starts) else np.zeros(len(indices), int)
+        return NestedColumn(self.base, self.flat, starts, counts)
+
+
+class Table:
+    """ตารางผลลัพธ์ของ query: ชื่อคอลัมน์และข้อมูล (แถวหรือคอลัมน์)"""
+
+    def __init__(self, columns: Sequence[str], rows: Optional[List[List[Any]]] = None,
+                 data: Optional[List[Any]] = None, length: Optional[int] = None):
+        """
+        เริ่มต้น Table
+
+        Args:
+            columns (Sequence[str]): ชื่อคอลัมน์ (ห้ามซ้ำ)
+            rows (Optional[List[List[Any]]]): แถวข้อมูล แต่ละแถวมีค่าเท่ากับจำนวนคอลัมน์
+            data (Optional[List[Any]]): คอลัมน์แบบ columnar (Column / NestedColumn) แทน rows
+            length (Optional[int]): จำนวนแถว (จำเป็นเมื่อใช้ data และไม่มีคอลัมน์)
+        """
+        self.columns = list(columns)
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError(f"ชื่อคอลัมน์ซ้ำ: {self.columns}")
+        if rows is None and data is None:
+            rows = []
+        self._rows = rows
+        self._data = data
+        if rows is not None:
+            self._length = len(rows)
+        elif length is not None:
+            self._length = length
+        else:
+            self._length = len(data[0].values) if data and isinstance(data[0], Column) else \
+                (len(data[0]) if data else 0)
+
+    @classmethod
+    def from_columns(cls, columns: Sequence[str], data: List[Any], length: Optional[int] = None) -> "Table":
+        """
+        สร้าง table จากคอลัมน์แบบ columnar
+
+        Args:
+            columns (Sequence[str]): ชื่อคอลัมน์
+            data (List[Any]): Column / NestedColumn ตามลำดับชื่อคอลัมน์
+            length (Optional[int]): จำนวนแถว
+
+        Returns:
+            Table: ตาราง
+        """
+        return cls(columns, data=data, length=length)
+
+    @property
+    def rows(self) -> List[List[Any]]:
+        """แถวข้อมูล (สร้างจากคอลัมน์เมื่อถูกใช้ครั้งแรก)"""
+        if self._rows is None:
+            values = [column_to_values(column) for column in self._data]
+            self._rows = [list(row) for row in zip(*values)] if values else [[] for _ in range(self._length)]
+        return self._rows
+
+    @property
+    def data(self) -> List[Any]:
+        """คอลัมน์แบบ columnar (สร้างจากแถวเมื่อถูกใช้ครั้งแรก ต้องมี NumPy)"""
+        if self._data is None:
+            if np is None:
+                raise RuntimeError("ต้องติดตั้ง numpy เพื่อใช้ table แบบ columnar")
+            self._data = [
+                column_from_values([row[i] for row in self._rows]) for i in range(len(self.columns))
+            ]
+        return self._data
+
+    @property
+    def is_columnar(self) -> bool:
+        """True หากข้อมูลถูกเก็บเป็นคอลัมน์อยู่แล้ว"""
+        return self._data is not None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"Table(columns={self.columns!r}, rows={self._length})"
+
+    def index(self, column: str) -> int:
+        """
+        ตำแหน่งของคอลัมน์
+
+        Args:
+            column (str): ชื่อคอลัมน์
+
+        Returns:
+            int: ตำแหน่ง (เริ่มที่ 0)
+        """
+        try:
+            return self.columns.index(column)
+        except ValueError:
+            raise KeyError(f"ไม่พบคอลัมน์ {column!r}") from None
+
+    def column(self, column: str) -> List[Any]:
+        """
+        ค่าทั้งหมดของคอลัมน์
+
+        Args:
+            column (str): ชื่อคอลัมน์
+
+        Returns:
+            List[Any]: ค่าตามลำดับแถว
+        """
+        i = self.index(column)
+        if self._rows is None:
+            return column_to_values(self._data[i])
+        return [row[i] for row in self._rows]
+
+    def take(self, indices: Any) -> "Table":
+        """
+        เลือกแถวตาม index
+
+        Args:
+            indices (Any): index ของแถว (list หรือ np.ndarray)
+
+        Returns:
+            Table: ตารางใหม่
+        """
+        if self._data is None and np is None:
+            return Table(self.columns, [self._rows[i] for i in indices])
+        indices = np.asarray(indices, dtype=np.int64)
+        return Table.from_columns(self.columns, [column_take(c, indices) for c in self.data], len(indices))
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """
+        แถวข้อมูลในรูป dict (ชื่อคอลัมน์ → ค่า)
+
+        Yields:
+            Dict[str, Any]: หนึ่งแถว
+        """
+        for row in self.rows:
+            yield dict(zip(self.columns, row))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        แปลงเป็น dict สำหรับแสดงผลหรือบันทึกเป็น JSON
+
+        Returns:
+            Dict[str, Any]: {"columns", "rows"}
+        """
+        return {"columns": list(self.columns), "rows": [list(row) for row in self.rows]}
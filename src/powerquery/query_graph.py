@@ -0,0 +1,347 @@
+"""
+Query Graph
+สร้างกราฟความสัมพันธ์ (DAG) ระหว่าง query, แหล่งข้อมูลภายนอก และ sheet ที่โหลดข้อมูลลง
+จากไฟล์ xlsx โดยไม่ต้องใช้ Excel
+"""
+
+import zipfile
+from typing import Dict, List, Any, Optional, Set
+
+from .datamashup import read_datamashup, read_package_parts, section_from_parts
+from .m_lexer import Token, tokenize, MSyntaxError
+from .workbook_parts import read_connections, read_query_table_loads
+
+# ฟังก์ชันที่ดึงข้อมูลจากภายนอก → ประเภทแหล่งข้อมูล
+SOURCE_FUNCTIONS = {
+    "File.Contents": "file",
+    "Folder.Files": "folder",
+    "Folder.Contents": "folder",
+    "Web.Contents": "web",
+    "Web.Page": "web",
+    "OData.Feed": "odata",
+    "Sql.Database": "sql",
+    "Sql.Databases": "sql",
+    "Oracle.Database": "oracle",
+    "PostgreSQL.Database": "postgresql",
+    "MySQL.Database": "mysql",
+    "Odbc.DataSource": "odbc",
+    "Odbc.Query": "odbc",
+    "OleDb.DataSource": "oledb",
+    "OleDb.Query": "oledb",
+    "SharePoint.Files": "sharepoint",
+    "SharePoint.Contents": "sharepoint",
+    "SharePoint.Tables": "sharepoint",
+    "AnalysisServices.Database": "analysis_services",
+    "Excel.CurrentWorkbook": "current_workbook",
+}
+
+_OPEN = {"(": ")", "[": "]", "{": "}"}
+_CLOSE = {")", "]", "}"}
+
+
+def parse_section(text: str) -> List[Dict[str, Any]]:
+    """
+    แยก section document ออกเป็น member (shared query)
+
+    Args:
+        text (str): โค้ด M ทั้งไฟล์ (Section1.m)
+
+    Returns:
+        List[Dict[str, Any]]: {"name", "shared", "expression", "tokens"} ตามลำดับในไฟล์
+    """
+    tokens = tokenize(text)
+    members = []
+    i = 0
+
+    # ข้าม "section Name;"
+    if tokens[0].kind == "ident" and tokens[0].value == "section":
+        while tokens[i].value != ";" and tokens[i].kind != "eof":
+            i += 1
+        i += 1
+
+    while tokens[i].kind != "eof":
+        shared = False
+        if tokens[i].kind == "ident" and tokens[i].value == "shared" and not tokens[i].quoted:
+            shared = True
+            i += 1
+        name_token = tokens[i]
+        if name_token.kind != "ident" or tokens[i + 1].value != "=":
+            raise MSyntaxError(f"คาดว่าจะเป็น member ที่ตำแหน่ง {name_token.pos}")
+        i += 2
+
+        start = i
+        depth = 0
+        while tokens[i].kind != "eof":
+            token = tokens[i]
+            if token.kind == "symbol":
+                if token.value in _OPEN:
+                    depth += 1
+                elif token.value in _CLOSE:
+                    depth -= 1
+                elif token.value == ";" and depth == 0:
+                    break
+            i += 1
+        body = tokens[start:i]
+        end_pos = tokens[i].pos
+        members.append({
+            "name": name_token.value,
+            "shared": shared,
+            "expression": text[body[0].pos:end_pos].strip() if body else "",
+            "tokens": body + [Token("eof", "", end_pos)],
+        })
+        i += 1
+
+    return members
+
+
+def _string_arguments(tokens: List[Token], open_index: int) -> List[str]:
+    """ดึง string literal ระดับบนสุดจากอาร์กิวเมนต์ของการเรียกฟังก์ชัน"""
+    values = []
+    depth = 0
+    for token in tokens[open_index:]:
+        if token.kind == "symbol" and token.value in _OPEN:
+            depth += 1
+        elif token.kind == "symbol" and token.value in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                break
+        elif token.kind == "string" and depth == 1:
+            values.append(token.value)
+    return values
+
+
+def find_sources(tokens: List[Token]) -> List[Dict[str, Any]]:
+    """
+    หาการเรียกฟังก์ชันที่ดึงข้อมูลจากภายนอก
+
+    Args:
+        tokens (List[Token]): token ของ expression
+
+    Returns:
+        List[Dict[str, Any]]: {"function", "kind", "arguments"} (arguments คือ string literal)
+    """
+    sources = []
+    for index, token in enumerate(tokens[:-1]):
+        if token.kind != "ident" or token.quoted or token.value not in SOURCE_FUNCTIONS:
+            continue
+        if tokens[index + 1].value != "(":
+            continue
+        sources.append({
+            "function": token.value,
+            "kind": SOURCE_FUNCTIONS[token.value],
+            "arguments": _string_arguments(tokens, index + 1),
+        })
+    return sources
+
+
+def find_references(tokens: List[Token], names: Set[str], own_name: str) -> Set[str]:
+    """
+    หาชื่อ query อื่นที่ถูกอ้างถึงใน expression (ไม่นับชื่อตัวแปรภายใน let และชื่อ field)
+
+    Args:
+        tokens (List[Token]): token ของ expression
+        names (Set[str]): ชื่อ query ทั้งหมดใน section
+        own_name (str): ชื่อ query ตัวเอง
+
+    Returns:
+        Set[str]: ชื่อ query ที่ถูกอ้างถึง
+    """
+    local_names = set()
+    for index, token in enumerate(tokens[:-1]):
+        # ชื่อที่ถูกกำหนดค่า (name = ...) ภายใน let / record
+        if token.kind == "ident" and tokens[index + 1].value == "=" and \
+                (index == 0 or tokens[index - 1].value in {",", "let", "["}):
+            local_names.add(token.value)
+
+    references = set()
+    bracket_depth = 0
+    for index, token in enumerate(tokens):
+        if token.kind == "symbol" and token.value == "[":
+            bracket_depth += 1
+        elif token.kind == "symbol" and token.value == "]":
+            bracket_depth -= 1
+        elif token.kind == "ident" and token.value in names and token.value != own_name:
+            # [Name] คือการอ้างถึง field ไม่ใช่ query
+            if bracket_depth > 0 and index + 1 < len(tokens) and tokens[index + 1].value in {"]", "="}:
+                continue
+            if token.value in local_names:
+                continue
+            references.add(token.value)
+    return references
+
+
+class QueryGraph:
+    """กราฟความสัมพันธ์ของ query ใน workbook"""
+
+    def __init__(self, members: List[Dict[str, Any]], connections: List[Dict[str, Any]],
+                 loads: Dict[str, List[Dict[str, str]]]):
+        """
+        เริ่มต้น QueryGraph
+
+        Args:
+            members (List[Dict[str, Any]]): ผลจาก parse_section
+            connections (List[Dict[str, Any]]): ผลจาก read_connections
+            loads (Dict[str, List[Dict[str, str]]]): ผลจาก read_query_table_loads
+        """
+        names = {member["name"] for member in members}
+        connection_by_query = {c["query"]: c for c in connections if c.get("query")}
+
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        for member in members:
+            name = member["name"]
+            connection = connection_by_query.get(name)
+            self.queries[name] = {
+                "name": name,
+                "expression": member["expression"],
+                "dependencies": find_references(member["tokens"], names, name),
+                "sources": find_sources(member["tokens"]),
+                "connection": connection["name"] if connection else None,
+                "data_model": bool(connection and connection.get("data_model")),
+                "loads": loads.get(connection["id"], []) if connection else [],
+            }
+
+    def dependents(self, name: str) -> Set[str]:
+        """
+        query ที่อ้างถึง name โดยตรง
+
+        Args:
+            name (str): ชื่อ query
+
+        Returns:
+            Set[str]: ชื่อ query ที่ใช้ name
+        """
+        return {q for q, info in self.queries.items() if name in info["dependencies"]}
+
+    def topological_order(self) -> List[str]:
+        """
+        ลำดับ query ที่ dependency มาก่อนผู้ใช้งานเสมอ
+
+        Returns:
+            List[str]: ชื่อ query (หากมีวงจร query ในวงจรจะต่อท้ายตามลำดับเดิม)
+        """
+        remaining = {name: set(info["dependencies"]) & set(self.queries) for name, info in self.queries.items()}
+        order = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                order.extend(remaining)
+                break
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def is_loaded(self, name: str) -> bool:
+        """query ถูกโหลดลง sheet หรือ data model หรือไม่"""
+        info = self.queries[name]
+        return bool(info["loads"]) or info["data_model"]
+
+    def refresh_targets(self) -> List[str]:
+        """
+        ชื่อการเชื่อมต่อที่ต้องสั่งรีเฟช
+
+        query ที่ไม่ได้โหลดลง sheet และถูก query อื่นใช้ จะถูกคำนวณใหม่อยู่แล้ว
+        เมื่อรีเฟช query ปลายทาง จึงไม่ต้องรีเฟชการเชื่อมต่อของมันซ้ำ
+
+        Returns:
+            List[str]: ชื่อการเชื่อมต่อ ตามลำดับ topological
+        """
+        targets = []
+        for name in self.topological_order():
+            info = self.queries[name]
+            if not info["connection"]:
+                continue
+            if self.is_loaded(name) or not self.dependents(name):
+                targets.append(info["connection"])
+        return targets
+
+    def independent_groups(self) -> List[List[str]]:
+        """
+        แบ่ง query เป็นกลุ่มที่ไม่เกี่ยวข้องกัน (weakly connected components)
+        กลุ่มต่าง ๆ รีเฟชพร้อมกันได้โดยไม่แย่งกันคำนวณ query ร่วม
+
+        Returns:
+            List[List[str]]: กลุ่มของชื่อ query
+        """
+        neighbours: Dict[str, Set[str]] = {name: set() for name in self.queries}
+        for name, info in self.queries.items():
+            for dep in info["dependencies"]:
+                if dep in neighbours:
+                    neighbours[name].add(dep)
+                    neighbours[dep].add(name)
+
+        groups = []
+        seen: Set[str] = set()
+        for name in self.queries:
+            if name in seen:
+                continue
+            stack, group = [name], []
+            seen.add(name)
+            while stack:
+                current = stack.pop()
+                group.append(current)
+                for other in neighbours[current] - seen:
+                    seen.add(other)
+                    stack.append(other)
+            groups.append(sorted(group))
+        return groups
+
+    def external_sources(self) -> List[Dict[str, Any]]:
+        """
+        แหล่งข้อมูลภายนอกทั้งหมด (ไม่ซ้ำ)
+
+        Returns:
+            List[Dict[str, Any]]: {"function", "kind", "arguments", "queries"}
+        """
+        sources: Dict[tuple, Dict[str, Any]] = {}
+        for name, info in self.queries.items():
+            for source in info["sources"]:
+                key = (source["function"], tuple(source["arguments"]))
+                entry = sources.setdefault(key, dict(source, queries=[]))
+                entry["queries"].append(name)
+        return list(sources.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        แปลงเป็น dict สำหรับแสดงผลหรือบันทึกเป็น JSON
+
+        Returns:
+            Dict[str, Any]: ข้อมูลกราฟ
+        """
+        return {
+            "queries": {
+                name: {
+                    "dependencies": sorted(info["dependencies"]),
+                    "sources": info["sources"],
+                    "connection": info["connection"],
+                    "loads": [{"sheet": l["sheet"], "table": l["table"]} for l in info["loads"]],
+                }
+                for name, info in self.queries.items()
+            },
+            "order": self.topological_order(),
+            "refresh_targets": self.refresh_targets(),
+            "independent_groups": self.independent_groups(),
+        }
+
+
+def build_query_graph(file_path: str) -> Optional[QueryGraph]:
+    """
+    อ่านไฟล์ xlsx แล้วสร้าง QueryGraph
+
+    Args:
+        file_path (str): เส้นทางไฟล์ xlsx
+
+    Returns:
+        Optional[QueryGraph]: กราฟ หรือ None หากไฟล์ไม่มี Power Query
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        data = read_datamashup(archive)
+        if data is None:
+            return None
+        connections = read_connections(archive)
+        loads = read_query_table_loads(archive)
+
+    section = section_from_parts(read_package_parts(data))
+    return QueryGraph(parse_section(section), connections, loads)
@@ -0,0 +1,293 @@
+"""
+Sheet Writer
+เขียนผลลัพธ์ของ query กลับลง table ใน sheet ของไฟล์ xlsx
+แก้ไข xml ของ sheet และ table เฉพาะส่วนที่จำเป็น เพื่อให้ส่วนอื่นของไฟล์คงเดิม
+"""
+
+import math
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from .m_evaluator import MError, UnsupportedFeature, force
+from .m_table import Table
+from .workbook_parts import NS_MAIN
+from .xlsx_reader import column_letter, datetime_to_excel_serial, split_cell_ref, split_range_ref
+from .zip_patch import replace_parts
+
+_SHEET_DATA = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_ATTR = re.compile(r'([\w:]+)\s*=\s*("[^"]*"|\'[^\']*\')')
+_DIMENSION = re.compile(r'(<dimension\b[^>]*\sref=")([^"]*)(")')
+_TABLE_REF = re.compile(r'(<table\b[^>]*?\sref=")([^"]*)(")')
+_AUTOFILTER_REF = re.compile(r'(<autoFilter\b[^>]*?\sref=")([^"]*)(")')
+_CALC_PR = re.compile(r"<calcPr\b([^>]*?)(/?)>")
+# อักขระที่ใช้ใน xml ไม่ได้
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f￾￿]")
+
+WORKBOOK_PART = "xl/workbook.xml"
+
+
+def _attributes(text: str) -> Dict[str, str]:
+    return {name: value[1:-1] for name, value in _ATTR.findall(text)}
+
+
+def _format_attributes(attributes: Dict[str, str]) -> str:
+    return "".join(f" {name}={quoteattr(value)}" for name, value in attributes.items())
+
+
+def cell_xml(ref: str, value: Any, style: Optional[str] = None) -> str:
+    """
+    สร้าง xml ของ cell หนึ่งช่อง
+
+    Args:
+        ref (str): ตำแหน่ง cell เช่น "B2"
+        value (Any): ค่า
+        style (Optional[str]): index ของ style เดิม (คงรูปแบบการแสดงผล)
+
+    Returns:
+        str: <c> element (error ระดับ cell เป็น cell ว่าง เหมือนที่ Excel โหลดผล query)
+    """
+    value = None if isinstance(value, MError) else force(value)
+    attributes = {"r": ref}
+    if style is not None:
+        attributes["s"] = style
+    if value is None:
+        return f"<c{_format_attributes(attributes)}/>"
+    if isinstance(value, bool):
+        attributes["t"] = "b"
+        return f"<c{_format_attributes(attributes)}><v>{int(value)}</v></c>"
+    if isinstance(value, (date, timedelta)):
+        value = datetime_to_excel_serial(value)
+    if isinstance(value, time):
+        value = (value.hour * 3600 + value.minute * 60 + value.second) / 86400
+    if isinstance(value, (int, float)) and not (isinstance(value, float) and not math.isfinite(value)):
+        return f"<c{_format_attributes(attributes)}><v>{value!r}</v></c>"
+    if isinstance(value, Table):
+        value = "Table"
+    elif isinstance(value, list):
+        value = "List"
+    elif isinstance(value, dict):
+        value = "Record"
+    text = _INVALID_XML_CHARS.sub("", str(value))
+    attributes["t"] = "inlineStr"
+    return f'<c{_format_attributes(attributes)}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+class _Row:
+    """แถวหนึ่งใน sheetData: attribute ของ row และ cell (คอลัมน์ → xml เดิม)"""
+
+    def __init__(self, attributes: Dict[str, str], cells: Dict[int, str]):
+        self.attributes = attributes
+        self.cells = cells
+
+    def to_xml(self, number: int) -> str:
+        attributes = dict(self.attributes)
+        attributes["r"] = str(number)
+        # spans เป็นเพียงคำแนะนำ ลบออกเพื่อไม่ให้ขัดกับ cell ใหม่
+        attributes.pop("spans", None)
+        if not self.cells:
+            return f"<row{_format_attributes(attributes)}/>"
+        body = "".join(self.cells[col] for col in sorted(self.cells))
+        return f"<row{_format_attributes(attributes)}>{body}</row>"
+
+
+def _parse_rows(sheet_data: str) -> Dict[int, _Row]:
+    rows: Dict[int, _Row] = {}
+    for match in _ROW.finditer(sheet_data):
+        attributes = _attributes(match.group(1))
+        if "r" not in attributes:
+            raise UnsupportedFeature("sheet ไม่มีเลขแถว (row/@r)")
+        cells: Dict[int, str] = {}
+        for cell in _CELL.finditer(match.group(2) or ""):
+            cell_attributes = _attributes(cell.group(1))
+            if "r" not in cell_attributes:
+                raise UnsupportedFeature("sheet ไม่มีตำแหน่ง cell (c/@r)")
+            cells[split_cell_ref(cell_attributes["r"])[0]] = cell.group(0)
+        rows[int(attributes["r"])] = _Row(attributes, cells)
+    return rows
+
+
+def _cell_style(cell: Optional[str]) -> Optional[str]:
+    if cell is None:
+        return None
+    return _attributes(_CELL.match(cell).group(1)).get("s")
+
+
+def _has_content(cell: str) -> bool:
+    """cell มีค่าหรือสูตร (cell ที่มีเพียง style นับเป็น cell ว่าง)"""
+    body = _CELL.match(cell).group(2) or ""
+    return re.search(r"<(v|f|is)\b", body) is not None
+
+
+def _union_ref(ref: Optional[str], first_col: int, first_row: int, last_col: int, last_row: int) -> str:
+    if ref:
+        try:
+            a, b, c, d = split_range_ref(ref)
+            first_col, first_row = min(first_col, a), min(first_row, b)
+            last_col, last_row = max(last_col, c), max(last_row, d)
+        except ValueError:
+            pass
+    return f"{column_letter(first_col)}{first_row}:{column_letter(last_col)}{last_row}"
+
+
+def table_definition(table_xml: bytes) -> Dict[str, Any]:
+    """
+    อ่านข้อมูลที่จำเป็นจาก xml ของ table
+
+    Args:
+        table_xml (bytes): เนื้อหา xl/tables/tableN.xml
+
+    Returns:
+        Dict[str, Any]: {"name", "ref", "columns", "header_rows", "totals_rows"}
+    """
+    root = ET.fromstring(table_xml)
+    return {
+        "name": root.get("displayName") or root.get("name"),
+        "ref": root.get("ref"),
+        "columns": [c.get("name") for c in root.iter(f"{{{NS_MAIN}}}tableColumn")],
+        "header_rows": int(root.get("headerRowCount", "1")),
+        "totals_rows": int(root.get("totalsRowCount", "0")),
+    }
+
+
+def write_table(sheet_xml: str, table_xml: str, result: Table) -> Tuple[str, str]:
+    """
+    เขียนผลลัพธ์ลง table (คอลัมน์ของผลลัพธ์ต้องตรงกับคอลัมน์ของ table เดิม)
+
+    cell นอกช่วงคอลัมน์ของ table ในแถวเดียวกันจะคงเดิม
+    แถวข้อมูลเดิมที่เกินจำนวนแถวใหม่จะถูกล้าง
+    หาก table ขยายลงไปทับ cell ที่มีข้อมูลอยู่แล้วจะไม่เขียน (ให้ Excel จัดการแทน)
+
+    Args:
+        sheet_xml (str): xml ของ sheet
+        table_xml (str): xml ของ table
+        result (Table): ผลลัพธ์ของ query
+
+    Returns:
+        Tuple[str, str]: (xml ของ sheet ใหม่, xml ของ table ใหม่)
+
+    Raises:
+        UnsupportedFeature: table มีแถวผลรวม, คอลัมน์ไม่ตรง หรือแถวที่ขยายออกไปมี cell ที่มีข้อมูล
+    """
+    definition = table_definition(table_xml.encode("utf-8"))
+    name = definition["name"]
+    if definition["totals_rows"]:
+        raise UnsupportedFeature(f"table {name} มีแถวผลรวม")
+    if definition["header_rows"] != 1:
+        raise UnsupportedFeature(f"table {name} ไม่มีแถวหัวตาราง")
+    if definition["columns"] != list(result.columns):
+        raise UnsupportedFeature(
+            f"คอลัมน์ของ table {name} ไม่ตรงกับผลลัพธ์ของ query (ต้องให้ Excel ปรับโครงสร้าง)"
+        )
+
+    first_col, header_row, last_col, old_last_row = split_range_ref(definition["ref"])
+    new_last_row = header_row + max(1, len(result.rows))
+
+    match = _SHEET_DATA.search(sheet_xml)
+    if match is None:
+        raise UnsupportedFeature("ไม่พบ sheetData")
+    rows = _parse_rows(match.group(1) or "")
+
+    # แถวที่ table ขยายออกไปต้องว่าง ไม่เช่นนั้นจะเขียนทับข้อมูลที่อยู่ใต้ table
+    for number in range(old_last_row + 1, new_last_row + 1):
+        row = rows.get(number)
+        occupied = [
+            col for col in range(first_col, last_col + 1)
+            if row is not None and col in row.cells and _has_content(row.cells[col])
+        ]
+        if occupied:
+            raise UnsupportedFeature(
+                f"table {name} ขยายไปทับ cell ที่มีข้อมูล ({column_letter(occupied[0])}{number})"
+            )
+
+    # ใช้ style ของแถวข้อมูลแรกเดิมกับทุกแถว
+    first_data = rows.get(header_row + 1)
+    styles = {
+        col: _cell_style(first_data.cells.get(col)) if first_data else None
+        for col in range(first_col, last_col + 1)
+    }
+
+    for number in range(header_row + 1, max(old_last_row, new_last_row) + 1):
+        row = rows.get(number)
+        if row is None:
+            row = rows[number] = _Row({}, {})
+        for col in range(first_col, last_col + 1):
+            row.cells.pop(col, None)
+        data_index = number - header_row - 1
+        if data_index < len(result.rows):
+            values = result.rows[data_index]
+            for offset, col in enumerate(range(first_col, last_col + 1)):
+                row.cells[col] = cell_xml(f"{column_letter(col)}{number}", values[offset], styles[col])
+        elif number <= new_last_row:
+            # table ว่างยังต้องมีแถวข้อมูลเปล่าหนึ่งแถว
+            for col in range(first_col, last_col + 1):
+                if styles[col] is not None:
+                    row.cells[col] = cell_xml(f"{column_letter(col)}{number}", None, styles[col])
+        if not row.cells and set(row.attributes) <= {"r", "spans"}:
+            del rows[number]
+
+    sheet_data = "".join(rows[number].to_xml(number) for number in sorted(rows))
+    sheet_xml = sheet_xml[:match.start()] + f"<sheetData>{sheet_data}</sheetData>" + sheet_xml[match.end():]
+
+    new_ref = f"{column_letter(first_col)}{header_row}:{column_letter(last_col)}{new_last_row}"
+    dimension = _DIMENSION.search(sheet_xml)
+    if dimension:
+        merged = _union_ref(dimension.group(2), first_col, header_row, last_col, new_last_row)
+        sheet_xml = sheet_xml[:dimension.start(2)] + merged + sheet_xml[dimension.end(2):]
+
+    table_xml = _TABLE_REF.sub(lambda m: m.group(1) + new_ref + m.group(3), table_xml, count=1)
+    table_xml = _AUTOFILTER_REF.sub(lambda m: m.group(1) + new_ref + m.group(3), table_xml, count=1)
+    return sheet_xml, table_xml
+
+
+def request_full_calculation(workbook_xml: str) -> str:
+    """
+    ตั้งค่าให้ Excel คำนวณสูตรใหม่ทั้งหมดเมื่อเปิดไฟล์ (สูตรที่อ้างถึง table จะได้ค่าใหม่)
+
+    Args:
+        workbook_xml (str): xml ของ xl/workbook.xml
+
+    Returns:
+        str: xml ที่แก้ไขแล้ว
+    """
+    match = _CALC_PR.search(workbook_xml)
+    if match is None:
+        return workbook_xml
+    attributes = _attributes(match.group(1))
+    attributes["fullCalcOnLoad"] = "1"
+    replacement = f"<calcPr{_format_attributes(attributes)}{match.group(2)}>"
+    return workbook_xml[:match.start()] + replacement + workbook_xml[match.end():]
+
+
+def write_results(file_path: str, results: List[Tuple[Dict[str, str], Table]]) -> None:
+    """
+    เขียนผลลัพธ์หลาย table ลงไฟล์ xlsx
+
+    อ่านและเขียนใหม่เฉพาะ part ของ sheet / table ที่เปลี่ยนและ xl/workbook.xml
+    part อื่นถูกคัดลอกแบบ raw ด้วย zip_patch.replace_parts
+
+    Args:
+        file_path (str): เส้นทางไฟล์ xlsx
+        results (List[Tuple[Dict[str, str], Table]]): (ตำแหน่งที่โหลด จาก read_query_table_loads, ผลลัพธ์)
+    """
+    changed: Dict[str, str] = {}
+    with zipfile.ZipFile(file_path) as archive:
+        def text_of(part: str) -> str:
+            if part not in changed:
+                changed[part] = archive.read(part).decode("utf-8")
+            return changed[part]
+
+        for load, table in results:
+            sheet_xml, table_xml = write_table(text_of(load["sheet_part"]), text_of(load["table_part"]), table)
+            changed[load["sheet_part"]] = sheet_xml
+            changed[load["table_part"]] = table_xml
+
+        if WORKBOOK_PART in archive.NameToInfo:
+            changed[WORKBOOK_PART] = request_full_calculation(text_of(WORKBOOK_PART))
+
+    replace_parts(file_path, {part: text.encode("utf-8") for part, text in changed.items()})
@@ -0,0 +1,154 @@
+"""
+Workbook Parts
+อ่านข้อมูลการเชื่อมต่อและตำแหน่งที่ query ถูกโหลดลง sheet จาก xml ภายในไฟล์ xlsx
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_LOCATION = re.compile(r"(?:^|;)\s*Location\s*=\s*(\"[^\"]*\"|[^;]*)", re.I)
+
+
+def _read_xml(archive: zipfile.ZipFile, name: str) -> Optional[ET.Element]:
+    try:
+        return ET.fromstring(archive.read(name))
+    except KeyError:
+        return None
+
+
+def _rels_path(part: str) -> str:
+    folder, file_name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", file_name + ".rels")
+
+
+def read_relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, Dict[str, str]]:
+    """
+    อ่าน relationships ของ part
+
+    Args:
+        archive (zipfile.ZipFile): ไฟล์ xlsx
+        part (str): ชื่อ part เช่น "xl/workbook.xml"
+
+    Returns:
+        Dict[str, Dict[str, str]]: rId → {"type", "target"} (target เป็น path เต็มใน zip)
+    """
+    root = _read_xml(archive, _rels_path(part))
+    if root is None:
+        return {}
+    folder = posixpath.dirname(part)
+    relationships = {}
+    for rel in root.findall(f"{{{NS_PKG_REL}}}Relationship"):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") != "External":
+            target = posixpath.normpath(
+                target.lstrip("/") if target.startswith("/") else posixpath.join(folder, target)
+            )
+        relationships[rel.get("Id")] = {"type": rel.get("Type", "").rsplit("/", 1)[-1], "target": target}
+    return relationships
+
+
+def read_sheets(archive: zipfile.ZipFile) -> List[Dict[str, str]]:
+    """
+    รายการ sheet ใน workbook
+
+    Returns:
+        List[Dict[str, str]]: {"name", "part"} ตามลำดับใน workbook
+    """
+    root = _read_xml(archive, "xl/workbook.xml")
+    if root is None:
+        return []
+    relationships = read_relationships(archive, "xl/workbook.xml")
+    sheets = []
+    for sheet in root.iter(f"{{{NS_MAIN}}}sheet"):
+        rel = relationships.get(sheet.get(f"{{{NS_REL}}}id"), {})
+        sheets.append({"name": sheet.get("name"), "part": rel.get("target", "")})
+    return sheets
+
+
+def connection_location(connection_string: str) -> Optional[str]:
+    """
+    ดึงชื่อ query จาก connection string ของ Power Query (Location=...)
+
+    Args:
+        connection_string (str): ค่า dbPr/@connection
+
+    Returns:
+        Optional[str]: ชื่อ query หรือ None
+    """
+    match = _LOCATION.search(connection_string or "")
+    if not match:
+        return None
+    value = match.group(1).strip()
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    return value
+
+
+def read_connections(archive: zipfile.ZipFile) -> List[Dict[str, Any]]:
+    """
+    อ่าน xl/connections.xml
+
+    Returns:
+        List[Dict[str, Any]]: {"id", "name", "type", "query", "data_model", "connection_string"}
+            query คือชื่อ Power Query (None หากไม่ใช่การเชื่อมต่อของ Power Query)
+            data_model เป็น True หากการเชื่อมต่อโหลดลง Data Model
+    """
+    root = _read_xml(archive, "xl/connections.xml")
+    if root is None:
+        return []
+    connections = []
+    for connection in root.findall(f"{{{NS_MAIN}}}connection"):
+        db_pr = connection.find(f"{{{NS_MAIN}}}dbPr")
+        connection_string = db_pr.get("connection", "") if db_pr is not None else ""
+        is_mashup = "Microsoft.Mashup.OleDb" in connection_string
+        # x15:connection model="1" อยู่ใน extLst ของการเชื่อมต่อที่โหลดลง Data Model
+        data_model = any(element.get("model") == "1" for element in connection.iter())
+        connections.append({
+            "id": connection.get("id"),
+            "name": connection.get("name"),
+            "type": connection.get("type"),
+            "query": connection_location(connection_string) if is_mashup else None,
+            "data_model": data_model,
+            "connection_string": connection_string,
+        })
+    return connections
+
+
+def read_query_table_loads(archive: zipfile.ZipFile) -> Dict[str, List[Dict[str, str]]]:
+    """
+    หาว่าการเชื่อมต่อแต่ละรายการโหลดข้อมูลลง table ใดใน sheet ใด
+
+    Returns:
+        Dict[str, List[Dict[str, str]]]: connection id → [{"sheet", "sheet_part", "table", "table_part", "ref"}]
+    """
+    loads: Dict[str, List[Dict[str, str]]] = {}
+    for sheet in read_sheets(archive):
+        sheet_part = sheet["part"]
+        for rel in read_relationships(archive, sheet_part).values():
+            if rel["type"] != "table":
+                continue
+            table = _read_xml(archive, rel["target"])
+            if table is None:
+                continue
+            for table_rel in read_relationships(archive, rel["target"]).values():
+                if table_rel["type"] != "queryTable":
+                    continue
+                query_table = _read_xml(archive, table_rel["target"])
+                if query_table is None:
+                    continue
+                loads.setdefault(query_table.get("connectionId"), []).append({
+                    "sheet": sheet["name"],
+                    "sheet_part": sheet_part,
+                    "table": table.get("name"),
+                    "table_part": rel["target"],
+                    "query_table_part": table_rel["target"],
+                    "ref": table.get("ref"),
+                })
+    return loads
@@ -0,0 +1,693 @@
+"""
+XLSX Reader
+อ่านค่าใน sheet และ table ของไฟล์ xlsx โดยไม่ต้องใช้ Excel
+"""
+
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .workbook_parts import NS_MAIN, read_relationships, read_sheets
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# numFmtId มาตรฐานที่เป็นวันที่ / เวลา
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+_DATE_ONLY_FORMATS = {14, 15, 16, 17}
+_CELL_REF = re.compile(r"^\$?([A-Za-z]{1,3})\$?(\d+)$")
+_FORMAT_LITERALS = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+
+_SI = f"{{{NS_MAIN}}}si"
+_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+_ROW = f"{{{NS_MAIN}}}row"
+_C = f"{{{NS_MAIN}}}c"
+_V = f"{{{NS_MAIN}}}v"
+
+# จำนวนแถวต่อชุดเริ่มต้นของ WorkbookReader.iter_batches
+DEFAULT_BATCH_ROWS = 10_000
+
+_DIGITS = "0123456789"
+# ชื่อคอลัมน์ของ cell ref → เลขคอลัมน์ (มีได้ไม่เกิน 16384 ค่า)
+_COLUMN_CACHE: Dict[str, int] = {}
+
+
+def column_index(letters: str) -> int:
+    """
+    แปลงชื่อคอลัมน์เป็นเลขคอลัมน์ (A → 1)
+
+    Args:
+        letters (str): ชื่อคอลัมน์ เช่น "AB"
+
+    Returns:
+        int: เลขคอลัมน์ เริ่มที่ 1
+    """
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+def column_letter(index: int) -> str:
+    """
+    แปลงเลขคอลัมน์เป็นชื่อคอลัมน์ (1 → A)
+
+    Args:
+        index (int): เลขคอลัมน์ เริ่มที่ 1
+
+    Returns:
+        str: ชื่อคอลัมน์
+    """
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def split_cell_ref(ref: str) -> Tuple[int, int]:
+    """
+    แยกตำแหน่ง cell เช่น "B5" → (2, 5)
+
+    Args:
+        ref (str): ตำแหน่ง cell
+
+    Returns:
+        Tuple[int, int]: (คอลัมน์, แถว)
+    """
+    match = _CELL_REF.match(ref.strip())
+    if not match:
+        raise ValueError(f"ตำแหน่ง cell ไม่ถูกต้อง: {ref}")
+    return column_index(match.group(1)), int(match.group(2))
+
+
+def split_range_ref(ref: str) -> Tuple[int, int, int, int]:
+    """
+    แยกช่วง cell เช่น "A1:C10" → (1, 1, 3, 10)
+
+    Args:
+        ref (str): ช่วง cell
+
+    Returns:
+        Tuple[int, int, int, int]: (คอลัมน์แรก, แถวแรก, คอลัมน์สุดท้าย, แถวสุดท้าย)
+    """
+    start, _, end = ref.partition(":")
+    first_col, first_row = split_cell_ref(start)
+    last_col, last_row = split_cell_ref(end) if end else (first_col, first_row)
+    return first_col, first_row, last_col, last_row
+
+
+def excel_serial_to_datetime(serial: float) -> datetime:
+    """
+    แปลงเลขวันที่ของ Excel (ระบบ 1900) เป็น datetime
+
+    Args:
+        serial (float): เลขวันที่
+
+    Returns:
+        datetime: วันเวลา
+    """
+    return EXCEL_EPOCH + timedelta(days=serial)
+
+
+def datetime_to_excel_serial(value: Any) -> float:
+    """
+    แปลง date / datetime / timedelta เป็นเลขวันที่ของ Excel
+
+    Args:
+        value (Any): date, datetime หรือ timedelta
+
+    Returns:
+        float: เลขวันที่ (timedelta คือจำนวนวัน)
+    """
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    delta = value - EXCEL_EPOCH
+    serial = delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+    return int(serial) if serial == int(serial) else serial
+
+
+def _read_xml(archive: zipfile.ZipFile, name: str) -> Optional[ET.Element]:
+    try:
+        return ET.fromstring(archive.read(name))
+    except KeyError:
+        return None
+
+
+def _text_of(element: ET.Element) -> str:
+    """ข้อความใน <si> / <is> (รวม rich text run และข้าม phonetic)"""
+    parts = []
+    for child in element:
+        tag = child.tag.rsplit("}", 1)[-1]
+        if tag == "t":
+            parts.append(child.text or "")
+        elif tag == "r":
+            t = child.find(f"{{{NS_MAIN}}}t")
+            if t is not None:
+                parts.append(t.text or "")
+    return "".join(parts)
+
+
+def _iter_shared_strings(stream: Any) -> Iterator[str]:
+    """อ่าน <si> ทีละตัวด้วย iterparse (ลบ element ที่อ่านแล้วเพื่อให้หน่วยความจำคงที่)"""
+    root = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        if element.tag == _SI:
+            yield _text_of(element)
+            element.clear()
+            if root is not None:
+                root.remove(element)
+
+
+def read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """
+    อ่าน xl/sharedStrings.xml
+
+    Returns:
+        List[str]: ข้อความตามลำดับ index
+    """
+    try:
+        stream = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    with stream:
+        return list(_iter_shared_strings(stream))
+
+
+class SharedStrings:
+    """
+    shared strings ที่อ่านแบบ streaming
+
+    อ่าน <si> เพิ่มเฉพาะเมื่อมีการขอ index ที่ยังอ่านไม่ถึง (Excel เรียงข้อความตามลำดับที่พบใน sheet
+    จึงมักไม่ต้องอ่านทั้งไฟล์ก่อนเริ่มอ่านแถวแรก)
+    """
+
+    def __init__(self, file_path: str):
+        """
+        เริ่มต้น SharedStrings
+
+        Args:
+            file_path (str): เส้นทางไฟล์ xlsx
+        """
+        self.file_path = file_path
+        self._strings: List[str] = []
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._stream: Any = None
+        self._iterator: Optional[Iterator[str]] = None
+        self._done = False
+
+    def _advance(self, count: int = 4096) -> None:
+        if self._iterator is None:
+            self._archive = zipfile.ZipFile(self.file_path)
+            try:
+                self._stream = self._archive.open("xl/sharedStrings.xml")
+            except KeyError:
+                self.close()
+                return
+            self._iterator = _iter_shared_strings(self._stream)
+        for _ in range(count):
+            try:
+                self._strings.append(next(self._iterator))
+            except StopIteration:
+                self.close()
+                return
+
+    def close(self) -> None:
+        """ปิดไฟล์ (ข้อความที่อ่านแล้วยังใช้ได้)"""
+        self._done = True
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __getitem__(self, index: int) -> str:
+        while index >= len(self._strings) and not self._done:
+            self._advance()
+        return self._strings[index]
+
+    def __len__(self) -> int:
+        while not self._done:
+            self._advance()
+        return len(self._strings)
+
+
+def _is_date_format(code: str) -> bool:
+    code = _FORMAT_LITERALS.sub("", code).lower()
+    return any(ch in code for ch in "dmyhs")
+
+
+def read_date_styles(archive: zipfile.ZipFile) -> Dict[int, bool]:
+    """
+    หา style (cellXfs) ที่แสดงผลเป็นวันที่ / เวลา
+
+    Returns:
+        Dict[int, bool]: index ของ style → True หากเป็นวันที่อย่างเดียว (False = มีเวลา)
+    """
+    root = _read_xml(archive, "xl/styles.xml")
+    if root is None:
+        return {}
+    custom: Dict[int, str] = {}
+    num_fmts = root.find(f"{{{NS_MAIN}}}numFmts")
+    if num_fmts is not None:
+        for num_fmt in num_fmts.findall(f"{{{NS_MAIN}}}numFmt"):
+            custom[int(num_fmt.get("numFmtId", "0"))] = num_fmt.get("formatCode", "")
+
+    styles: Dict[int, bool] = {}
+    cell_xfs = root.find(f"{{{NS_MAIN}}}cellXfs")
+    if cell_xfs is None:
+        return styles
+    for index, xf in enumerate(cell_xfs.findall(f"{{{NS_MAIN}}}xf")):
+        fmt_id = int(xf.get("numFmtId", "0"))
+        if fmt_id in custom:
+            code = _FORMAT_LITERALS.sub("", custom[fmt_id]).lower()
+            if _is_date_format(custom[fmt_id]):
+                styles[index] = not any(ch in code for ch in "hs")
+        elif fmt_id in _BUILTIN_DATE_FORMATS:
+            styles[index] = fmt_id in _DATE_ONLY_FORMATS
+    return styles
+
+
+def cell_value(cell: ET.Element, shared_strings: Sequence[str], date_styles: Dict[int, bool]) -> Any:
+    """
+    แปลง <c> เป็นค่า Python
+
+    Args:
+        cell (ET.Element): element ของ cell
+        shared_strings (Sequence[str]): ผลจาก read_shared_strings หรือ SharedStrings
+        date_styles (Dict[int, bool]): ผลจาก read_date_styles
+
+    Returns:
+        Any: None, bool, int, float, str, date หรือ datetime
+    """
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        inline = cell.find(f"{{{NS_MAIN}}}is")
+        return _text_of(inline) if inline is not None else ""
+    v = cell.find(f"{{{NS_MAIN}}}v")
+    if v is None or v.text is None:
+        return None
+    text = v.text
+    if cell_type == "s":
+        return shared_strings[int(text)]
+    if cell_type in ("str", "e"):
+        return text
+    if cell_type == "b":
+        return text == "1"
+    if cell_type == "d":
+        return datetime.fromisoformat(text)
+
+    number = float(text)
+    style = int(cell.get("s", "0"))
+    if style in date_styles:
+        moment = excel_serial_to_datetime(number)
+        return moment.date() if date_styles[style] else moment
+    return int(number) if number.is_integer() and "." not in text and "E" not in text.upper() else number
+
+
+def _has_value(cell: ET.Element) -> bool:
+    """cell มีค่าหรือไม่ (ตรงกับ cell_value ที่ไม่คืน None โดยไม่ต้องแปลงค่า)"""
+    if cell.get("t") == "inlineStr":
+        return True
+    v = cell.find(_V)
+    return v is not None and v.text is not None
+
+
+def _iter_row_elements(archive: zipfile.ZipFile, sheet_part: str) -> Iterator[Tuple[int, ET.Element]]:
+    """
+    อ่าน <row> ของ sheet แบบ streaming
+
+    element ของแถวจะถูกลบหลังจากผู้เรียกใช้งานเสร็จ หน่วยความจำจึงไม่ขึ้นกับขนาดของ sheet
+    """
+    try:
+        stream = archive.open(sheet_part)
+    except KeyError:
+        return
+    with stream:
+        sheet_data = None
+        row_number = 0
+        for event, element in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if element.tag == _SHEET_DATA:
+                    sheet_data = element
+                continue
+            if element.tag != _ROW:
+                continue
+            row_number = int(element.get("r") or row_number + 1)
+            yield row_number, element
+            element.clear()
+            if sheet_data is not None:
+                sheet_data.remove(element)
+
+
+def _row_cells(row: ET.Element) -> Iterator[Tuple[int, ET.Element]]:
+    """cell ในแถวพร้อมเลขคอลัมน์ (cell ที่ไม่มี r อยู่ถัดจาก cell ก่อนหน้า)"""
+    col = 0
+    for cell in row.iter(_C):
+        ref = cell.get("r")
+        if ref:
+            letters = ref.rstrip(_DIGITS)
+            col = _COLUMN_CACHE.get(letters, 0)
+            if not col:
+                col = _COLUMN_CACHE[letters] = split_cell_ref(ref)[0]
+        else:
+            col += 1
+        yield col, cell
+
+
+def iter_sheet_rows(archive: zipfile.ZipFile, sheet_part: str,
+                    shared_strings: Optional[Sequence[str]] = None,
+                    date_styles: Optional[Dict[int, bool]] = None,
+                    columns: Optional[Set[int]] = None) -> Iterator[Tuple[int, Dict[int, Any]]]:
+    """
+    อ่านค่าใน sheet ทีละแถวแบบ streaming (แถวที่ไม่มีค่าจะถูกข้าม)
+
+    Args:
+        archive (zipfile.ZipFile): ไฟล์ xlsx
+        sheet_part (str): ชื่อ part ของ sheet เช่น "xl/worksheets/sheet1.xml"
+        shared_strings (Optional[Sequence[str]]): ข้อความ (list หรือ SharedStrings)
+        date_styles (Optional[Dict[int, bool]]): style วันที่ที่อ่านไว้แล้ว
+        columns (Optional[Set[int]]): อ่านเฉพาะคอลัมน์เหล่านี้ (None = ทุกคอลัมน์)
+
+    Yields:
+        Tuple[int, Dict[int, Any]]: (เลขแถว, {เลขคอลัมน์: ค่า})
+    """
+    if shared_strings is None:
+        shared_strings = read_shared_strings(archive)
+    if date_styles is None:
+        date_styles = read_date_styles(archive)
+    for row_number, row in _iter_row_elements(archive, sheet_part):
+        values = {}
+        for col, cell in _row_cells(row):
+            if columns is not None and col not in columns:
+                continue
+            value = cell_value(cell, shared_strings, date_styles)
+            if value is not None:
+                values[col] = value
+        if values:
+            yield row_number, values
+
+
+def read_cells(archive: zipfile.ZipFile, sheet_part: str,
+               shared_strings: Optional[Sequence[str]] = None,
+               date_styles: Optional[Dict[int, bool]] = None,
+               columns: Optional[Set[int]] = None) -> Dict[Tuple[int, int], Any]:
+    """
+    อ่านทุก cell ที่มีค่าใน sheet
+
+    Args:
+        archive (zipfile.ZipFile): ไฟล์ xlsx
+        sheet_part (str): ชื่อ part ของ sheet เช่น "xl/worksheets/sheet1.xml"
+        shared_strings (Optional[Sequence[str]]): ข้อความที่อ่านไว้แล้ว
+        date_styles (Optional[Dict[int, bool]]): style วันที่ที่อ่านไว้แล้ว
+        columns (Optional[Set[int]]): อ่านเฉพาะคอลัมน์เหล่านี้ (None = ทุกคอลัมน์)
+
+    Returns:
+        Dict[Tuple[int, int], Any]: (คอลัมน์, แถว) → ค่า
+    """
+    cells: Dict[Tuple[int, int], Any] = {}
+    for row_number, values in iter_sheet_rows(archive, sheet_part, shared_strings, date_styles, columns):
+        for col, value in values.items():
+            cells[(col, row_number)] = value
+    return cells
+
+
+def used_range(archive: zipfile.ZipFile, sheet_part: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    ช่วงของ cell ที่มีค่าใน sheet (อ่านแบบ streaming และไม่แปลงค่าของ cell)
+
+    Args:
+        archive (zipfile.ZipFile): ไฟล์ xlsx
+        sheet_part (str): ชื่อ part ของ sheet
+
+    Returns:
+        Optional[Tuple[int, int, int, int]]: (คอลัมน์แรก, แถวแรก, คอลัมน์สุดท้าย, แถวสุดท้าย) หรือ None หาก sheet ว่าง
+    """
+    bounds = None
+    for row_number, row in _iter_row_elements(archive, sheet_part):
+        cols = [col for col, cell in _row_cells(row) if _has_value(cell)]
+        if not cols:
+            continue
+        if bounds is None:
+            bounds = [min(cols), row_number, max(cols), row_number]
+        else:
+            bounds = [min(bounds[0], min(cols)), min(bounds[1], row_number),
+                      max(bounds[2], max(cols)), max(bounds[3], row_number)]
+    return tuple(bounds) if bounds else None
+
+
+def cells_to_rows(cells: Dict[Tuple[int, int], Any],
+                  bounds: Optional[Tuple[int, int, int, int]] = None) -> List[List[Any]]:
+    """
+    แปลง cell เป็นแถวข้อมูลแบบเต็มช่วง
+
+    Args:
+        cells (Dict[Tuple[int, int], Any]): ผลจาก read_cells
+        bounds (Optional[Tuple[int, int, int, int]]): ช่วงที่ต้องการ (None = ช่วงที่มีข้อมูล)
+
+    Returns:
+        List[List[Any]]: แถวข้อมูล
+    """
+    if bounds is None:
+        if not cells:
+            return []
+        cols = [col for col, _ in cells]
+        rows = [row for _, row in cells]
+        bounds = (min(cols), min(rows), max(cols), max(rows))
+    first_col, first_row, last_col, last_row = bounds
+    return [
+        [cells.get((col, row)) for col in range(first_col, last_col + 1)]
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def read_tables(archive: zipfile.ZipFile) -> List[Dict[str, Any]]:
+    """
+    รายการ table (ListObject) ใน workbook
+
+    Returns:
+        List[Dict[str, Any]]: {"name", "sheet", "sheet_part", "part", "ref", "columns",
+            "header_rows", "totals_rows"}
+    """
+    tables = []
+    for sheet in read_sheets(archive):
+        for rel in read_relationships(archive, sheet["part"]).values():
+            if rel["type"] != "table":
+                continue
+            root = _read_xml(archive, rel["target"])
+            if root is None:
+                continue
+            columns = [c.get("name") for c in root.iter(f"{{{NS_MAIN}}}tableColumn")]
+            tables.append({
+                "name": root.get("displayName") or root.get("name"),
+                "sheet": sheet["name"],
+                "sheet_part": sheet["part"],
+                "part": rel["target"],
+                "ref": root.get("ref"),
+                "columns": columns,
+                "header_rows": int(root.get("headerRowCount", "1")),
+                "totals_rows": int(root.get("totalsRowCount", "0")),
+            })
+    return tables
+
+
+def read_hidden_sheets(archive: zipfile.ZipFile) -> Set[str]:
+    """
+    ชื่อ sheet ที่ถูกซ่อน
+
+    Returns:
+        Set[str]: ชื่อ sheet
+    """
+    root = _read_xml(archive, "xl/workbook.xml")
+    if root is None:
+        return set()
+    return {
+        sheet.get("name") for sheet in root.iter(f"{{{NS_MAIN}}}sheet")
+        if sheet.get("state") in ("hidden", "veryHidden")
+    }
+
+
+class WorkbookReader:
+    """อ่าน sheet และ table จากไฟล์ xlsx (เก็บ cache ของแต่ละ sheet)"""
+
+    def __init__(self, file_path: str):
+        """
+        เริ่มต้น WorkbookReader
+
+        Args:
+            file_path (str): เส้นทางไฟล์ xlsx
+        """
+        self.file_path = file_path
+        with zipfile.ZipFile(file_path) as archive:
+            self.sheets = read_sheets(archive)
+            self.tables = read_tables(archive)
+            self.hidden = read_hidden_sheets(archive)
+        self._shared_strings: Optional[SharedStrings] = None
+        self._date_styles: Optional[Dict[int, bool]] = None
+        self._cells: Dict[str, Dict[Tuple[int, int], Any]] = {}
+        self._ranges: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+
+    def _sheet_cells(self, sheet_part: str) -> Dict[Tuple[int, int], Any]:
+        if sheet_part not in self._cells:
+            with zipfile.ZipFile(self.file_path) as archive:
+                self._load_styles(archive)
+                self._cells[sheet_part] = read_cells(
+                    archive, sheet_part, self._shared_strings, self._date_styles
+                )
+        return self._cells[sheet_part]
+
+    def _load_styles(self, archive: zipfile.ZipFile) -> None:
+        if self._shared_strings is None:
+            self._shared_strings = SharedStrings(self.file_path)
+            self._date_styles = read_date_styles(archive)
+
+    def sheet_part(self, sheet_name: str) -> str:
+        """
+        ชื่อ part ของ sheet
+
+        Args:
+            sheet_name (str): ชื่อ sheet
+
+        Returns:
+            str: เช่น "xl/worksheets/sheet1.xml"
+        """
+        for sheet in self.sheets:
+            if sheet["name"] == sheet_name:
+                return sheet["part"]
+        raise KeyError(f"ไม่พบ sheet {sheet_name!r}")
+
+    def sheet_range(self, sheet_name: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        ช่วงที่มีข้อมูลของ sheet
+
+        Args:
+            sheet_name (str): ชื่อ sheet
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: ช่วง cell หรือ None หาก sheet ว่าง
+        """
+        part = self.sheet_part(sheet_name)
+        if part in self._cells:
+            cells = self._cells[part]
+            if not cells:
+                return None
+            cols = [col for col, _ in cells]
+            rows = [row for _, row in cells]
+            return min(cols), min(rows), max(cols), max(rows)
+        if part not in self._ranges:
+            with zipfile.ZipFile(self.file_path) as archive:
+                self._ranges[part] = used_range(archive, part)
+        return self._ranges[part]
+
+    def iter_range(self, sheet_part: str, bounds: Tuple[int, int, int, int],
+                   columns: Optional[List[int]] = None) -> Iterator[List[Any]]:
+        """
+        แถวในช่วงที่กำหนดแบบ streaming อ่านและแปลงค่าเฉพาะคอลัมน์ที่ต้องการ (ไม่เก็บ cache)
+
+        Args:
+            sheet_part (str): ชื่อ part ของ sheet
+            bounds (Tuple[int, int, int, int]): ช่วง cell
+            columns (Optional[List[int]]): เลขคอลัมน์ที่ต้องการตามลำดับ (None = ทุกคอลัมน์ในช่วง)
+
+        Yields:
+            List[Any]: ค่าของแต่ละแถวตามลำดับ columns (แถวที่ไม่มีค่าเป็น None ทั้งแถว)
+        """
+        first_col, first_row, last_col, last_row = bounds
+        if columns is None:
+            columns = list(range(first_col, last_col + 1))
+        if sheet_part in self._cells:
+            cells = self._cells[sheet_part]
+            for row in range(first_row, last_row + 1):
+                yield [cells.get((col, row)) for col in columns]
+            return
+
+        empty = [None] * len(columns)
+        next_row = first_row
+        with zipfile.ZipFile(self.file_path) as archive:
+            self._load_styles(archive)
+            for row_number, values in iter_sheet_rows(
+                    archive, sheet_part, self._shared_strings, self._date_styles, set(columns)):
+                if row_number < first_row:
+                    continue
+                if row_number > last_row:
+                    break
+                while next_row < row_number:
+                    yield list(empty)
+                    next_row += 1
+                yield [values.get(col) for col in columns]
+                next_row = row_number + 1
+        while next_row <= last_row:
+            yield list(empty)
+            next_row += 1
+
+    def iter_batches(self, sheet_name: str, batch_rows: int = DEFAULT_BATCH_ROWS,
+                     columns: Optional[List[int]] = None) -> Iterator[List[List[Any]]]:
+        """
+        ข้อมูลของ sheet เป็นชุดละไม่เกิน batch_rows แถว (หน่วยความจำไม่ขึ้นกับขนาดของ sheet)
+
+        Args:
+            sheet_name (str): ชื่อ sheet
+            batch_rows (int): จำนวนแถวต่อชุด
+            columns (Optional[List[int]]): เลขคอลัมน์ที่ต้องการ (None = ทุกคอลัมน์ในช่วงที่มีข้อมูล)
+
+        Yields:
+            List[List[Any]]: แถวข้อมูลหนึ่งชุด
+        """
+        bounds = self.sheet_range(sheet_name)
+        if bounds is None:
+            return
+        batch: List[List[Any]] = []
+        for row in self.iter_range(self.sheet_part(sheet_name), bounds, columns):
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def sheet_rows(self, sheet_name: str) -> List[List[Any]]:
+        """
+        ข้อมูลทั้งหมดของ sheet (ช่วงที่มีข้อมูล)
+
+        Args:
+            sheet_name (str): ชื่อ sheet
+
+        Returns:
+            List[List[Any]]: แถวข้อมูล
+        """
+        for sheet in self.sheets:
+            if sheet["name"] == sheet_name:
+                return cells_to_rows(self._sheet_cells(sheet["part"]))
+        raise KeyError(f"ไม่พบ sheet {sheet_name!r}")
+
+    def table_rows(self, table_name: str) -> Tuple[List[str], List[List[Any]]]:
+        """
+        ข้อมูลของ table (ไม่รวมแถวหัวตารางและแถวผลรวม)
+
+        Args:
+            table_name (str): ชื่อ table
+
+        Returns:
+            Tuple[List[str], List[List[Any]]]: (ชื่อคอลัมน์, แถวข้อมูล)
+        """
+        for table in self.tables:
+            if table["name"] == table_name:
+                first_col, first_row, last_col, last_row = split_range_ref(table["ref"])
+                first_row += table["header_rows"]
+                last_row -= table["totals_rows"]
+                rows = cells_to_rows(
+                    self._sheet_cells(table["sheet_part"]), (first_col, first_row, last_col, last_row)
+                )
+                # table ที่ว่างจะมีแถวข้อมูลเปล่าหนึ่งแถว
+                if len(rows) == 1 and all(value is None for value in rows[0]):
+                    rows = []
+                return table["columns"], rows
+        raise KeyError(f"ไม่พบ table {table_name!r}")
@@ -0,0 +1,268 @@
+"""
+Zip Patch
+แทนที่ part บางส่วนในไฟล์ xlsx โดยคัดลอก part อื่นแบบข้อมูลที่บีบอัดแล้ว (ไม่คลายและบีบอัดใหม่)
+เวลาบันทึกจึงขึ้นกับขนาดของ part ที่เปลี่ยน ไม่ใช่ขนาดของไฟล์
+
+zipfile ไม่มี API สาธารณะสำหรับเขียนข้อมูลที่บีบอัดแล้ว จึงเขียน local header, central directory
+และ end of central directory เองด้วย RawZipWriter (ใช้ zipfile สำหรับอ่านและใช้ ZipInfo เป็นข้อมูลของ member เท่านั้น)
+"""
+
+import copy
+import os
+import struct
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, List, Tuple
+
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+_END_SIGNATURE = b"PK\x05\x06"
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<4sBBHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<4sHHHHIIH")
+_LOCAL_HEADER_SIZE = _LOCAL_HEADER.size
+_DATA_DESCRIPTOR_FLAG = 0x08
+_UTF8_FLAG = 0x800
+_ZIP64_EXTRA_ID = 0x0001
+# เกินค่านี้ต้องใช้ zip64 ซึ่งไม่รองรับ (ไฟล์ xlsx ของ Excel ไม่ถึงขนาดนี้)
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_MAX_MEMBERS = 0xFFFF
+_VERSION_MADE_BY = 20
+_COPY_CHUNK = 1024 * 1024
+
+
+def _without_zip64_extra(extra: bytes) -> bytes:
+    """ลบ extra field ของ zip64 (RawZipWriter ไม่เขียน zip64)"""
+    kept = []
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, offset)
+        if header_id != _ZIP64_EXTRA_ID:
+            kept.append(extra[offset:offset + 4 + size])
+        offset += 4 + size
+    return b"".join(kept)
+
+
+def _encoded_name(info: zipfile.ZipInfo) -> Tuple[bytes, int]:
+    """(ชื่อ member เป็น bytes, flag_bits) ชื่อที่ไม่ใช่ ascii ใช้ utf-8 และตั้ง flag 0x800"""
+    try:
+        return info.filename.encode("ascii"), info.flag_bits & ~_UTF8_FLAG
+    except UnicodeEncodeError:
+        return info.filename.encode("utf-8"), info.flag_bits | _UTF8_FLAG
+
+
+def _dos_date_time(info: zipfile.ZipInfo) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = info.date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def open_raw_member(reader: BinaryIO, info: zipfile.ZipInfo) -> BinaryIO:
+    """
+    เลื่อนตำแหน่งอ่านไปยังข้อมูลที่บีบอัดของ member (อ่านต่อได้ info.compress_size bytes)
+
+    Args:
+        reader (BinaryIO): ไฟล์ zip ที่เปิดแบบ "rb" (แยกจาก ZipFile ที่ใช้อ่าน infolist)
+        info (zipfile.ZipInfo): member
+
+    Returns:
+        BinaryIO: reader ที่อยู่ที่ตำแหน่งข้อมูลของ member
+
+    Raises:
+        zipfile.BadZipFile: local header ไม่ถูกต้อง
+    """
+    reader.seek(info.header_offset)
+    header = reader.read(_LOCAL_HEADER_SIZE)
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"local header ของ {info.filename} ไม่ถูกต้อง")
+    name_length, extra_length = struct.unpack_from("<HH", header, 26)
+    reader.seek(name_length + extra_length, os.SEEK_CUR)
+    return reader
+
+
+class RawZipWriter:
+    """เขียนไฟล์ zip จากข้อมูลที่บีบอัดแล้ว (ไม่รองรับ zip64)"""
+
+    def __init__(self, file_path: str):
+        """
+        เริ่มต้น RawZipWriter (สร้างไฟล์ใหม่ทับไฟล์เดิม)
+
+        Args:
+            file_path (str): เส้นทางไฟล์ zip ที่จะเขียน
+        """
+        self._file = open(file_path, "wb")
+        self._members: List[zipfile.ZipInfo] = []
+
+    def __enter__(self) -> "RawZipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def write_raw(self, info: zipfile.ZipInfo, stream: BinaryIO) -> None:
+        """
+        เขียน member ที่บีบอัดแล้ว โดยอ่านข้อมูล info.compress_size bytes จาก stream
+
+        info ต้องมี CRC, compress_size, file_size และ compress_type ของข้อมูลนั้น
+
+        Args:
+            info (zipfile.ZipInfo): ข้อมูลของ member
+            stream (BinaryIO): file object ที่อ่านข้อมูลที่บีบอัดแล้วได้
+
+        Raises:
+            zipfile.BadZipFile: ข้อมูลไม่ครบ
+            zipfile.LargeZipFile: ไฟล์ต้องใช้ zip64
+        """
+        # CRC และขนาดรู้อยู่แล้ว จึงเขียนลง local header ได้เลย (ไม่ต้องมี data descriptor)
+        member = copy.copy(info)
+        member.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+        member.extra = _without_zip64_extra(info.extra)
+        member.header_offset = self._file.tell()
+        if len(self._members) >= _ZIP32_MAX_MEMBERS or max(
+                member.compress_size, member.file_size, member.header_offset) > _ZIP32_LIMIT:
+            raise zipfile.LargeZipFile(f"{info.filename} ต้องใช้ zip64 ซึ่งไม่รองรับ")
+
+        name, flag_bits = _encoded_name(member)
+        dos_date, dos_time = _dos_date_time(member)
+        self._file.write(_LOCAL_HEADER.pack(
+            _LOCAL_HEADER_SIGNATURE, member.extract_version, flag_bits, member.compress_type,
+            dos_time, dos_date, member.CRC, member.compress_size, member.file_size, len(name), len(member.extra)
+        ))
+        self._file.write(name)
+        self._file.write(member.extra)
+
+        remaining = member.compress_size
+        while remaining:
+            chunk = stream.read(min(remaining, _COPY_CHUNK))
+            if not chunk:
+                raise zipfile.BadZipFile(f"ข้อมูลของ {info.filename} ไม่ครบ")
+            self._file.write(chunk)
+            remaining -= len(chunk)
+        self._members.append(member)
+
+    def writestr(self, info: zipfile.ZipInfo, data: bytes) -> None:
+        """
+        บีบอัด data ด้วย info.compress_type (ZIP_STORED / ZIP_DEFLATED) แล้วเขียนเป็น member
+
+        Args:
+            info (zipfile.ZipInfo): ข้อมูลของ member (CRC และขนาดจะถูกคำนวณใหม่)
+            data (bytes): เนื้อหา
+
+        Raises:
+            NotImplementedError: วิธีบีบอัดอื่นที่ไม่ใช่ stored / deflated
+        """
+        member = copy.copy(info)
+        if member.compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+        elif member.compress_type == zipfile.ZIP_STORED:
+            compressed = data
+        else:
+            raise NotImplementedError(f"ไม่รองรับวิธีบีบอัด {member.compress_type} ของ {info.filename}")
+        member.CRC = zlib.crc32(data)
+        member.file_size = len(data)
+        member.compress_size = len(compressed)
+        self.write_raw(member, _BytesReader(compressed))
+
+    def close(self) -> None:
+        """เขียน central directory และ end of central directory แล้วปิดไฟล์"""
+        if self._file.closed:
+            return
+        start = self._file.tell()
+        for member in self._members:
+            name, flag_bits = _encoded_name(member)
+            dos_date, dos_time = _dos_date_time(member)
+            comment = member.comment or b""
+            self._file.write(_CENTRAL_HEADER.pack(
+                _CENTRAL_HEADER_SIGNATURE, _VERSION_MADE_BY, member.create_system, member.extract_version,
+                flag_bits, member.compress_type, dos_time, dos_date, member.CRC, member.compress_size,
+                member.file_size, len(name), len(member.extra), len(comment), 0, member.internal_attr,
+                member.external_attr, member.header_offset
+            ))
+            self._file.write(name)
+            self._file.write(member.extra)
+            self._file.write(comment)
+        end = self._file.tell()
+        if end > _ZIP32_LIMIT:
+            self._file.close()
+            raise zipfile.LargeZipFile("central directory ต้องใช้ zip64 ซึ่งไม่รองรับ")
+        count = len(self._members)
+        self._file.write(_END_RECORD.pack(_END_SIGNATURE, 0, 0, count, count, end - start, start, 0))
+        self._file.close()
+
+
+class _BytesReader:
+    """อ่าน bytes ทีละส่วนแบบ file object (ใช้กับ RawZipWriter.write_raw)"""
+
+    def __init__(self, data: bytes):
+        self._view = memoryview(data)
+        self._offset = 0
+
+    def read(self, size: int) -> bytes:
+        chunk = self._view[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        return bytes(chunk)
+
+
+def write_raw_member(output: RawZipWriter, info: zipfile.ZipInfo, stream: BinaryIO) -> None:
+    """
+    เขียน member ที่บีบอัดแล้วลง output โดยอ่านข้อมูล info.compress_size bytes จาก stream
+
+    Args:
+        output (RawZipWriter): ไฟล์ปลายทาง
+        info (zipfile.ZipInfo): ข้อมูลของ member (ต้องมี CRC, compress_size, file_size และ compress_type)
+        stream (BinaryIO): file object ที่อ่านข้อมูลที่บีบอัดแล้วได้
+
+    Raises:
+        zipfile.BadZipFile: ข้อมูลไม่ครบ
+    """
+    output.write_raw(info, stream)
+
+
+def copy_raw_member(reader: BinaryIO, info: zipfile.ZipInfo, output: RawZipWriter) -> None:
+    """
+    คัดลอก member จากไฟล์ต้นทางไป output โดยใช้ข้อมูลที่บีบอัดแล้วตามเดิม
+
+    Args:
+        reader (BinaryIO): ไฟล์ zip ต้นทางที่เปิดแบบ "rb"
+        info (zipfile.ZipInfo): member ที่ต้องการคัดลอก (จาก ZipFile.infolist ของไฟล์เดียวกัน)
+        output (RawZipWriter): ไฟล์ปลายทาง
+
+    Raises:
+        zipfile.BadZipFile: local header หรือข้อมูลของ member ไม่สมบูรณ์
+    """
+    output.write_raw(info, open_raw_member(reader, info))
+
+
+def replace_parts(file_path: str, parts: Dict[str, bytes]) -> None:
+    """
+    แทนที่ part ในไฟล์ xlsx (เขียนไฟล์ชั่วคราวแล้วแทนที่ไฟล์เดิม)
+
+    part ที่แทนที่จะถูกบีบอัดด้วยวิธีเดิมของ part นั้น ส่วน part อื่นถูกคัดลอกแบบ raw
+    ลำดับของ member ในไฟล์คงเดิม
+
+    Args:
+        file_path (str): เส้นทางไฟล์ xlsx
+        parts (Dict[str, bytes]): ชื่อ part → เนื้อหาใหม่ (ต้องมีอยู่ในไฟล์เดิม)
+
+    Raises:
+        KeyError: ไม่พบ part ในไฟล์
+    """
+    temp_path = file_path + ".tmp"
+    try:
+        with zipfile.ZipFile(file_path) as source, open(file_path, "rb") as reader:
+            missing = set(parts) - set(source.namelist())
+            if missing:
+                raise KeyError(f"ไม่พบ part ในไฟล์: {sorted(missing)}")
+            with RawZipWriter(temp_path) as output:
+                for info in source.infolist():
+                    if info.filename in parts:
+                        output.writestr(info, parts[info.filename])
+                    else:
+                        copy_raw_member(reader, info, output)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,300 @@
+"""
+Refresh Backends
+ชั้นกลางระหว่าง ExcelRefresher กับตัวที่รีเฟชจริง (xlwings หรือ simulator)
+"""
+
+import os
+import re
+import time
+import random
+import zipfile
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Any
+
+
+class RefreshBackend(ABC):
+    """interface สำหรับ backend ที่ใช้เปิด/รีเฟช/บันทึก workbook"""
+
+    def is_available(self) -> bool:
+        """
+        ตรวจสอบว่า backend พร้อมใช้งานหรือไม่
+
+        Returns:
+            bool: True หากพร้อมใช้งาน
+        """
+        return True
+
+    @abstractmethod
+    def open_app(self, visible: bool = False) -> Any:
+        """เปิด application และคืน handle"""
+
+    @abstractmethod
+    def close_app(self, app: Any) -> None:
+        """ปิด application"""
+
+    @abstractmethod
+    def open_workbook(self, app: Any, file_path: str) -> Any:
+        """เปิด workbook และคืน handle"""
+
+    @abstractmethod
+    def close_workbook(self, workbook: Any) -> None:
+        """ปิด workbook"""
+
+    @abstractmethod
+    def list_connections(self, workbook: Any) -> List[Any]:
+        """คืนรายการการเชื่อมต่อใน workbook"""
+
+    @abstractmethod
+    def connection_name(self, connection: Any) -> str:
+        """คืนชื่อการเชื่อมต่อ"""
+
+    @abstractmethod
+    def refresh_connection(self, connection: Any) -> None:
+        """สั่งรีเฟชการเชื่อมต่อ (อาจคืนทันทีหากรีเฟชแบบ background)"""
+
+    @abstractmethod
+    def is_refreshing(self, connection: Any) -> bool:
+        """ตรวจสอบว่าการเชื่อมต่อยังรีเฟชอยู่หรือไม่"""
+
+    @abstractmethod
+    def save_workbook(self, workbook: Any) -> None:
+        """บันทึก workbook"""
+
+    def app_pid(self, app: Any) -> Optional[int]:
+        """
+        process id ของ application (ใช้ปิดแบบบังคับเมื่อค้าง)
+
+        Returns:
+            Optional[int]: pid หรือ None หากไม่ทราบ
+        """
+        return None
+
+
+class XlwingsBackend(RefreshBackend):
+    """backend ที่ควบคุม Excel จริงผ่าน xlwings"""
+
+    def __init__(self, xlwings_module: Optional[Any] = None):
+        """
+        เริ่มต้น XlwingsBackend
+
+        Args:
+            xlwings_module (Optional[Any]): โมดูล xlwings (หรือตัวแทนสำหรับทดสอบ)
+        """
+        if xlwings_module is None:
+            try:
+                import xlwings as xlwings_module
+            except ImportError:
+                xlwings_module = None
+        self.xw = xlwings_module
+
+    def is_available(self) -> bool:
+        return self.xw is not None
+
+    def open_app(self, visible: bool = False) -> Any:
+        return self.xw.App(visible=visible)
+
+    def close_app(self, app: Any) -> None:
+        app.quit()
+
+    def open_workbook(self, app: Any, file_path: str) -> Any:
+        return app.books.open(file_path)
+
+    def close_workbook(self, workbook: Any) -> None:
+        workbook.close()
+
+    def list_connections(self, workbook: Any) -> List[Any]:
+        return list(workbook.api.Connections)
+
+    def connection_name(self, connection: Any) -> str:
+        return connection.Name
+
+    def refresh_connection(self, connection: Any) -> None:
+        connection.Refresh()
+
+    def is_refreshing(self, connection: Any) -> bool:
+        for attr in ("OLEDBConnection", "ODBCConnection"):
+            try:
+                sub_connection = getattr(connection, attr, None)
+            except Exception:
+                # COM จะ raise หากการเชื่อมต่อไม่ใช่ประเภทนี้
+                continue
+            if sub_connection:
+                return bool(sub_connection.Refreshing)
+        return False
+
+    def save_workbook(self, workbook: Any) -> None:
+        workbook.save()
+
+    def app_pid(self, app: Any) -> Optional[int]:
+        # Excel ที่เปิดผ่าน COM ไม่ใช่ child process ของ Python จึงต้องรู้ pid เพื่อปิดเมื่อค้าง
+        try:
+            return app.pid
+        except Exception:
+            return None
+
+
+class SimulatedError(Exception):
+    """ข้อผิดพลาดที่ simulator สร้างขึ้นตาม failure rate ใน profile"""
+
+
+class SimulatedBackend(RefreshBackend):
+    """
+    backend จำลองสำหรับวัดประสิทธิภาพโดยไม่ต้องใช้ Excel
+
+    ทุกค่าสุ่มคำนวณจาก seed + path ของไฟล์ + ชื่อการเชื่อมต่อ ผลจึงเหมือนเดิมทุกครั้ง
+    ไม่ว่าไฟล์จะถูกรีเฟชในลำดับใดหรือใน process ใด
+    """
+
+    DEFAULT_PROFILE: Dict[str, Any] = {
+        "seed": 0,
+        "time_scale": 1.0,
+        "app_launch_seconds": 3.0,
+        "open_seconds_per_mb": 0.5,
+        "connections_per_workbook": 1,
+        "connection_seconds": [0.5, 5.0],
+        "connection_failure_rate": 0.0,
+        "save_seconds_per_mb": 1.0,
+        "save_failure_rate": 0.0,
+        "workbooks": {}
+    }
+
+    def __init__(self, profile: Optional[Dict[str, Any]] = None):
+        """
+        เริ่มต้น SimulatedBackend
+
+        Args:
+            profile (Optional[Dict[str, Any]]): ค่าที่ใช้จำลอง ได้แก่
+                time_scale: ตัวคูณเวลา (0.001 = เร็วขึ้น 1000 เท่า)
+                app_launch_seconds: เวลาเปิด Excel
+                open_seconds_per_mb / save_seconds_per_mb: เวลาเปิด/บันทึกต่อขนาดไฟล์
+                connections_per_workbook: จำนวนการเชื่อมต่อหากอ่านจากไฟล์ไม่ได้
+                connection_seconds: ระยะเวลารีเฟช [min, max] หรือค่าคงที่
+                connection_failure_rate / save_failure_rate: โอกาสล้มเหลว (0-1)
+                workbooks: ค่าเฉพาะไฟล์ ตามชื่อไฟล์ (ไม่มีนามสกุล) เช่น
+                    {"sales": {"connections": {"Query - A": 12.0}, "save_seconds": 4.0}}
+                    และ "hang": "open" / "refresh" / "save" เพื่อจำลองการเรียก COM ที่ค้างไม่คืนค่า
+                    "error": ข้อความ error ของแหล่งข้อมูล (เช่น "DataSource.Error: timeout") ที่การรีเฟชจะ raise
+                    "error_attempts": จำนวนครั้งแรกที่ raise "error" (ไม่ระบุ = ทุกครั้ง) ใช้จำลองปัญหาชั่วคราว
+        """
+        self.profile = dict(self.DEFAULT_PROFILE)
+        self.profile.update(profile or {})
+        self.app_launches = 0
+        self.error_counts: Dict[str, int] = {}
+
+    def _scaled_sleep(self, seconds: float) -> None:
+        """หน่วงเวลาตาม time_scale"""
+        seconds *= self.profile["time_scale"]
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _rng(self, *keys: str) -> random.Random:
+        """สร้าง Random ที่ผลขึ้นกับ seed และ key เท่านั้น"""
+        seed_text = "|".join([str(self.profile["seed"])] + list(keys))
+        return random.Random(zlib.crc32(seed_text.encode("utf-8")))
+
+    def _hang_if_configured(self, file_path: str, stage: str) -> None:
+        """ค้างตลอดไป (เหมือน COM call ที่ไม่คืนค่า) หากไฟล์นี้ตั้ง hang ไว้ที่ขั้นตอนนี้"""
+        if self._workbook_profile(file_path).get("hang") == stage:
+            while True:
+                time.sleep(3600)
+
+    def _workbook_profile(self, file_path: str) -> Dict[str, Any]:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        return self.profile["workbooks"].get(name, {})
+
+    @staticmethod
+    def _read_connection_names(file_path: str) -> List[str]:
+        """อ่านชื่อการเชื่อมต่อจาก xl/connections.xml (หากมี)"""
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                xml = archive.read("xl/connections.xml").decode("utf-8", "replace")
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return []
+        return re.findall(r'<connection\b[^>]*?\sname="([^"]*)"', xml)
+
+    def open_app(self, visible: bool = False) -> Any:
+        self._scaled_sleep(self.profile["app_launch_seconds"])
+        self.app_launches += 1
+        return {"visible": visible}
+
+    def close_app(self, app: Any) -> None:
+        pass
+
+    def open_workbook(self, app: Any, file_path: str) -> Any:
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(file_path)
+
+        self._hang_if_configured(file_path, "open")
+        size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        self._scaled_sleep(self.profile["open_seconds_per_mb"] * size_mb)
+
+        workbook_profile = self._workbook_profile(file_path)
+        durations = dict(workbook_profile.get("connections", {}))
+        if not durations:
+            names = self._read_connection_names(file_path)
+            if not names:
+                count = self.profile["connections_per_workbook"]
+                names = [f"Query - Query{i}" for i in range(1, count + 1)]
+            for name in names:
+                durations[name] = self._pick_duration(file_path, name)
+
+        connections = [
+            {
+                "name": name,
+                "file_path": file_path,
+                "duration": duration,
+                "started": None,
+            }
+            for name, duration in durations.items()
+        ]
+        return {
+            "path": file_path,
+            "size_mb": size_mb,
+            "profile": workbook_profile,
+            "connections": connections,
+        }
+
+    def _pick_duration(self, file_path: str, name: str) -> float:
+        spec = self.profile["connection_seconds"]
+        if isinstance(spec, (list, tuple)):
+            return self._rng(file_path, name, "duration").uniform(spec[0], spec[1])
+        return float(spec)
+
+    def close_workbook(self, workbook: Any) -> None:
+        pass
+
+    def list_connections(self, workbook: Any) -> List[Any]:
+        return workbook["connections"]
+
+    def connection_name(self, connection: Any) -> str:
+        return connection["name"]
+
+    def refresh_connection(self, connection: Any) -> None:
+        self._hang_if_configured(connection["file_path"], "refresh")
+        workbook_profile = self._workbook_profile(connection["file_path"])
+        if workbook_profile.get("error"):
+            count = self.error_counts.get(connection["file_path"], 0)
+            if count < workbook_profile.get("error_attempts", float("inf")):
+                self.error_counts[connection["file_path"]] = count + 1
+                raise SimulatedError(workbook_profile["error"])
+        failure_rate = self.profile["connection_failure_rate"]
+        if self._rng(connection["file_path"], connection["name"], "fail").random() < failure_rate:
+            raise SimulatedError(f"simulated failure: {connection['name']}")
+        connection["started"] = time.perf_counter()
+
+    def is_refreshing(self, connection: Any) -> bool:
+        if connection["started"] is None:
+            return False
+        elapsed = time.perf_counter() - connection["started"]
+        return elapsed < connection["duration"] * self.profile["time_scale"]
+
+    def save_workbook(self, workbook: Any) -> None:
+        self._hang_if_configured(workbook["path"], "save")
+        if self._rng(workbook["path"], "save").random() < self.profile["save_failure_rate"]:
+            raise SimulatedError(f"simulated save failure: {workbook['path']}")
+        save_seconds = workbook["profile"].get(
+            "save_seconds",
+            self.profile["save_seconds_per_mb"] * workbook["size_mb"]
+        )
+        self._scaled_sleep(save_seconds)
@@ -6,7 +6,9 @@ Excel Refresher
 import time
 import sys
 import os
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable, Iterator, Set
 
 # เพิ่ม path สำหรับ import เมื่อใช้จาก GUI
 if __name__ != "__main__":
@@ -15,10 +17,18 @@ if __name__ != "__main__":
 try:
     from core.logger_manager import LoggerManager
     from core.file_manager import FileManager
+    from refreshers.backends import RefreshBackend, XlwingsBackend
+    from powerquery.query_graph import build_query_graph
+    from powerquery.headless import HeadlessEngine
+    from powerquery.m_evaluator import UnsupportedFeature
 except ImportError:
     # fallback สำหรับการใช้งานปกติ
     from ..core.logger_manager import LoggerManager
     from ..core.file_manager import FileManager
+    from .backends import RefreshBackend, XlwingsBackend
+    from ..powerquery.query_graph import build_query_graph
+    from ..powerquery.headless import HeadlessEngine
+    from ..powerquery.m_evaluator import UnsupportedFeature
 
 try:
     import xlwings as xw
@@ -30,22 +40,57 @@ except ImportError:
 class ExcelRefresher:
     """คลาสสำหรับรีเฟช Excel Power Query"""
     
-    def __init__(self, logger: LoggerManager, file_manager: FileManager):
+    def __init__(self, logger: LoggerManager, file_manager: FileManager,
+                 xlwings_module: Optional[Any] = None,
+                 backend: Optional[RefreshBackend] = None):
         """
         เริ่มต้น ExcelRefresher
         
         Args:
             logger (LoggerManager): ตัวจัดการ logging
             file_manager (FileManager): ตัวจัดการไฟล์
+            xlwings_module (Optional[Any]): โมดูลที่ใช้แทน xlwings (ใช้สำหรับทดสอบ)
+            backend (Optional[RefreshBackend]): backend ที่ใช้รีเฟช (ค่าเริ่มต้นคือ xlwings)
         """
         self.logger = logger
         self.file_manager = file_manager
+        if backend is None:
+            backend = XlwingsBackend(xlwings_module if xlwings_module is not None else xw)
+        self.backend = backend
+        self.headless_engine = HeadlessEngine()
         self.app = None
         self.workbook = None
         
-        if xw is None:
+        # สถานะของ session (ใช้ Excel ตัวเดียวกันหลายไฟล์)
+        self.session_active = False
+        self.session_recycle_after = 0
+        self.session_workbook_count = 0
+        self.app_launch_count = 0
+        
+        # ช่วงเวลาตรวจสถานะการรีเฟช (วินาที) และเวลาที่แต่ละการเชื่อมต่อใช้ล่าสุด
+        self.poll_interval_min = 0.05
+        self.poll_interval_max = 1.0
+        self.connection_timings: Dict[str, float] = {}
+        
+        # เวลาแต่ละขั้นตอนของไฟล์ที่กำลังรีเฟช / ไฟล์ล่าสุด
+        self.current_record: Optional[Dict[str, Any]] = None
+        self.last_file_record: Optional[Dict[str, Any]] = None
+        
+        if not self.backend.is_available():
             self.logger.error("xlwings ไม่พร้อมใช้งาน กรุณาติดตั้ง: pip install xlwings")
     
+    def _record_error(self, message: str) -> None:
+        """
+        บันทึก log และเก็บข้อผิดพลาดแรกของไฟล์ที่กำลังรีเฟชไว้ใน current_record["error"]
+        (ใช้แยกประเภทความล้มเหลวเพื่อตัดสินใจลองใหม่)
+        
+        Args:
+            message (str): ข้อความ error
+        """
+        self.logger.error(message)
+        if self.current_record is not None and not self.current_record.get("error"):
+            self.current_record["error"] = message
+    
     def _check_dependencies(self) -> bool:
         """
         ตรวจสอบ dependencies
@@ -53,7 +98,12 @@ class ExcelRefresher:
         Returns:
             bool: True หากพร้อมใช้งาน
         """
-        return xw is not None
+        if not self.backend.is_available():
+            # แจ้งใน log ไปแล้วตอนเริ่มต้น จึงเก็บไว้ใน record อย่างเดียว
+            if self.current_record is not None:
+                self.current_record.setdefault("error", "xlwings ไม่พร้อมใช้งาน")
+            return False
+        return True
     
     def _open_excel_app(self, visible: bool = False) -> bool:
         """
@@ -66,26 +116,107 @@ class ExcelRefresher:
             bool: True หากเปิดสำเร็จ
         """
         try:
-            self.app = xw.App(visible=visible)
+            self.app = self.backend.open_app(visible=visible)
+            self.app_launch_count += 1
+            self.session_workbook_count = 0
             self.logger.info(f"เปิด Excel Application (visible={visible})")
             return True
         except Exception as e:
-            self.logger.error(f"ไม่สามารถเปิด Excel Application: {e}")
+            self._record_error(f"ไม่สามารถเปิด Excel Application: {e}")
             return False
     
     def _close_excel_app(self) -> None:
         """ปิดแอปพลิเคชัน Excel"""
         try:
-            if self.workbook:
-                self.workbook.close()
-                self.workbook = None
-            if self.app:
-                self.app.quit()
+            self._close_workbook()
+            if self.app is not None:
+                self.backend.close_app(self.app)
                 self.app = None
             self.logger.info("ปิด Excel Application")
         except Exception as e:
             self.logger.error(f"เกิดข้อผิดพลาดในการปิด Excel: {e}")
     
+    @contextmanager
+    def _timed_phase(self, phase: str) -> Iterator[None]:
+        """
+        จับเวลาขั้นตอนหนึ่งและบันทึกลง current_record["phases"]
+        
+        Args:
+            phase (str): ชื่อขั้นตอน
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.current_record is not None:
+                phases = self.current_record["phases"]
+                phases[phase] = round(phases.get(phase, 0.0) + time.perf_counter() - start, 4)
+    
+    def _close_workbook(self) -> None:
+        """ปิด workbook ปัจจุบันโดยไม่ปิด Excel"""
+        if self.workbook is not None:
+            try:
+                self.backend.close_workbook(self.workbook)
+            finally:
+                self.workbook = None
+    
+    def start_session(self, recycle_after: int = 0) -> None:
+        """
+        เริ่ม session ที่ใช้ Excel Application ตัวเดียวกันสำหรับหลายไฟล์
+        
+        Args:
+            recycle_after (int): เปิด Excel ใหม่หลังรีเฟชครบจำนวนไฟล์นี้ (0 = ไม่จำกัด)
+        """
+        self.session_active = True
+        self.session_recycle_after = max(0, int(recycle_after))
+        self.session_workbook_count = 0
+        self.logger.info(f"เริ่ม Excel session (recycle ทุก {self.session_recycle_after or '-'} ไฟล์)")
+    
+    def end_session(self) -> None:
+        """จบ session และปิด Excel Application"""
+        self.session_active = False
+        self._close_excel_app()
+        self.logger.info("จบ Excel session")
+    
+    def _ensure_excel_app(self) -> bool:
+        """
+        เตรียม Excel Application ให้พร้อมใช้งาน (ใช้ตัวเดิมหากอยู่ใน session)
+        
+        Returns:
+            bool: True หากพร้อมใช้งาน
+        """
+        if self.session_active and self.app is not None:
+            return True
+        return self._open_excel_app(visible=False)
+    
+    def _release_excel_app(self, success: bool) -> None:
+        """
+        ปิด workbook และตัดสินใจว่าจะปิด Excel หรือเก็บไว้ใช้ต่อ
+        
+        Args:
+            success (bool): ผลการรีเฟชไฟล์ล่าสุด
+        """
+        if not self.session_active:
+            self._close_excel_app()
+            return
+        
+        try:
+            self._close_workbook()
+        except Exception as e:
+            self.logger.error(f"เกิดข้อผิดพลาดในการปิดไฟล์: {e}")
+            success = False
+        
+        if self.app is None:
+            return
+        
+        self.session_workbook_count += 1
+        if not success:
+            self.logger.warning("รีเฟชล้มเหลว จะเปิด Excel ใหม่สำหรับไฟล์ถัดไป")
+            self._close_excel_app()
+        elif self.session_recycle_after and self.session_workbook_count >= self.session_recycle_after:
+            self.logger.info(f"ใช้ Excel ครบ {self.session_workbook_count} ไฟล์ จะเปิด Excel ใหม่")
+            self._close_excel_app()
+    
     def _open_workbook(self, file_path: str) -> bool:
         """
         เปิด workbook
@@ -97,81 +228,172 @@ class ExcelRefresher:
             bool: True หากเปิดสำเร็จ
         """
         try:
-            self.workbook = self.app.books.open(file_path)
+            self.workbook = self.backend.open_workbook(self.app, file_path)
             self.logger.info(f"เปิดไฟล์: {file_path}")
             return True
         except Exception as e:
-            self.logger.error(f"ไม่สามารถเปิดไฟล์ {file_path}: {e}")
+            self._record_error(f"ไม่สามารถเปิดไฟล์ {file_path}: {e}")
+            return False
+    
+    def _upstream_connection_names(self, file_path: str) -> Optional[Set[str]]:
+        """
+        หาการเชื่อมต่อของ query ต้นทางที่ไม่ต้องรีเฟชจากกราฟ query ในไฟล์
+        (query ที่ถูก query อื่นใช้และไม่ได้โหลดลง sheet จะถูกคำนวณใหม่ผ่าน query ปลายทางอยู่แล้ว)
+        
+        การเชื่อมต่อที่ไม่ได้เป็นของ Power Query (OLEDB / ODBC แบบเดิม) ไม่อยู่ในกราฟ จึงไม่ถูกข้าม
+        
+        Args:
+            file_path (str): เส้นทางไฟล์
+            
+        Returns:
+            Optional[Set[str]]: ชื่อการเชื่อมต่อที่ข้ามได้ หรือ None หากวิเคราะห์ไม่ได้ (รีเฟชทั้งหมด)
+        """
+        try:
+            graph = build_query_graph(file_path)
+        except Exception as e:
+            self.logger.warning(f"ไม่สามารถอ่านกราฟ query ของ {file_path}: {e}")
+            return None
+        if graph is None:
+            return None
+        targets = set(graph.refresh_targets())
+        return {
+            info["connection"] for info in graph.queries.values()
+            if info["connection"] and info["connection"] not in targets
+        }
+    
+    def _refresh_headless(self, file_path: str, settings: Dict[str, Any]) -> bool:
+        """
+        รีเฟช query ด้วย headless engine และเขียนผลลัพธ์ลง sheet
+        
+        Args:
+            file_path (str): เส้นทางไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+            
+        Returns:
+            bool: True หากรีเฟชสำเร็จ (False = ให้ใช้ Excel แทน)
+        """
+        try:
+            results = self.headless_engine.refresh_workbook(
+                file_path,
+                settings.get("auto_save", True),
+                settings.get("pushdown_source_folders", []),
+            )
+        except UnsupportedFeature as e:
+            self.logger.info(f"รีเฟชแบบ headless ไม่ได้ จะใช้ Excel แทน: {e}")
+            return False
+        except Exception as e:
+            self.logger.warning(f"รีเฟชแบบ headless ไม่สำเร็จ จะใช้ Excel แทน: {e}")
             return False
+        
+        for result in results:
+            name = result["connection"] or result["query"]
+            self.connection_timings[name] = result["seconds"]
+            self.logger.info(f"query {result['query']}: {result['rows']} แถว ({result['seconds']:.2f} วินาที)")
+        if self.current_record is not None:
+            self.current_record["engine"] = "headless"
+        return True
     
-    def _refresh_connections(self, timeout_seconds: int = 1800) -> bool:
+    def _refresh_connections(self, timeout_seconds: int = 1800,
+                             skip: Optional[Set[str]] = None) -> bool:
         """
         รีเฟชการเชื่อมต่อทั้งหมดใน workbook
         
         Args:
             timeout_seconds (int): timeout ในหน่วยวินาที
+            skip (Optional[Set[str]]): ชื่อการเชื่อมต่อของ query ต้นทางที่ไม่ต้องรีเฟช (None = รีเฟชทั้งหมด)
             
         Returns:
             bool: True หากรีเฟชสำเร็จ
         """
+        self.connection_timings = {}
         try:
-            connections = self.workbook.api.Connections
+            connections = self.backend.list_connections(self.workbook)
+            
+            if skip:
+                selected = [c for c in connections if self.backend.connection_name(c) not in skip]
+                if len(selected) < len(connections):
+                    self.logger.info(
+                        f"ข้ามการเชื่อมต่อที่เป็น query ต้นทาง {len(connections) - len(selected)} รายการ"
+                    )
+                connections = selected
             
-            if connections.Count == 0:
+            if not connections:
                 self.logger.info("ไม่มีการเชื่อมต่อที่ต้องรีเฟช")
                 return True
             
-            self.logger.info(f"พบการเชื่อมต่อ {connections.Count} รายการ")
+            self.logger.info(f"พบการเชื่อมต่อ {len(connections)} รายการ")
             
-            # รีเฟชทุกการเชื่อมต่อ
-            for i, connection in enumerate(connections, 1):
-                self.logger.info(f"รีเฟชการเชื่อมต่อ {i}/{connections.Count}: {connection.Name}")
-                connection.Refresh()
+            # รีเฟชทุกการเชื่อมต่อ และจดเวลาเริ่มของแต่ละรายการ
+            started: Dict[str, float] = {}
+            pending: Dict[str, Any] = {}
+            with self._timed_phase("refresh_calls"):
+                for i, connection in enumerate(connections, 1):
+                    name = self.backend.connection_name(connection)
+                    self.logger.info(f"รีเฟชการเชื่อมต่อ {i}/{len(connections)}: {name}")
+                    started[name] = time.perf_counter()
+                    self.backend.refresh_connection(connection)
+                    pending[name] = connection
             
             # รอให้การรีเฟชเสร็จสิ้น
-            return self._wait_for_refresh_completion(timeout_seconds)
+            with self._timed_phase("completion_wait"):
+                return self._wait_for_refresh_completion(timeout_seconds, pending, started)
             
         except Exception as e:
-            self.logger.error(f"เกิดข้อผิดพลาดในการรีเฟช: {e}")
+            self._record_error(f"เกิดข้อผิดพลาดในการรีเฟช: {e}")
             return False
     
-    def _wait_for_refresh_completion(self, timeout_seconds: int) -> bool:
+    def _wait_for_refresh_completion(self, timeout_seconds: int,
+                                     pending: Optional[Dict[str, Any]] = None,
+                                     started: Optional[Dict[str, float]] = None) -> bool:
         """
-        รอให้การรีเฟชเสร็จสิ้น
+        รอให้การรีเฟชเสร็จสิ้น โดยตรวจเฉพาะการเชื่อมต่อที่ยังรีเฟชอยู่
+        และเพิ่มช่วงเวลาการตรวจแบบ backoff
         
         Args:
             timeout_seconds (int): timeout ในหน่วยวินาที
+            pending (Optional[Dict[str, Any]]): การเชื่อมต่อที่ต้องรอ (ชื่อ → COM object)
+            started (Optional[Dict[str, float]]): เวลาเริ่มรีเฟชของแต่ละการเชื่อมต่อ
             
         Returns:
             bool: True หากรีเฟชเสร็จสิ้น
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        while time.time() - start_time < timeout_seconds:
-            refreshing = False
-            
+        if pending is None:
+            pending = {
+                self.backend.connection_name(connection): connection
+                for connection in self.backend.list_connections(self.workbook)
+            }
+        pending = dict(pending)
+        started = started or {}
+        
+        poll_interval = self.poll_interval_min
+        
+        while True:
             try:
-                for connection in self.workbook.api.Connections:
-                    # ตรวจสอบสถานะการรีเฟช
-                    if hasattr(connection, 'OLEDBConnection') and connection.OLEDBConnection:
-                        if connection.OLEDBConnection.Refreshing:
-                            refreshing = True
-                            break
-                    elif hasattr(connection, 'WorkbookConnection') and connection.WorkbookConnection:
-                        # สำหรับการเชื่อมต่อประเภทอื่น ๆ
-                        pass
+                for name, connection in list(pending.items()):
+                    if not self.backend.is_refreshing(connection):
+                        now = time.perf_counter()
+                        self.connection_timings[name] = now - started.get(name, start_time)
+                        del pending[name]
+                        self.logger.info(f"การเชื่อมต่อ {name} เสร็จใน {self.connection_timings[name]:.2f} วินาที")
                 
-                if not refreshing:
+                if not pending:
                     self.logger.info("การรีเฟชเสร็จสิ้น")
                     return True
                     
             except Exception as e:
-                self.logger.error(f"เกิดข้อผิดพลาดในการตรวจสอบสถานะรีเฟช: {e}")
+                self._record_error(f"เกิดข้อผิดพลาดในการตรวจสอบสถานะรีเฟช: {e}")
+                break
+            
+            remaining = timeout_seconds - (time.perf_counter() - start_time)
+            if remaining <= 0:
                 break
             
-            time.sleep(1)
+            time.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, self.poll_interval_max)
         
-        self.logger.error(f"การรีเฟชใช้เวลานานเกิน {timeout_seconds} วินาที")
+        self._record_error(f"การรีเฟชใช้เวลานานเกิน {timeout_seconds} วินาที (ค้าง: {', '.join(pending)})")
         return False
     
     def _save_workbook(self, auto_save: bool = True) -> bool:
@@ -188,17 +410,19 @@ class ExcelRefresher:
             return True
             
         try:
-            self.workbook.save()
+            self.backend.save_workbook(self.workbook)
             self.logger.info("บันทึกไฟล์สำเร็จ")
             return True
         except Exception as e:
-            self.logger.error(f"ไม่สามารถบันทึกไฟล์: {e}")
+            self._record_error(f"ไม่สามารถบันทึกไฟล์: {e}")
             return False
     
     def refresh_file(self, file_info: Dict[str, Any], settings: Dict[str, Any]) -> bool:
         """
         รีเฟชไฟล์ Excel
         
+        เวลาของแต่ละขั้นตอนจะถูกเก็บไว้ใน last_file_record
+        
         Args:
             file_info (Dict[str, Any]): ข้อมูลไฟล์
             settings (Dict[str, Any]): การตั้งค่า
@@ -206,94 +430,182 @@ class ExcelRefresher:
         Returns:
             bool: True หากรีเฟชสำเร็จ
         """
-        if not self._check_dependencies():
-            return False
+        file_path = file_info["path"]
+        self.connection_timings = {}
+        self.current_record = {
+            "name": file_info.get("name", os.path.splitext(os.path.basename(file_path))[0]),
+            "path": file_path,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "success": False,
+            "engine": "excel",
+            "phases": {},
+            "connections": {},
+            "total_seconds": 0.0
+        }
+        start_time = time.perf_counter()
         
+        success = False
+        try:
+            success = self._refresh_file(file_info, settings)
+        finally:
+            record = self.current_record
+            record["success"] = success
+            record["connections"] = {
+                name: round(seconds, 4) for name, seconds in self.connection_timings.items()
+            }
+            record["total_seconds"] = round(time.perf_counter() - start_time, 4)
+            record["file_size"] = self.file_manager.get_file_size(file_path)
+            self.last_file_record = record
+            self.current_record = None
+        
+        return success
+    
+    def _refresh_file(self, file_info: Dict[str, Any], settings: Dict[str, Any]) -> bool:
+        """
+        ขั้นตอนการรีเฟชไฟล์ Excel (เรียกผ่าน refresh_file)
+        
+        Args:
+            file_info (Dict[str, Any]): ข้อมูลไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+            
+        Returns:
+            bool: True หากรีเฟชสำเร็จ
+        """
         file_path = file_info["path"]
         
+        # ข้ามทันทีเมื่อ circuit ของแหล่งข้อมูลเปิดอยู่ (ไม่เปิด Excel)
+        if file_info.get("skip_reason"):
+            self._record_error(f"ข้าม {file_info['name']}: {file_info['skip_reason']}")
+            return False
+        
         # ตรวจสอบไฟล์
         if not self.file_manager.file_exists(file_path):
-            self.logger.error(f"ไม่พบไฟล์ Excel: {file_path}")
+            self._record_error(f"ไม่พบไฟล์ Excel: {file_path}")
             return False
         
         if not self.file_manager.is_excel_file(file_path):
-            self.logger.error(f"ไฟล์ไม่ใช่ Excel: {file_path}")
+            self._record_error(f"ไฟล์ไม่ใช่ Excel: {file_path}")
             return False
         
         self.logger.info(f"เริ่มรีเฟช Excel: {file_info['name']} - {file_path}")
         
         # สำรองไฟล์
-        backup_path = self.file_manager.backup_file(
-            file_path, 
-            settings.get("backup_before_refresh", False)
-        )
+        with self._timed_phase("backup"):
+            backup_path = self.file_manager.backup_file(
+                file_path, 
+                settings.get("backup_before_refresh", False),
+                settings.get("backup_mode", "xlsx")
+            )
         if backup_path:
             self.logger.info(f"สำรองไฟล์: {backup_path}")
         
+        # รีเฟชโดยไม่ใช้ Excel หาก query ใช้เฉพาะฟังก์ชันที่รองรับ
+        if settings.get("headless_refresh", False):
+            with self._timed_phase("headless"):
+                refreshed = self._refresh_headless(file_path, settings)
+            if refreshed:
+                self.logger.info(f"รีเฟช Excel เสร็จสิ้น (headless): {file_info['name']}")
+                return True
+        
+        if not self._check_dependencies():
+            return False
+        
         success = False
         try:
-            # เปิด Excel
-            if not self._open_excel_app(visible=False):
-                return False
+            # เปิด Excel (หรือใช้ตัวเดิมใน session)
+            with self._timed_phase("app_launch"):
+                if not self._ensure_excel_app():
+                    return False
             
             # เปิดไฟล์
-            if not self._open_workbook(file_path):
-                return False
+            with self._timed_phase("workbook_open"):
+                if not self._open_workbook(file_path):
+                    return False
             
             # รีเฟชการเชื่อมต่อ
-            timeout_minutes = settings.get("refresh_timeout_minutes", 30)
-            timeout_seconds = timeout_minutes * 60
+            # เวลาสูงสุดเฉพาะไฟล์ (จากประวัติหรือ config) หากไม่มีใช้ refresh_timeout_minutes
+            timeout_seconds = file_info.get("timeout_seconds") or settings.get("refresh_timeout_minutes", 30) * 60
+            
+            skip = None
+            if settings.get("refresh_leaf_connections_only", False):
+                skip = self._upstream_connection_names(file_path)
             
-            if not self._refresh_connections(timeout_seconds):
+            if not self._refresh_connections(timeout_seconds, skip):
                 return False
             
             # บันทึกไฟล์
-            if not self._save_workbook(settings.get("auto_save", True)):
-                return False
+            with self._timed_phase("save"):
+                if not self._save_workbook(settings.get("auto_save", True)):
+                    return False
             
             success = True
             self.logger.info(f"รีเฟช Excel เสร็จสิ้น: {file_info['name']}")
             
         except Exception as e:
-            self.logger.error(f"เกิดข้อผิดพลาดในการรีเฟช Excel {file_path}: {e}")
+            self._record_error(f"เกิดข้อผิดพลาดในการรีเฟช Excel {file_path}: {e}")
             success = False
         
         finally:
-            # ปิด Excel
-            self._close_excel_app()
+            # ปิด workbook / Excel
+            with self._timed_phase("close"):
+                self._release_excel_app(success)
         
         return success
     
-    def refresh_multiple_files(self, files: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, int]:
+    def refresh_multiple_files(self, files: List[Dict[str, Any]], settings: Dict[str, Any],
+                               ready: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                               on_result: Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]] = None
+                               ) -> Dict[str, Any]:
         """
         รีเฟชไฟล์ Excel หลายไฟล์
         
         Args:
             files (List[Dict[str, Any]]): รายการไฟล์
             settings (Dict[str, Any]): การตั้งค่า
+            ready (Optional[Callable[[Dict[str, Any]], Any]]): เรียกก่อนรีเฟชแต่ละไฟล์ และรอจนไฟล์นั้นพร้อม
+                (เช่นรอการตรวจและสำรองที่ทำใน thread อื่น)
+            on_result (Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]]): เรียกเมื่อแต่ละไฟล์
+                รีเฟชเสร็จ (file_info, success, record) โดย record["error"] คือสาเหตุที่ล้มเหลว
             
         Returns:
-            Dict[str, int]: ผลลัพธ์การรีเฟช
+            Dict[str, Any]: ผลลัพธ์การรีเฟช (success, failed, total)
+                และ files: เวลาแต่ละขั้นตอนของแต่ละไฟล์
         """
         if not files:
             self.logger.info("ไม่มีไฟล์ Excel ที่จะรีเฟช")
-            return {"success": 0, "failed": 0, "total": 0}
+            return {"success": 0, "failed": 0, "total": 0, "files": []}
         
         self.logger.info(f"เริ่มรีเฟช Excel {len(files)} ไฟล์")
         
         success_count = 0
         failed_count = 0
+        records = []
         
-        for file_info in files:
-            if self.refresh_file(file_info, settings):
-                success_count += 1
-            else:
-                failed_count += 1
+        use_session = settings.get("reuse_excel_app", False) and not self.session_active
+        if use_session:
+            self.start_session(settings.get("excel_recycle_after", 0))
+        
+        try:
+            for file_info in files:
+                if ready is not None:
+                    ready(file_info)
+                success = self.refresh_file(file_info, settings)
+                if success:
+                    success_count += 1
+                else:
+                    failed_count += 1
+                records.append(self.last_file_record)
+                if on_result is not None:
+                    on_result(file_info, success, self.last_file_record)
+        finally:
+            if use_session:
+                self.end_session()
         
         result = {
             "success": success_count,
             "failed": failed_count,
-            "total": len(files)
+            "total": len(files),
+            "files": records
         }
         
         self.logger.info(f"รีเฟช Excel เสร็จสิ้น: {success_count}/{len(files)} ไฟล์")
@@ -0,0 +1,297 @@
+"""
+Parallel Refresher
+รีเฟชไฟล์ Excel หลายไฟล์พร้อมกันด้วย worker process หลายตัว
+"""
+
+import sys
+import os
+import queue
+import threading
+import multiprocessing as mp
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+# เพิ่ม path สำหรับ import เมื่อใช้จาก GUI
+if __name__ != "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from core.logger_manager import LoggerManager
+    from core.file_manager import FileManager
+    from refreshers.excel_refresher import ExcelRefresher
+    from refreshers.backends import SimulatedBackend
+except ImportError:
+    # fallback สำหรับการใช้งานปกติ
+    from ..core.logger_manager import LoggerManager
+    from ..core.file_manager import FileManager
+    from .excel_refresher import ExcelRefresher
+    from .backends import SimulatedBackend
+
+
+def _managers(settings: Optional[Dict[str, Any]]) -> Tuple[LoggerManager, FileManager]:
+    """LoggerManager / FileManager ของ worker ตามโฟลเดอร์ใน settings (log_dir, backup_dir)"""
+    settings = settings or {}
+    return (
+        LoggerManager(settings.get("log_dir", "data/logs")),
+        FileManager(settings.get("backup_dir", "data/backups")),
+    )
+
+
+def create_excel_refresher(settings: Optional[Dict[str, Any]] = None) -> ExcelRefresher:
+    """
+    สร้าง ExcelRefresher สำหรับใช้ใน worker process
+
+    Args:
+        settings (Optional[Dict[str, Any]]): การตั้งค่า (ใช้ log_dir / backup_dir)
+
+    Returns:
+        ExcelRefresher: refresher ที่มี Excel Application เป็นของตัวเอง
+    """
+    return ExcelRefresher(*_managers(settings))
+
+
+def create_simulated_refresher(profile: Optional[Dict[str, Any]] = None,
+                               settings: Optional[Dict[str, Any]] = None) -> ExcelRefresher:
+    """
+    สร้าง ExcelRefresher ที่ใช้ SimulatedBackend (ใช้กับ functools.partial เพื่อส่ง profile)
+
+    Args:
+        profile (Optional[Dict[str, Any]]): profile ของ simulator
+        settings (Optional[Dict[str, Any]]): การตั้งค่า (ใช้ log_dir / backup_dir)
+
+    Returns:
+        ExcelRefresher: refresher ที่ไม่ต้องใช้ Excel
+    """
+    return ExcelRefresher(*_managers(settings), backend=SimulatedBackend(profile))
+
+
+def _worker_main(task_queue, result_queue, refresher_factory: Callable[[Dict[str, Any]], Any],
+                 settings: Dict[str, Any]) -> None:
+    """
+    ลูปหลักของ worker process: ดึงไฟล์จากคิวมารีเฟชจนกว่าจะเจอ None
+
+    Args:
+        task_queue: คิวงาน (index, file_info)
+        result_queue: คิวผลลัพธ์ (index, success, record)
+        refresher_factory (Callable[[Dict[str, Any]], Any]): ฟังก์ชันสร้าง refresher จาก settings
+        settings (Dict[str, Any]): การตั้งค่า
+    """
+    refresher = refresher_factory(settings)
+    use_session = settings.get("reuse_excel_app", False) and hasattr(refresher, "start_session")
+    if use_session:
+        refresher.start_session(settings.get("excel_recycle_after", 0))
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            index, file_info = task
+            try:
+                success = bool(refresher.refresh_file(file_info, settings))
+            except Exception:
+                success = False
+            record = getattr(refresher, "last_file_record", None)
+            result_queue.put((index, success, record))
+    finally:
+        if use_session:
+            refresher.end_session()
+
+
+class ParallelRefresher:
+    """คลาสสำหรับรีเฟชไฟล์ Excel แบบขนานด้วย process pool"""
+
+    def __init__(self, logger: LoggerManager,
+                 refresher_factory: Callable[[Dict[str, Any]], Any] = create_excel_refresher,
+                 max_workers: int = 2):
+        """
+        เริ่มต้น ParallelRefresher
+
+        Args:
+            logger (LoggerManager): ตัวจัดการ logging
+            refresher_factory (Callable[[Dict[str, Any]], Any]): ฟังก์ชันระดับ module สำหรับสร้าง refresher จาก settings
+                ในแต่ละ worker (ต้อง pickle ได้)
+            max_workers (int): จำนวน worker process สูงสุด
+        """
+        self.logger = logger
+        self.refresher_factory = refresher_factory
+        self.max_workers = max(1, int(max_workers))
+
+    def refresh_multiple_files(self, files: List[Dict[str, Any]], settings: Dict[str, Any],
+                               ready: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                               on_result: Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]] = None
+                               ) -> Dict[str, Any]:
+        """
+        รีเฟชไฟล์ Excel หลายไฟล์แบบขนาน
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+            ready (Optional[Callable[[Dict[str, Any]], Any]]): เรียกก่อนส่งแต่ละไฟล์เข้าคิว และรอจนไฟล์นั้นพร้อม
+                (ไฟล์จะถูกส่งเข้าคิวตามลำดับจาก thread แยก worker จึงเริ่มได้ทันทีที่ไฟล์แรกพร้อม
+                และส่งล่วงหน้าไม่เกินจำนวน worker เพื่อให้ ready เห็นผลของไฟล์ก่อนหน้า เช่น circuit breaker)
+            on_result (Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]]): เรียกใน process หลัก
+                เมื่อได้ผลของแต่ละไฟล์ (file_info, success, record) รวมถึงไฟล์ที่นับเป็นล้มเหลวเพราะ worker หยุดทำงาน
+
+        Returns:
+            Dict[str, Any]: ผลลัพธ์การรีเฟช (success, failed, total)
+                และ files: เวลาแต่ละขั้นตอนของแต่ละไฟล์ ตามลำดับเดียวกับ files
+        """
+        if not files:
+            self.logger.info("ไม่มีไฟล์ Excel ที่จะรีเฟช")
+            return {"success": 0, "failed": 0, "total": 0, "files": []}
+
+        worker_count = min(self.max_workers, len(files))
+        self.logger.info(f"เริ่มรีเฟช Excel {len(files)} ไฟล์ ด้วย {worker_count} worker")
+
+        # ใช้ spawn เสมอ เพื่อให้แต่ละ process มี COM / Excel ของตัวเอง
+        ctx = mp.get_context("spawn")
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        slots = threading.Semaphore(worker_count)
+
+        # ไฟล์ที่ไม่ได้ส่งเข้าคิวเพราะ ready ผิดพลาด (index → ข้อความ error)
+        not_sent: Dict[int, str] = {}
+
+        def feed_tasks() -> None:
+            index = 0
+            try:
+                for index, file_info in enumerate(files):
+                    slots.acquire()
+                    if ready is not None:
+                        ready(file_info)
+                    task_queue.put((index, dict(file_info)))
+            except Exception as e:
+                self.logger.error(f"ส่งไฟล์ {files[index]['name']} เข้าคิวไม่ได้ ไฟล์ที่เหลือจะนับเป็นล้มเหลว: {e}")
+                for i in range(index, len(files)):
+                    not_sent[i] = f"ไม่ได้ส่งไฟล์ให้ worker: {e}"
+            finally:
+                # ส่ง None เสมอ เพื่อให้ worker จบได้แม้ ready ผิดพลาด
+                for _ in range(worker_count):
+                    task_queue.put(None)
+
+        workers = [
+            ctx.Process(
+                target=_worker_main,
+                args=(task_queue, result_queue, self.refresher_factory, dict(settings)),
+                daemon=True
+            )
+            for _ in range(worker_count)
+        ]
+        for worker in workers:
+            worker.start()
+        feeder = threading.Thread(target=feed_tasks, name="refresh-feeder", daemon=True)
+        feeder.start()
+
+        results, records = self._collect_results(files, result_queue, workers, on_result, slots, not_sent)
+
+        for worker in workers:
+            worker.join()
+
+        success_count = sum(1 for ok in results.values() if ok)
+        result = {
+            "success": success_count,
+            "failed": len(files) - success_count,
+            "total": len(files),
+            "files": [records[i] for i in range(len(files))]
+        }
+
+        self.logger.info(f"รีเฟช Excel เสร็จสิ้น: {success_count}/{len(files)} ไฟล์")
+
+        return result
+
+    def _collect_results(self, files: List[Dict[str, Any]], result_queue, workers: List[Any],
+                         on_result: Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]] = None,
+                         slots: Optional[threading.Semaphore] = None,
+                         not_sent: Optional[Dict[int, str]] = None
+                         ) -> Tuple[Dict[int, bool], Dict[int, Dict[str, Any]]]:
+        """
+        รอผลลัพธ์จาก worker ทั้งหมด หาก worker ตายก่อนส่งผลครบ ไฟล์ที่เหลือจะนับเป็นล้มเหลว
+        (ไฟล์ใน not_sent ไม่ถูกรอ และนับเป็นล้มเหลวด้วยข้อความ error ของไฟล์นั้น)
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            result_queue: คิวผลลัพธ์
+            workers (List[Any]): รายการ worker process
+            on_result (Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]]): เรียกเมื่อได้ผลของแต่ละไฟล์
+            slots (Optional[threading.Semaphore]): คืนช่องให้ thread ที่ส่งงานเมื่อได้ผลแต่ละไฟล์
+            not_sent (Optional[Dict[int, str]]): ไฟล์ที่ไม่ได้ส่งให้ worker (index → ข้อความ error)
+                ถูกเติมโดย thread ที่ส่งงานระหว่างรอผล
+
+        Returns:
+            Tuple[Dict[int, bool], Dict[int, Dict[str, Any]]]: ผลลัพธ์และเวลาแต่ละขั้นตอน ตาม index ของไฟล์
+        """
+        results: Dict[int, bool] = {}
+        records: Dict[int, Dict[str, Any]] = {}
+
+        not_sent = not_sent if not_sent is not None else {}
+
+        while len(results) + len(not_sent) < len(files):
+            try:
+                index, success, record = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+
+            results[index] = success
+            records[index] = record
+            status = "สำเร็จ" if success else "ล้มเหลว"
+            self.logger.info(f"[{len(results)}/{len(files)}] {files[index]['name']}: {status}")
+            if on_result is not None:
+                on_result(files[index], success, record)
+            if slots is not None:
+                slots.release()
+
+        # ดึงผลที่ค้างอยู่ในคิวหลัง worker จบ
+        while True:
+            try:
+                index, success, record = result_queue.get_nowait()
+            except queue.Empty:
+                break
+            results[index] = success
+            records[index] = record
+            if on_result is not None:
+                on_result(files[index], success, record)
+
+        for i in sorted(not_sent):
+            if i not in results:
+                results[i] = False
+                records[i] = dict(self._missing_record(files[i]), error=not_sent[i])
+                if on_result is not None:
+                    on_result(files[i], False, records[i])
+
+        missing = [i for i in range(len(files)) if i not in results]
+        if missing:
+            self.logger.error(f"worker หยุดทำงานก่อนรีเฟชเสร็จ: {', '.join(files[i]['name'] for i in missing)}")
+            for i in missing:
+                results[i] = False
+                records[i] = self._missing_record(files[i])
+                if on_result is not None:
+                    on_result(files[i], False, records[i])
+
+        for i, file_info in enumerate(files):
+            if records.get(i) is None:
+                records[i] = {
+                    "name": file_info.get("name"),
+                    "path": file_info.get("path"),
+                    "success": results[i],
+                    "phases": {},
+                    "connections": {},
+                    "total_seconds": 0.0
+                }
+
+        return results, records
+    
+    @staticmethod
+    def _missing_record(file_info: Dict[str, Any]) -> Dict[str, Any]:
+        """record ของไฟล์ที่ worker หยุดทำงานก่อนส่งผล"""
+        return {
+            "name": file_info.get("name"),
+            "path": file_info.get("path"),
+            "success": False,
+            "phases": {},
+            "connections": {},
+            "total_seconds": 0.0,
+            "error": "worker หยุดทำงานก่อนส่งผล"
+        }
@@ -0,0 +1,410 @@
+"""
+Supervised Refresher
+รีเฟชแต่ละไฟล์ใน worker process ที่มีผู้ดูแล: worker ส่ง heartbeat เป็นระยะ และแต่ละไฟล์มีเวลาสูงสุด
+หากไฟล์ใดค้าง (เช่น COM call ที่ไม่คืนค่า) หรือ worker หยุดส่ง heartbeat จะปิด worker พร้อม process ลูก
+และ Excel ของมันแบบบังคับ นับไฟล์นั้นเป็นล้มเหลว แล้วเปิด worker ใหม่ทำไฟล์ที่เหลือต่อ
+"""
+
+import sys
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+import multiprocessing as mp
+from datetime import datetime
+from multiprocessing.connection import wait
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# เพิ่ม path สำหรับ import เมื่อใช้จาก GUI
+if __name__ != "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from core.logger_manager import LoggerManager
+    from refreshers.parallel_refresher import create_excel_refresher
+except ImportError:
+    # fallback สำหรับการใช้งานปกติ
+    from ..core.logger_manager import LoggerManager
+    from .parallel_refresher import create_excel_refresher
+
+# ช่วงเวลาที่ process หลักตรวจ deadline / heartbeat (วินาที)
+POLL_SECONDS = 0.2
+
+
+def kill_process_tree(pid: int, extra_pids: Iterable[Optional[int]] = ()) -> None:
+    """
+    ปิด process พร้อม process ลูกทั้งหมดแบบบังคับ
+
+    Excel ที่เปิดผ่าน COM ไม่ใช่ process ลูกของ worker จึงต้องส่ง pid มาใน extra_pids
+
+    Args:
+        pid (int): pid ของ worker
+        extra_pids (Iterable[Optional[int]]): pid อื่นที่ต้องปิดด้วย (None จะถูกข้าม)
+    """
+    roots = [pid] + [extra for extra in extra_pids if extra]
+    if psutil is not None:
+        for root in roots:
+            try:
+                parent = psutil.Process(root)
+                processes = parent.children(recursive=True) + [parent]
+            except psutil.Error:
+                continue
+            for process in processes:
+                try:
+                    process.kill()
+                except psutil.Error:
+                    pass
+            psutil.wait_procs(processes, timeout=5)
+        return
+
+    for root in roots:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(root)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            continue
+        try:
+            # worker เรียก setsid ไว้ จึงปิดทั้ง process group ได้
+            os.killpg(root, signal.SIGKILL)
+        except OSError:
+            try:
+                os.kill(root, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _app_pid(refresher: Any) -> Optional[int]:
+    """pid ของ Excel ที่ refresher เปิดอยู่ (หากทราบ)"""
+    app = getattr(refresher, "app", None)
+    backend = getattr(refresher, "backend", None)
+    if app is None or backend is None:
+        return None
+    try:
+        return backend.app_pid(app)
+    except Exception:
+        return None
+
+
+def _worker_main(conn, refresher_factory: Callable[[Dict[str, Any]], Any], settings: Dict[str, Any],
+                 heartbeat_interval: float) -> None:
+    """
+    ลูปหลักของ worker process: รับงานทาง pipe รีเฟช แล้วส่งผลกลับ จนกว่าจะได้ None
+
+    ข้อความที่ส่งกลับ: ("heartbeat", excel_pid) และ ("result", index, success, record)
+
+    Args:
+        conn: ปลาย pipe ฝั่ง worker
+        refresher_factory (Callable[[Dict[str, Any]], Any]): ฟังก์ชันสร้าง refresher จาก settings
+        settings (Dict[str, Any]): การตั้งค่า
+        heartbeat_interval (float): ช่วงเวลาส่ง heartbeat (วินาที)
+    """
+    if hasattr(os, "setsid"):
+        try:
+            # แยก process group เพื่อให้ process หลักปิด worker พร้อม process ลูกได้ในคำสั่งเดียว
+            os.setsid()
+        except OSError:
+            pass
+
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    refresher = refresher_factory(settings)
+
+    def heartbeat() -> None:
+        while not stopped.wait(heartbeat_interval):
+            try:
+                send(("heartbeat", _app_pid(refresher)))
+            except (OSError, EOFError, ValueError):
+                # process หลักปิด pipe แล้ว
+                break
+
+    use_session = settings.get("reuse_excel_app", False) and hasattr(refresher, "start_session")
+    if use_session:
+        refresher.start_session(settings.get("excel_recycle_after", 0))
+    threading.Thread(target=heartbeat, name="heartbeat", daemon=True).start()
+
+    try:
+        send(("heartbeat", None))
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+
+            index, file_info = task
+            try:
+                success = bool(refresher.refresh_file(file_info, settings))
+            except Exception:
+                success = False
+            record = getattr(refresher, "last_file_record", None)
+            send(("result", index, success, record))
+    finally:
+        stopped.set()
+        if use_session:
+            refresher.end_session()
+
+
+class _WorkerHandle:
+    """สถานะของ worker หนึ่งตัวใน process หลัก"""
+
+    def __init__(self, process: Any, conn: Any):
+        self.process = process
+        self.conn = conn
+        self.last_heartbeat = time.monotonic()
+        self.excel_pid: Optional[int] = None
+        # งานที่กำลังทำ: index ของไฟล์, เวลาเริ่ม และ deadline (time.monotonic)
+        self.index: Optional[int] = None
+        self.started_at = ""
+        self.started = 0.0
+        self.deadline = 0.0
+
+
+class SupervisedRefresher:
+    """คลาสสำหรับรีเฟชไฟล์ Excel ใน worker process ที่ถูกปิดแบบบังคับได้เมื่อค้าง"""
+
+    def __init__(self, logger: LoggerManager,
+                 refresher_factory: Callable[[Dict[str, Any]], Any] = create_excel_refresher,
+                 max_workers: int = 1):
+        """
+        เริ่มต้น SupervisedRefresher
+
+        Args:
+            logger (LoggerManager): ตัวจัดการ logging
+            refresher_factory (Callable[[Dict[str, Any]], Any]): ฟังก์ชันระดับ module สำหรับสร้าง refresher จาก settings
+                ในแต่ละ worker (ต้อง pickle ได้)
+            max_workers (int): จำนวน worker process สูงสุด
+        """
+        self.logger = logger
+        self.refresher_factory = refresher_factory
+        self.max_workers = max(1, int(max_workers))
+
+    @staticmethod
+    def _file_timeout(file_info: Dict[str, Any], settings: Dict[str, Any]) -> float:
+        """
+        เวลาสูงสุดของหนึ่งไฟล์ (วินาที): timeout_seconds ของไฟล์ (หรือ refresh_timeout_minutes)
+        บวกเวลาเผื่อเปิด/บันทึกไฟล์
+
+        Args:
+            file_info (Dict[str, Any]): ข้อมูลไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+
+        Returns:
+            float: จำนวนวินาทีก่อนปิด worker แบบบังคับ
+        """
+        refresh_seconds = file_info.get("timeout_seconds") or settings.get("refresh_timeout_minutes", 30) * 60
+        return float(refresh_seconds + settings.get("supervisor_grace_seconds", 120))
+
+    def refresh_multiple_files(self, files: List[Dict[str, Any]], settings: Dict[str, Any],
+                               ready: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                               on_result: Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]] = None
+                               ) -> Dict[str, Any]:
+        """
+        รีเฟชไฟล์ Excel หลายไฟล์ภายใต้การดูแล (ไฟล์ที่ค้างไม่ทำให้ทั้งรอบหยุด)
+
+        Args:
+            files (List[Dict[str, Any]]): รายการไฟล์
+            settings (Dict[str, Any]): การตั้งค่า
+            ready (Optional[Callable[[Dict[str, Any]], Any]]): เรียกก่อนส่งแต่ละไฟล์ให้ worker และรอจนไฟล์นั้นพร้อม
+            on_result (Optional[Callable[[Dict[str, Any], bool, Optional[Dict[str, Any]]], Any]]): เรียกใน process หลัก
+                เมื่อได้ผลของแต่ละไฟล์ (file_info, success, record) รวมถึงไฟล์ที่ถูกยกเลิกเพราะค้าง
+
+        Returns:
+            Dict[str, Any]: ผลลัพธ์การรีเฟช (success, failed, total)
+                และ files: เวลาแต่ละขั้นตอนของแต่ละไฟล์ ตามลำดับเดียวกับ files
+                (ไฟล์ที่ถูกยกเลิกจะมี "error" บอกสาเหตุ)
+        """
+        if not files:
+            self.logger.info("ไม่มีไฟล์ Excel ที่จะรีเฟช")
+            return {"success": 0, "failed": 0, "total": 0, "files": []}
+
+        worker_count = min(self.max_workers, len(files))
+        heartbeat_timeout = float(settings.get("heartbeat_timeout_seconds", 60))
+        heartbeat_interval = max(0.1, min(5.0, heartbeat_timeout / 3))
+        self.logger.info(f"เริ่มรีเฟช Excel {len(files)} ไฟล์ ด้วย {worker_count} worker (มีผู้ดูแล)")
+
+        # ใช้ spawn เสมอ เพื่อให้แต่ละ process มี COM / Excel ของตัวเอง
+        ctx = mp.get_context("spawn")
+        worker_settings = dict(settings)
+
+        def spawn() -> _WorkerHandle:
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker_main,
+                args=(child_conn, self.refresher_factory, worker_settings, heartbeat_interval),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            return _WorkerHandle(process, parent_conn)
+
+        # ส่งไฟล์ที่พร้อมแล้วเข้าคิวตามลำดับจาก thread แยก (None = หมดแล้ว)
+        # ล่วงหน้าไม่เกินจำนวน worker เพื่อให้ ready เห็นผลของไฟล์ก่อนหน้า (เช่น circuit breaker)
+        pending: "queue.Queue[Optional[int]]" = queue.Queue()
+        slots = threading.Semaphore(worker_count)
+
+        def feed_tasks() -> None:
+            try:
+                for index, file_info in enumerate(files):
+                    slots.acquire()
+                    if ready is not None:
+                        ready(file_info)
+                    pending.put(index)
+            finally:
+                pending.put(None)
+
+        results: Dict[int, bool] = {}
+        records: Dict[int, Dict[str, Any]] = {}
+
+        def finish(index: int, success: bool, record: Optional[Dict[str, Any]]) -> None:
+            results[index] = success
+            records[index] = record
+            status = "สำเร็จ" if success else "ล้มเหลว"
+            self.logger.info(f"[{len(results)}/{len(files)}] {files[index]['name']}: {status}")
+            if on_result is not None:
+                on_result(files[index], success, record)
+            slots.release()
+
+        workers = [spawn() for _ in range(worker_count)]
+        feeder = threading.Thread(target=feed_tasks, name="refresh-feeder", daemon=True)
+        feeder.start()
+        fed_all = False
+
+        try:
+            while len(results) < len(files):
+                if fed_all and all(worker.index is None for worker in workers):
+                    break
+                # แจกไฟล์ให้ worker ที่ว่าง
+                for worker in workers:
+                    if worker.index is not None or fed_all:
+                        continue
+                    try:
+                        index = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    if index is None:
+                        fed_all = True
+                        break
+                    worker.index = index
+                    worker.started_at = datetime.now().isoformat(timespec="seconds")
+                    worker.started = time.monotonic()
+                    worker.deadline = worker.started + self._file_timeout(files[index], settings)
+                    worker.conn.send((index, dict(files[index])))
+
+                wait([worker.conn for worker in workers] + [worker.process.sentinel for worker in workers],
+                     timeout=POLL_SECONDS)
+
+                now = time.monotonic()
+                for worker in list(workers):
+                    reason = self._read_messages(worker, finish)
+                    if reason is None and not worker.process.is_alive():
+                        reason = f"worker หยุดทำงาน (exit code {worker.process.exitcode})"
+                    if reason is None and worker.index is not None and now > worker.deadline:
+                        reason = f"เกินเวลาสูงสุด {worker.deadline - worker.started:.0f} วินาที"
+                    if reason is None and now - worker.last_heartbeat > heartbeat_timeout:
+                        reason = f"ไม่ได้รับ heartbeat นาน {now - worker.last_heartbeat:.0f} วินาที"
+                    if reason is None:
+                        continue
+
+                    workers.remove(worker)
+                    self._kill_worker(worker, reason, files)
+                    if worker.index is not None:
+                        finish(worker.index, False, self._failed_record(files[worker.index], worker, reason))
+                    busy = sum(1 for other in workers if other.index is not None)
+                    if len(results) + busy < len(files):
+                        workers.append(spawn())
+        finally:
+            for worker in workers:
+                try:
+                    worker.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+            for worker in workers:
+                worker.process.join(timeout=30)
+                if worker.process.is_alive():
+                    self._kill_worker(worker, "ไม่ปิดตัวเองเมื่อจบรอบ", files)
+                worker.conn.close()
+
+        missing = [i for i in range(len(files)) if i not in results]
+        if missing:
+            self.logger.error(f"ไม่ได้ส่งไฟล์ให้ worker: {', '.join(files[i]['name'] for i in missing)}")
+            for i in missing:
+                finish(i, False, None)
+        for i, file_info in enumerate(files):
+            if records.get(i) is None:
+                records[i] = {
+                    "name": file_info.get("name"),
+                    "path": file_info.get("path"),
+                    "success": results[i],
+                    "phases": {},
+                    "connections": {},
+                    "total_seconds": 0.0
+                }
+
+        success_count = sum(1 for ok in results.values() if ok)
+        result = {
+            "success": success_count,
+            "failed": len(files) - success_count,
+            "total": len(files),
+            "files": [records[i] for i in range(len(files))]
+        }
+
+        self.logger.info(f"รีเฟช Excel เสร็จสิ้น: {success_count}/{len(files)} ไฟล์")
+
+        return result
+
+    @staticmethod
+    def _read_messages(worker: _WorkerHandle,
+                       finish: Callable[[int, bool, Optional[Dict[str, Any]]], None]) -> Optional[str]:
+        """
+        อ่านข้อความทั้งหมดที่ worker ส่งมา
+
+        Returns:
+            Optional[str]: สาเหตุหาก pipe ขาด (worker ตาย) หรือ None
+        """
+        try:
+            while worker.conn.poll():
+                message = worker.conn.recv()
+                worker.last_heartbeat = time.monotonic()
+                if message[0] == "heartbeat":
+                    worker.excel_pid = message[1]
+                elif message[0] == "result":
+                    _, index, success, record = message
+                    worker.index = None
+                    finish(index, success, record)
+        except (EOFError, OSError):
+            return f"worker หยุดทำงาน (exit code {worker.process.exitcode})"
+        return None
+
+    def _kill_worker(self, worker: _WorkerHandle, reason: str, files: List[Dict[str, Any]]) -> None:
+        """ปิด worker พร้อม process ลูกและ Excel ของมันแบบบังคับ แล้วเก็บ process ที่จบแล้ว"""
+        name = files[worker.index]["name"] if worker.index is not None else "-"
+        self.logger.error(f"ปิด worker {worker.process.pid} แบบบังคับ ({name}): {reason}")
+        kill_process_tree(worker.process.pid, [worker.excel_pid])
+        worker.process.join(timeout=10)
+        worker.conn.close()
+
+    @staticmethod
+    def _failed_record(file_info: Dict[str, Any], worker: _WorkerHandle, reason: str) -> Dict[str, Any]:
+        """record ของไฟล์ที่ถูกยกเลิก (worker ไม่ได้ส่งเวลาแต่ละขั้นตอนกลับมา)"""
+        return {
+            "name": file_info.get("name"),
+            "path": file_info.get("path"),
+            "started_at": worker.started_at,
+            "success": False,
+            "phases": {},
+            "connections": {},
+            "total_seconds": round(time.monotonic() - worker.started, 4),
+            "error": reason
+        }